@@ -0,0 +1,158 @@
+from typing import List, Dict, Callable, Iterable, Tuple, Optional
+from datetime import datetime
+import threading
+
+from modelo import db, lectura, Producto, AlertaStock, AlertaFila
+
+class MotorAlertasStock:
+    """
+    Mantiene en la tabla AlertaStock el conjunto de productos con stock en o
+    por debajo del mínimo. Los caminos del controlador que modifican stock le
+    informan los productos afectados y el motor avisa a los suscriptores,
+    sin volver a recorrer la tabla de productos.
+
+    Si un producto entra o sale del conjunto se decide en la base, dentro de
+    la transacción que cambió el stock: así otras terminales, el servicio y
+    la sincronización móvil comparten el mismo conjunto y cada alta o baja
+    se avisa una sola vez.
+
+    Los cambios evaluados dentro de una transacción quedan pendientes (por
+    hilo) hasta que el controlador confirma; si la transacción se revierte,
+    se descartan.
+    """
+
+    def __init__(self):
+        self._suscriptores: List[Callable[[Dict[str, List]], None]] = []
+        self._local = threading.local()
+        self._verificado = False
+
+    def _pendientes(self) -> List[Tuple[int, Optional[AlertaFila], bool]]:
+        if not hasattr(self._local, 'pendientes'):
+            self._local.pendientes = []
+        return self._local.pendientes
+
+    def _asegurar_cargado(self):
+        """
+        La primera vez en el proceso, reconstruye el conjunto si está vacío
+        (bases anteriores a AlertaStock). evaluar no lo necesita: decide cada
+        producto en la base.
+        """
+        if not self._verificado:
+            self._verificado = True
+            if not lectura(AlertaStock.select()).exists():
+                self.reconstruir()
+
+    def reconstruir(self):
+        """Recalcula el conjunto con un recorrido completo (reparación)."""
+        query = (Producto
+                 .select(Producto.id, Producto.nombre,
+                         Producto.stock_actual, Producto.stock_minimo)
+                 .where((Producto.activo == True) &
+                        (Producto.stock_actual <= Producto.stock_minimo)))
+        with db.atomic():
+            previos = {producto_id for producto_id, in AlertaStock.select(AlertaStock.producto).tuples()}
+            filas = {fila[0]: AlertaFila._make(fila) for fila in query.tuples()}
+            AlertaStock.delete().execute()
+            ahora = datetime.now()
+            for inicio in range(0, len(filas), 500):
+                AlertaStock.insert_many(
+                    [{'producto': producto_id, 'fecha': ahora}
+                     for producto_id in list(filas)[inicio:inicio + 500]]
+                ).execute()
+        self._verificado = True
+        evento = {
+            'altas': [alerta for producto_id, alerta in filas.items() if producto_id not in previos],
+            'bajas': [producto_id for producto_id in previos if producto_id not in filas],
+            'cambios': []
+        }
+        if any(evento.values()):
+            self._notificar(evento)
+
+    def evaluar(self, filas: Iterable[Tuple[int, str, int, int, bool]]):
+        """
+        Evalúa productos cuyo stock o mínimo cambió. Persiste los cambios en
+        AlertaStock dentro de la transacción en curso y los deja pendientes
+        hasta confirmar(). El alta es un INSERT ... ON CONFLICT DO NOTHING y
+        la baja un DELETE: la cantidad de filas afectadas dice si el producto
+        entró o salió del conjunto, aunque lo haya cambiado otro proceso.
+
+        Args:
+            filas (Iterable[Tuple]): Tuplas (id, nombre, stock_actual, stock_minimo, activo)
+        """
+        pendientes = self._pendientes()
+        ahora = datetime.now()
+        for producto_id, nombre, stock_actual, stock_minimo, activo in filas:
+            if activo and stock_actual <= stock_minimo:
+                alta = db.execute(AlertaStock
+                                  .insert(producto=producto_id, fecha=ahora)
+                                  .on_conflict_ignore()).rowcount
+                pendientes.append((producto_id,
+                                   AlertaFila(producto_id, nombre, stock_actual, stock_minimo),
+                                   alta > 0))
+            elif AlertaStock.delete().where(AlertaStock.producto == producto_id).execute():
+                pendientes.append((producto_id, None, True))
+
+    def marca(self) -> int:
+        """Posición actual de los pendientes, para descartar solo un tramo."""
+        return len(self._pendientes())
+
+    def descartar(self, desde: int = 0):
+        """Descarta los cambios pendientes (la transacción se revirtió)."""
+        del self._pendientes()[desde:]
+
+    def confirmar(self):
+        """Avisa a los suscriptores los cambios confirmados."""
+        pendientes = self._pendientes()
+        if not pendientes:
+            return
+        # Un producto evaluado varias veces en la transacción: vale el último
+        # estado, y es alta o baja si alguna evaluación lo fue
+        ultimos: Dict[int, Tuple[Optional[AlertaFila], bool]] = {}
+        for producto_id, alerta, cambio in pendientes:
+            previo = ultimos.pop(producto_id, (None, False))
+            ultimos[producto_id] = (alerta, cambio or previo[1])
+        pendientes.clear()
+
+        evento = {'altas': [], 'bajas': [], 'cambios': []}
+        for producto_id, (alerta, cambio) in ultimos.items():
+            if alerta is None:
+                evento['bajas'].append(producto_id)
+            elif cambio:
+                evento['altas'].append(alerta)
+            else:
+                evento['cambios'].append(alerta)
+        self._notificar(evento)
+
+    def _notificar(self, evento: Dict[str, List]):
+        for callback in list(self._suscriptores):
+            callback(evento)
+
+    def suscribir(self, callback: Callable[[Dict[str, List]], None]):
+        """
+        Registra una función que recibe cada cambio del conjunto.
+
+        Args:
+            callback (Callable): Recibe {'altas': [AlertaFila], 'bajas': [id], 'cambios': [AlertaFila]}
+        """
+        self._suscriptores.append(callback)
+
+    def desuscribir(self, callback: Callable[[Dict[str, List]], None]):
+        """Quita una suscripción."""
+        if callback in self._suscriptores:
+            self._suscriptores.remove(callback)
+
+    def productos_bajo_stock(self) -> List[AlertaFila]:
+        """
+        Devuelve el conjunto actual ordenado por stock. Lee AlertaStock, que
+        es chica, sin recorrer la tabla de productos.
+        """
+        self._asegurar_cargado()
+        query = (AlertaStock
+                 .select(Producto.id, Producto.nombre,
+                         Producto.stock_actual, Producto.stock_minimo)
+                 .join(Producto)
+                 .order_by(Producto.stock_actual))
+        return [AlertaFila._make(fila) for fila in lectura(query).tuples()]
+
+# Motor compartido por todos los controladores del proceso
+motor_alertas = MotorAlertasStock()
@@ -0,0 +1,278 @@
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+import os
+
+from peewee import fn, EXCLUDED
+
+from modelo import (
+    db, db_lectura, lectura, RUTA_DB, Venta, DetalleVenta, Pago, RegistroBorrado,
+    SecuenciaCambios, PeriodoArchivado, ResumenVentasArchivadas, ResumenProductosArchivados
+)
+from utilidades import log_operacion
+
+# Tablas que se mueven a los archivos anuales, en orden de copia
+TABLAS_ARCHIVADAS = ('venta', 'detalleventa', 'pago')
+
+# Índices que necesitan las consultas sobre un archivo
+INDICES_ARCHIVO = {
+    'venta': ('fecha', 'cliente_id'),
+    'detalleventa': ('venta_id', 'producto_id'),
+    'pago': ('venta_id', 'fecha')
+}
+
+# Meses que quedan siempre en la base principal
+MESES_ABIERTOS = 12
+
+def ruta_archivo(anio: int) -> str:
+    """Archivo anual, en el mismo directorio que la base principal."""
+    return os.path.join(os.path.dirname(os.path.abspath(RUTA_DB)), f'archivo_{anio}.db')
+
+def _alias(anio: int) -> str:
+    return f'archivo_{anio}'
+
+def inicio_mes(fecha: datetime) -> datetime:
+    return datetime(fecha.year, fecha.month, 1)
+
+def restar_meses(fecha: datetime, meses: int) -> datetime:
+    """Primer instante del mes que está `meses` meses antes del de la fecha."""
+    total = fecha.year * 12 + fecha.month - 1 - meses
+    return datetime(total // 12, total % 12 + 1, 1)
+
+@contextmanager
+def adjuntar(database, anio: int, solo_lectura: bool = True):
+    """
+    Adjunta el archivo de un año a la conexión actual de la base dada con el
+    esquema archivo_<año> y lo separa al salir.
+    """
+    alias = _alias(anio)
+    ruta = ruta_archivo(anio)
+    if solo_lectura:
+        ruta = f'file:{ruta}?mode=ro'
+    database.execute_sql(f'ATTACH DATABASE ? AS "{alias}"', (ruta,))
+    try:
+        yield alias
+    finally:
+        database.execute_sql(f'DETACH DATABASE "{alias}"')
+
+def en_archivo(query, anio: int) -> Tuple[str, tuple]:
+    """
+    SQL de la consulta apuntando las tablas archivadas al archivo del año;
+    el resto (clientes, productos) se sigue leyendo de la base principal.
+    """
+    sql, params = query.sql()
+    alias = _alias(anio)
+    for tabla in TABLAS_ARCHIVADAS:
+        sql = sql.replace(f'"{tabla}" AS', f'"{alias}"."{tabla}" AS')
+    return sql, tuple(params)
+
+def anios_archivados(desde: Optional[datetime], hasta: Optional[datetime]) -> List[int]:
+    """Años archivados que tienen ventas o pagos dentro del rango."""
+    query = PeriodoArchivado.select(PeriodoArchivado.anio).order_by(PeriodoArchivado.anio)
+    if desde:
+        query = query.where(PeriodoArchivado.hasta > desde)
+    if hasta:
+        query = query.where(PeriodoArchivado.desde <= hasta)
+    return [anio for anio, in lectura(query).tuples()]
+
+def meses_completos(desde: Optional[datetime], hasta: Optional[datetime]) -> bool:
+    """Indica si el rango está formado por meses completos (o abierto)."""
+    if desde is not None and desde != inicio_mes(desde):
+        return False
+    if hasta is not None:
+        # Las particiones mensuales terminan un microsegundo antes del mes siguiente
+        siguiente = hasta + timedelta(microseconds=1)
+        return siguiente == inicio_mes(siguiente)
+    return True
+
+def filas_con_archivo(query, desde: Optional[datetime], hasta: Optional[datetime],
+                      resumen=None) -> List[tuple]:
+    """
+    Ejecuta una consulta de reporte en la base principal y agrega las filas de
+    los períodos archivados del rango. Si el rango es de meses completos y se
+    indica una consulta de resumen equivalente, se leen los resúmenes; si no,
+    se adjunta el archivo de cada año necesario. Sin períodos archivados en el
+    rango no se adjunta nada.
+
+    Args:
+        query: Consulta sobre Venta/DetalleVenta/Pago
+        desde (Optional[datetime]): Fecha inicial del reporte
+        hasta (Optional[datetime]): Fecha final del reporte
+        resumen: Consulta sobre los resúmenes con las mismas columnas
+
+    Returns:
+        List[tuple]: Filas de todas las fuentes, sin combinar
+    """
+    filas = db_lectura.execute(query).fetchall()
+    anios = anios_archivados(desde, hasta)
+    if not anios:
+        return filas
+
+    if resumen is not None and meses_completos(desde, hasta):
+        return filas + db_lectura.execute(resumen).fetchall()
+
+    for anio in anios:
+        with adjuntar(db_lectura, anio):
+            filas += db_lectura.execute_sql(*en_archivo(query, anio)).fetchall()
+    return filas
+
+def _preparar_archivo(alias: str):
+    """Crea en el archivo adjunto las tablas (o columnas nuevas) e índices."""
+    for tabla in TABLAS_ARCHIVADAS:
+        sql, = db.execute_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)).fetchone()
+        db.execute_sql(sql.replace(f'CREATE TABLE "{tabla}"',
+                                   f'CREATE TABLE IF NOT EXISTS "{alias}"."{tabla}"', 1))
+
+        existentes = {fila[1] for fila in db.execute_sql(f'PRAGMA "{alias}".table_info("{tabla}")')}
+        for _, columna, tipo, _, _, _ in db.execute_sql(f'PRAGMA main.table_info("{tabla}")').fetchall():
+            if columna not in existentes:
+                db.execute_sql(f'ALTER TABLE "{alias}"."{tabla}" ADD COLUMN "{columna}" {tipo}')
+
+        for columna in INDICES_ARCHIVO[tabla]:
+            db.execute_sql(f'CREATE INDEX IF NOT EXISTS "{alias}"."{tabla}_{columna}" '
+                           f'ON "{tabla}" ("{columna}")')
+
+def _copiar(alias: str, tabla: str, condicion: str, params: tuple):
+    columnas = ', '.join(f'"{fila[1]}"' for fila in
+                         db.execute_sql(f'PRAGMA main.table_info("{tabla}")').fetchall())
+    db.execute_sql(f'INSERT OR REPLACE INTO "{alias}"."{tabla}" ({columnas}) '
+                   f'SELECT {columnas} FROM main."{tabla}" WHERE {condicion}', params)
+
+def _acumular_resumenes(ventas):
+    """Suma las ventas a archivar a los resúmenes mensuales (acumulando si ya existen)."""
+    mes = fn.strftime('%Y-%m-01 00:00:00', Venta.fecha)
+
+    por_cliente = (Venta
+                   .select(mes, Venta.cliente, fn.COUNT(Venta.id),
+                           fn.SUM(Venta.total), fn.SUM(Venta.monto_pagado))
+                   .where(Venta.id.in_(ventas))
+                   .group_by(mes, Venta.cliente))
+    (ResumenVentasArchivadas
+     .insert_from(por_cliente, [ResumenVentasArchivadas.mes, ResumenVentasArchivadas.cliente,
+                                ResumenVentasArchivadas.cantidad_ventas,
+                                ResumenVentasArchivadas.total_ventas,
+                                ResumenVentasArchivadas.total_pagado])
+     .on_conflict(
+         conflict_target=[ResumenVentasArchivadas.mes, ResumenVentasArchivadas.cliente],
+         update={
+             ResumenVentasArchivadas.cantidad_ventas:
+                 ResumenVentasArchivadas.cantidad_ventas + EXCLUDED.cantidad_ventas,
+             ResumenVentasArchivadas.total_ventas:
+                 ResumenVentasArchivadas.total_ventas + EXCLUDED.total_ventas,
+             ResumenVentasArchivadas.total_pagado:
+                 ResumenVentasArchivadas.total_pagado + EXCLUDED.total_pagado
+         })
+     .execute())
+
+    por_producto = (DetalleVenta
+                    .select(mes, DetalleVenta.producto,
+                            fn.SUM(DetalleVenta.cantidad), fn.SUM(DetalleVenta.subtotal))
+                    .join(Venta)
+                    .where(Venta.id.in_(ventas))
+                    .group_by(mes, DetalleVenta.producto))
+    (ResumenProductosArchivados
+     .insert_from(por_producto, [ResumenProductosArchivados.mes,
+                                 ResumenProductosArchivados.producto,
+                                 ResumenProductosArchivados.cantidad,
+                                 ResumenProductosArchivados.total])
+     .on_conflict(
+         conflict_target=[ResumenProductosArchivados.mes, ResumenProductosArchivados.producto],
+         update={
+             ResumenProductosArchivados.cantidad:
+                 ResumenProductosArchivados.cantidad + EXCLUDED.cantidad,
+             ResumenProductosArchivados.total:
+                 ResumenProductosArchivados.total + EXCLUDED.total
+         })
+     .execute())
+
+@log_operacion("archivo")
+def archivar_ventas(meses_abiertos: int = MESES_ABIERTOS) -> Dict[int, int]:
+    """
+    Mueve las ventas pagadas anteriores a los últimos meses abiertos (con sus
+    detalles y pagos) al archivo de su año y deja en la base principal los
+    resúmenes mensuales. Una venta con algún pago dentro de los meses
+    abiertos espera: el tablero recalcula lo cobrado en esos días desde la
+    base principal.
+
+    La copia al archivo, el borrado de la base principal y los resúmenes de
+    cada año van en una sola transacción. Archivar no es borrar: las marcas
+    de borrado que dejan los disparadores para estas ventas se descartan en
+    la misma transacción, así las réplicas no las eliminan. La copia
+    reemplaza por id, así que si el proceso se corta en el medio se puede
+    volver a ejecutar sin duplicar nada.
+
+    Args:
+        meses_abiertos (int): Meses (además del actual) que no se archivan
+
+    Returns:
+        Dict[int, int]: Ventas archivadas por año
+    """
+    corte = restar_meses(datetime.now(), meses_abiertos)
+    pagos_abiertos = Pago.select(Pago.venta).where(Pago.fecha >= corte)
+    cerradas = (Venta.pagada == True) & (Venta.fecha < corte) & Venta.id.not_in(pagos_abiertos)
+    anios = [int(anio) for anio, in (Venta
+                                    .select(fn.DISTINCT(fn.strftime('%Y', Venta.fecha)))
+                                    .where(cerradas)
+                                    .tuples())]
+
+    archivadas = {}
+    for anio in anios:
+        inicio, fin = datetime(anio, 1, 1), min(datetime(anio + 1, 1, 1), corte)
+        ventas = Venta.select(Venta.id).where(cerradas & (Venta.fecha >= inicio) & (Venta.fecha < fin))
+        sql_ventas, params = ventas.sql()
+        # Las tablas del archivo se cargan desde main con la misma condición
+        condiciones = {
+            'venta': (f'"id" IN ({sql_ventas})', tuple(params)),
+            'detalleventa': (f'"venta_id" IN ({sql_ventas})', tuple(params)),
+            'pago': (f'"venta_id" IN ({sql_ventas})', tuple(params))
+        }
+
+        # ATTACH no se admite dentro de una transacción
+        with adjuntar(db, anio, solo_lectura=False) as alias:
+            _preparar_archivo(alias)
+            with db.atomic('IMMEDIATE'):
+                primera, cantidad = (Venta
+                                     .select(fn.MIN(Venta.fecha), fn.COUNT(Venta.id))
+                                     .where(Venta.id.in_(ventas))
+                                     .tuples()[0])
+                if not cantidad:
+                    continue
+                # Los pagos pueden ser de un año posterior al de la venta: el
+                # período cubre hasta el último para que los reportes de
+                # pagos adjunten este archivo
+                ultimo_pago, = (Pago
+                                .select(fn.MAX(Pago.fecha))
+                                .where(Pago.venta.in_(ventas))
+                                .tuples()[0])
+                if ultimo_pago is not None:
+                    fin = max(fin, Pago.fecha.python_value(ultimo_pago) + timedelta(microseconds=1))
+                for tabla in TABLAS_ARCHIVADAS:
+                    _copiar(alias, tabla, *condiciones[tabla])
+
+                marca = SecuenciaCambios.get_by_id(1).valor
+                _acumular_resumenes(ventas)
+                Pago.delete().where(Pago.venta.in_(ventas)).execute()
+                DetalleVenta.delete().where(DetalleVenta.venta.in_(ventas)).execute()
+                Venta.delete().where(Venta.id.in_(ventas)).execute()
+                # Solo esta transacción escribe: lo numerado después de la
+                # marca en las tablas archivadas son los borrados de arriba
+                (RegistroBorrado
+                 .delete()
+                 .where((RegistroBorrado.secuencia > marca) &
+                        RegistroBorrado.tabla.in_(TABLAS_ARCHIVADAS))
+                 .execute())
+
+                periodo = PeriodoArchivado.get_or_none(PeriodoArchivado.anio == anio)
+                primera = Venta.fecha.python_value(primera)
+                if periodo is None:
+                    PeriodoArchivado.create(anio=anio, archivo=ruta_archivo(anio), desde=primera,
+                                            hasta=fin, ventas=cantidad)
+                else:
+                    periodo.desde = min(periodo.desde, primera)
+                    periodo.hasta = max(periodo.hasta, fin)
+                    periodo.ventas += cantidad
+                    periodo.fecha_archivado = datetime.now()
+                    periodo.save()
+                archivadas[anio] = cantidad
+    return archivadas
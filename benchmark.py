@@ -0,0 +1,1137 @@
+"""
+Benchmarks del sistema de gestión de bebidas.
+
+Cada benchmark trabaja sobre una base temporal en un directorio propio, nunca
+sobre distribucion_bebidas.db.
+
+Uso:
+    python benchmark.py memoria [--filas 100000]
+    python benchmark.py estres [--procesos 8] [--ventas 200] [--stock 1000]
+    python benchmark.py ventas [--ventas 2000] [--historial 200000]
+    python benchmark.py sincronizacion [--terminales 4] [--ventas 300] [--stock 500]
+    python benchmark.py cambios [--filas 200000] [--cambios 500]
+    python benchmark.py api [--clientes 6] [--segundos 10]
+    python benchmark.py tablero [--historial 200000] [--ventas 500]
+    python benchmark.py respaldo [--historial 500000] [--segundos 5]
+    python benchmark.py mantenimiento [--historial 300000] [--pausa 0.02]
+    python benchmark.py migracion [--historial 1000000]
+    python benchmark.py centavos [--historial 1000000]
+    python benchmark.py validacion [--filas 100000] [--registrados 50000]
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Tuple
+
+# La ruta de la base es relativa al directorio de trabajo: se cambia a un
+# directorio temporal antes de importar modelo.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def preparar_base_temporal() -> str:
+    """Crea un directorio temporal, se ubica en él e inicializa la base."""
+    directorio = tempfile.mkdtemp(prefix='bench_bebidas_')
+    os.chdir(directorio)
+    from modelo import inicializar_db
+    inicializar_db()
+    return directorio
+
+def poblar_clientes(cantidad: int, lote: int = 5000):
+    """Inserta clientes de prueba en bloques."""
+    from modelo import db, Cliente
+    ahora = datetime.now()
+    with db.atomic():
+        for inicio in range(0, cantidad, lote):
+            Cliente.insert_many([{
+                'nombre': f'Cliente {i:07d}',
+                'telefono': f'11{i:08d}',
+                'telefono_normalizado': f'11{i:08d}',
+                'email': f'cliente{i}@ejemplo.com',
+                'direccion': f'Calle {i % 500} N° {i}',
+                'fecha_registro': ahora,
+                'activo': True,
+                'limite_credito': 0
+            } for i in range(inicio, min(inicio + lote, cantidad))]).execute()
+
+def medir(funcion):
+    """
+    Ejecuta la función midiendo tiempo y memoria retenida por su resultado.
+
+    Returns:
+        Tuple[Any, int, float]: Resultado, bytes retenidos y segundos
+    """
+    # El tiempo se mide sin tracemalloc, que enlentece mucho las asignaciones
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    del resultado
+
+    gc.collect()
+    tracemalloc.start()
+    resultado = funcion()
+    gc.collect()
+    retenido, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, retenido, duracion
+
+def benchmark_memoria(filas: int):
+    """Compara instancias Model completas contra filas livianas (NamedTuple)."""
+    preparar_base_temporal()
+    from modelo import Cliente
+    from controlador import Controlador
+
+    poblar_clientes(filas)
+    controlador = Controlador()
+
+    def como_modelos():
+        return list(Cliente
+                    .select()
+                    .where(Cliente.activo == True)
+                    .order_by(Cliente.nombre))
+
+    modelos, memoria_modelos, tiempo_modelos = medir(como_modelos)
+    cantidad = len(modelos)
+    del modelos
+
+    filas_livianas, memoria_filas, tiempo_filas = medir(controlador.obtener_todos_clientes)
+    assert len(filas_livianas) == cantidad
+    del filas_livianas
+
+    print(f"Clientes: {cantidad}")
+    print(f"{'Representación':<22}{'Memoria (MB)':>14}{'Bytes/fila':>12}{'Tiempo (s)':>12}")
+    for nombre, memoria, tiempo in (
+        ('Model (peewee)', memoria_modelos, tiempo_modelos),
+        ('ClienteFila', memoria_filas, tiempo_filas)
+    ):
+        print(f"{nombre:<22}{memoria / 1e6:>14.1f}{memoria / cantidad:>12.0f}{tiempo:>12.3f}")
+    print(f"Reducción de memoria: {memoria_modelos / max(memoria_filas, 1):.1f}x")
+
+def _vender_concurrente(directorio: str, cliente_id: int, producto_id: int,
+                        ventas: int, inicio) -> tuple:
+    """Proceso de estrés: vende de a una unidad del mismo producto."""
+    os.chdir(directorio)
+    from controlador import Controlador
+    controlador = Controlador()
+    exitosas = rechazadas = 0
+    inicio.wait()
+    for _ in range(ventas):
+        try:
+            controlador.registrar_venta(cliente_id, [{'producto_id': producto_id, 'cantidad': 1}])
+            exitosas += 1
+        except ValueError:
+            rechazadas += 1
+    return exitosas, rechazadas
+
+def benchmark_estres(procesos: int, ventas: int, stock: int):
+    """
+    Varios procesos venden el mismo producto a la vez. Verifica que no se
+    pierdan actualizaciones (stock final = inicial - vendidas), que el diario
+    de movimientos coincida con el stock y que nunca se venda de más.
+    """
+    directorio = preparar_base_temporal()
+    from peewee import fn
+    from modelo import db, Producto, MovimientoStock, DetalleVenta
+    from controlador import Controlador
+
+    controlador = Controlador()
+    proveedor = controlador.agregar_proveedor("Proveedor Estrés", "1100000000")
+    cliente = controlador.agregar_cliente("Cliente Estrés", "1100000001", "Calle 1")
+    producto = controlador.agregar_producto("Gaseosa Estrés", 100, stock, proveedor.id,
+                                            stock_minimo=0)
+    db.close_all()
+
+    contexto = multiprocessing.get_context('spawn')
+    with contexto.Manager() as manager:
+        inicio = manager.Event()
+        with contexto.Pool(procesos) as pool:
+            tareas = [pool.apply_async(_vender_concurrente,
+                                       (directorio, cliente.id, producto.id, ventas, inicio))
+                      for _ in range(procesos)]
+            time.sleep(1)  # que todos los procesos lleguen a la barrera
+            comienzo = time.perf_counter()
+            inicio.set()
+            resultados = [tarea.get() for tarea in tareas]
+            duracion = time.perf_counter() - comienzo
+
+    exitosas = sum(r[0] for r in resultados)
+    rechazadas = sum(r[1] for r in resultados)
+    final = Producto.get_by_id(producto.id)
+    vendidas = (DetalleVenta
+                .select(fn.SUM(DetalleVenta.cantidad))
+                .where(DetalleVenta.producto == producto.id)
+                .scalar() or 0)
+    diario = (MovimientoStock
+              .select(fn.SUM(MovimientoStock.cantidad))
+              .where(MovimientoStock.producto == producto.id)
+              .scalar() or 0)
+
+    print(f"Procesos: {procesos}  Intentos: {procesos * ventas}  Stock inicial: {stock}")
+    print(f"Exitosas: {exitosas}  Rechazadas por stock: {rechazadas}")
+    print(f"Stock final: {final.stock_actual}  Versión: {final.version}")
+    print(f"Ventas/s: {exitosas / duracion:.0f}  ({duracion:.2f} s)")
+
+    esperado = stock - exitosas
+    assert final.stock_actual == esperado, f"Actualizaciones perdidas: {final.stock_actual} != {esperado}"
+    assert vendidas == exitosas, f"Detalles inconsistentes: {vendidas} != {exitosas}"
+    assert diario == final.stock_actual, f"Diario inconsistente: {diario} != {final.stock_actual}"
+    assert final.stock_actual >= 0, "Se vendió más que el stock disponible"
+    assert exitosas == min(stock, procesos * ventas)
+    print("OK: sin actualizaciones perdidas ni sobreventa")
+
+def poblar_historial(clientes: list, cantidad: int, lote: int = 5000):
+    """Inserta ventas históricas (70 % pagadas) repartidas entre los clientes."""
+    import random
+    from modelo import db, Venta
+    azar = random.Random(1)
+    ahora = datetime.now()
+    with db.atomic():
+        for inicio in range(0, cantidad, lote):
+            filas = []
+            for _ in range(min(lote, cantidad - inicio)):
+                total = azar.randint(100, 5000)
+                pagada = azar.random() < 0.7
+                filas.append({
+                    'cliente': azar.choice(clientes),
+                    'fecha': ahora,
+                    'total': total,
+                    'pagada': pagada,
+                    'monto_pagado': total if pagada else 0
+                })
+            Venta.insert_many(filas).execute()
+
+def percentil(tiempos: list, p: float) -> float:
+    return sorted(tiempos)[min(len(tiempos) - 1, int(len(tiempos) * p))]
+
+def benchmark_ventas(ventas: int, historial: int):
+    """
+    Latencia de registrar_venta con control de límite de crédito. Compara el
+    saldo mantenido en Cliente contra el control ingenuo de dos SUM por venta
+    sobre el historial del cliente.
+    """
+    preparar_base_temporal()
+    from peewee import fn
+    from modelo import Cliente, Venta, Pago
+    from controlador import Controlador, LimiteCreditoExcedido
+
+    controlador = Controlador()
+    proveedor = controlador.agregar_proveedor("Proveedor Ventas", "1100000000")
+    productos = [controlador.agregar_producto(f"Producto {i}", 100, 10 ** 7, proveedor.id).id
+                 for i in range(20)]
+    poblar_clientes(500)
+    clientes = [cliente.id for cliente in Cliente.select(Cliente.id)]
+    poblar_historial(clientes, historial)
+    controlador.verificar_saldos(reparar=True)
+
+    def control_ingenuo(cliente_id: int):
+        total = (Venta.select(fn.COALESCE(fn.SUM(Venta.total), 0))
+                 .where(Venta.cliente == cliente_id).scalar())
+        pagado = (Pago.select(fn.COALESCE(fn.SUM(Pago.monto), 0))
+                  .join(Venta).where(Venta.cliente == cliente_id).scalar())
+        return total - pagado
+
+    # Cada modo vende a su propio grupo de clientes y los modos se alternan
+    # venta a venta: la base crece igual para todos y el orden no sesga
+    modos = (
+        ('Sin límite de crédito', 0, False),
+        ('Límite con saldo mantenido', 10 ** 9, False),
+        ('Límite con dos SUM por venta', 10 ** 9, True)
+    )
+    grupos = [clientes[i::len(modos)] for i in range(len(modos))]
+    for grupo, (_, limite, _) in zip(grupos, modos):
+        Cliente.update(limite_credito=limite).where(Cliente.id.in_(grupo)).execute()
+
+    tiempos = [[] for _ in modos]
+    for i in range(ventas):
+        items = [{'producto_id': productos[i % len(productos)], 'cantidad': 1}]
+        for j in range(len(modos)):
+            modo = (i + j) % len(modos)
+            cliente_id = grupos[modo][i % len(grupos[modo])]
+            inicio = time.perf_counter()
+            if modos[modo][2]:
+                control_ingenuo(cliente_id)
+            controlador.registrar_venta(cliente_id, items, permitir_exceso_credito=True)
+            tiempos[modo].append(time.perf_counter() - inicio)
+
+    print(f"Historial: {historial} ventas en {len(clientes)} clientes; {ventas} ventas medidas por modo")
+    print(f"{'Modo':<34}{'Media (ms)':>12}{'p95 (ms)':>12}")
+    for (nombre, _, _), medidos in zip(modos, tiempos):
+        print(f"{nombre:<34}{sum(medidos) / len(medidos) * 1000:>12.3f}"
+              f"{percentil(medidos, 0.95) * 1000:>12.3f}")
+    media = [sum(medidos) / len(medidos) for medidos in tiempos]
+    print(f"Saldo mantenido contra dos SUM: {media[2] / media[1]:.2f}x")
+
+    rechazos = 0
+    Cliente.update(limite_credito=1).execute()
+    for cliente_id in clientes[:50]:
+        try:
+            controlador.registrar_venta(cliente_id, [{'producto_id': productos[0], 'cantidad': 1}])
+        except ValueError:
+            rechazos += 1
+    print(f"Ventas rechazadas por límite: {rechazos}/50")
+    try:
+        controlador.registrar_venta(-1, [{'producto_id': productos[0], 'cantidad': 1}])
+    except LimiteCreditoExcedido:
+        raise AssertionError("Un cliente inexistente no es un exceso de crédito")
+    except ValueError:
+        pass
+    assert not controlador.verificar_saldos(), "Saldos desincronizados"
+    print("OK: saldos mantenidos consistentes con las ventas")
+
+def _terminal_movil(directorio: str, url: str, numero: int, ventas: int,
+                    producto_id: int) -> dict:
+    """Proceso terminal: sincroniza el catálogo, vende sin conexión y sincroniza."""
+    import random
+    os.chdir(directorio)
+    from sincronizacion import (abrir_diario, DiarioVentas, TransporteHttp, VentaDiario,
+                                ClienteLocal, ProductoLocal, empaquetar)
+
+    enviado = {'comprimido': 0, 'json': 0}
+
+    class TransporteMedido(TransporteHttp):
+        def __call__(self, paquete):
+            import json
+            enviado['comprimido'] += len(empaquetar(paquete))
+            enviado['json'] += len(json.dumps(paquete, default=str).encode('utf-8'))
+            return super().__call__(paquete)
+
+    abrir_diario(f'diario_{numero}.db')
+    diario = DiarioVentas(TransporteMedido(url))
+    diario.sincronizar()
+    clientes = [cliente.id for cliente in ClienteLocal.select(ClienteLocal.id)]
+    otros = [producto.id for producto in ProductoLocal.select(ProductoLocal.id)
+             .where(ProductoLocal.id != producto_id)]
+    aleatorio = random.Random(numero)
+    for _ in range(ventas):
+        items = [{'producto_id': aleatorio.choice(otros), 'cantidad': 1}]
+        # El producto compartido se vende mientras el stock local alcance
+        if ProductoLocal.get_by_id(producto_id).stock_actual > 0:
+            items.append({'producto_id': producto_id, 'cantidad': 1})
+        diario.registrar_venta(aleatorio.choice(clientes), items)
+
+    inicio = time.perf_counter()
+    resumen = diario.sincronizar()
+    duracion = time.perf_counter() - inicio
+
+    # Respuesta perdida: se reenvía todo y la oficina no debe duplicar nada
+    VentaDiario.update(estado='pendiente').where(VentaDiario.estado != 'rechazada').execute()
+    reenvio = diario.sincronizar()
+    return {'resumen': resumen, 'reenvio': reenvio, 'duracion': duracion, **enviado}
+
+def benchmark_sincronizacion(terminales: int, ventas: int, stock: int):
+    """
+    Varias terminales venden sin conexión (todas el mismo producto, cuyo stock
+    no alcanza) y sincronizan contra el servidor local. Verifica que no haya
+    sobreventa, que el stock coincida con lo registrado y que el reenvío de
+    lotes no duplique ventas.
+    """
+    directorio = preparar_base_temporal()
+    from peewee import fn
+    from modelo import Venta, DetalleVenta, Producto
+    from controlador import Controlador
+    from sincronizacion import iniciar_servidor
+
+    controlador = Controlador()
+    proveedor = controlador.agregar_proveedor("Proveedor Sincronización", "1100000000")
+    compartido = controlador.agregar_producto("Gaseosa Compartida", 100, stock, proveedor.id,
+                                              stock_minimo=0)
+    for i in range(200):
+        controlador.agregar_producto(f"Producto {i}", 100, 10 ** 6, proveedor.id)
+    poblar_clientes(500)
+    servidor = iniciar_servidor(controlador, 0)
+    url = f'http://127.0.0.1:{servidor.server_port}/sincronizar'
+
+    contexto = multiprocessing.get_context('spawn')
+    with contexto.Pool(terminales) as pool:
+        resultados = pool.starmap(_terminal_movil, [(directorio, url, numero, ventas, compartido.id)
+                                                    for numero in range(terminales)])
+    servidor.shutdown()
+
+    estados = {}
+    for resultado in resultados:
+        for estado, cantidad in resultado['resumen'].items():
+            estados[estado] = estados.get(estado, 0) + cantidad
+    comprimido = sum(r['comprimido'] for r in resultados)
+    sin_comprimir = sum(r['json'] for r in resultados)
+    registradas = Venta.select().where(Venta.id_externo.is_null(False)).count()
+    vendidas = (DetalleVenta
+                .select(fn.COALESCE(fn.SUM(DetalleVenta.cantidad), 0))
+                .where(DetalleVenta.producto == compartido.id)
+                .scalar())
+    final = Producto.get_by_id(compartido.id).stock_actual
+
+    print(f"Terminales: {terminales}  Ventas por terminal: {ventas}  Stock compartido: {stock}")
+    print(f"Estados: {estados}")
+    print(f"Sincronización: {max(r['duracion'] for r in resultados):.2f} s la más lenta")
+    print(f"Enviado: {comprimido / 1e3:.1f} kB comprimido de {sin_comprimir / 1e3:.1f} kB "
+          f"({sin_comprimir / max(comprimido, 1):.1f}x)")
+    print(f"Producto compartido: vendidas {vendidas}, stock final {final}")
+
+    assert registradas == terminales * ventas - estados.get('rechazada', 0), "Ventas perdidas o duplicadas"
+    assert all(set(r['reenvio']) <= {'duplicada'} for r in resultados), "El reenvío duplicó ventas"
+    assert final >= 0, "Se vendió más que el stock disponible"
+    assert final == stock - vendidas, f"Stock inconsistente: {final} != {stock - vendidas}"
+    assert not controlador.verificar_saldos(), "Saldos desincronizados"
+    print("OK: sin sobreventa ni duplicados")
+
+def benchmark_cambios(filas: int, cambios: int):
+    """
+    Puesta al día de una réplica con el feed de cambios: una réplica al día
+    solo lee los cambios nuevos, sin importar el tamaño de la base.
+    """
+    preparar_base_temporal()
+    from modelo import Cliente
+    from controlador import Controlador
+
+    controlador = Controlador()
+    poblar_clientes(filas)
+
+    def ponerse_al_dia(desde: int) -> tuple:
+        leidos = lotes = 0
+        while True:
+            lote = controlador.obtener_cambios(desde)
+            leidos += len(lote['cambios'])
+            lotes += 1
+            desde = lote['hasta']
+            if lote['completo']:
+                return desde, leidos, lotes
+
+    inicio = time.perf_counter()
+    marca, leidos, lotes = ponerse_al_dia(0)
+    completa = time.perf_counter() - inicio
+
+    clientes = [cliente.id for cliente in Cliente.select(Cliente.id).limit(cambios)]
+    for cliente_id in clientes[:cambios // 2]:
+        controlador.actualizar_cliente(cliente_id, telefono='1199999999')
+    for cliente_id in clientes[cambios // 2:]:
+        Cliente.delete().where(Cliente.id == cliente_id).execute()
+
+    inicio = time.perf_counter()
+    _, nuevos, lotes_nuevos = ponerse_al_dia(marca)
+    incremental = time.perf_counter() - inicio
+
+    print(f"Base: {filas} clientes")
+    print(f"{'Réplica':<22}{'Cambios':>10}{'Lotes':>8}{'Tiempo (s)':>12}")
+    print(f"{'Desde cero':<22}{leidos:>10}{lotes:>8}{completa:>12.3f}")
+    print(f"{'Al día + cambios':<22}{nuevos:>10}{lotes_nuevos:>8}{incremental:>12.3f}")
+    assert leidos == filas, f"Faltan registros: {leidos} != {filas}"
+    assert nuevos == len(clientes), f"Cambios perdidos: {nuevos} != {len(clientes)}"
+    print("OK: la réplica recibe exactamente los cambios nuevos")
+
+def _servir_api(directorio: str, ventas_por_lote: int, puertos, detener):
+    """Proceso servidor: levanta el servicio HTTP hasta que se pida detenerlo."""
+    os.chdir(directorio)
+    from controlador import Controlador
+    from servicio import iniciar_servidor_api
+    servidor = iniciar_servidor_api(Controlador(), 0, ventas_por_lote=ventas_por_lote)
+    puertos.put(servidor.server_port)
+    detener.wait()
+    servidor.shutdown()
+    servidor.server_close()
+
+def _mostrador(puerto: int, numero: int, segundos: float, clientes: list,
+               productos: list) -> dict:
+    """Hilo de carga: una conexión keep-alive con pedidos mezclados."""
+    import http.client
+    import json
+    import random
+    aleatorio = random.Random(numero)
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto)
+    tiempos = {'producto': [], 'clientes': [], 'venta': []}
+    errores = 0
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        sorteo = aleatorio.random()
+        cuerpo = None
+        if sorteo < 0.6:
+            tipo, metodo, ruta = 'producto', 'GET', f'/productos/{aleatorio.choice(productos)}'
+        elif sorteo < 0.75:
+            tipo, metodo, ruta = 'clientes', 'GET', f'/clientes?texto={aleatorio.randint(0, 999):03d}&limite=20'
+        else:
+            tipo, metodo, ruta = 'venta', 'POST', '/ventas'
+            cuerpo = json.dumps({
+                'cliente_id': aleatorio.choice(clientes),
+                'items': [{'producto_id': producto_id, 'cantidad': aleatorio.randint(1, 3)}
+                          for producto_id in aleatorio.sample(productos, aleatorio.randint(1, 3))]
+            })
+        inicio = time.perf_counter()
+        conexion.request(metodo, ruta, body=cuerpo, headers={'Content-Type': 'application/json'})
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        tiempos[tipo].append(time.perf_counter() - inicio)
+        if respuesta.status >= 300:
+            errores += 1
+    conexion.close()
+    return {'tiempos': tiempos, 'errores': errores}
+
+def benchmark_api(clientes: int, segundos: float):
+    """
+    Carga sobre el servicio HTTP/JSON: varios mostradores con conexiones
+    keep-alive mezclan consultas y ventas. Compara las ventas registradas de
+    a una contra las agrupadas por LoteVentas y verifica stock y saldos.
+    Cada conexión ocupa un hilo del servidor: los mostradores no deben superar
+    TRABAJADORES_API.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    directorio = preparar_base_temporal()
+    from peewee import fn
+    from modelo import db, Cliente, Producto, DetalleVenta
+    from controlador import Controlador
+    from servicio import VENTAS_POR_LOTE
+
+    stock = 10 ** 7
+    controlador = Controlador()
+    proveedor = controlador.agregar_proveedor("Proveedor API", "1100000000")
+    productos = [controlador.agregar_producto(f"Producto {i}", 100, stock, proveedor.id).id
+                 for i in range(200)]
+    poblar_clientes(5000)
+    ids_clientes = [cliente.id for cliente in Cliente.select(Cliente.id)]
+    db.close_all()
+
+    contexto = multiprocessing.get_context('spawn')
+    print(f"Mostradores: {clientes}  Duración: {segundos:.0f} s por modo")
+    print(f"{'Modo':<20}{'Pedidos/s':>11}{'Ventas/s':>10}{'Venta p50':>11}{'Venta p95':>11}"
+          f"{'Lectura p50':>13}{'Errores':>9}")
+    for nombre, por_lote in (('Venta por commit', 1), ('Ventas agrupadas', VENTAS_POR_LOTE)):
+        puertos, detener = contexto.Queue(), contexto.Event()
+        servidor = contexto.Process(target=_servir_api,
+                                    args=(directorio, por_lote, puertos, detener))
+        servidor.start()
+        puerto = puertos.get(timeout=60)
+        with ThreadPoolExecutor(clientes) as pool:
+            resultados = list(pool.map(lambda numero: _mostrador(puerto, numero, segundos,
+                                                                 ids_clientes, productos),
+                                       range(clientes)))
+        detener.set()
+        servidor.join()
+
+        ventas = [t for r in resultados for t in r['tiempos']['venta']]
+        lecturas = [t for r in resultados for tipo in ('producto', 'clientes')
+                    for t in r['tiempos'][tipo]]
+        errores = sum(r['errores'] for r in resultados)
+        print(f"{nombre:<20}{(len(ventas) + len(lecturas)) / segundos:>11.0f}"
+              f"{len(ventas) / segundos:>10.0f}"
+              f"{percentil(ventas, 0.5) * 1000:>9.1f}ms{percentil(ventas, 0.95) * 1000:>9.1f}ms"
+              f"{percentil(lecturas, 0.5) * 1000:>11.1f}ms{errores:>9}")
+        assert not errores, f"{errores} pedidos con error"
+
+    vendidas = dict(DetalleVenta
+                    .select(DetalleVenta.producto, fn.SUM(DetalleVenta.cantidad))
+                    .group_by(DetalleVenta.producto)
+                    .tuples())
+    for producto_id, actual in Producto.select(Producto.id, Producto.stock_actual).tuples():
+        assert actual == stock - vendidas.get(producto_id, 0), f"Stock inconsistente en {producto_id}"
+    assert not controlador.verificar_saldos(), "Saldos desincronizados"
+    print("OK: stock y saldos consistentes con las ventas registradas")
+
+def benchmark_tablero(historial: int, ventas: int):
+    """
+    Apertura del tablero desde los acumuladores contra las agregaciones
+    completas de los reportes, con un historial grande. Verifica que los
+    acumuladores mantenidos por las operaciones coincidan con la reconciliación.
+    """
+    import random
+    from datetime import date
+    preparar_base_temporal()
+    from modelo import db, Cliente
+    from controlador import Controlador
+
+    controlador = Controlador()
+    proveedor = controlador.agregar_proveedor("Proveedor Tablero", "1100000000")
+    productos = [controlador.agregar_producto(f"Producto {i}", 100, 10 ** 7, proveedor.id).id
+                 for i in range(200)]
+    poblar_clientes(2000)
+    clientes = [cliente.id for cliente in Cliente.select(Cliente.id)]
+    poblar_historial(clientes, historial)
+    # El historial se reparte en el último año (poblar_historial lo fecha hoy)
+    db.execute_sql("UPDATE venta SET fecha = datetime(fecha, '-' || (1 + id % 365) || ' days')")
+    controlador.verificar_saldos(reparar=True)
+    controlador.verificar_tablero(reparar=True)
+
+    aleatorio = random.Random(1)
+    ventas_hoy = []
+    for _ in range(ventas):
+        venta, _ = controlador.registrar_venta(
+            aleatorio.choice(clientes),
+            [{'producto_id': aleatorio.choice(productos), 'cantidad': aleatorio.randint(1, 5)}],
+            permitir_exceso_credito=True)
+        ventas_hoy.append(venta)
+    for venta in ventas_hoy[:ventas // 4]:
+        controlador.registrar_pago(venta.id, venta.total, 'efectivo')
+    for venta in ventas_hoy[-10:]:
+        controlador.anular_venta(venta.id)
+
+    hoy = datetime.combine(date.today(), datetime.min.time())
+
+    def con_reportes():
+        return (controlador.obtener_lote_ventas_cliente(hoy),
+                controlador.obtener_lote_productos(hoy),
+                controlador.obtener_saldos_clientes(),
+                controlador.obtener_productos_bajo_stock())
+
+    def medir_veces(funcion, veces: int = 20) -> float:
+        funcion()
+        inicio = time.perf_counter()
+        for _ in range(veces):
+            funcion()
+        return (time.perf_counter() - inicio) / veces
+
+    tiempo_reportes = medir_veces(con_reportes)
+    tiempo_tablero = medir_veces(controlador.obtener_tablero)
+    tablero = controlador.obtener_tablero()
+
+    print(f"Historial: {historial} ventas; hoy: {tablero['cantidad_ventas']} ventas, "
+          f"{tablero['total_ventas']} vendido, {tablero['total_cobrado']} cobrado")
+    print(f"{'Apertura':<28}{'Tiempo (ms)':>12}")
+    print(f"{'Agregaciones de reportes':<28}{tiempo_reportes * 1000:>12.2f}")
+    print(f"{'Acumuladores del tablero':<28}{tiempo_tablero * 1000:>12.2f}")
+    print(f"Aceleración: {tiempo_reportes / tiempo_tablero:.0f}x")
+    diferencias = controlador.verificar_tablero()
+    assert not diferencias, f"Acumuladores inconsistentes: {diferencias[:3]}"
+    assert tablero['cantidad_ventas'] == ventas - 10
+    print("OK: acumuladores consistentes con ventas, pagos y saldos")
+
+def benchmark_respaldo(historial: int, segundos: float):
+    """
+    Latencia de registrar_venta mientras corre un respaldo en línea, contra
+    la misma carga sin respaldo. Verifica el respaldo y mide la restauración.
+    """
+    import threading
+    import sqlite3
+    directorio = preparar_base_temporal()
+    from modelo import Cliente, Venta, RUTA_DB
+    from controlador import Controlador
+    from respaldo import respaldar, verificar_respaldo, restaurar_respaldo
+
+    controlador = Controlador()
+    proveedor = controlador.agregar_proveedor("Proveedor Respaldo", "1100000000")
+    productos = [controlador.agregar_producto(f"Producto {i}", 100, 10 ** 7, proveedor.id).id
+                 for i in range(50)]
+    poblar_clientes(5000)
+    clientes = [cliente.id for cliente in Cliente.select(Cliente.id)]
+    poblar_historial(clientes, historial)
+    controlador.verificar_saldos(reparar=True)
+
+    def vender(hasta: threading.Event) -> list:
+        tiempos = []
+        i = 0
+        while not hasta.is_set():
+            inicio = time.perf_counter()
+            controlador.registrar_venta(clientes[i % len(clientes)],
+                                        [{'producto_id': productos[i % len(productos)], 'cantidad': 1}],
+                                        permitir_exceso_credito=True)
+            tiempos.append(time.perf_counter() - inicio)
+            i += 1
+        return tiempos
+
+    sin_respaldo = threading.Event()
+    threading.Timer(segundos, sin_respaldo.set).start()
+    tiempos_base = vender(sin_respaldo)
+
+    ventas_previas = Venta.select().count()
+    resultado = {}
+    con_respaldo = threading.Event()
+
+    def respaldar_en_hilo():
+        inicio = time.perf_counter()
+        resultado['ruta'] = respaldar(os.path.join(directorio, 'respaldos'))
+        resultado['duracion'] = time.perf_counter() - inicio
+        con_respaldo.set()
+
+    hilo = threading.Thread(target=respaldar_en_hilo)
+    hilo.start()
+    tiempos_respaldo = vender(con_respaldo)
+    hilo.join()
+
+    problemas = verificar_respaldo(resultado['ruta'])
+    restaurada = os.path.join(directorio, 'restaurada.db')
+    duracion_restauracion = restaurar_respaldo(resultado['ruta'], restaurada, respaldar_actual=False)
+    conexion = sqlite3.connect(restaurada)
+    ventas_restauradas, = conexion.execute('SELECT COUNT(*) FROM venta').fetchone()
+    conexion.close()
+
+    print(f"Base: {os.path.getsize(RUTA_DB) / 1e6:.1f} MB ({historial} ventas)  "
+          f"Respaldo: {os.path.getsize(resultado['ruta']) / 1e6:.1f} MB comprimido")
+    print(f"{'Carga':<22}{'Ventas':>8}{'Media (ms)':>12}{'p95 (ms)':>10}{'Máx (ms)':>10}")
+    for nombre, tiempos in (('Sin respaldo', tiempos_base), ('Durante el respaldo', tiempos_respaldo)):
+        print(f"{nombre:<22}{len(tiempos):>8}{sum(tiempos) / len(tiempos) * 1000:>12.2f}"
+              f"{percentil(tiempos, 0.95) * 1000:>10.2f}{max(tiempos) * 1000:>10.2f}")
+    print(f"Respaldo: {resultado['duracion']:.2f} s  Restauración: {duracion_restauracion:.2f} s")
+    assert not problemas, f"Respaldo inválido: {problemas}"
+    assert ventas_previas <= ventas_restauradas <= ventas_previas + len(tiempos_respaldo), \
+        "El respaldo no es una foto consistente"
+    print("OK: respaldo íntegro tomado sin detener las ventas")
+
+def benchmark_mantenimiento(historial: int, pausa: float):
+    """
+    Mantenimiento de una base vieja (sin auto_vacuum ni estadísticas) con un
+    tercio de las ventas borradas al azar, y luego de un archivado que borra
+    otro tercio contiguo, mientras se siguen registrando ventas separadas
+    por `pausa` segundos. Mide el espacio recuperado, la duración y la
+    latencia de las ventas contra la misma carga sin mantenimiento.
+    """
+    import threading
+    import sqlite3
+    preparar_base_temporal()
+    from modelo import Cliente, RUTA_DB, mantener_db
+    from controlador import Controlador
+
+    controlador = Controlador()
+    proveedor = controlador.agregar_proveedor("Proveedor Mantenimiento", "1100000000")
+    productos = [controlador.agregar_producto(f"Producto {i}", 100, 10 ** 7, proveedor.id).id
+                 for i in range(50)]
+    poblar_clientes(5000)
+    clientes = [cliente.id for cliente in Cliente.select(Cliente.id)]
+    poblar_historial(clientes, historial)
+
+    def ejecutar(*sentencias):
+        conexion = sqlite3.connect(RUTA_DB, isolation_level=None)
+        for sentencia in sentencias:
+            conexion.execute(sentencia)
+        libres = conexion.execute('PRAGMA freelist_count').fetchone()[0]
+        conexion.close()
+        return libres
+
+    def vender(hasta: threading.Event) -> list:
+        tiempos = []
+        i = 0
+        while not hasta.is_set():
+            inicio = time.perf_counter()
+            controlador.registrar_venta(clientes[i % len(clientes)],
+                                        [{'producto_id': productos[i % len(productos)], 'cantidad': 1}],
+                                        permitir_exceso_credito=True)
+            tiempos.append(time.perf_counter() - inicio)
+            i += 1
+            time.sleep(pausa)
+        return tiempos
+
+    def mantener_vendiendo() -> Tuple[list, list, float]:
+        # Como el programador: si una venta lo interrumpe, sigue en el próximo hueco
+        ejecuciones = []
+        terminado = threading.Event()
+
+        def mantener_en_hilo():
+            while not ejecuciones or not ejecuciones[-1]['completo']:
+                ejecuciones.append(mantener_db())
+            terminado.set()
+
+        hilo = threading.Thread(target=mantener_en_hilo)
+        inicio = time.perf_counter()
+        hilo.start()
+        tiempos = vender(terminado)
+        hilo.join()
+        return tiempos, ejecuciones, time.perf_counter() - inicio
+
+    sin_mantenimiento = threading.Event()
+    threading.Timer(3, sin_mantenimiento.set).start()
+    tiempos_base = vender(sin_mantenimiento)
+
+    # Base como las de antes de este cambio: sin auto_vacuum y fragmentada
+    ejecutar('PRAGMA auto_vacuum=NONE', 'VACUUM', 'DELETE FROM venta WHERE id % 3 = 0')
+    tamanio_vieja = os.path.getsize(RUTA_DB)
+    tiempos_vacuum, ejecuciones_vacuum, duracion_vacuum = mantener_vendiendo()
+    tamanio_convertida = os.path.getsize(RUTA_DB)
+
+    # Archivado: se borra un bloque contiguo y quedan páginas enteras libres
+    libres = ejecutar(f'DELETE FROM venta WHERE id <= {historial // 3}')
+    tiempos_incremental, ejecuciones_incremental, duracion_incremental = mantener_vendiendo()
+    tamanio_final = os.path.getsize(RUTA_DB)
+
+    conexion = sqlite3.connect(RUTA_DB)
+    auto_vacuum = conexion.execute('PRAGMA auto_vacuum').fetchone()[0]
+    estadisticas = conexion.execute('SELECT COUNT(*) FROM sqlite_stat1').fetchone()[0]
+    conexion.close()
+
+    print(f"Base vieja: {tamanio_vieja / 1e6:.1f} MB -> {tamanio_convertida / 1e6:.1f} MB con el "
+          f"VACUUM inicial ({duracion_vacuum:.2f} s, {len(ejecuciones_vacuum)} intento(s))")
+    print(f"Archivado: {libres} páginas libres -> {tamanio_final / 1e6:.1f} MB con incremental_vacuum "
+          f"({duracion_incremental:.2f} s, {len(ejecuciones_incremental)} intento(s))")
+    print(f"{'Carga':<30}{'Ventas':>8}{'Media (ms)':>12}{'p95 (ms)':>10}{'Máx (ms)':>10}")
+    for nombre, tiempos in (('Sin mantenimiento', tiempos_base),
+                            ('Durante el VACUUM inicial', tiempos_vacuum),
+                            ('Durante el incremental', tiempos_incremental)):
+        print(f"{nombre:<30}{len(tiempos):>8}{sum(tiempos) / len(tiempos) * 1000:>12.2f}"
+              f"{percentil(tiempos, 0.95) * 1000:>10.2f}{max(tiempos) * 1000:>10.2f}")
+    assert ejecuciones_incremental[-1]['paginas_liberadas'] > 0
+    assert not any(ejecucion['problemas'] for ejecucion in ejecuciones_vacuum + ejecuciones_incremental)
+    assert auto_vacuum == 2 and estadisticas > 0
+    assert tamanio_convertida < tamanio_vieja and tamanio_final < tamanio_convertida
+    print("OK: espacio recuperado y estadísticas al día sin cortar las ventas")
+
+def benchmark_migracion(historial: int):
+    """
+    Migra una base anterior al versionado (sin Venta.monto_pagado ni
+    Cliente.saldo) con `historial` ventas y sus pagos. La primera corrida se
+    corta a mitad de la actualización por lotes y la segunda la retoma.
+    Mide duración, memoria de Python y tamaño máximo del WAL (incluidos
+    los índices que se arman al final).
+    """
+    import sqlite3
+    preparar_base_temporal()
+    from modelo import db, Cliente, Venta, RUTA_DB
+    from peewee import fn
+    from migraciones import migrar, version_esquema, ultima_version
+
+    poblar_clientes(5000)
+    clientes = [cliente.id for cliente in Cliente.select(Cliente.id)]
+    poblar_historial(clientes, historial)
+    db.close_all()
+
+    conexion = sqlite3.connect(RUTA_DB, isolation_level=None)
+    conexion.execute("INSERT INTO pago (venta_id, fecha, monto, metodo_pago, secuencia) "
+                     "SELECT id, fecha, monto_pagado, 'efectivo', 0 FROM venta WHERE monto_pagado > 0")
+    pagado_esperado, = conexion.execute('SELECT SUM(monto_pagado) FROM venta').fetchone()
+    saldo_esperado, = conexion.execute(
+        'SELECT SUM(total - monto_pagado) FROM venta WHERE NOT pagada').fetchone()
+    # Base como las de antes del versionado, con los montos en pesos
+    conexion.execute('UPDATE venta SET total = total / 100.0, monto_pagado = monto_pagado / 100.0')
+    conexion.execute('UPDATE pago SET monto = monto / 100.0')
+    for nombre, in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                    "AND (sql LIKE '%monto_pagado%' OR sql LIKE '%saldo%')").fetchall():
+        conexion.execute(f'DROP INDEX "{nombre}"')
+    conexion.execute('ALTER TABLE venta DROP COLUMN monto_pagado')
+    conexion.execute('ALTER TABLE cliente DROP COLUMN saldo')
+    conexion.execute('PRAGMA user_version = 0')
+    conexion.execute('VACUUM')
+    conexion.close()
+    tamanio = os.path.getsize(RUTA_DB)
+
+    wal = [0]
+
+    class Corte(Exception):
+        pass
+
+    def cortar_a_mitad(tarea: str, hechas: int, total: int):
+        wal[0] = max(wal[0], os.path.getsize(RUTA_DB + '-wal'))
+        if tarea == 'venta.monto_pagado' and hechas >= total // 2:
+            raise Corte()
+
+    def seguir(tarea: str, hechas: int, total: int):
+        wal[0] = max(wal[0], os.path.getsize(RUTA_DB + '-wal'))
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        migrar(cortar_a_mitad)
+    except Corte:
+        pass
+    primera = time.perf_counter() - inicio
+    with db.connection_context():
+        version_cortada = version_esquema()
+    inicio = time.perf_counter()
+    aplicadas = migrar(seguir)
+    segunda = time.perf_counter() - inicio
+    seguir('', 0, 0)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with db.connection_context():
+        version = version_esquema()
+        pagado = Venta.select(fn.SUM(Venta.monto_pagado)).scalar()
+        saldo = Cliente.select(fn.SUM(Cliente.saldo)).scalar()
+
+    print(f"Base anterior al versionado: {tamanio / 1e6:.1f} MB, {historial} ventas")
+    print(f"Primera corrida, cortada a mitad de venta.monto_pagado: {primera:.2f} s "
+          f"(queda en versión {version_cortada})")
+    print(f"Segunda corrida, retomada: {segunda:.2f} s, versiones aplicadas {aplicadas}")
+    print(f"Memoria de Python (pico): {pico / 1e6:.1f} MB  WAL máximo: {wal[0] / 1e6:.1f} MB")
+    assert version_cortada == 0 and version == ultima_version()
+    assert pagado == pagado_esperado and saldo == saldo_esperado, "Totales desnormalizados distintos"
+    print("OK: migración por lotes retomada con memoria y WAL acotados")
+
+def benchmark_centavos(historial: int):
+    """
+    Montos en centavos enteros contra montos REAL. Arma una base como las
+    anteriores a la migración 2 (montos en pesos con centavos), mide la
+    agregación del reporte de ventas por cliente, la migra y vuelve a medir.
+    Compara los totales con la suma exacta de los centavos generados.
+    """
+    import random
+    import sqlite3
+    preparar_base_temporal()
+    from modelo import db, Cliente, Venta, RUTA_DB
+    from migraciones import migrar, version_esquema, ultima_version
+    from controlador import Controlador
+    from utilidades import de_centavos
+
+    poblar_clientes(5000)
+    clientes = [cliente.id for cliente in Cliente.select(Cliente.id)]
+    azar = random.Random(1)
+    ahora = datetime.now()
+    exacto = 0
+    with db.atomic():
+        for inicio in range(0, historial, 5000):
+            centavos = [azar.randint(100, 500000) for _ in range(min(5000, historial - inicio))]
+            exacto += sum(centavos)
+            Venta.insert_many([{
+                'cliente': azar.choice(clientes),
+                'fecha': ahora,
+                'total': de_centavos(total),
+                'pagada': False
+            } for total in centavos]).execute()
+    db.close_all()
+
+    conexion = sqlite3.connect(RUTA_DB, isolation_level=None)
+    conexion.execute('UPDATE venta SET total = total / 100.0')
+    conexion.execute('PRAGMA user_version = 1')
+    conexion.close()
+
+    controlador = Controlador()
+    agregacion = 'SELECT cliente_id, SUM(total) FROM venta GROUP BY cliente_id'
+
+    def medir_agregacion() -> Tuple[float, float, list]:
+        with db.connection_context():
+            inicio = time.perf_counter()
+            filas = db.execute_sql(agregacion).fetchall()
+            sql = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        controlador.obtener_lote_ventas_cliente()
+        return sql, time.perf_counter() - inicio, filas
+
+    sql_real, _, filas = medir_agregacion()
+    # Lo que hacía el reporte con montos REAL: sumas de SQLite y acumulación en float
+    suma_float = sum(total for _, total in filas)
+    error_float = abs(suma_float * 100 - exacto)
+
+    inicio = time.perf_counter()
+    migrar()
+    migracion = time.perf_counter() - inicio
+
+    sql_entero, lote, filas = medir_agregacion()
+    lote_total = controlador.obtener_lote_ventas_cliente()['total_ventas'].sum()
+    with db.connection_context():
+        version = version_esquema()
+
+    print(f"Historial: {historial} ventas con centavos, suma exacta {de_centavos(exacto)}")
+    print(f"{'Agregación por cliente':<28}{'SQL (ms)':>10}")
+    print(f"{'Montos REAL':<28}{sql_real * 1000:>10.1f}")
+    print(f"{'Centavos enteros':<28}{sql_entero * 1000:>10.1f}")
+    print(f"Reporte columnar en centavos: {lote * 1000:.1f} ms")
+    print(f"Error de la suma en float: {error_float:.6f} centavos")
+    print(f"Migración a centavos: {migracion:.2f} s")
+    assert version == ultima_version()
+    assert sum(total for _, total in filas) == exacto, "La suma en centavos no es exacta"
+    assert lote_total == exacto, "El reporte no suma los centavos exactos"
+    print("OK: sumas exactas en centavos después de la migración")
+
+def _telefono_fila_por_fila(telefono: str) -> bool:
+    """Validador de teléfono anterior a validacion.py, de a un valor."""
+    import re
+    solo_numeros = re.sub(r'[\s\(\)\-\+]', '', telefono)
+    if not (8 <= len(solo_numeros) <= 15):
+        return False
+    return bool(re.match(r'^[\+]?[\d\s\(\)\-]+$', telefono))
+
+def _email_fila_por_fila(email: str) -> bool:
+    """Validador de email anterior a validacion.py, de a un valor."""
+    import re
+    return bool(re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email))
+
+def _archivo_importacion(filas: int, registrados: int) -> dict:
+    """
+    Columnas de un archivo de clientes con teléfonos en varios formatos y
+    errores mezclados: nombres vacíos, teléfonos inválidos, repetidos en el
+    archivo o ya registrados, emails y límites de crédito mal escritos.
+    """
+    import random
+    azar = random.Random(7)
+    formatos = ('11{a:04d}{b:04d}', '011 {a:04d}-{b:04d}', '+54 9 11 {a:04d}-{b:04d}',
+                '(11) {a:04d}-{b:04d}', '+54 11 {a:04d} {b:04d}')
+    columnas = {'nombre': [], 'telefono': [], 'email': [], 'limite_credito': []}
+    for i in range(filas):
+        sorteo = azar.random()
+        if sorteo < 0.02 and registrados:
+            numero = azar.randrange(registrados)
+        elif sorteo < 0.04 and i:
+            numero = azar.randrange(i) + 10 ** 6
+        else:
+            numero = i + 10 ** 6
+        telefono = azar.choice(formatos).format(a=numero // 10000, b=numero % 10000)
+        if azar.random() < 0.02:
+            telefono = azar.choice(('1234', 'sin teléfono', '11-2345-678x'))
+        columnas['nombre'].append('' if azar.random() < 0.01 else f'Importado {i}')
+        columnas['telefono'].append(telefono)
+        email = f'importado{i}@ejemplo.com' if azar.random() < 0.6 else ''
+        if azar.random() < 0.02:
+            email = f'importado{i}.ejemplo.com'
+        columnas['email'].append(email)
+        limite = azar.choice(('', '1500', '2500,50', '3000.5'))
+        if azar.random() < 0.01:
+            limite = '1.234,5'
+        columnas['limite_credito'].append(limite)
+    return columnas
+
+def benchmark_validacion(filas: int, registrados: int):
+    """
+    Validación de un archivo de clientes a importar: los validadores de a
+    un valor (que compilaban sus patrones en cada llamada y buscaban cada
+    teléfono en la base) contra validar_lote por columnas. Comprueba que
+    ambos rechacen las mismas filas y mide la importación completa.
+    """
+    import csv
+    import re
+    import numpy as np
+    preparar_base_temporal()
+    from modelo import Cliente, lectura
+    from controlador import Controlador
+    from validacion import validar_lote
+
+    poblar_clientes(registrados)
+    controlador = Controlador()
+    columnas = _archivo_importacion(filas, registrados)
+
+    def fila_por_fila() -> set:
+        invalidas = set()
+        vistos = set()
+        for i in range(filas):
+            nombre = columnas['nombre'][i].strip()
+            telefono = columnas['telefono'][i].strip()
+            email = columnas['email'][i].strip()
+            limite = columnas['limite_credito'][i].strip()
+            valida = bool(nombre) and bool(telefono)
+            if telefono and _telefono_fila_por_fila(telefono):
+                normalizado = re.sub(r'[^0-9]', '', telefono)
+                if len(normalizado) > 10 and normalizado.startswith('54'):
+                    normalizado = normalizado[2:]
+                    if len(normalizado) == 11 and normalizado.startswith('9'):
+                        normalizado = normalizado[1:]
+                if normalizado.startswith('0'):
+                    normalizado = normalizado[1:]
+                if normalizado in vistos:
+                    valida = False
+                vistos.add(normalizado)
+                if lectura(Cliente.select(Cliente.id)
+                           .where(Cliente.telefono_normalizado == normalizado)).exists():
+                    valida = False
+            elif telefono:
+                valida = False
+            if email and not _email_fila_por_fila(email):
+                valida = False
+            if limite and not re.match(r'^[0-9]+(?:[.,][0-9]{1,2})?$', limite):
+                valida = False
+            if not valida:
+                invalidas.add(i)
+        return invalidas
+
+    inicio = time.perf_counter()
+    invalidas = fila_por_fila()
+    individual = time.perf_counter() - inicio
+
+    registrados_en = controlador._telefonos_registrados(Cliente)
+    inicio = time.perf_counter()
+    resultado = validar_lote(columnas, montos=('limite_credito',), registrados=registrados_en)
+    lote = time.perf_counter() - inicio
+    invalidas_lote = {int(i) for i in np.flatnonzero(~resultado.validas)}
+
+    ruta = os.path.abspath('clientes.csv')
+    with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(columnas.keys())
+        escritor.writerows(zip(*columnas.values()))
+    antes = Cliente.select().count()
+    inicio = time.perf_counter()
+    importacion = controlador.importar_clientes(ruta)
+    completa = time.perf_counter() - inicio
+    importados = Cliente.select().count() - antes
+
+    inicio = time.perf_counter()
+    for i in range(1000):
+        controlador.buscar_cliente_por_telefono(f'+54 9 11 {i // 10:04d}-{i % 10000:04d}')
+    busqueda = (time.perf_counter() - inicio) / 1000
+
+    print(f"Archivo: {filas} filas, {len(invalidas)} con errores; {registrados} clientes registrados")
+    print(f"{'Validación':<30}{'total (s)':>10}{'us/fila':>10}")
+    print(f"{'Fila por fila':<30}{individual:>10.2f}{individual / filas * 1e6:>10.1f}")
+    print(f"{'Por columnas (validar_lote)':<30}{lote:>10.2f}{lote / filas * 1e6:>10.1f}")
+    print(f"Importación completa desde CSV: {completa:.2f} s, {importacion['importadas']} filas, "
+          f"{len(importacion['errores'])} errores informados")
+    print(f"Búsqueda por teléfono normalizado: {busqueda * 1e6:.0f} us")
+    assert invalidas == invalidas_lote, "Las validaciones no rechazan las mismas filas"
+    assert importacion['importadas'] == importados == filas - len(invalidas)
+    print("OK: mismas filas rechazadas por ambas validaciones")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del sistema")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    memoria = subparsers.add_parser('memoria', help="Memoria de las listas: Model vs filas livianas")
+    memoria.add_argument('--filas', type=int, default=100000)
+
+    estres = subparsers.add_parser('estres', help="Ventas concurrentes del mismo producto")
+    estres.add_argument('--procesos', type=int, default=8)
+    estres.add_argument('--ventas', type=int, default=200)
+    estres.add_argument('--stock', type=int, default=1000)
+
+    ventas = subparsers.add_parser('ventas', help="Latencia de registrar_venta con control de crédito")
+    ventas.add_argument('--ventas', type=int, default=2000)
+    ventas.add_argument('--historial', type=int, default=200000)
+
+    sincronizacion = subparsers.add_parser('sincronizacion',
+                                           help="Ventas sin conexión de varias terminales")
+    sincronizacion.add_argument('--terminales', type=int, default=4)
+    sincronizacion.add_argument('--ventas', type=int, default=300)
+    sincronizacion.add_argument('--stock', type=int, default=500)
+
+    feed = subparsers.add_parser('cambios', help="Puesta al día de réplicas con el feed de cambios")
+    feed.add_argument('--filas', type=int, default=200000)
+    feed.add_argument('--cambios', type=int, default=500)
+
+    api = subparsers.add_parser('api', help="Carga sobre el servicio HTTP/JSON")
+    api.add_argument('--clientes', type=int, default=6)
+    api.add_argument('--segundos', type=float, default=10)
+
+    tablero = subparsers.add_parser('tablero', help="Apertura del tablero con acumuladores")
+    tablero.add_argument('--historial', type=int, default=200000)
+    tablero.add_argument('--ventas', type=int, default=500)
+
+    copia = subparsers.add_parser('respaldo', help="Ventas durante un respaldo en línea")
+    copia.add_argument('--historial', type=int, default=500000)
+    copia.add_argument('--segundos', type=float, default=5)
+
+    orden = subparsers.add_parser('mantenimiento', help="Ventas durante el mantenimiento de la base")
+    orden.add_argument('--historial', type=int, default=300000)
+    orden.add_argument('--pausa', type=float, default=0.02)
+
+    migracion = subparsers.add_parser('migracion', help="Migración por lotes de una base vieja")
+    migracion.add_argument('--historial', type=int, default=1000000)
+
+    centavos = subparsers.add_parser('centavos', help="Sumas en centavos enteros contra montos REAL")
+    centavos.add_argument('--historial', type=int, default=1000000)
+
+    validacion = subparsers.add_parser('validacion', help="Validación por columnas de un archivo a importar")
+    validacion.add_argument('--filas', type=int, default=100000)
+    validacion.add_argument('--registrados', type=int, default=50000)
+
+    args = parser.parse_args()
+    if args.benchmark == 'memoria':
+        benchmark_memoria(args.filas)
+    elif args.benchmark == 'estres':
+        benchmark_estres(args.procesos, args.ventas, args.stock)
+    elif args.benchmark == 'ventas':
+        benchmark_ventas(args.ventas, args.historial)
+    elif args.benchmark == 'sincronizacion':
+        benchmark_sincronizacion(args.terminales, args.ventas, args.stock)
+    elif args.benchmark == 'cambios':
+        benchmark_cambios(args.filas, args.cambios)
+    elif args.benchmark == 'api':
+        benchmark_api(args.clientes, args.segundos)
+    elif args.benchmark == 'tablero':
+        benchmark_tablero(args.historial, args.ventas)
+    elif args.benchmark == 'respaldo':
+        benchmark_respaldo(args.historial, args.segundos)
+    elif args.benchmark == 'mantenimiento':
+        benchmark_mantenimiento(args.historial, args.pausa)
+    elif args.benchmark == 'migracion':
+        benchmark_migracion(args.historial)
+    elif args.benchmark == 'centavos':
+        benchmark_centavos(args.historial)
+    elif args.benchmark == 'validacion':
+        benchmark_validacion(args.filas, args.registrados)
+
+if __name__ == '__main__':
+    main()
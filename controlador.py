@@ -1,19 +1,106 @@
 from typing import List, Dict, Optional, Tuple, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
-from peewee import fn, JOIN, SQL
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from itertools import islice
+import heapq
+import json
+import random
+import time
+import numpy as np
+from peewee import fn, JOIN, SQL, Case, Value, Tuple as Fila, OperationalError, DoesNotExist, chunked
 
 from modelo import (
-    db, Cliente, Producto, Proveedor, 
-    Venta, DetalleVenta, Pago
+    db, db_lectura, lectura, Cliente, Producto, Proveedor, 
+    Venta, DetalleVenta, Pago, MovimientoStock, CorteStock,
+    OrdenCompra, DetalleOrdenCompra, ResumenVentasArchivadas, ResumenProductosArchivados,
+    ClienteFila, ProductoFila, ProveedorFila, VentaFila, AlertaFila,
+    OrdenCompraFila, SugerenciaReposicionFila, PronosticoFila,
+    MOVIMIENTO_VENTA, MOVIMIENTO_ANULACION, MOVIMIENTO_AJUSTE, MOVIMIENTO_INICIAL,
+    MOVIMIENTO_COMPRA, ORDEN_PENDIENTE, ORDEN_RECIBIDA, ORDEN_CANCELADA,
+    SecuenciaCambios, RegistroBorrado, MODELOS_REPLICADOS
 )
-from utilidades import log_operacion, validar_email, validar_telefono
+from utilidades import log_operacion, a_decimal, a_centavos, de_centavos
+from validacion import validar_email, validar_telefono, normalizar_telefono, validar_lote
+from motor_reportes import (
+    obtener_motor, filtrar_fechas, consulta_antiguedad, LoteColumnas,
+    TIPOS_REPORTE, TRAMOS_ANTIGUEDAD, CENTAVOS
+)
+from alertas import motor_alertas
+from archivo import filas_con_archivo, archivar_ventas, MESES_ABIERTOS
+from pronostico import obtener_motor_pronostico
+from tablero import (
+    leer_tablero, reconciliar_tablero, sumar_venta, sumar_cobro, sumar_saldo_pendiente
+)
+
+# Días entre cortes automáticos de stock
+DIAS_ENTRE_CORTES = 30
+
+# Parámetros por defecto de la sugerencia de reposición
+DIAS_HISTORIAL_REPOSICION = 30
+DIAS_COBERTURA_REPOSICION = 14
+
+# Filas por sentencia en las inserciones masivas
+FILAS_POR_LOTE = 100
+
+# Cambios por lote del feed de réplicas
+CAMBIOS_POR_LOTE = 1000
+
+# Reintentos ante bloqueo de la base por otra terminal
+REINTENTOS_BLOQUEO = 5
+ESPERA_BLOQUEO = 0.05
+
+class ConflictoConcurrencia(ValueError):
+    """El registro fue modificado por otra terminal después de leerlo."""
+
+class LimiteCreditoExcedido(ValueError):
+    """La venta dejaría al cliente por encima de su límite de crédito."""
+
+def reintentar_si_bloqueada(func):
+    """
+    Decorador que repite la operación completa si la base está bloqueada por
+    otra terminal, con espera creciente. Dentro de una transacción externa no
+    reintenta: la decisión queda en quien la abrió.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for intento in range(REINTENTOS_BLOQUEO):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                mensaje = str(e).lower()
+                bloqueo = 'locked' in mensaje or 'busy' in mensaje
+                if not bloqueo or db.in_transaction() or intento == REINTENTOS_BLOQUEO - 1:
+                    raise
+                time.sleep(ESPERA_BLOQUEO * (2 ** intento) * (1 + random.random()))
+    return wrapper
 
 class Controlador:
+    @contextmanager
+    def _transaccion(self):
+        """
+        Transacción de escritura. Empieza con BEGIN IMMEDIATE para tomar el
+        lock de escritura de entrada (en WAL, una lectura que luego intenta
+        escribir falla si otra terminal escribió en el medio). Los cambios de
+        alertas evaluados adentro se publican recién cuando la transacción
+        más externa confirma, y se descartan si se revierte.
+        """
+        marca = motor_alertas.marca()
+        try:
+            with db.atomic('IMMEDIATE'):
+                yield
+        except Exception:
+            motor_alertas.descartar(marca)
+            raise
+        if not db.in_transaction():
+            motor_alertas.confirmar()
+
     # CRUD Clientes
     @log_operacion("gestión_cliente")
     def agregar_cliente(self, nombre: str, telefono: str, direccion: str, 
-                       email: Optional[str] = None, limite_credito: float = 0) -> Cliente:
+                       email: Optional[str] = None, limite_credito: Decimal = Decimal('0')) -> Cliente:
         """
         Agrega un nuevo cliente a la base de datos.
         
@@ -22,7 +109,7 @@ class Controlador:
             telefono (str): Teléfono del cliente
             direccion (str): Dirección del cliente
             email (Optional[str]): Email del cliente
-            limite_credito (float): Límite de crédito del cliente
+            limite_credito (Decimal): Límite de crédito del cliente
             
         Returns:
             Cliente: Instancia del cliente creado
@@ -36,9 +123,10 @@ class Controlador:
             cliente = Cliente.create(
                 nombre=nombre,
                 telefono=telefono,
+                telefono_normalizado=normalizar_telefono(telefono),
                 direccion=direccion,
                 email=email,
-                limite_credito=limite_credito
+                limite_credito=a_decimal(limite_credito)
             )
         return cliente
 
@@ -47,8 +135,10 @@ class Controlador:
         """Actualiza los datos de un cliente existente."""
         if 'email' in datos and datos['email'] and not validar_email(datos['email']):
             raise ValueError("Email inválido")
-        if 'telefono' in datos and not validar_telefono(datos['telefono']):
-            raise ValueError("Teléfono inválido")
+        if 'telefono' in datos:
+            if not validar_telefono(datos['telefono']):
+                raise ValueError("Teléfono inválido")
+            datos['telefono_normalizado'] = normalizar_telefono(datos['telefono'])
         
         with db.atomic():
             cliente = Cliente.get_by_id(cliente_id)
@@ -68,7 +158,7 @@ class Controlador:
 
     # CRUD Productos
     @log_operacion("gestión_producto")
-    def agregar_producto(self, nombre: str, precio: float, stock: int,
+    def agregar_producto(self, nombre: str, precio: Decimal, stock: int,
                         proveedor_id: int, descripcion: Optional[str] = None,
                         stock_minimo: int = 10) -> Producto:
         """
@@ -76,7 +166,7 @@ class Controlador:
         
         Args:
             nombre (str): Nombre del producto
-            precio (float): Precio unitario
+            precio (Decimal): Precio unitario
             stock (int): Cantidad inicial en stock
             proveedor_id (int): ID del proveedor
             descripcion (Optional[str]): Descripción del producto
@@ -85,46 +175,222 @@ class Controlador:
         Returns:
             Producto: Instancia del producto creado
         """
-        with db.atomic():
+        with self._transaccion():
             producto = Producto.create(
                 nombre=nombre,
-                precio_unitario=precio,
-                stock_actual=stock,
+                precio_unitario=a_decimal(precio),
+                stock_actual=0,
                 stock_minimo=stock_minimo,
                 proveedor_id=proveedor_id,
                 descripcion=descripcion
             )
+            # El stock inicial entra por el diario como cualquier otro movimiento
+            self._aplicar_movimientos([{
+                'producto': producto.id,
+                'tipo': MOVIMIENTO_INICIAL,
+                'cantidad': stock
+            }])
+            producto.stock_actual = stock
         return producto
 
     @log_operacion("gestión_producto")
-    def actualizar_producto(self, producto_id: int, **datos) -> Producto:
-        """Actualiza los datos de un producto existente."""
-        with db.atomic():
+    @reintentar_si_bloqueada
+    def actualizar_producto(self, producto_id: int, version_esperada: Optional[int] = None,
+                            **datos) -> Producto:
+        """
+        Actualiza los datos de un producto existente.
+        
+        Args:
+            producto_id (int): ID del producto
+            version_esperada (Optional[int]): Versión leída al abrir la edición;
+                si otra terminal modificó el producto después se rechaza el cambio
+            **datos: Campos a modificar
+            
+        Returns:
+            Producto: Instancia actualizada
+        """
+        with self._transaccion():
             producto = Producto.get_by_id(producto_id)
+            if version_esperada is not None and producto.version != version_esperada:
+                raise ConflictoConcurrencia(
+                    "El producto fue modificado desde otra terminal. Vuelva a abrirlo.")
             for campo, valor in datos.items():
                 setattr(producto, campo, valor)
+            producto.version += 1
+            producto.fecha_actualizacion = datetime.now()
             producto.save()
+            # El mínimo o el estado pudieron cambiar
+            self._evaluar_alertas([producto.id])
         return producto
 
     @log_operacion("gestión_producto")
+    @reintentar_si_bloqueada
     def eliminar_producto(self, producto_id: int) -> bool:
         """Elimina (desactiva) un producto."""
-        with db.atomic():
+        with self._transaccion():
             producto = Producto.get_by_id(producto_id)
             producto.activo = False
+            producto.version += 1
+            producto.fecha_actualizacion = datetime.now()
             producto.save()
+            self._evaluar_alertas([producto.id])
             return True
 
     @log_operacion("gestión_producto")
+    @reintentar_si_bloqueada
     def ajustar_stock(self, producto_id: int, cantidad: int, motivo: str) -> Producto:
-        """Ajusta el stock de un producto."""
-        with db.atomic():
+        """Ajusta el stock de un producto dejando el motivo en el diario."""
+        with self._transaccion():
             producto = Producto.get_by_id(producto_id)
-            producto.stock_actual += cantidad
-            if producto.stock_actual < 0:
+            try:
+                self._aplicar_movimientos([{
+                    'producto': producto.id,
+                    'tipo': MOVIMIENTO_AJUSTE,
+                    'cantidad': cantidad,
+                    'motivo': motivo
+                }])
+            except ValueError:
                 raise ValueError("El stock no puede ser negativo")
-            producto.save()
-            return producto
+            return Producto.get_by_id(producto_id)
+
+    # Diario de stock
+    def _aplicar_movimientos(self, movimientos: List[Dict[str, Any]]) -> None:
+        """
+        Inserta movimientos en el diario y actualiza los contadores stock_actual
+        con un único UPDATE. Debe llamarse dentro de una transacción.
+        
+        Args:
+            movimientos (List[Dict[str, Any]]): Filas de MovimientoStock
+                [{"producto": id, "tipo": tipo, "cantidad": cantidad, ...}, ...]
+        """
+        if not movimientos:
+            return
+        
+        ahora = datetime.now()
+        deltas = defaultdict(int)
+        for movimiento in movimientos:
+            movimiento.setdefault('fecha', ahora)
+            deltas[movimiento['producto']] += movimiento['cantidad']
+        
+        for lote in chunked(movimientos, FILAS_POR_LOTE):
+            MovimientoStock.insert_many(lote).execute()
+        
+        # UPDATE condicional y atómico: la resta se hace en SQLite sobre el
+        # valor vigente, nunca sobre uno leído antes en Python, y solo si el
+        # stock no queda negativo. Si algún producto no alcanza, no se
+        # modifica y la cantidad de filas afectadas lo delata.
+        delta = Case(Producto.id, list(deltas.items()), 0)
+        actualizados = (Producto
+                        .update(stock_actual=Producto.stock_actual + delta,
+                                version=Producto.version + 1)
+                        .where(Producto.id.in_(list(deltas)) &
+                               (Producto.stock_actual + delta >= 0))
+                        .execute())
+        
+        if actualizados != len(deltas):
+            faltantes = (Producto
+                         .select(Producto.nombre)
+                         .where(Producto.id.in_(list(deltas)) &
+                                (Producto.stock_actual + delta < 0)))
+            nombres = ', '.join(p.nombre for p in faltantes)
+            raise ValueError(f"Stock insuficiente para {nombres}")
+        
+        self._evaluar_alertas(list(deltas))
+
+    def _evaluar_alertas(self, producto_ids: List[int]) -> None:
+        """Informa al motor de alertas los productos cuyo stock o mínimo cambió."""
+        motor_alertas.evaluar(Producto
+                              .select(Producto.id, Producto.nombre, Producto.stock_actual,
+                                      Producto.stock_minimo, Producto.activo)
+                              .where(Producto.id.in_(producto_ids))
+                              .tuples())
+
+    @log_operacion("gestión_producto")
+    def generar_cortes_stock(self, forzar: bool = False) -> int:
+        """
+        Guarda una foto del stock de todos los productos. Sin forzar, solo lo
+        hace si el último corte tiene más de DIAS_ENTRE_CORTES días.
+        
+        Args:
+            forzar (bool): Generar el corte aunque no corresponda todavía
+            
+        Returns:
+            int: Cantidad de productos incluidos en el corte
+        """
+        with db.atomic():
+            ultimo = CorteStock.select(fn.MAX(CorteStock.fecha)).scalar()
+            ahora = datetime.now()
+            if not forzar and ultimo and ultimo > ahora - timedelta(days=DIAS_ENTRE_CORTES):
+                return 0
+            
+            return (CorteStock
+                    .insert_from(
+                        Producto.select(Producto.id, Value(ahora), Producto.stock_actual),
+                        [CorteStock.producto, CorteStock.fecha, CorteStock.stock])
+                    .execute())
+
+    @log_operacion("consulta")
+    def obtener_stock_a_fecha(self, producto_id: int, fecha: datetime) -> int:
+        """
+        Obtiene el stock que tenía un producto en una fecha: parte del último
+        corte anterior y suma solo los movimientos posteriores a él.
+        
+        Args:
+            producto_id (int): ID del producto
+            fecha (datetime): Fecha a consultar
+            
+        Returns:
+            int: Stock del producto a esa fecha
+        """
+        movimientos = MovimientoStock.select(fn.COALESCE(fn.SUM(MovimientoStock.cantidad), 0))
+        
+        # Una sola lectura consistente: el stock actual y los movimientos que
+        # se le descuentan corresponden al mismo momento
+        with db_lectura.atomic():
+            corte = lectura(CorteStock
+                            .select(CorteStock.fecha, CorteStock.stock)
+                            .where((CorteStock.producto == producto_id) &
+                                   (CorteStock.fecha <= fecha))
+                            .order_by(CorteStock.fecha.desc())
+                            .limit(1)).first()
+            
+            if corte:
+                delta = lectura(movimientos.where(
+                    (MovimientoStock.producto == producto_id) &
+                    (MovimientoStock.fecha > corte.fecha) &
+                    (MovimientoStock.fecha <= fecha))).scalar()
+                return corte.stock + delta
+            
+            # Sin corte previo se descuenta desde el stock actual hacia atrás
+            stock_actual = lectura(Producto
+                                   .select(Producto.stock_actual)
+                                   .where(Producto.id == producto_id)).scalar()
+            if stock_actual is None:
+                raise Producto.DoesNotExist(f"Producto {producto_id} no encontrado")
+            posteriores = lectura(movimientos.where(
+                (MovimientoStock.producto == producto_id) &
+                (MovimientoStock.fecha > fecha))).scalar()
+            return stock_actual - posteriores
+
+    @log_operacion("consulta")
+    def obtener_movimientos_stock(self, producto_id: int, desde: Optional[datetime] = None,
+                                  hasta: Optional[datetime] = None) -> List[MovimientoStock]:
+        """
+        Obtiene los movimientos del diario de un producto.
+        
+        Args:
+            producto_id (int): ID del producto
+            desde (Optional[datetime]): Fecha inicial
+            hasta (Optional[datetime]): Fecha final
+            
+        Returns:
+            List[MovimientoStock]: Movimientos ordenados por fecha
+        """
+        query = (MovimientoStock
+                 .select()
+                 .where(MovimientoStock.producto == producto_id)
+                 .order_by(MovimientoStock.fecha))
+        return list(lectura(filtrar_fechas(query, MovimientoStock.fecha, desde, hasta)))
 
     # CRUD Proveedores
     @log_operacion("gestión_proveedor")
@@ -140,6 +406,7 @@ class Controlador:
             proveedor = Proveedor.create(
                 nombre=nombre,
                 telefono=telefono,
+                telefono_normalizado=normalizar_telefono(telefono),
                 email=email,
                 direccion=direccion
             )
@@ -150,8 +417,10 @@ class Controlador:
         """Actualiza los datos de un proveedor existente."""
         if 'email' in datos and datos['email'] and not validar_email(datos['email']):
             raise ValueError("Email inválido")
-        if 'telefono' in datos and not validar_telefono(datos['telefono']):
-            raise ValueError("Teléfono inválido")
+        if 'telefono' in datos:
+            if not validar_telefono(datos['telefono']):
+                raise ValueError("Teléfono inválido")
+            datos['telefono_normalizado'] = normalizar_telefono(datos['telefono'])
         
         with db.atomic():
             proveedor = Proveedor.get_by_id(proveedor_id)
@@ -160,6 +429,116 @@ class Controlador:
             proveedor.save()
         return proveedor
 
+    # Importación de clientes y proveedores desde archivos
+    @staticmethod
+    def _leer_columnas(ruta: str) -> Dict[str, np.ndarray]:
+        """
+        Lee un CSV o Excel como columnas de texto, con los encabezados en
+        minúsculas (nombre, telefono, direccion, email, limite_credito).
+        """
+        import pandas as pd
+        
+        if ruta.lower().endswith(('.xlsx', '.xls')):
+            df = pd.read_excel(ruta, dtype=str, keep_default_na=False)
+        else:
+            df = pd.read_csv(ruta, dtype=str, keep_default_na=False)
+        return {str(columna).strip().lower(): df[columna].to_numpy() for columna in df.columns}
+
+    @staticmethod
+    def _telefonos_registrados(modelo):
+        """Función para validar_lote: teléfonos normalizados ya cargados en el modelo."""
+        def registrados(telefonos: List[str]) -> set:
+            # Todos los teléfonos en un solo parámetro JSON: una consulta
+            # sobre el índice, sin armar un IN con cientos de miles de valores
+            query = (modelo
+                     .select(modelo.telefono_normalizado)
+                     .where(modelo.telefono_normalizado.in_(
+                         SQL('(SELECT value FROM json_each(?))', (json.dumps(telefonos),))))
+                     .tuples())
+            return {telefono for telefono, in lectura(query)}
+        return registrados
+
+    def _importar(self, modelo, columnas: Dict[str, np.ndarray], obligatorias: Tuple[str, ...],
+                  montos: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """
+        Valida todas las columnas de una vez y carga las filas válidas en
+        una sola transacción. Las filas con errores no se cargan.
+        """
+        resultado = validar_lote(columnas, obligatorias, montos,
+                                 registrados=self._telefonos_registrados(modelo))
+        opcionales = [nombre for nombre in ('direccion', 'email', *montos)
+                      if nombre in resultado.columnas and nombre not in obligatorias]
+        nombres = [*obligatorias, 'telefono_normalizado', *opcionales]
+        # Un valor vacío deja el email en NULL, los montos en 0 y el resto en ''
+        vacios = {'email': None, **{nombre: Decimal('0') for nombre in montos}}
+        
+        filas = []
+        for valores in resultado.filas_validas(*nombres):
+            fila = {'direccion': ''}
+            fila.update((nombre, valor if valor != '' else vacios.get(nombre, ''))
+                        for nombre, valor in zip(nombres, valores))
+            filas.append(fila)
+        with self._transaccion():
+            self._insertar_filas(modelo, filas)
+        return {'importadas': len(filas), 'errores': resultado.errores}
+
+    @staticmethod
+    def _insertar_filas(modelo, filas: List[Dict[str, Any]]):
+        """
+        Inserta muchas filas con una sola sentencia preparada (executemany):
+        con cientos de miles de valores, armar el SQL de cada lote con
+        insert_many cuesta más que la inserción misma. Los campos que no
+        vienen en las filas toman su valor por defecto.
+        """
+        if not filas:
+            return
+        campos = [modelo._meta.fields[nombre] for nombre in filas[0]]
+        por_defecto = [campo for campo in modelo._meta.sorted_fields
+                       if campo.name not in filas[0] and campo.default is not None
+                       and not campo.primary_key]
+        fijos = [campo.db_value(campo.default() if callable(campo.default) else campo.default)
+                 for campo in por_defecto]
+        columnas = ', '.join(f'"{campo.column_name}"' for campo in campos + por_defecto)
+        marcas = ', '.join('?' * (len(campos) + len(por_defecto)))
+        db.cursor().executemany(
+            f'INSERT INTO "{modelo._meta.table_name}" ({columnas}) VALUES ({marcas})',
+            ([campo.db_value(fila[campo.name]) for campo in campos] + fijos for fila in filas))
+
+    @log_operacion("gestión_cliente")
+    @reintentar_si_bloqueada
+    def importar_clientes(self, ruta: str) -> Dict[str, Any]:
+        """
+        Importa clientes desde un CSV o Excel. Valida el archivo completo por
+        columnas (obligatorios, teléfono, email, límite de crédito y
+        teléfonos repetidos o ya registrados) y carga solo las filas válidas.
+        
+        Args:
+            ruta (str): Archivo con columnas nombre, telefono y opcionalmente
+                direccion, email y limite_credito
+            
+        Returns:
+            Dict[str, Any]: Cantidad importada y lista de ErrorFila (fila 0 =
+                primera fila de datos)
+        """
+        return self._importar(Cliente, self._leer_columnas(ruta), ('nombre', 'telefono'),
+                              montos=('limite_credito',))
+
+    @log_operacion("gestión_proveedor")
+    @reintentar_si_bloqueada
+    def importar_proveedores(self, ruta: str) -> Dict[str, Any]:
+        """
+        Importa proveedores desde un CSV o Excel, con la misma validación que
+        importar_clientes.
+        
+        Args:
+            ruta (str): Archivo con columnas nombre, telefono y opcionalmente
+                direccion y email
+            
+        Returns:
+            Dict[str, Any]: Cantidad importada y lista de ErrorFila
+        """
+        return self._importar(Proveedor, self._leer_columnas(ruta), ('nombre', 'telefono'))
+
     @log_operacion("gestión_proveedor")
     def eliminar_proveedor(self, proveedor_id: int) -> bool:
         """Elimina (desactiva) un proveedor."""
@@ -170,35 +549,71 @@ class Controlador:
             return True
 
     # Métodos de consulta
+    # Las listas devuelven filas livianas (NamedTuple) armadas con .tuples();
+    # para editar un registro se usa obtener_*_por_id, que trae el Model.
+    @staticmethod
+    def _consulta_clientes():
+        return Cliente.select(
+            Cliente.id, Cliente.nombre, Cliente.telefono,
+            Cliente.direccion, Cliente.email
+        )
+
+    @staticmethod
+    def _consulta_productos():
+        return (Producto
+                .select(
+                    Producto.id, Producto.nombre, Producto.descripcion,
+                    Producto.precio_unitario, Producto.stock_actual,
+                    Producto.stock_minimo, Producto.proveedor_id, Proveedor.nombre
+                )
+                .join(Proveedor))
+
+    @staticmethod
+    def _consulta_proveedores():
+        return Proveedor.select(
+            Proveedor.id, Proveedor.nombre, Proveedor.telefono,
+            Proveedor.email, Proveedor.direccion
+        )
+
+    @staticmethod
+    def _consulta_ventas():
+        return (Venta
+                .select(
+                    Venta.id, Venta.fecha, Venta.cliente_id,
+                    Cliente.nombre, Venta.total, Venta.pagada
+                )
+                .join(Cliente))
+
+    @staticmethod
+    def _filas(query, fila):
+        return list(map(fila._make, query.tuples()))
+
     @log_operacion("consulta")
-    def obtener_todos_clientes(self) -> List[Cliente]:
+    def obtener_todos_clientes(self) -> List[ClienteFila]:
         """
         Obtiene todos los clientes activos ordenados por nombre.
         
         Returns:
-            List[Cliente]: Lista de clientes activos
+            List[ClienteFila]: Lista de clientes activos
         """
-        return (Cliente
-                .select()
-                .where(Cliente.activo == True)
-                .order_by(Cliente.nombre))
+        return self._filas(self._consulta_clientes()
+                           .where(Cliente.activo == True)
+                           .order_by(Cliente.nombre), ClienteFila)
 
     @log_operacion("consulta")
-    def obtener_todos_productos(self) -> List[Producto]:
-        return (Producto
-                .select()
-                .where(Producto.activo == True)
-                .order_by(Producto.nombre))
+    def obtener_todos_productos(self) -> List[ProductoFila]:
+        return self._filas(self._consulta_productos()
+                           .where(Producto.activo == True)
+                           .order_by(Producto.nombre), ProductoFila)
 
     @log_operacion("consulta")
-    def obtener_todos_proveedores(self) -> List[Proveedor]:
-        return (Proveedor
-                .select()
-                .where(Proveedor.activo == True)
-                .order_by(Proveedor.nombre))
+    def obtener_todos_proveedores(self) -> List[ProveedorFila]:
+        return self._filas(self._consulta_proveedores()
+                           .where(Proveedor.activo == True)
+                           .order_by(Proveedor.nombre), ProveedorFila)
 
     @log_operacion("consulta")
-    def buscar_clientes(self, texto: str) -> List[Cliente]:
+    def buscar_clientes(self, texto: str) -> List[ClienteFila]:
         """
         Busca clientes por nombre, teléfono o email.
         
@@ -206,56 +621,106 @@ class Controlador:
             texto (str): Texto a buscar
             
         Returns:
-            List[Cliente]: Lista de clientes que coinciden con la búsqueda
+            List[ClienteFila]: Lista de clientes que coinciden con la búsqueda
         """
+        return self._filas(self._consulta_clientes()
+                           .where((Cliente.activo == True) & self._filtro_clientes(texto))
+                           .order_by(Cliente.nombre), ClienteFila)
+
+    @staticmethod
+    def _filtro_clientes(texto: str):
+        digitos = normalizar_telefono(texto)
         texto = f"%{texto}%"
-        return (Cliente
-                .select()
-                .where(
-                    (Cliente.activo == True) &
-                    (
-                        (Cliente.nombre ** texto) |
-                        (Cliente.telefono ** texto) |
-                        (Cliente.email ** texto)
-                    )
-                )
-                .order_by(Cliente.nombre))
+        filtro = ((Cliente.nombre ** texto) |
+                  (Cliente.telefono ** texto) |
+                  (Cliente.email ** texto))
+        if digitos:
+            # El teléfono se encuentra aunque se escriba con otro formato
+            filtro |= (Cliente.telefono_normalizado ** f"%{digitos}%")
+        return filtro
 
     @log_operacion("consulta")
-    def buscar_productos(self, texto: str) -> List[Producto]:
+    def buscar_cliente_por_telefono(self, telefono: str) -> Optional[Cliente]:
+        """
+        Busca un cliente activo por teléfono escrito en cualquier formato,
+        por igualdad sobre el índice del teléfono normalizado.
+        
+        Args:
+            telefono (str): Teléfono a buscar
+            
+        Returns:
+            Optional[Cliente]: Cliente encontrado o None
+        """
+        normalizado = normalizar_telefono(telefono)
+        if not normalizado:
+            return None
+        return lectura(Cliente.select()
+                       .where((Cliente.telefono_normalizado == normalizado) &
+                              (Cliente.activo == True))).first()
+
+    @log_operacion("consulta")
+    def obtener_pagina_clientes(self, texto: str = "", despues: Optional[Tuple[str, int]] = None,
+                                limite: int = FILAS_POR_LOTE) -> List[ClienteFila]:
+        """
+        Obtiene una página de clientes activos ordenados por nombre. La página
+        siguiente se pide a partir del (nombre, id) de la última fila recibida
+        en lugar de un OFFSET, así cada página cuesta lo mismo sin importar
+        cuántas se leyeron antes. Usa la conexión de solo lectura, por lo que
+        se puede llamar desde un hilo en segundo plano.
+        
+        Args:
+            texto (str): Texto a buscar en nombre, teléfono o email (vacío: todos)
+            despues (Optional[Tuple[str, int]]): Nombre e ID de la última fila de la página anterior
+            limite (int): Cantidad máxima de filas
+            
+        Returns:
+            List[ClienteFila]: Clientes de la página; menos de `limite` indica que no hay más
+        """
+        query = self._consulta_clientes().where(Cliente.activo == True)
+        if texto:
+            query = query.where(self._filtro_clientes(texto))
+        if despues is not None:
+            query = query.where(Fila(Cliente.nombre, Cliente.id) > Fila(*despues))
+        return self._filas(lectura(query
+                                   .order_by(Cliente.nombre, Cliente.id)
+                                   .limit(limite)), ClienteFila)
+
+    @log_operacion("consulta")
+    def buscar_productos(self, texto: str) -> List[ProductoFila]:
         """Busca productos por nombre o descripción."""
         texto = f"%{texto}%"
-        return (Producto
-                .select()
-                .where(
-                    (Producto.activo == True) &
-                    (
-                        (Producto.nombre ** texto) |
-                        (Producto.descripcion ** texto)
-                    )
-                )
-                .order_by(Producto.nombre))
+        return self._filas(self._consulta_productos()
+                           .where(
+                               (Producto.activo == True) &
+                               (
+                                   (Producto.nombre ** texto) |
+                                   (Producto.descripcion ** texto)
+                               )
+                           )
+                           .order_by(Producto.nombre), ProductoFila)
 
     @log_operacion("consulta")
-    def buscar_proveedores(self, texto: str) -> List[Proveedor]:
+    def buscar_proveedores(self, texto: str) -> List[ProveedorFila]:
         """Busca proveedores por nombre, teléfono o email."""
         texto = f"%{texto}%"
-        return (Proveedor
-                .select()
-                .where(
-                    (Proveedor.activo == True) &
-                    (
-                        (Proveedor.nombre ** texto) |
-                        (Proveedor.telefono ** texto) |
-                        (Proveedor.email ** texto)
-                    )
-                )
-                .order_by(Proveedor.nombre))
+        return self._filas(self._consulta_proveedores()
+                           .where(
+                               (Proveedor.activo == True) &
+                               (
+                                   (Proveedor.nombre ** texto) |
+                                   (Proveedor.telefono ** texto) |
+                                   (Proveedor.email ** texto)
+                               )
+                           )
+                           .order_by(Proveedor.nombre), ProveedorFila)
 
     # Gestión de Ventas
     @log_operacion("gestión_venta")
-    def registrar_venta(self, cliente_id: int, 
-                       items: List[Dict[str, int]]) -> Tuple[Venta, List[DetalleVenta]]:
+    @reintentar_si_bloqueada
+    def registrar_venta(self, cliente_id: int, items: List[Dict[str, int]],
+                       permitir_exceso_credito: bool = False,
+                       fecha: Optional[datetime] = None,
+                       id_externo: Optional[str] = None) -> Tuple[Venta, List[DetalleVenta]]:
         """
         Registra una nueva venta.
         
@@ -263,19 +728,42 @@ class Controlador:
             cliente_id (int): ID del cliente
             items (List[Dict[str, int]]): Lista de productos y cantidades
                 [{"producto_id": id, "cantidad": cantidad}, ...]
+            permitir_exceso_credito (bool): Registrar aunque supere el límite de
+                crédito, dejando la venta marcada con excede_credito
+            fecha (Optional[datetime]): Fecha de la venta (por defecto, ahora)
+            id_externo (Optional[str]): Identificador asignado por quien la
+                cargó (terminal móvil o cliente de la API). Si ya hay una
+                venta con ese identificador se devuelve esa sin registrar
+                otra, así un reintento no la duplica
             
         Returns:
             Tuple[Venta, List[DetalleVenta]]: Venta y sus detalles
         """
-        with db.atomic():
+        if not items:
+            raise ValueError("La venta no tiene productos")
+        # Una cantidad negativa pasaría el control de stock y lo aumentaría
+        if any(item["cantidad"] <= 0 for item in items):
+            raise ValueError("La cantidad debe ser mayor a cero")
+        
+        with self._transaccion():
+            if id_externo is not None:
+                existente = Venta.get_or_none(Venta.id_externo == id_externo)
+                if existente is not None:
+                    if existente.cliente_id != cliente_id:
+                        raise ValueError("El id_externo ya corresponde a una venta de otro cliente")
+                    return existente, list(existente.detalles)
+            
             # Crear venta
             venta = Venta.create(
                 cliente_id=cliente_id,
-                fecha=datetime.now(),
-                total=0
+                fecha=fecha or datetime.now(),
+                total=0,
+                id_externo=id_externo
             )
             
             detalles = []
+            movimientos = []
+            reservado = defaultdict(int)
             total_venta = Decimal('0')
             
             # Procesar cada item
@@ -283,8 +771,10 @@ class Controlador:
                 producto = Producto.get_by_id(item["producto_id"])
                 cantidad = item["cantidad"]
                 
-                if producto.stock_actual < cantidad:
+                # Se descuenta lo ya reservado por otros items del mismo producto
+                if producto.stock_actual - reservado[producto.id] < cantidad:
                     raise ValueError(f"Stock insuficiente para {producto.nombre}")
+                reservado[producto.id] += cantidad
                 
                 subtotal = producto.precio_unitario * cantidad
                 
@@ -298,61 +788,144 @@ class Controlador:
                 )
                 detalles.append(detalle)
                 
-                # Actualizar stock
-                producto.stock_actual -= cantidad
-                producto.save()
+                movimientos.append({
+                    'producto': producto.id,
+                    'tipo': MOVIMIENTO_VENTA,
+                    'cantidad': -cantidad,
+                    'referencia': venta.id
+                })
                 
                 total_venta += subtotal
             
+            # Actualizar stock: diario y contadores en bloque
+            self._aplicar_movimientos(movimientos)
+            
+            # Control de crédito sobre el saldo mantenido del cliente: el
+            # mismo UPDATE que suma la deuda verifica el límite
+            if not self._sumar_saldo(cliente_id, total_venta, controlar_limite=True):
+                if not permitir_exceso_credito:
+                    raise LimiteCreditoExcedido(
+                        "La venta supera el límite de crédito del cliente")
+                self._sumar_saldo(cliente_id, total_venta)
+                venta.excede_credito = True
+            
             # Actualizar total de la venta
             venta.total = total_venta
             venta.save()
+            sumar_venta(venta.fecha, total_venta,
+                        [(detalle.producto_id, detalle.cantidad, detalle.subtotal)
+                         for detalle in detalles])
             
             return venta, detalles
 
     @log_operacion("gestión_venta")
+    @reintentar_si_bloqueada
+    def registrar_ventas(self, ventas: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Registra varias ventas independientes en una sola transacción, con un
+        único commit para todo el lote. Cada venta corre en su propio punto de
+        guardado: si una se rechaza (stock, crédito, producto inexistente) se
+        revierte solo esa y el resto sigue.
+        
+        Args:
+            ventas (List[Dict[str, Any]]): Argumentos de registrar_venta por venta
+                [{"cliente_id": id, "items": [...], "permitir_exceso_credito": bool}, ...]
+            
+        Returns:
+            List[Any]: Por venta, la tupla (Venta, detalles) o la excepción que la rechazó
+        """
+        resultados = []
+        with self._transaccion():
+            for venta in ventas:
+                try:
+                    resultados.append(self.registrar_venta(**venta))
+                except (ValueError, DoesNotExist) as e:
+                    resultados.append(e)
+        return resultados
+
+    @log_operacion("gestión_venta")
+    @reintentar_si_bloqueada
     def anular_venta(self, venta_id: int) -> bool:
         """Anula una venta y restaura el stock."""
-        with db.atomic():
+        with self._transaccion():
             venta = Venta.get_by_id(venta_id)
             if venta.pagada:
                 raise ValueError("No se puede anular una venta pagada")
+            if venta.monto_pagado > 0:
+                raise ValueError("La venta tiene pagos registrados; anúlelos primero")
             
             # Restaurar stock
-            for detalle in venta.detalles:
-                producto = detalle.producto
-                producto.stock_actual += detalle.cantidad
-                producto.save()
+            detalles = list(venta.detalles)
+            self._aplicar_movimientos([{
+                'producto': detalle.producto_id,
+                'tipo': MOVIMIENTO_ANULACION,
+                'cantidad': detalle.cantidad,
+                'referencia': venta.id
+            } for detalle in detalles])
+            
+            self._sumar_saldo(venta.cliente_id, -venta.total)
+            sumar_venta(venta.fecha, venta.total,
+                        [(detalle.producto_id, detalle.cantidad, detalle.subtotal)
+                         for detalle in detalles], signo=-1)
             
             # Eliminar detalles y venta
             DetalleVenta.delete().where(DetalleVenta.venta == venta).execute()
             venta.delete_instance()
             return True
 
+    @staticmethod
+    def _sumar_saldo(cliente_id: int, monto: Decimal, controlar_limite: bool = False) -> bool:
+        """
+        Suma al saldo mantenido del cliente dentro de la transacción en curso.
+        
+        Args:
+            cliente_id (int): ID del cliente
+            monto (Decimal): Importe a sumar (negativo para pagos)
+            controlar_limite (bool): No sumar si supera el límite de crédito
+            
+        Returns:
+            bool: False si el límite lo impidió
+        """
+        # Un solo UPDATE condicional: suma y controla el límite a la vez, y
+        # la cantidad de filas afectadas dice si se aplicó
+        condicion = Cliente.id == cliente_id
+        if controlar_limite:
+            condicion &= ((Cliente.limite_credito <= 0) |
+                          (Cliente.saldo + monto <= Cliente.limite_credito))
+        if not Cliente.update(saldo=Cliente.saldo + monto).where(condicion).execute():
+            # Solo cuando no se aplicó se averigua si fue el límite
+            if not Cliente.select().where(Cliente.id == cliente_id).exists():
+                raise ValueError("Cliente no encontrado")
+            return False
+        sumar_saldo_pendiente(monto)
+        return True
+
     # Gestión de Pagos
     @log_operacion("gestión_pago")
-    def registrar_pago(self, venta_id: int, monto: float, 
+    @reintentar_si_bloqueada
+    def registrar_pago(self, venta_id: int, monto: Decimal, 
                       metodo_pago: str, notas: Optional[str] = None) -> Pago:
         """
         Registra un pago para una venta.
         
         Args:
             venta_id (int): ID de la venta
-            monto (float): Monto del pago
+            monto (Decimal): Monto del pago
             metodo_pago (str): Método de pago utilizado
             notas (Optional[str]): Notas adicionales
             
         Returns:
             Pago: Instancia del pago creado
         """
-        with db.atomic():
+        monto = a_decimal(monto)
+        if monto <= 0:
+            raise ValueError("El monto del pago debe ser mayor a cero")
+        
+        with self._transaccion():
             venta = Venta.get_by_id(venta_id)
             
             # Verificar si el monto excede el total pendiente
-            pagos_previos = Pago.select(fn.SUM(Pago.monto)).where(Pago.venta == venta).scalar() or 0
-            pendiente = float(venta.total) - float(pagos_previos)
-            
-            if float(monto) > pendiente:
+            if monto > venta.total - venta.monto_pagado:
                 raise ValueError("El monto del pago excede el total pendiente")
             
             pago = Pago.create(
@@ -362,75 +935,757 @@ class Controlador:
                 notas=notas
             )
             
-            # Actualizar estado de la venta si está completamente pagada
-            if float(pagos_previos) + float(monto) >= float(venta.total):
-                venta.pagada = True
-                venta.save()
-                
+            # Actualizar lo pagado, el estado de la venta y el saldo del cliente
+            (Venta
+             .update(monto_pagado=Venta.monto_pagado + monto,
+                     pagada=venta.monto_pagado + monto >= venta.total)
+             .where(Venta.id == venta.id)
+             .execute())
+            self._sumar_saldo(venta.cliente_id, -monto)
+            sumar_cobro(pago.fecha, monto)
             return pago
 
     @log_operacion("gestión_pago")
+    @reintentar_si_bloqueada
+    def registrar_pago_cliente(self, cliente_id: int, monto: Decimal, metodo_pago: str,
+                               notas: Optional[str] = None) -> List[Tuple[int, Decimal]]:
+        """
+        Imputa un pago del cliente a sus ventas impagas, de la más antigua a la
+        más nueva (FIFO), en una sola transacción: un INSERT por lote de pagos
+        y un UPDATE para lo pagado y el estado de todas las ventas alcanzadas.
+        
+        Args:
+            cliente_id (int): ID del cliente
+            monto (Decimal): Monto total recibido
+            metodo_pago (str): Método de pago utilizado
+            notas (Optional[str]): Notas adicionales
+            
+        Returns:
+            List[Tuple[int, Decimal]]: Venta y monto imputado a cada una
+        """
+        monto = a_decimal(monto)
+        if monto <= 0:
+            raise ValueError("El monto del pago debe ser mayor a cero")
+        
+        with self._transaccion():
+            cliente = Cliente.get_by_id(cliente_id)
+            impagas = (Venta
+                       .select(Venta.id, Venta.total, Venta.monto_pagado)
+                       .where((Venta.cliente == cliente) & (Venta.pagada == False))
+                       .order_by(Venta.fecha, Venta.id)
+                       .tuples())
+            
+            imputaciones = []
+            nuevos_montos = []
+            pagadas = []
+            resto = monto
+            for venta_id, total, pagado in impagas:
+                if not resto:
+                    break
+                saldo = total - pagado
+                if saldo <= 0:
+                    continue
+                imputado = min(resto, saldo)
+                resto -= imputado
+                imputaciones.append((venta_id, imputado))
+                nuevos_montos.append((venta_id, pagado + imputado))
+                if imputado == saldo:
+                    pagadas.append(venta_id)
+            
+            if resto:
+                raise ValueError("El monto del pago excede el saldo pendiente del cliente")
+            
+            ahora = datetime.now()
+            for lote in chunked(imputaciones, FILAS_POR_LOTE):
+                Pago.insert_many([{
+                    'venta': venta_id,
+                    'fecha': ahora,
+                    'monto': imputado,
+                    'metodo_pago': metodo_pago,
+                    'notas': notas
+                } for venta_id, imputado in lote]).execute()
+            
+            # Los valores de un CASE no pasan por el campo: van ya en centavos
+            ids = [venta_id for venta_id, _ in imputaciones]
+            (Venta
+             .update(monto_pagado=Case(Venta.id, [(venta_id, a_centavos(nuevo))
+                                                  for venta_id, nuevo in nuevos_montos]),
+                     pagada=Venta.id.in_(pagadas))
+             .where(Venta.id.in_(ids))
+             .execute())
+            self._sumar_saldo(cliente.id, -monto)
+            sumar_cobro(ahora, monto)
+            return imputaciones
+
+    @log_operacion("gestión_pago")
+    @reintentar_si_bloqueada
     def anular_pago(self, pago_id: int) -> bool:
         """Anula un pago y actualiza el estado de la venta."""
-        with db.atomic():
+        with self._transaccion():
             pago = Pago.get_by_id(pago_id)
             venta = pago.venta
             
-            # Actualizar estado de la venta
-            venta.pagada = False
-            venta.save()
+            # Actualizar lo pagado; la venta sigue pagada solo si lo restante
+            # todavía cubre el total (p. ej. un pago duplicado)
+            pagado = venta.monto_pagado - pago.monto
+            (Venta
+             .update(monto_pagado=Venta.monto_pagado - pago.monto,
+                     pagada=pagado >= venta.total)
+             .where(Venta.id == venta.id)
+             .execute())
+            self._sumar_saldo(venta.cliente_id, pago.monto)
+            sumar_cobro(pago.fecha, -pago.monto)
             
             # Eliminar pago
             pago.delete_instance()
             return True
 
+    def _pagos_inconsistentes(self, ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Ventas cuyo monto_pagado o pagada no coinciden con sus pagos. Sin ids
+        recorre todas en la base de solo lectura; con ids las recalcula en la
+        conexión actual (dentro de la transacción que va a reparar).
+        """
+        pagos = (Pago
+                 .select(Pago.venta.alias('venta_id'), fn.SUM(Pago.monto).alias('suma'))
+                 .group_by(Pago.venta))
+        if ids is not None:
+            pagos = pagos.where(Pago.venta.in_(ids))
+        pagos = pagos.alias('pagos')
+        query = (Venta
+                 .select(Venta.id, Venta.total, Venta.monto_pagado, Venta.pagada,
+                         fn.COALESCE(pagos.c.suma, 0))
+                 .join(pagos, JOIN.LEFT_OUTER, on=(pagos.c.venta_id == Venta.id)))
+        query = lectura(query) if ids is None else query.where(Venta.id.in_(ids))
+
+        inconsistentes = []
+        for venta_id, total, monto_pagado, pagada, suma in query.tuples():
+            suma = de_centavos(suma)
+            # La misma regla que registrar_pago: una venta queda pagada
+            # cuando un pago cubre su total. Una venta de total cero
+            # (bonificada) no admite pagos y no se juzga por su estado.
+            correcta = suma >= total if total > 0 else bool(pagada)
+            if monto_pagado != suma or bool(pagada) != correcta:
+                inconsistentes.append({
+                    'venta_id': venta_id,
+                    'monto_pagado': monto_pagado,
+                    'pagada': bool(pagada),
+                    'monto_pagado_correcto': suma,
+                    'pagada_correcta': correcta
+                })
+        return inconsistentes
+
+    @log_operacion("gestión_pago")
+    @reintentar_si_bloqueada
+    def verificar_pagos(self, reparar: bool = False) -> List[Dict[str, Any]]:
+        """
+        Compara monto_pagado y pagada de cada venta con la suma real de sus
+        pagos. Sirve para bases anteriores a monto_pagado o modificadas por
+        fuera de la aplicación. Es una tarea de mantenimiento: el recorrido
+        usa la base de solo lectura y la reparación reserva la base solo
+        para volver a calcular y corregir las ventas que diferían.
+        
+        Args:
+            reparar (bool): Corregir las ventas inconsistentes
+            
+        Returns:
+            List[Dict[str, Any]]: Ventas inconsistentes con los valores
+                guardados y los correctos
+        """
+        inconsistentes = self._pagos_inconsistentes()
+        if reparar and inconsistentes:
+            with self._transaccion():
+                for lote in chunked(inconsistentes, FILAS_POR_LOTE):
+                    # Pudieron cambiar desde la lectura: se corrige lo vigente
+                    lote = self._pagos_inconsistentes([fila['venta_id'] for fila in lote])
+                    if not lote:
+                        continue
+                    (Venta
+                     .update(monto_pagado=Case(Venta.id, [(fila['venta_id'],
+                                                           a_centavos(fila['monto_pagado_correcto']))
+                                                          for fila in lote]),
+                             pagada=Venta.id.in_([fila['venta_id'] for fila in lote
+                                                  if fila['pagada_correcta']]))
+                     .where(Venta.id.in_([fila['venta_id'] for fila in lote]))
+                     .execute())
+        return inconsistentes
+
+    def _saldos_inconsistentes(self, ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Clientes cuyo saldo no coincide con la deuda de sus ventas impagas.
+        Sin ids recorre todos en la base de solo lectura; con ids los
+        recalcula en la conexión actual.
+        """
+        deudas = (Venta
+                  .select(Venta.cliente.alias('cliente_id'),
+                          fn.SUM(Venta.total - Venta.monto_pagado).alias('deuda'))
+                  .where(Venta.pagada == False)
+                  .group_by(Venta.cliente))
+        if ids is not None:
+            deudas = deudas.where(Venta.cliente.in_(ids))
+        deudas = deudas.alias('deudas')
+        query = (Cliente
+                 .select(Cliente.id, Cliente.saldo, fn.COALESCE(deudas.c.deuda, 0))
+                 .join(deudas, JOIN.LEFT_OUTER, on=(deudas.c.cliente_id == Cliente.id)))
+        query = lectura(query) if ids is None else query.where(Cliente.id.in_(ids))
+
+        return [{
+            'cliente_id': cliente_id,
+            'saldo': saldo,
+            'saldo_correcto': de_centavos(deuda)
+        } for cliente_id, saldo, deuda in query.tuples() if saldo != de_centavos(deuda)]
+
+    @log_operacion("gestión_pago")
+    @reintentar_si_bloqueada
+    def verificar_saldos(self, reparar: bool = False) -> List[Dict[str, Any]]:
+        """
+        Compara el saldo mantenido de cada cliente con la deuda de sus ventas
+        impagas. Como verificar_pagos, recorre en la base de solo lectura y
+        reserva la base solo para corregir los clientes que diferían.
+        
+        Args:
+            reparar (bool): Corregir los saldos inconsistentes
+            
+        Returns:
+            List[Dict[str, Any]]: Clientes inconsistentes con el saldo guardado y el correcto
+        """
+        inconsistentes = self._saldos_inconsistentes()
+        if reparar and inconsistentes:
+            with self._transaccion():
+                for lote in chunked(inconsistentes, FILAS_POR_LOTE):
+                    lote = self._saldos_inconsistentes([fila['cliente_id'] for fila in lote])
+                    if not lote:
+                        continue
+                    (Cliente
+                     .update(saldo=Case(Cliente.id, [(fila['cliente_id'], a_centavos(fila['saldo_correcto']))
+                                                     for fila in lote]))
+                     .where(Cliente.id.in_([fila['cliente_id'] for fila in lote]))
+                     .execute())
+                    sumar_saldo_pendiente(sum(fila['saldo_correcto'] - fila['saldo']
+                                              for fila in lote))
+        return inconsistentes
+
+    # Tablero
+    @log_operacion("consulta")
+    def obtener_tablero(self) -> Dict[str, Any]:
+        """
+        Obtiene los indicadores del tablero de inicio desde los acumuladores,
+        sin recorrer ventas ni pagos. Usa la conexión de solo lectura.
+        
+        Returns:
+            Dict[str, Any]: Indicadores del día (ver tablero.leer_tablero)
+        """
+        return leer_tablero()
+
+    @log_operacion("tablero")
+    @reintentar_si_bloqueada
+    def verificar_tablero(self, reparar: bool = False) -> List[Dict[str, Any]]:
+        """
+        Compara los acumuladores del tablero con lo calculado desde las ventas,
+        pagos y clientes de los últimos días (reconciliación periódica).
+        
+        Args:
+            reparar (bool): Reemplazar los acumuladores inconsistentes
+            
+        Returns:
+            List[Dict[str, Any]]: Indicadores inconsistentes con el valor guardado y el correcto
+        """
+        with self._transaccion():
+            return reconciliar_tablero(reparar)
+
+    @log_operacion("gestión_venta")
+    @reintentar_si_bloqueada
+    def archivar_ventas_antiguas(self, meses_abiertos: int = MESES_ABIERTOS) -> Dict[int, int]:
+        """
+        Mueve las ventas pagadas más antiguas a los archivos anuales. Los
+        reportes las siguen incluyendo a través de los resúmenes mensuales.
+
+        Args:
+            meses_abiertos (int): Meses recientes que quedan en la base principal
+
+        Returns:
+            Dict[int, int]: Ventas archivadas por año
+        """
+        if meses_abiertos < 1:
+            raise ValueError("Debe quedar al menos un mes abierto")
+        return archivar_ventas(meses_abiertos)
+
+    # Sincronización con terminales móviles
+    @log_operacion("sincronización")
+    @reintentar_si_bloqueada
+    def recibir_ventas_moviles(self, ventas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Registra un lote de ventas cargadas sin conexión en una terminal móvil.
+        Cada venta trae el id_externo que le asignó la terminal: si ya está
+        registrada (el lote se reenvió porque se perdió la respuesta) se
+        informa como duplicada sin volver a cargarla.
+
+        Ante un conflicto de stock prevalece la base: cada ítem se reduce a lo
+        disponible y la venta se informa como ajustada; si no queda nada por
+        registrar se rechaza. Se cobra el precio vigente en la base. El límite
+        de crédito no frena la venta (la mercadería ya se entregó) pero queda
+        marcada con excede_credito.
+
+        Args:
+            ventas (List[Dict[str, Any]]): Ventas de la terminal
+                [{"id_externo": str, "cliente_id": id, "fecha": datetime,
+                  "items": [{"producto_id": id, "cantidad": cantidad}, ...]}, ...]
+
+        Returns:
+            List[Dict[str, Any]]: Por venta: id_externo, estado (registrada,
+                duplicada, ajustada o rechazada), venta_id, total, items y mensaje
+        """
+        with self._transaccion():
+            existentes = dict(Venta
+                              .select(Venta.id_externo, Venta.id)
+                              .where(Venta.id_externo.in_([venta['id_externo'] for venta in ventas]))
+                              .tuples())
+            clientes = {cliente_id for cliente_id, in Cliente
+                        .select(Cliente.id)
+                        .where(Cliente.id.in_([venta['cliente_id'] for venta in ventas]) &
+                               (Cliente.activo == True))
+                        .tuples()}
+            disponible = dict(Producto
+                              .select(Producto.id, Producto.stock_actual)
+                              .where(Producto.id.in_([item['producto_id'] for venta in ventas
+                                                      for item in venta['items']]) &
+                                     (Producto.activo == True))
+                              .tuples())
+
+            resultados = []
+            for venta in ventas:
+                resultado = {
+                    'id_externo': venta['id_externo'],
+                    'estado': 'rechazada',
+                    'venta_id': existentes.get(venta['id_externo']),
+                    'total': None,
+                    'items': [],
+                    'mensaje': None
+                }
+                resultados.append(resultado)
+                if resultado['venta_id'] is not None:
+                    resultado['estado'] = 'duplicada'
+                    continue
+                if venta['cliente_id'] not in clientes:
+                    resultado['mensaje'] = "Cliente inexistente o inactivo"
+                    continue
+
+                pedido = defaultdict(int)
+                for item in venta['items']:
+                    pedido[item['producto_id']] += item['cantidad']
+                items = [{'producto_id': producto_id,
+                          'cantidad': min(cantidad, disponible.get(producto_id, 0))}
+                         for producto_id, cantidad in pedido.items()]
+                items = [item for item in items if item['cantidad'] > 0]
+                if not items:
+                    resultado['mensaje'] = "Sin stock para ningún producto de la venta"
+                    continue
+
+                try:
+                    registrada, _ = self.registrar_venta(
+                        venta['cliente_id'], items, permitir_exceso_credito=True,
+                        fecha=venta['fecha'], id_externo=venta['id_externo'])
+                except ValueError as e:
+                    resultado['mensaje'] = str(e)
+                    continue
+
+                for item in items:
+                    disponible[item['producto_id']] -= item['cantidad']
+                existentes[venta['id_externo']] = registrada.id
+                ajustada = len(items) < len(pedido) or any(
+                    item['cantidad'] < pedido[item['producto_id']] for item in items)
+                resultado.update(estado='ajustada' if ajustada else 'registrada',
+                                 venta_id=registrada.id, total=registrada.total, items=items)
+            return resultados
+
+    @log_operacion("sincronización")
+    def obtener_cambios_catalogo(self, marca: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Devuelve los productos y clientes que cambiaron desde la marca de la
+        última sincronización de una terminal (todos, si no tiene marca).
+        
+        Args:
+            marca (Optional[Dict[str, Any]]): Marca devuelta por la sincronización anterior
+            
+        Returns:
+            Dict[str, Any]: productos, clientes y la marca nueva
+        """
+        desde = (marca or {}).get('secuencia', 0)
+        # Una sola lectura consistente: la marca corresponde a lo devuelto
+        with db_lectura.atomic():
+            productos = lectura(Producto
+                                .select(Producto.id, Producto.nombre, Producto.precio_unitario,
+                                        Producto.stock_actual, Producto.activo)
+                                .where(Producto.secuencia > desde)).tuples()
+            clientes = lectura(Cliente
+                               .select(Cliente.id, Cliente.nombre, Cliente.telefono, Cliente.activo)
+                               .where(Cliente.secuencia > desde)).tuples()
+            return {
+                'productos': [dict(zip(('id', 'nombre', 'precio_unitario', 'stock_actual', 'activo'), fila))
+                              for fila in productos],
+                'clientes': [dict(zip(('id', 'nombre', 'telefono', 'activo'), fila))
+                             for fila in clientes],
+                'marca': {'secuencia': self._secuencia_actual()}
+            }
+
+    @staticmethod
+    def _secuencia_actual() -> int:
+        return lectura(SecuenciaCambios.select(SecuenciaCambios.valor)).scalar() or 0
+
+    @log_operacion("sincronización")
+    def obtener_cambios(self, desde: int = 0, limite: int = CAMBIOS_POR_LOTE) -> Dict[str, Any]:
+        """
+        Feed de cambios para réplicas: altas, modificaciones y bajas de los
+        modelos replicados posteriores a una secuencia, en orden y de a lotes
+        acotados. Una réplica se pone al día pidiendo desde su última
+        secuencia hasta que el lote llegue completo, con un costo
+        proporcional a los cambios y no al tamaño de la base.
+        
+        Args:
+            desde (int): Última secuencia aplicada por la réplica (0: todo)
+            limite (int): Cambios máximos por lote
+            
+        Returns:
+            Dict[str, Any]: cambios [{"tabla", "id", "secuencia", "borrado", "datos"}, ...],
+                hasta (secuencia para el próximo pedido) y completo (no quedan más)
+        """
+        if limite < 1:
+            raise ValueError("El límite debe ser mayor a cero")
+        
+        # Cada fuente aporta sus primeros limite + 1 cambios; todas se leen
+        # en la misma instantánea para que no se cuele un cambio intermedio
+        fuentes = []
+        with db_lectura.atomic():
+            for modelo in MODELOS_REPLICADOS:
+                tabla = modelo._meta.table_name
+                filas = lectura(modelo
+                                .select()
+                                .where(modelo.secuencia > desde)
+                                .order_by(modelo.secuencia)
+                                .limit(limite + 1)).dicts()
+                fuentes.append([{
+                    'tabla': tabla,
+                    'id': fila['id'],
+                    'secuencia': fila['secuencia'],
+                    'borrado': False,
+                    'datos': fila
+                } for fila in filas])
+            
+            borrados = lectura(RegistroBorrado
+                               .select(RegistroBorrado.tabla, RegistroBorrado.registro_id,
+                                       RegistroBorrado.secuencia)
+                               .where(RegistroBorrado.secuencia > desde)
+                               .order_by(RegistroBorrado.secuencia)
+                               .limit(limite + 1)).tuples()
+            fuentes.append([{
+                'tabla': tabla,
+                'id': registro_id,
+                'secuencia': secuencia,
+                'borrado': True,
+                'datos': None
+            } for tabla, registro_id, secuencia in borrados])
+            actual = self._secuencia_actual()
+        
+        cambios = list(islice(heapq.merge(*fuentes, key=lambda cambio: cambio['secuencia']),
+                              limite + 1))
+        completo = len(cambios) <= limite
+        cambios = cambios[:limite]
+        return {
+            'cambios': cambios,
+            'hasta': actual if completo else cambios[-1]['secuencia'],
+            'completo': completo
+        }
+
+    # Órdenes de compra
+    @log_operacion("gestión_compra")
+    @reintentar_si_bloqueada
+    def crear_orden_compra(self, proveedor_id: int, items: List[Dict[str, Any]],
+                           notas: Optional[str] = None) -> OrdenCompra:
+        """
+        Crea una orden de compra a un proveedor.
+        
+        Args:
+            proveedor_id (int): ID del proveedor
+            items (List[Dict[str, Any]]): Lista de items
+                [{"producto_id": id, "cantidad": cantidad, "costo_unitario": costo}, ...]
+            notas (Optional[str]): Notas adicionales
+            
+        Returns:
+            OrdenCompra: Instancia de la orden creada
+        """
+        if not items:
+            raise ValueError("La orden debe tener al menos un producto")
+        
+        cantidades = defaultdict(int)
+        costos = {}
+        for item in items:
+            if item['cantidad'] <= 0:
+                raise ValueError("Las cantidades deben ser mayores a cero")
+            cantidades[item['producto_id']] += item['cantidad']
+            if item.get('costo_unitario') is not None:
+                costos[item['producto_id']] = item['costo_unitario']
+        
+        with self._transaccion():
+            proveedor = Proveedor.get_by_id(proveedor_id)
+            validos = {producto_id for producto_id, in Producto
+                       .select(Producto.id)
+                       .where(Producto.id.in_(list(cantidades)) &
+                              (Producto.proveedor == proveedor) &
+                              (Producto.activo == True))
+                       .tuples()}
+            invalidos = set(cantidades) - validos
+            if invalidos:
+                raise ValueError(
+                    f"Productos inexistentes o de otro proveedor: {sorted(invalidos)}")
+            
+            orden = OrdenCompra.create(proveedor=proveedor, notas=notas)
+            for lote in chunked(cantidades.items(), FILAS_POR_LOTE):
+                DetalleOrdenCompra.insert_many([{
+                    'orden': orden.id,
+                    'producto': producto_id,
+                    'cantidad': cantidad,
+                    'costo_unitario': costos.get(producto_id)
+                } for producto_id, cantidad in lote]).execute()
+            return orden
+
+    @log_operacion("gestión_compra")
+    @reintentar_si_bloqueada
+    def recibir_orden_compra(self, orden_id: int,
+                             recibidos: Optional[Dict[int, int]] = None) -> OrdenCompra:
+        """
+        Recibe una orden completa en una sola transacción: un movimiento de
+        compra por producto y un único UPDATE de stock para todos.
+        
+        Args:
+            orden_id (int): ID de la orden
+            recibidos (Optional[Dict[int, int]]): Cantidad recibida por producto
+                cuando difiere de lo pedido; por defecto se recibe todo
+            
+        Returns:
+            OrdenCompra: Orden recibida
+        """
+        recibidos = recibidos or {}
+        ahora = datetime.now()
+        with self._transaccion():
+            # El cambio de estado condicional evita recibir dos veces la misma orden
+            if not (OrdenCompra
+                    .update(estado=ORDEN_RECIBIDA, fecha_recepcion=ahora)
+                    .where((OrdenCompra.id == orden_id) &
+                           (OrdenCompra.estado == ORDEN_PENDIENTE))
+                    .execute()):
+                raise ValueError("La orden no existe o ya no está pendiente")
+            
+            pedidos = dict(DetalleOrdenCompra
+                           .select(DetalleOrdenCompra.producto, DetalleOrdenCompra.cantidad)
+                           .where(DetalleOrdenCompra.orden == orden_id)
+                           .tuples())
+            ajenos = set(recibidos) - set(pedidos)
+            if ajenos:
+                raise ValueError(f"Productos que no están en la orden: {sorted(ajenos)}")
+            if any(cantidad < 0 for cantidad in recibidos.values()):
+                raise ValueError("Las cantidades recibidas no pueden ser negativas")
+            
+            cantidades = {producto_id: recibidos.get(producto_id, cantidad)
+                          for producto_id, cantidad in pedidos.items()}
+            self._aplicar_movimientos([{
+                'producto': producto_id,
+                'tipo': MOVIMIENTO_COMPRA,
+                'cantidad': cantidad,
+                'referencia': orden_id,
+                'fecha': ahora
+            } for producto_id, cantidad in cantidades.items() if cantidad])
+            
+            (DetalleOrdenCompra
+             .update(cantidad_recibida=Case(DetalleOrdenCompra.producto,
+                                            list(cantidades.items()), 0))
+             .where(DetalleOrdenCompra.orden == orden_id)
+             .execute())
+            return OrdenCompra.get_by_id(orden_id)
+
+    @log_operacion("gestión_compra")
+    @reintentar_si_bloqueada
+    def cancelar_orden_compra(self, orden_id: int) -> bool:
+        """Cancela una orden pendiente."""
+        with self._transaccion():
+            if not (OrdenCompra
+                    .update(estado=ORDEN_CANCELADA)
+                    .where((OrdenCompra.id == orden_id) &
+                           (OrdenCompra.estado == ORDEN_PENDIENTE))
+                    .execute()):
+                raise ValueError("La orden no existe o ya no está pendiente")
+            return True
+
+    @log_operacion("consulta")
+    def obtener_ordenes_compra(self, estado: Optional[str] = None,
+                               proveedor_id: Optional[int] = None) -> List[OrdenCompraFila]:
+        """Obtiene las órdenes de compra con la cantidad de items y unidades."""
+        query = (OrdenCompra
+                 .select(OrdenCompra.id, OrdenCompra.fecha, Proveedor.id, Proveedor.nombre,
+                         OrdenCompra.estado,
+                         fn.COUNT(DetalleOrdenCompra.id),
+                         fn.COALESCE(fn.SUM(DetalleOrdenCompra.cantidad), 0))
+                 .join(Proveedor)
+                 .switch(OrdenCompra)
+                 .join(DetalleOrdenCompra, JOIN.LEFT_OUTER)
+                 .group_by(OrdenCompra.id)
+                 .order_by(OrdenCompra.fecha.desc()))
+        if estado:
+            query = query.where(OrdenCompra.estado == estado)
+        if proveedor_id:
+            query = query.where(OrdenCompra.proveedor == proveedor_id)
+        return self._filas(lectura(query), OrdenCompraFila)
+
+    @log_operacion("consulta")
+    def obtener_detalles_orden(self, orden_id: int) -> List[DetalleOrdenCompra]:
+        """Obtiene los items de una orden de compra."""
+        return list(DetalleOrdenCompra
+                    .select(DetalleOrdenCompra, Producto)
+                    .join(Producto)
+                    .where(DetalleOrdenCompra.orden == orden_id)
+                    .order_by(Producto.nombre))
+
+    @log_operacion("consulta")
+    def sugerir_reposicion(self, proveedor_id: Optional[int] = None,
+                           dias_historial: int = DIAS_HISTORIAL_REPOSICION,
+                           dias_cobertura: int = DIAS_COBERTURA_REPOSICION
+                           ) -> List[SugerenciaReposicionFila]:
+        """
+        Calcula en una sola consulta la cantidad a pedir de cada producto:
+        el mínimo más la venta diaria reciente por los días de cobertura,
+        menos el stock actual y lo ya pedido en órdenes pendientes.
+        
+        Args:
+            proveedor_id (Optional[int]): Limitar a un proveedor
+            dias_historial (int): Días de ventas para estimar la venta diaria
+            dias_cobertura (int): Días de venta que debe cubrir la reposición
+            
+        Returns:
+            List[SugerenciaReposicionFila]: Productos a reponer
+        """
+        if dias_historial <= 0 or dias_cobertura < 0:
+            raise ValueError("Los días de historial y cobertura no son válidos")
+        
+        desde = datetime.now() - timedelta(days=dias_historial)
+        ventas = (DetalleVenta
+                  .select(DetalleVenta.producto.alias('producto_id'),
+                          fn.SUM(DetalleVenta.cantidad).alias('vendidas'))
+                  .join(Venta)
+                  .where(Venta.fecha >= desde)
+                  .group_by(DetalleVenta.producto)
+                  .alias('ventas'))
+        pendientes = (DetalleOrdenCompra
+                      .select(DetalleOrdenCompra.producto.alias('producto_id'),
+                              fn.SUM(DetalleOrdenCompra.cantidad).alias('en_camino'))
+                      .join(OrdenCompra)
+                      .where(OrdenCompra.estado == ORDEN_PENDIENTE)
+                      .group_by(DetalleOrdenCompra.producto)
+                      .alias('pendientes'))
+        
+        vendidas = fn.COALESCE(ventas.c.vendidas, 0)
+        en_camino = fn.COALESCE(pendientes.c.en_camino, 0)
+        # Redondeo hacia arriba con aritmética entera de SQLite
+        cobertura = (vendidas * dias_cobertura + dias_historial - 1) / dias_historial
+        sugerido = Producto.stock_minimo + cobertura - Producto.stock_actual - en_camino
+        
+        query = (Producto
+                 .select(Producto.id, Producto.nombre, Proveedor.id, Proveedor.nombre,
+                         Producto.stock_actual, Producto.stock_minimo,
+                         vendidas * 1.0 / dias_historial, en_camino, sugerido)
+                 .join(Proveedor)
+                 .join_from(Producto, ventas, JOIN.LEFT_OUTER,
+                            on=(ventas.c.producto_id == Producto.id))
+                 .join_from(Producto, pendientes, JOIN.LEFT_OUTER,
+                            on=(pendientes.c.producto_id == Producto.id))
+                 .where((Producto.activo == True) & (sugerido > 0))
+                 .order_by(Proveedor.nombre, Producto.nombre))
+        if proveedor_id:
+            query = query.where(Producto.proveedor == proveedor_id)
+        return self._filas(lectura(query), SugerenciaReposicionFila)
+
+    @log_operacion("gestión_compra")
+    @reintentar_si_bloqueada
+    def generar_ordenes_sugeridas(self, proveedor_id: Optional[int] = None) -> List[OrdenCompra]:
+        """Crea una orden pendiente por proveedor con las cantidades sugeridas."""
+        por_proveedor = defaultdict(list)
+        for sugerencia in self.sugerir_reposicion(proveedor_id):
+            por_proveedor[sugerencia.proveedor_id].append({
+                'producto_id': sugerencia.producto_id,
+                'cantidad': sugerencia.sugerido
+            })
+        
+        with self._transaccion():
+            return [self.crear_orden_compra(proveedor, items, notas="Reposición sugerida")
+                    for proveedor, items in por_proveedor.items()]
+
     # Reportes y consultas adicionales
     @log_operacion("consulta")
-    def obtener_reporte_ventas_cliente(self, desde: Optional[datetime] = None,
-                                     hasta: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    def obtener_lote_ventas_cliente(self, desde: Optional[datetime] = None,
+                                    hasta: Optional[datetime] = None) -> LoteColumnas:
         """
-        Obtiene el reporte de ventas por cliente.
+        Obtiene el reporte de ventas por cliente en formato columnar.
         
         Args:
             desde (Optional[datetime]): Fecha inicial
             hasta (Optional[datetime]): Fecha final
             
         Returns:
-            List[Dict[str, Any]]: Lista de datos del reporte
+            LoteColumnas: Columnas cliente, total_ventas, total_pagado y saldo
         """
+        # Ventas y pagos se agregan por separado para no multiplicar el total
+        # de una venta por la cantidad de pagos que tiene
+        ventas = filtrar_fechas(
+            Venta
+            .select(Venta.cliente_id, fn.SUM(Venta.total).alias('total'))
+            .group_by(Venta.cliente_id),
+            Venta.fecha, desde, hasta).alias('v')
+        pagos = filtrar_fechas(
+            Pago
+            .select(Venta.cliente_id, fn.SUM(Pago.monto).alias('pagado'))
+            .join(Venta)
+            .group_by(Venta.cliente_id),
+            Venta.fecha, desde, hasta).alias('p')
+        
         query = (Cliente
                 .select(
+                    Cliente.id,
                     Cliente.nombre,
-                    fn.SUM(Venta.total).alias('total_ventas'),
-                    fn.COALESCE(fn.SUM(Pago.monto), 0).alias('total_pagado')
+                    fn.COALESCE(ventas.c.total, 0),
+                    fn.COALESCE(pagos.c.pagado, 0)
                 )
-                .join(Venta, JOIN.LEFT_OUTER)
-                .join(Pago, JOIN.LEFT_OUTER)
+                .join(ventas, JOIN.LEFT_OUTER, on=(ventas.c.cliente_id == Cliente.id))
+                .join(pagos, JOIN.LEFT_OUTER, on=(pagos.c.cliente_id == Cliente.id))
                 .where(Cliente.activo == True))
         
-        if desde:
-            query = query.where(Venta.fecha >= desde)
-        if hasta:
-            query = query.where(Venta.fecha <= hasta)
-        
-        query = query.group_by(Cliente)
-        
-        resultados = []
-        for r in query:
-            resultados.append({
-                'cliente': r.nombre,
-                'total_ventas': float(r.total_ventas or 0),
-                'total_pagado': float(r.total_pagado or 0),
-                'saldo': float((r.total_ventas or 0) - (r.total_pagado or 0))
-            })
-        
-        return resultados
+        if desde or hasta:
+            query = query.where(ventas.c.total.is_null(False))
+        
+        # Lo archivado del rango sale de los resúmenes mensuales o del archivo anual
+        resumen = filtrar_fechas(
+            ResumenVentasArchivadas
+            .select(Cliente.id, Cliente.nombre,
+                    fn.SUM(ResumenVentasArchivadas.total_ventas),
+                    fn.SUM(ResumenVentasArchivadas.total_pagado))
+            .join(Cliente)
+            .where(Cliente.activo == True)
+            .group_by(Cliente.id),
+            ResumenVentasArchivadas.mes, desde, hasta)
+        
+        # Orden por id, también para los clientes que solo tienen lo archivado
+        filas = sorted(filas_con_archivo(query, desde, hasta, resumen), key=lambda fila: fila[0])
+        lote = LoteColumnas.desde_filas(filas, [
+            ('id', 'i8'),
+            ('cliente', 'O'),
+            ('total_ventas', CENTAVOS),
+            ('total_pagado', CENTAVOS)
+        ]).agrupar('id', ['total_ventas', 'total_pagado'])
+        lote.agregar_monto('saldo', lote['total_ventas'] - lote['total_pagado'])
+        return lote
 
     @log_operacion("consulta")
-    def obtener_reporte_productos(self, desde: Optional[datetime] = None,
-                                hasta: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    def obtener_reporte_ventas_cliente(self, desde: Optional[datetime] = None,
+                                     hasta: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
-        Obtiene el reporte de productos más vendidos.
+        Obtiene el reporte de ventas por cliente.
         
         Args:
             desde (Optional[datetime]): Fecha inicial
@@ -439,36 +1694,61 @@ class Controlador:
         Returns:
             List[Dict[str, Any]]: Lista de datos del reporte
         """
+        return self.obtener_lote_ventas_cliente(desde, hasta).a_registros()
+
+    @log_operacion("consulta")
+    def obtener_lote_productos(self, desde: Optional[datetime] = None,
+                               hasta: Optional[datetime] = None) -> LoteColumnas:
+        """
+        Obtiene el reporte de productos más vendidos en formato columnar.
+        
+        Args:
+            desde (Optional[datetime]): Fecha inicial
+            hasta (Optional[datetime]): Fecha final
+            
+        Returns:
+            LoteColumnas: Columnas producto, cantidad y total
+        """
         query = (Producto
                 .select(
+                    Producto.id,
                     Producto.nombre,
-                    fn.SUM(DetalleVenta.cantidad).alias('cantidad'),
-                    fn.SUM(DetalleVenta.subtotal).alias('total')
+                    fn.SUM(DetalleVenta.cantidad),
+                    fn.SUM(DetalleVenta.subtotal)
                 )
                 .join(DetalleVenta)
                 .join(Venta)
                 .where(Producto.activo == True))
         
-        if desde:
-            query = query.where(Venta.fecha >= desde)
-        if hasta:
-            query = query.where(Venta.fecha <= hasta)
-        
-        query = (query
-                .group_by(Producto)
-                .order_by(fn.SUM(DetalleVenta.cantidad).desc()))
-        
-        return [{
-            'producto': r.nombre,
-            'cantidad': int(r.cantidad or 0),
-            'total': float(r.total or 0)
-        } for r in query]
+        query = (filtrar_fechas(query, Venta.fecha, desde, hasta)
+                .group_by(Producto))
+        
+        resumen = filtrar_fechas(
+            ResumenProductosArchivados
+            .select(Producto.id, Producto.nombre,
+                    fn.SUM(ResumenProductosArchivados.cantidad),
+                    fn.SUM(ResumenProductosArchivados.total))
+            .join(Producto)
+            .where(Producto.activo == True)
+            .group_by(Producto.id),
+            ResumenProductosArchivados.mes, desde, hasta)
+        
+        # Por id antes de ordenar por cantidad: los empates quedan por id
+        filas = sorted(filas_con_archivo(query, desde, hasta, resumen), key=lambda fila: fila[0])
+        return (LoteColumnas.desde_filas(filas, [
+            ('id', 'i8'),
+            ('producto', 'O'),
+            ('cantidad', 'i8'),
+            ('total', CENTAVOS)
+        ])
+        .agrupar('id', ['cantidad', 'total'])
+        .ordenar('cantidad'))
 
     @log_operacion("consulta")
-    def obtener_reporte_pagos(self, desde: Optional[datetime] = None,
-                            hasta: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    def obtener_reporte_productos(self, desde: Optional[datetime] = None,
+                                hasta: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
-        Obtiene el reporte de pagos.
+        Obtiene el reporte de productos más vendidos.
         
         Args:
             desde (Optional[datetime]): Fecha inicial
@@ -477,58 +1757,139 @@ class Controlador:
         Returns:
             List[Dict[str, Any]]: Lista de datos del reporte
         """
+        return self.obtener_lote_productos(desde, hasta).a_registros()
+
+    @log_operacion("consulta")
+    def obtener_lote_pagos(self, desde: Optional[datetime] = None,
+                           hasta: Optional[datetime] = None) -> LoteColumnas:
+        """
+        Obtiene el reporte de pagos en formato columnar.
+        
+        Args:
+            desde (Optional[datetime]): Fecha inicial
+            hasta (Optional[datetime]): Fecha final
+            
+        Returns:
+            LoteColumnas: Columnas fecha, cliente, monto y metodo_pago
+        """
         query = (Pago
-                .select(Pago, Cliente)
+                .select(Pago.fecha, Cliente.nombre, Pago.monto, Pago.metodo_pago)
                 .join(Venta)
                 .join(Cliente)
                 .order_by(Pago.fecha.desc()))
         
-        if desde:
-            query = query.where(Pago.fecha >= desde)
-        if hasta:
-            query = query.where(Pago.fecha <= hasta)
+        query = filtrar_fechas(query, Pago.fecha, desde, hasta)
         
-        return [{
-            'fecha': p.fecha,
-            'cliente': p.venta.cliente.nombre,
-            'monto': float(p.monto),
-            'metodo_pago': p.metodo_pago
-        } for p in query]
+        lote = LoteColumnas.desde_filas(filas_con_archivo(query, desde, hasta), [
+            ('fecha', 'datetime64[us]'),
+            ('cliente', 'O'),
+            ('monto', CENTAVOS),
+            ('metodo_pago', 'O')
+        ])
+        return lote.ordenar('fecha')
 
     @log_operacion("consulta")
-    def obtener_reporte_stock(self) -> List[Dict[str, Any]]:
+    def obtener_reporte_pagos(self, desde: Optional[datetime] = None,
+                            hasta: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
-        Obtiene el reporte de stock actual.
+        Obtiene el reporte de pagos.
         
+        Args:
+            desde (Optional[datetime]): Fecha inicial
+            hasta (Optional[datetime]): Fecha final
+            
         Returns:
             List[Dict[str, Any]]: Lista de datos del reporte
         """
+        return self.obtener_lote_pagos(desde, hasta).a_registros()
+
+    @log_operacion("consulta")
+    def obtener_lote_stock(self) -> LoteColumnas:
+        """
+        Obtiene el reporte de stock actual en formato columnar.
+        
+        Returns:
+            LoteColumnas: Columnas producto, stock_actual, stock_minimo y estado
+        """
         query = (Producto
-                .select()
+                .select(Producto.nombre, Producto.stock_actual, Producto.stock_minimo)
                 .where(Producto.activo == True)
                 .order_by(Producto.stock_actual))
         
-        return [{
-            'producto': p.nombre,
-            'stock_actual': p.stock_actual,
-            'stock_minimo': p.stock_minimo
-        } for p in query]
+        lote = LoteColumnas.desde_consulta(query, [
+            ('producto', 'O'),
+            ('stock_actual', 'i8'),
+            ('stock_minimo', 'i8')
+        ])
+        # Misma regla que motor_reportes.estado_stock, por columnas
+        lote['estado'] = np.select(
+            [lote['stock_actual'] <= 0, lote['stock_actual'] <= lote['stock_minimo']],
+            ['Agotado', 'Bajo'],
+            default='Normal'
+        )
+        return lote
+
+    @log_operacion("consulta")
+    def obtener_reporte_stock(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene el reporte de stock actual.
+        
+        Returns:
+            List[Dict[str, Any]]: Lista de datos del reporte
+        """
+        return self.obtener_lote_stock().a_registros()
+
+    @log_operacion("consulta")
+    def obtener_lote_antiguedad(self, al: Optional[datetime] = None,
+                                dias_plazo: int = 0) -> LoteColumnas:
+        """
+        Obtiene la antigüedad de saldos por cliente (0-30, 31-60, 61-90 y más
+        de 90 días) en formato columnar, con una sola consulta agrupada.
+        
+        Args:
+            al (Optional[datetime]): Fecha de corte; por defecto ahora
+            dias_plazo (int): Días de plazo de pago antes de contar la antigüedad
+            
+        Returns:
+            LoteColumnas: Columnas cliente, d0_30, d31_60, d61_90, d90_mas y total
+        """
+        query = consulta_antiguedad(al or datetime.now(), dias_plazo)
+        return LoteColumnas.desde_consulta(
+            query,
+            [('cliente', 'O')] +
+            [(nombre, CENTAVOS) for nombre, _, _ in TRAMOS_ANTIGUEDAD] +
+            [('total', CENTAVOS)]
+        )
 
     @log_operacion("consulta")
-    def obtener_todas_ventas(self) -> List[Venta]:
+    def obtener_reporte_antiguedad(self, al: Optional[datetime] = None,
+                                   dias_plazo: int = 0) -> List[Dict[str, Any]]:
+        """
+        Obtiene el reporte de antigüedad de saldos por cliente.
+        
+        Args:
+            al (Optional[datetime]): Fecha de corte
+            dias_plazo (int): Días de plazo de pago
+            
+        Returns:
+            List[Dict[str, Any]]: Lista de datos del reporte
+        """
+        return self.obtener_lote_antiguedad(al, dias_plazo).a_registros()
+
+    @log_operacion("consulta")
+    def obtener_todas_ventas(self) -> List[VentaFila]:
         """
         Obtiene todas las ventas ordenadas por fecha.
         
         Returns:
-            List[Venta]: Lista de ventas
+            List[VentaFila]: Lista de ventas
         """
-        return (Venta
-                .select()
-                .order_by(Venta.fecha.desc()))
+        return self._filas(self._consulta_ventas()
+                           .order_by(Venta.fecha.desc()), VentaFila)
 
     @log_operacion("consulta")
     def filtrar_ventas(self, cliente_id: Optional[int] = None,
-                      pagada: Optional[bool] = None) -> List[Venta]:
+                      pagada: Optional[bool] = None) -> List[VentaFila]:
         """
         Filtra las ventas según los criterios especificados.
         
@@ -537,16 +1898,16 @@ class Controlador:
             pagada (Optional[bool]): Estado de pago
             
         Returns:
-            List[Venta]: Lista de ventas filtradas
+            List[VentaFila]: Lista de ventas filtradas
         """
-        query = Venta.select().order_by(Venta.fecha.desc())
+        query = self._consulta_ventas().order_by(Venta.fecha.desc())
         
         if cliente_id is not None:
             query = query.where(Venta.cliente_id == cliente_id)
         if pagada is not None:
             query = query.where(Venta.pagada == pagada)
         
-        return query
+        return self._filas(query, VentaFila)
 
     @log_operacion("consulta")
     def obtener_venta_por_id(self, venta_id: int) -> Venta:
@@ -577,14 +1938,14 @@ class Controlador:
                 .where(DetalleVenta.venta_id == venta_id))
 
     @log_operacion("reporte")
-    def generar_grafico_ventas_cliente(self, datos: List[Dict[str, Any]], 
+    def generar_grafico_ventas_cliente(self, datos: LoteColumnas, 
                                      canvas: Any, desde: Optional[datetime] = None,
                                      hasta: Optional[datetime] = None) -> None:
         """
         Genera un gráfico de barras de ventas por cliente.
         
         Args:
-            datos (List[Dict[str, Any]]): Datos para el gráfico
+            datos (LoteColumnas): Datos para el gráfico
             canvas (Any): Canvas donde dibujar el gráfico
             desde (Optional[datetime]): Fecha inicial
             hasta (Optional[datetime]): Fecha final
@@ -595,23 +1956,18 @@ class Controlador:
         # Crear figura
         fig, ax = plt.subplots(figsize=(10, 6))
         
-        # Preparar datos
-        clientes = [d['cliente'] for d in datos]
-        ventas = [d['total_ventas'] for d in datos]
-        pagos = [d['total_pagado'] for d in datos]
-        
-        # Crear gráfico de barras
-        x = range(len(clientes))
+        # Crear gráfico de barras directamente desde las columnas
+        x = np.arange(len(datos))
         width = 0.35
         
-        ax.bar([i - width/2 for i in x], ventas, width, label='Ventas', color='#2ecc71')
-        ax.bar([i + width/2 for i in x], pagos, width, label='Pagado', color='#3498db')
+        ax.bar(x - width/2, datos.pesos('total_ventas'), width, label='Ventas', color='#2ecc71')
+        ax.bar(x + width/2, datos.pesos('total_pagado'), width, label='Pagado', color='#3498db')
         
         # Configurar gráfico
         ax.set_ylabel('Monto ($)')
         ax.set_title('Ventas y Pagos por Cliente')
         ax.set_xticks(x)
-        ax.set_xticklabels(clientes, rotation=45, ha='right')
+        ax.set_xticklabels(datos['cliente'], rotation=45, ha='right')
         ax.legend()
         
         # Ajustar layout
@@ -623,14 +1979,14 @@ class Controlador:
         canvas_widget.get_tk_widget().pack(side='top', fill='both', expand=1)
 
     @log_operacion("reporte")
-    def generar_grafico_productos(self, datos: List[Dict[str, Any]], 
+    def generar_grafico_productos(self, datos: LoteColumnas, 
                                 canvas: Any, desde: Optional[datetime] = None,
                                 hasta: Optional[datetime] = None) -> None:
         """
         Genera un gráfico de barras horizontales de productos más vendidos.
         
         Args:
-            datos (List[Dict[str, Any]]): Datos para el gráfico
+            datos (LoteColumnas): Datos para el gráfico
             canvas (Any): Canvas donde dibujar el gráfico
             desde (Optional[datetime]): Fecha inicial
             hasta (Optional[datetime]): Fecha final
@@ -641,12 +1997,8 @@ class Controlador:
         # Crear figura
         fig, ax = plt.subplots(figsize=(10, 6))
         
-        # Preparar datos
-        productos = [d['producto'] for d in datos]
-        cantidades = [d['cantidad'] for d in datos]
-        
         # Crear gráfico de barras horizontales
-        ax.barh(productos, cantidades, color='#e74c3c')
+        ax.barh(datos['producto'], datos['cantidad'], color='#e74c3c')
         
         # Configurar gráfico
         ax.set_xlabel('Cantidad Vendida')
@@ -661,32 +2013,30 @@ class Controlador:
         canvas_widget.get_tk_widget().pack(side='top', fill='both', expand=1)
 
     @log_operacion("reporte")
-    def generar_grafico_pagos(self, datos: List[Dict[str, Any]], 
+    def generar_grafico_pagos(self, datos: LoteColumnas, 
                             canvas: Any, desde: Optional[datetime] = None,
                             hasta: Optional[datetime] = None) -> None:
         """
         Genera un gráfico de torta de métodos de pago.
         
         Args:
-            datos (List[Dict[str, Any]]): Datos para el gráfico
+            datos (LoteColumnas): Datos para el gráfico
             canvas (Any): Canvas donde dibujar el gráfico
             desde (Optional[datetime]): Fecha inicial
             hasta (Optional[datetime]): Fecha final
         """
         import matplotlib.pyplot as plt
         from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-        from collections import defaultdict
         
         # Crear figura
         fig, ax = plt.subplots(figsize=(10, 6))
         
-        # Preparar datos
-        metodos = defaultdict(float)
-        for pago in datos:
-            metodos[pago['metodo_pago']] += pago['monto']
+        # Sumar montos por método de pago
+        metodos, indices = np.unique(datos['metodo_pago'].astype(str), return_inverse=True)
+        montos = np.bincount(indices, weights=datos.pesos('monto'), minlength=len(metodos))
         
         # Crear gráfico de torta
-        ax.pie(metodos.values(), labels=metodos.keys(), autopct='%1.1f%%')
+        ax.pie(montos, labels=metodos, autopct='%1.1f%%')
         ax.set_title('Distribución de Métodos de Pago')
         
         # Ajustar layout
@@ -698,12 +2048,12 @@ class Controlador:
         canvas_widget.get_tk_widget().pack(side='top', fill='both', expand=1)
 
     @log_operacion("reporte")
-    def generar_grafico_stock(self, datos: List[Dict[str, Any]], canvas: Any) -> None:
+    def generar_grafico_stock(self, datos: LoteColumnas, canvas: Any) -> None:
         """
         Genera un gráfico de barras comparando stock actual vs mínimo.
         
         Args:
-            datos (List[Dict[str, Any]]): Datos para el gráfico
+            datos (LoteColumnas): Datos para el gráfico
             canvas (Any): Canvas donde dibujar el gráfico
         """
         import matplotlib.pyplot as plt
@@ -712,25 +2062,62 @@ class Controlador:
         # Crear figura
         fig, ax = plt.subplots(figsize=(10, 6))
         
-        # Preparar datos
-        productos = [d['producto'] for d in datos]
-        stock_actual = [d['stock_actual'] for d in datos]
-        stock_minimo = [d['stock_minimo'] for d in datos]
-        
-        # Crear gráfico de barras
-        x = range(len(productos))
+        # Crear gráfico de barras directamente desde las columnas
+        x = np.arange(len(datos))
         width = 0.35
         
-        ax.bar([i - width/2 for i in x], stock_actual, width, 
+        ax.bar(x - width/2, datos['stock_actual'], width, 
                label='Stock Actual', color='#2ecc71')
-        ax.bar([i + width/2 for i in x], stock_minimo, width, 
+        ax.bar(x + width/2, datos['stock_minimo'], width, 
                label='Stock Mínimo', color='#e74c3c')
         
         # Configurar gráfico
         ax.set_ylabel('Cantidad')
         ax.set_title('Stock Actual vs Mínimo')
         ax.set_xticks(x)
-        ax.set_xticklabels(productos, rotation=45, ha='right')
+        ax.set_xticklabels(datos['producto'], rotation=45, ha='right')
+        ax.legend()
+        
+        # Ajustar layout
+        plt.tight_layout()
+        
+        # Mostrar en canvas
+        canvas_widget = FigureCanvasTkAgg(fig, master=canvas)
+        canvas_widget.draw()
+        canvas_widget.get_tk_widget().pack(side='top', fill='both', expand=1)
+
+    @log_operacion("reporte")
+    def generar_grafico_antiguedad(self, datos: LoteColumnas, canvas: Any,
+                                   limite: int = 15) -> None:
+        """
+        Genera un gráfico de barras apiladas con la antigüedad de los saldos
+        de los clientes con mayor deuda.
+        
+        Args:
+            datos (LoteColumnas): Datos para el gráfico (ordenados por total)
+            canvas (Any): Canvas donde dibujar el gráfico
+            limite (int): Cantidad de clientes a mostrar
+        """
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        # Crear figura
+        fig, ax = plt.subplots(figsize=(10, 6))
+        
+        # Apilar los tramos de los primeros clientes
+        clientes = datos['cliente'][:limite]
+        base = np.zeros(len(clientes))
+        colores = ['#2ecc71', '#f1c40f', '#e67e22', '#e74c3c']
+        etiquetas = ['0-30 días', '31-60 días', '61-90 días', 'Más de 90 días']
+        for (nombre, _, _), color, etiqueta in zip(TRAMOS_ANTIGUEDAD, colores, etiquetas):
+            valores = datos.pesos(nombre)[:limite]
+            ax.bar(clientes, valores, bottom=base, label=etiqueta, color=color)
+            base += valores
+        
+        # Configurar gráfico
+        ax.set_ylabel('Saldo ($)')
+        ax.set_title('Antigüedad de Saldos por Cliente')
+        ax.tick_params(axis='x', rotation=45)
         ax.legend()
         
         # Ajustar layout
@@ -755,22 +2142,19 @@ class Controlador:
         Returns:
             str: Nombre del archivo generado
         """
-        import pandas as pd
         from datetime import datetime
         
         # Obtener datos según el tipo de reporte
         if tipo_reporte == 'Ventas por Cliente':
-            datos = self.obtener_reporte_ventas_cliente(desde, hasta)
-            df = pd.DataFrame(datos)
+            df = self.obtener_lote_ventas_cliente(desde, hasta).a_dataframe()
         elif tipo_reporte == 'Productos más Vendidos':
-            datos = self.obtener_reporte_productos(desde, hasta)
-            df = pd.DataFrame(datos)
+            df = self.obtener_lote_productos(desde, hasta).a_dataframe()
         elif tipo_reporte == 'Balance de Pagos':
-            datos = self.obtener_reporte_pagos(desde, hasta)
-            df = pd.DataFrame(datos)
+            df = self.obtener_lote_pagos(desde, hasta).a_dataframe()
         elif tipo_reporte == 'Stock Actual':
-            datos = self.obtener_reporte_stock()
-            df = pd.DataFrame(datos)
+            df = self.obtener_lote_stock().a_dataframe()
+        elif tipo_reporte == 'Antigüedad de Saldos':
+            df = self.obtener_lote_antiguedad(hasta).a_dataframe()
         else:
             raise ValueError(f"Tipo de reporte no válido: {tipo_reporte}")
         
@@ -783,21 +2167,131 @@ class Controlador:
         
         return nombre_archivo
 
+    @log_operacion("reporte")
+    def generar_paquete_reportes(self, desde: Optional[datetime] = None,
+                                 hasta: Optional[datetime] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Calcula todos los reportes a la vez en el pool de procesos.
+        
+        Args:
+            desde (Optional[datetime]): Fecha inicial
+            hasta (Optional[datetime]): Fecha final
+            
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Datos de cada reporte por tipo
+        """
+        return obtener_motor().generar_paquete(desde, hasta, TIPOS_REPORTE)
+
+    @log_operacion("reporte")
+    def exportar_paquete_reportes(self, desde: Optional[datetime] = None,
+                                  hasta: Optional[datetime] = None) -> str:
+        """
+        Exporta el paquete de cierre (los cuatro reportes) a un Excel con una hoja por reporte.
+        
+        Args:
+            desde (Optional[datetime]): Fecha inicial
+            hasta (Optional[datetime]): Fecha final
+            
+        Returns:
+            str: Nombre del archivo generado
+        """
+        import pandas as pd
+        
+        paquete = self.generar_paquete_reportes(desde, hasta)
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        nombre_archivo = f"paquete_reportes_{timestamp}.xlsx"
+        
+        with pd.ExcelWriter(nombre_archivo) as writer:
+            for tipo_reporte, datos in paquete.items():
+                # Los nombres de hoja de Excel admiten hasta 31 caracteres
+                pd.DataFrame(datos).to_excel(writer, sheet_name=tipo_reporte[:31], index=False)
+        
+        return nombre_archivo
+
     @log_operacion("consulta")
-    def obtener_productos_bajo_stock(self) -> List[Producto]:
+    def obtener_productos_bajo_stock(self) -> List[AlertaFila]:
         """
-        Obtiene la lista de productos con stock bajo.
+        Obtiene la lista de productos con stock bajo. La mantiene el motor de
+        alertas a medida que cambia el stock, sin recorrer la tabla.
         
         Returns:
-            List[Producto]: Lista de productos con stock bajo
+            List[AlertaFila]: Lista de productos con stock bajo
         """
-        return (Producto
-                .select()
-                .where(
-                    (Producto.activo == True) &
-                    (Producto.stock_actual <= Producto.stock_minimo)
-                )
-                .order_by(Producto.stock_actual))
+        return motor_alertas.productos_bajo_stock()
+
+    def suscribir_alertas_stock(self, callback) -> None:
+        """
+        Registra una función que se llama con cada cambio en las alertas de stock.
+        
+        Args:
+            callback: Recibe {'altas': [...], 'bajas': [...], 'cambios': [...]}
+        """
+        motor_alertas.suscribir(callback)
+
+    @log_operacion("gestión_producto")
+    def reconstruir_alertas_stock(self) -> None:
+        """Recalcula las alertas de stock recorriendo todos los productos."""
+        motor_alertas.reconstruir()
+
+    def actualizar_pronosticos(self, forzar: bool = False):
+        """
+        Pide el pronóstico de demanda en segundo plano. Si no hubo ventas desde
+        el último cálculo devuelve el resultado guardado sin recalcular.
+        
+        Args:
+            forzar (bool): Recalcular aunque no haya ventas nuevas
+            
+        Returns:
+            Future: Se completa con Dict[int, PronosticoFila]
+        """
+        return obtener_motor_pronostico().actualizar(forzar)
+
+    @log_operacion("consulta")
+    def obtener_pronosticos(self) -> Dict[int, PronosticoFila]:
+        """Último pronóstico de demanda por producto, sin recalcular."""
+        return obtener_motor_pronostico().pronosticos()
+
+    def suscribir_pronosticos(self, callback) -> None:
+        """
+        Registra una función que se llama (desde otro hilo) con cada pronóstico nuevo.
+        
+        Args:
+            callback: Recibe Dict[int, PronosticoFila]
+        """
+        obtener_motor_pronostico().suscribir(callback)
+
+    @log_operacion("gestión_producto")
+    @reintentar_si_bloqueada
+    def aplicar_minimos_sugeridos(self, producto_ids: Optional[List[int]] = None) -> int:
+        """
+        Copia el mínimo sugerido por el pronóstico al stock_minimo de los
+        productos con un único UPDATE y reevalúa sus alertas.
+        
+        Args:
+            producto_ids (Optional[List[int]]): Productos a actualizar; por defecto todos
+            
+        Returns:
+            int: Cantidad de productos actualizados
+        """
+        pronosticos = self.obtener_pronosticos()
+        if producto_ids is not None:
+            pronosticos = {producto_id: pronosticos[producto_id]
+                           for producto_id in producto_ids if producto_id in pronosticos}
+        if not pronosticos:
+            return 0
+        
+        minimos = [(producto_id, fila.minimo_sugerido) for producto_id, fila in pronosticos.items()]
+        with self._transaccion():
+            actualizados = (Producto
+                            .update(stock_minimo=Case(Producto.id, minimos),
+                                    version=Producto.version + 1,
+                                    fecha_actualizacion=datetime.now())
+                            .where(Producto.id.in_(list(pronosticos)) &
+                                   (Producto.activo == True))
+                            .execute())
+            self._evaluar_alertas(list(pronosticos))
+        return actualizados
 
     @log_operacion("consulta")
     def obtener_cliente_por_id(self, cliente_id: int) -> Cliente:
@@ -813,7 +2307,7 @@ class Controlador:
         return Cliente.get_by_id(cliente_id)
 
     @log_operacion("consulta")
-    def obtener_balance_cliente(self, cliente_id: int) -> Dict[str, float]:
+    def obtener_balance_cliente(self, cliente_id: int) -> Dict[str, Decimal]:
         """
         Obtiene el balance de un cliente.
         
@@ -821,27 +2315,43 @@ class Controlador:
             cliente_id (int): ID del cliente
             
         Returns:
-            Dict[str, float]: Diccionario con total_ventas, total_pagado y saldo_pendiente
+            Dict[str, Decimal]: Diccionario con total_ventas, total_pagado y saldo_pendiente
         """
         cliente = Cliente.get_by_id(cliente_id)
         
-        total_ventas = (Venta
-                       .select(fn.COALESCE(fn.SUM(Venta.total), 0))
-                       .where(Venta.cliente == cliente)
-                       .scalar()) or 0
-        
-        total_pagado = (Pago
-                       .select(fn.COALESCE(fn.SUM(Pago.monto), 0))
-                       .join(Venta)
-                       .where(Venta.cliente == cliente)
-                       .scalar()) or 0
+        total_ventas, total_pagado = (Venta
+                                      .select(fn.COALESCE(fn.SUM(Venta.total), 0),
+                                              fn.COALESCE(fn.SUM(Venta.monto_pagado), 0))
+                                      .where(Venta.cliente == cliente)
+                                      .tuples()[0])
+        
+        archivado_ventas, archivado_pagado = (ResumenVentasArchivadas
+                                              .select(fn.COALESCE(fn.SUM(ResumenVentasArchivadas.total_ventas), 0),
+                                                      fn.COALESCE(fn.SUM(ResumenVentasArchivadas.total_pagado), 0))
+                                              .where(ResumenVentasArchivadas.cliente == cliente)
+                                              .tuples()[0])
+        # Las sumas llegan en centavos enteros y se convierten una sola vez
+        total_ventas += archivado_ventas
+        total_pagado += archivado_pagado
         
         return {
-            "total_ventas": float(total_ventas),
-            "total_pagado": float(total_pagado),
-            "saldo_pendiente": float(total_ventas - total_pagado)
+            "total_ventas": de_centavos(total_ventas),
+            "total_pagado": de_centavos(total_pagado),
+            "saldo_pendiente": de_centavos(total_ventas - total_pagado)
         }
 
+    @log_operacion("consulta")
+    def obtener_saldos_clientes(self) -> Dict[int, Decimal]:
+        """
+        Obtiene el saldo pendiente de todos los clientes. Se lee el saldo
+        mantenido en Cliente, sin agregar ventas ni pagos.
+        
+        Returns:
+            Dict[int, Decimal]: Saldo pendiente por ID de cliente
+        """
+        saldos = Cliente.select(Cliente.id, Cliente.saldo).where(Cliente.saldo != 0)
+        return dict(lectura(saldos).tuples())
+
     @log_operacion("consulta")
     def obtener_producto_por_id(self, producto_id: int):
         """
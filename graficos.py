@@ -3,7 +3,7 @@ import seaborn as sns
 from typing import List, Tuple, Dict
 import pandas as pd
 from datetime import datetime, timedelta
-from modelo import Venta, DetalleVenta, Cliente, Producto, Pago
+from modelo import lectura, Venta, DetalleVenta, Cliente, Producto, Pago
 from utilidades import log_operacion
 from peewee import fn
 
@@ -27,10 +27,10 @@ class GeneradorGraficos:
         fecha_inicio = datetime.now() - timedelta(days=dias)
         
         # Obtener datos
-        ventas = (Venta
-                 .select(Venta, Cliente)
-                 .join(Cliente)
-                 .where(Venta.fecha >= fecha_inicio))
+        ventas = lectura(Venta
+                         .select(Venta, Cliente)
+                         .join(Cliente)
+                         .where(Venta.fecha >= fecha_inicio))
         
         # Preparar datos para el gráfico
         datos = {}
@@ -65,13 +65,13 @@ class GeneradorGraficos:
             str: Ruta del archivo guardado
         """
         # Obtener datos
-        detalles = (DetalleVenta
-                   .select(Producto.nombre, 
-                          fn.SUM(DetalleVenta.cantidad).alias('total_vendido'))
-                   .join(Producto)
-                   .group_by(Producto.nombre)
-                   .order_by(fn.SUM(DetalleVenta.cantidad).desc())
-                   .limit(top))
+        detalles = lectura(DetalleVenta
+                           .select(Producto.nombre, 
+                                  fn.SUM(DetalleVenta.cantidad).alias('total_vendido'))
+                           .join(Producto)
+                           .group_by(Producto.nombre)
+                           .order_by(fn.SUM(DetalleVenta.cantidad).desc())
+                           .limit(top))
         
         nombres = [d.producto.nombre for d in detalles]
         cantidades = [d.total_vendido for d in detalles]
@@ -102,10 +102,10 @@ class GeneradorGraficos:
         fecha_inicio = datetime.now() - timedelta(days=dias)
         
         # Obtener datos
-        ventas = (Venta
-                 .select(Venta.fecha, Venta.total)
-                 .where(Venta.fecha >= fecha_inicio)
-                 .order_by(Venta.fecha))
+        ventas = lectura(Venta
+                         .select(Venta.fecha, Venta.total)
+                         .where(Venta.fecha >= fecha_inicio)
+                         .order_by(Venta.fecha))
         
         fechas = [v.fecha for v in ventas]
         totales = [float(v.total) for v in ventas]
@@ -132,8 +132,8 @@ class GeneradorGraficos:
             str: Ruta del archivo guardado
         """
         # Obtener datos
-        total_ventas = Venta.select(fn.COUNT(Venta.id)).scalar()
-        ventas_pagadas = Venta.select(fn.COUNT(Venta.id)).where(Venta.pagada == True).scalar()
+        total_ventas = lectura(Venta.select(fn.COUNT(Venta.id))).scalar()
+        ventas_pagadas = lectura(Venta.select(fn.COUNT(Venta.id)).where(Venta.pagada == True)).scalar()
         ventas_pendientes = total_ventas - ventas_pagadas
         
         # Crear gráfico
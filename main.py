@@ -1,10 +1,12 @@
 import tkinter as tk
 import os
+import multiprocessing
 from vista import VistaPrincipal
 from controlador import Controlador
-from modelo import inicializar_db
+from modelo import inicializar_db, ProgramadorMantenimiento
 from utilidades import configurar_logging
 from graficos import GeneradorGraficos
+from respaldo import ProgramadorRespaldos
 
 def main():
     """Función principal que inicia la aplicación."""
@@ -17,6 +19,13 @@ def main():
     # Inicializar base de datos
     inicializar_db()
     
+    # Corte periódico de stock (solo si el último es viejo) y reconciliación
+    # del tablero de los últimos días. Los pagos y saldos de toda la base se
+    # verifican a pedido desde el tablero, no en cada arranque.
+    controlador = Controlador()
+    controlador.generar_cortes_stock()
+    controlador.verificar_tablero(reparar=True)
+    
     # Configurar logging
     configurar_logging()
     
@@ -31,8 +40,19 @@ def main():
     # Configurar tema y estilo
     root.option_add('*tearOff', False)  # Deshabilitar menús desprendibles
     
+    # Respaldo diario y mantenimiento de la base en segundo plano, sin
+    # detener las ventas
+    programador = ProgramadorRespaldos()
+    programador.iniciar()
+    mantenimiento = ProgramadorMantenimiento()
+    mantenimiento.iniciar()
+
     # Iniciar loop principal
     root.mainloop()
+    mantenimiento.detener()
+    programador.detener()
 
 if __name__ == '__main__':
+    # Necesario para el pool de procesos de reportes en el ejecutable de Windows
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
@@ -1,22 +1,141 @@
+from threading import Thread
+
 from kivymd.app import MDApp
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.screenmanager import MDScreenManager
 from kivymd.uix.bottomnavigation import MDBottomNavigation, MDBottomNavigationItem
 from kivymd.uix.toolbar import MDTopAppBar
 from kivymd.uix.button import MDRaisedButton
-from kivymd.uix.list import MDList, OneLineListItem
+from kivymd.uix.list import OneLineListItem
+from kivymd.uix.textfield import MDTextField
 from kivymd.uix.card import MDCard
+from kivymd.uix.label import MDLabel
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.clock import Clock
+from kivy.logger import Logger
 from kivy.metrics import dp
 
-from modelo import *
-from controlador import Controlador
+# La terminal trabaja solo con su diario local: no abre la base de la oficina
+from sincronizacion import DiarioVentas, ProductoLocal, ClienteLocal, db_diario, abrir_diario
+
+# Clientes que se leen por página
+FILAS_POR_PAGINA = 100
+# Segundos sin teclear antes de lanzar la búsqueda
+ESPERA_BUSQUEDA = 0.3
+# Fracción del desplazamiento restante que dispara la página siguiente
+MARGEN_CARGA = 0.2
+
+class ListaClientes(RecycleView):
+    """
+    Lista de clientes reciclada: solo existen los renglones visibles y los
+    datos se leen por páginas en un hilo aparte a medida que se desplaza,
+    así la memoria y el tiempo de armado no dependen de la cantidad de
+    clientes. Los clientes son los del diario local, los mismos que usa la
+    carga de ventas.
+    """
+
+    def __init__(self, diario: DiarioVentas, **kwargs):
+        super().__init__(**kwargs)
+        self.diario = diario
+        self.viewclass = OneLineListItem
+        
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(48)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        
+        self.texto = ""
+        self._filas = []        # ClienteLocal cargados para el texto actual
+        self._ultima = None     # (nombre, id) de la última fila cargada
+        self._completa = False  # ya se leyó la última página
+        self._cargando = False
+        self._generacion = 0    # descarta páginas de búsquedas anteriores
+        self.bind(scroll_y=self._al_desplazar)
+
+    @staticmethod
+    def _item(cliente) -> dict:
+        return {'text': f"{cliente.nombre} - {cliente.telefono}"}
+
+    @staticmethod
+    def _coincide(cliente, texto: str) -> bool:
+        return any(texto in (valor or "").casefold()
+                   for valor in (cliente.nombre, cliente.telefono))
+
+    def buscar(self, texto: str, recargar: bool = False):
+        """
+        Muestra los clientes que coinciden con el texto. Si la búsqueda
+        anterior ya estaba cargada completa y el texto nuevo la refina, se
+        filtra en memoria sin volver a la base.
+        
+        Args:
+            texto (str): Texto a buscar (vacío: todos)
+            recargar (bool): Volver a leer aunque se pueda filtrar en memoria
+        """
+        texto = texto.strip()
+        refina = (not recargar and self._completa and
+                  texto.casefold().startswith(self.texto.casefold()))
+        self._generacion += 1
+        self.texto = texto
+        
+        if refina:
+            self._filas = [cliente for cliente in self._filas
+                           if self._coincide(cliente, texto.casefold())]
+            self.data = [self._item(cliente) for cliente in self._filas]
+            return
+        
+        self._filas, self._ultima, self._completa = [], None, False
+        self._cargando = False
+        self.data = []
+        self.scroll_y = 1
+        self.cargar_pagina()
+
+    def cargar_pagina(self):
+        """Pide la página siguiente en segundo plano (si no hay otra en curso)."""
+        if self._cargando or self._completa:
+            return
+        self._cargando = True
+        Thread(target=self._leer_pagina,
+               args=(self._generacion, self.texto, self._ultima),
+               daemon=True).start()
+
+    def _leer_pagina(self, generacion: int, texto: str, despues):
+        filas = None
+        try:
+            # Conexión propia de este hilo al diario, cerrada al terminar
+            with db_diario.connection_context():
+                filas = self.diario.pagina_clientes(texto, despues, FILAS_POR_PAGINA)
+        except Exception as e:
+            Logger.error(f"Clientes: error al leer la página: {e}")
+        Clock.schedule_once(lambda dt: self._agregar_pagina(generacion, filas))
+
+    def _agregar_pagina(self, generacion: int, filas):
+        if generacion != self._generacion:
+            return
+        self._cargando = False
+        if filas is None:
+            return
+        self._filas.extend(filas)
+        self.data.extend(self._item(cliente) for cliente in filas)
+        if len(filas) < FILAS_POR_PAGINA:
+            self._completa = True
+        else:
+            self._ultima = (filas[-1].nombre, filas[-1].id)
+
+    def _al_desplazar(self, instancia, scroll_y: float):
+        # scroll_y va de 1 (arriba) a 0 (abajo)
+        if scroll_y <= MARGEN_CARGA:
+            self.cargar_pagina()
 
 class VentanaClientes(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.controlador = Controlador()
+        self.diario = DiarioVentas()
         
         # Layout principal
         layout = BoxLayout(orientation='vertical')
@@ -33,23 +152,33 @@ class VentanaClientes(MDScreen):
         )
         layout.add_widget(btn_agregar)
         
+        # Búsqueda incremental: espera a que se deje de teclear
+        self.campo_busqueda = MDTextField(
+            hint_text="Buscar cliente",
+            size_hint_y=None,
+            height=dp(48)
+        )
+        self._busqueda = Clock.create_trigger(self._buscar, ESPERA_BUSQUEDA)
+        self.campo_busqueda.bind(text=self._al_escribir)
+        layout.add_widget(self.campo_busqueda)
+        
         # Lista de clientes
-        scroll = ScrollView()
-        self.lista_clientes = MDList()
-        scroll.add_widget(self.lista_clientes)
-        layout.add_widget(scroll)
+        self.lista_clientes = ListaClientes(self.diario)
+        layout.add_widget(self.lista_clientes)
         
         self.add_widget(layout)
+        # La primera página se lee en segundo plano; no demora el armado de la app
         self.actualizar_lista()
     
+    def _al_escribir(self, instancia, texto: str):
+        self._busqueda.cancel()
+        self._busqueda()
+
+    def _buscar(self, dt):
+        self.lista_clientes.buscar(self.campo_busqueda.text)
+
     def actualizar_lista(self):
-        self.lista_clientes.clear_widgets()
-        clientes = self.controlador.obtener_todos_clientes()
-        for cliente in clientes:
-            item = OneLineListItem(
-                text=f"{cliente.nombre} - {cliente.telefono}"
-            )
-            self.lista_clientes.add_widget(item)
+        self.lista_clientes.buscar(self.campo_busqueda.text, recargar=True)
 
 class VentanaProductos(MDScreen):
     def __init__(self, **kwargs):
@@ -60,12 +189,118 @@ class VentanaProductos(MDScreen):
         self.add_widget(layout)
 
 class VentanaVentas(MDScreen):
+    """
+    Carga de ventas sin conexión: se guardan en el diario local y se envían
+    a la oficina al sincronizar.
+    """
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        layout = BoxLayout(orientation='vertical')
+        self.diario = DiarioVentas()
+        self.items = []
+        
+        layout = BoxLayout(orientation='vertical', spacing=dp(4))
         toolbar = MDTopAppBar(title="Ventas")
         layout.add_widget(toolbar)
+        
+        self.etiqueta_estado = MDLabel(size_hint_y=None, height=dp(32))
+        layout.add_widget(self.etiqueta_estado)
+        
+        self.campo_cliente = MDTextField(hint_text="Cliente", size_hint_y=None, height=dp(48))
+        self.campo_producto = MDTextField(hint_text="Producto", size_hint_y=None, height=dp(48))
+        self.campo_cantidad = MDTextField(hint_text="Cantidad", input_filter='int',
+                                          size_hint_y=None, height=dp(48))
+        for campo in (self.campo_cliente, self.campo_producto, self.campo_cantidad):
+            layout.add_widget(campo)
+        
+        botones = BoxLayout(size_hint_y=None, height=dp(48), spacing=dp(8))
+        botones.add_widget(MDRaisedButton(text="Agregar", on_release=self.agregar_item))
+        botones.add_widget(MDRaisedButton(text="Guardar Venta", on_release=self.guardar_venta))
+        self.boton_sincronizar = MDRaisedButton(text="Sincronizar", on_release=self.sincronizar)
+        botones.add_widget(self.boton_sincronizar)
+        layout.add_widget(botones)
+        
+        self.etiqueta_items = MDLabel(size_hint_y=None, height=dp(48))
+        layout.add_widget(self.etiqueta_items)
+        
+        # Ventas del diario (recicladas, como la lista de clientes)
+        self.lista_ventas = RecycleView()
+        self.lista_ventas.viewclass = OneLineListItem
+        contenedor = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(48)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        contenedor.bind(minimum_height=contenedor.setter('height'))
+        self.lista_ventas.add_widget(contenedor)
+        layout.add_widget(self.lista_ventas)
+        
         self.add_widget(layout)
+        self.actualizar_lista()
+    
+    def actualizar_lista(self):
+        self.etiqueta_estado.text = f"Ventas pendientes de sincronizar: {self.diario.pendientes()}"
+        self.etiqueta_items.text = ", ".join(f"{nombre} x{cantidad}"
+                                             for _, nombre, cantidad in self.items)
+        self.lista_ventas.data = [
+            {'text': f"{venta.fecha:%d/%m %H:%M} - ${venta.total:,.2f} - {venta.estado}"}
+            for venta in self.diario.ventas()
+        ]
+    
+    def _buscar(self, modelo, texto: str):
+        return (modelo
+                .select()
+                .where((modelo.activo == True) & (modelo.nombre ** f"%{texto.strip()}%"))
+                .order_by(modelo.nombre)
+                .first())
+    
+    def agregar_item(self, *args):
+        producto = self._buscar(ProductoLocal, self.campo_producto.text)
+        if producto is None or not self.campo_cantidad.text:
+            self.etiqueta_estado.text = "Indique un producto y la cantidad"
+            return
+        self.items.append((producto.id, producto.nombre, int(self.campo_cantidad.text)))
+        self.campo_producto.text = ""
+        self.campo_cantidad.text = ""
+        self.actualizar_lista()
+    
+    def guardar_venta(self, *args):
+        cliente = self._buscar(ClienteLocal, self.campo_cliente.text)
+        if cliente is None:
+            self.etiqueta_estado.text = "Cliente no encontrado"
+            return
+        try:
+            self.diario.registrar_venta(cliente.id, [
+                {'producto_id': producto_id, 'cantidad': cantidad}
+                for producto_id, _, cantidad in self.items
+            ])
+        except ValueError as e:
+            self.etiqueta_estado.text = str(e)
+            return
+        self.items = []
+        self.campo_cliente.text = ""
+        self.actualizar_lista()
+    
+    def sincronizar(self, *args):
+        self.boton_sincronizar.disabled = True
+        Thread(target=self._sincronizar, daemon=True).start()
+    
+    def _sincronizar(self):
+        try:
+            # Conexión propia de este hilo al diario, cerrada al terminar
+            with db_diario.connection_context():
+                resumen = self.diario.sincronizar()
+            mensaje = ", ".join(f"{estado}: {cantidad}" for estado, cantidad in resumen.items())
+            mensaje = mensaje or "Sin ventas pendientes"
+        except Exception as e:
+            mensaje = f"No se pudo sincronizar: {e}"
+        Clock.schedule_once(lambda dt: self._fin_sincronizacion(mensaje))
+    
+    def _fin_sincronizacion(self, mensaje: str):
+        self.boton_sincronizar.disabled = False
+        self.actualizar_lista()
+        self.etiqueta_estado.text = mensaje
 
 class VentanaReportes(MDScreen):
     def __init__(self, **kwargs):
@@ -104,7 +339,7 @@ class GestionBebidasApp(MDApp):
         return navigation
 
 if __name__ == '__main__':
-    # Inicializar la base de datos
-    inicializar_db()
+    # Abrir el diario de ventas sin conexión (clientes y catálogo locales)
+    abrir_diario()
     # Iniciar la aplicación
     GestionBebidasApp().run() 
\ No newline at end of file
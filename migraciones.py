@@ -0,0 +1,418 @@
+from typing import List, Dict, Optional, Callable, NamedTuple, Any
+import argparse
+import logging
+import os
+import time
+
+from peewee import fn, SQL
+from playhouse.migrate import SqliteMigrator, migrate
+
+from modelo import (
+    db, Proveedor, Cliente, Venta, Pago, SecuenciaCambios, RegistroBorrado, TareaMigracion,
+    PeriodoArchivado, CentavosField, MODELOS, MODELOS_REPLICADOS
+)
+from archivo import adjuntar, ruta_archivo, TABLAS_ARCHIVADAS
+
+# Filas por transacción en las actualizaciones por lotes: cada lote confirma
+# y el WAL se recicla, así una base grande se migra sin un WAL del tamaño de
+# la base ni transacciones que traben a las demás terminales
+FILAS_POR_MIGRACION = 20000
+
+Progreso = Callable[[str, int, int], None]
+
+class Migracion(NamedTuple):
+    """
+    Cambio de esquema numerado. Las transaccionales corren enteras en una
+    transacción junto con el cambio de versión; las por lotes manejan sus
+    propias transacciones con actualizar_por_lotes y se pueden retomar si
+    se cortan a mitad de camino.
+    """
+    version: int
+    descripcion: str
+    aplicar: Callable[[Optional[Progreso]], None]
+    por_lotes: bool = False
+
+def version_esquema() -> int:
+    """Versión del esquema guardada en la base (PRAGMA user_version)."""
+    return db.execute_sql('PRAGMA user_version').fetchone()[0]
+
+def _fijar_version(version: int):
+    db.execute_sql(f'PRAGMA user_version = {int(version)}')
+
+def ultima_version() -> int:
+    return max(migracion.version for migracion in MIGRACIONES)
+
+# Operaciones para escribir migraciones. Todas se pueden repetir sin efecto:
+# una base nueva se crea con los modelos al día y una migración vieja puede
+# encontrarse con columnas o índices que ya existen.
+def _literal(valor) -> str:
+    if isinstance(valor, str):
+        return "'" + valor.replace("'", "''") + "'"
+    return str(int(valor)) if isinstance(valor, bool) else str(valor)
+
+def agregar_columnas(modelo, *campos) -> List[str]:
+    """
+    Agrega las columnas que falten de los campos dados del modelo. Una
+    columna NOT NULL con valor por defecto fijo se agrega con ALTER TABLE
+    ADD COLUMN ... DEFAULT, que en SQLite no reescribe la tabla; el
+    migrador de peewee la copiaría entera en una sola transacción.
+
+    Returns:
+        List[str]: Columnas agregadas
+    """
+    tabla = modelo._meta.table_name
+    existentes = {columna.name for columna in db.get_columns(tabla)}
+    faltantes = [campo for campo in campos if campo.column_name not in existentes]
+    migrator = SqliteMigrator(db)
+    for campo in faltantes:
+        if campo.null or campo.default is None or callable(campo.default):
+            migrate(migrator.add_column(tabla, campo.column_name, campo))
+        else:
+            contexto = db.get_sql_context()
+            columna, _ = contexto.sql(campo.ddl(contexto)).query()
+            db.execute_sql(f'ALTER TABLE "{tabla}" ADD COLUMN {columna} '
+                           f'DEFAULT {_literal(campo.db_value(campo.default))}')
+    return [campo.column_name for campo in faltantes]
+
+def crear_indices(modelo):
+    """Crea los índices declarados en el modelo que todavía no existen."""
+    modelo._schema.create_indexes(safe=True)
+
+def borrar_indice(nombre: str):
+    db.execute_sql(f'DROP INDEX IF EXISTS "{nombre}"')
+
+def programar_tarea(tarea: str):
+    """
+    Deja pendiente una actualización por lotes. Se llama en la misma
+    transacción que el cambio de esquema que la hace necesaria, así un
+    corte antes de terminarla no la pierde.
+    """
+    TareaMigracion.insert(tarea=tarea, ultimo_id=0).on_conflict_ignore().execute()
+
+def _marca(version: int) -> str:
+    return f'migracion_{version}'
+
+def primera_vez(version: int) -> bool:
+    """
+    Para el paso transaccional de una migración por lotes que no se puede
+    repetir (por ejemplo, una conversión de valores): deja una marca en la
+    transacción en curso y devuelve False si ya estaba. Si el proceso se
+    corta antes de terminar los lotes, el reintento no vuelve a aplicar el
+    paso ni a programar tareas ya terminadas. migrar borra la marca al
+    cambiar la versión.
+    """
+    marca = _marca(version)
+    if TareaMigracion.select().where(TareaMigracion.tarea == marca).exists():
+        return False
+    TareaMigracion.create(tarea=marca, ultimo_id=0)
+    return True
+
+def _en_esquema(query, esquema: Optional[str]):
+    """SQL de la consulta con la tabla del modelo en una base adjunta (un archivo anual)."""
+    sql, params = query.sql()
+    if esquema is not None:
+        tabla = query.model._meta.table_name
+        sql = (sql
+               .replace(f'UPDATE "{tabla}"', f'UPDATE "{esquema}"."{tabla}"', 1)
+               .replace(f'FROM "{tabla}"', f'FROM "{esquema}"."{tabla}"', 1))
+    return sql, params
+
+def actualizar_por_lotes(tarea: str, modelo, valores: Dict[Any, Any],
+                         progreso: Optional[Progreso] = None,
+                         lote: int = FILAS_POR_MIGRACION,
+                         esquema: Optional[str] = None) -> int:
+    """
+    Ejecuta una tarea programada: UPDATE del modelo por rangos de id, una
+    transacción por lote que guarda también hasta dónde llegó. Si la tarea
+    no está pendiente no hace nada; si se cortó, sigue desde el último lote
+    confirmado. El avance se lee con el lock de escritura tomado, así dos
+    terminales que migran a la vez nunca aplican dos veces el mismo lote.
+    Nada pasa por la memoria de Python.
+
+    Args:
+        tarea (str): Nombre con el que se programó
+        modelo: Modelo a actualizar
+        valores (Dict[Any, Any]): Asignaciones del UPDATE (pueden ser expresiones)
+        progreso (Optional[Progreso]): Recibe tarea, id alcanzado e id máximo
+        lote (int): Filas (por rango de id) en cada transacción
+        esquema (Optional[str]): Base adjunta donde está la tabla (por defecto, la principal)
+
+    Returns:
+        int: Filas actualizadas en esta ejecución
+    """
+    avance = (TareaMigracion
+              .select(TareaMigracion.ultimo_id)
+              .where(TareaMigracion.tarea == tarea))
+    if avance.scalar() is None:
+        return 0
+    maximo = db.execute_sql(*_en_esquema(modelo.select(fn.MAX(modelo.id)), esquema)).fetchone()[0] or 0
+    actualizadas = 0
+    decimo = -1
+    while True:
+        with db.atomic('IMMEDIATE'):
+            desde = avance.scalar()
+            if desde is None or desde >= maximo:
+                break
+            hasta = min(desde + lote, maximo)
+            actualizacion = (modelo
+                             .update(valores)
+                             .where((modelo.id > desde) & (modelo.id <= hasta)))
+            actualizadas += db.execute_sql(*_en_esquema(actualizacion, esquema)).rowcount
+            (TareaMigracion
+             .update(ultimo_id=hasta)
+             .where(TareaMigracion.tarea == tarea)
+             .execute())
+        desde = hasta
+        if progreso is not None:
+            progreso(tarea, desde, maximo)
+        if desde * 10 // maximo != decimo:
+            decimo = desde * 10 // maximo
+            logging.info(f'Migración {tarea}: {desde * 100 // maximo} % ({desde}/{maximo})')
+    TareaMigracion.delete().where(TareaMigracion.tarea == tarea).execute()
+    return actualizadas
+
+def crear_disparadores():
+    """
+    Crea los disparadores que numeran los cambios de los modelos replicados.
+    SQLite admite un solo escritor, así que los números se asignan en orden
+    de confirmación: quien leyó los cambios hasta N nunca verá aparecer
+    después uno menor a N. Se recrean después de cada migración porque el
+    de modificación lista las columnas de la tabla.
+    """
+    SecuenciaCambios.insert(id=1, valor=0).on_conflict_ignore().execute()
+    contador = SecuenciaCambios._meta.table_name
+    siguiente = f'UPDATE "{contador}" SET "valor" = "valor" + 1 WHERE "id" = 1;'
+    actual = f'(SELECT "valor" FROM "{contador}" WHERE "id" = 1)'
+    borrados = RegistroBorrado._meta.table_name
+
+    for modelo in MODELOS_REPLICADOS:
+        tabla = modelo._meta.table_name
+        numerar = f'UPDATE "{tabla}" SET "secuencia" = {actual} WHERE "id" = NEW."id";'
+        # El de modificación escucha todas las columnas menos secuencia, así
+        # no se dispara con la numeración misma
+        columnas = ', '.join(f'"{campo.column_name}"' for campo in modelo._meta.sorted_fields
+                             if campo.name != 'secuencia')
+        disparadores = {
+            'insert': f'AFTER INSERT ON "{tabla}" BEGIN {siguiente} {numerar} END',
+            'update': f'AFTER UPDATE OF {columnas} ON "{tabla}" BEGIN {siguiente} {numerar} END',
+            'delete': (f'AFTER DELETE ON "{tabla}" BEGIN {siguiente} '
+                       f'INSERT INTO "{borrados}" ("tabla", "registro_id", "secuencia") '
+                       f"VALUES ('{tabla}', OLD.\"id\", {actual}); END")
+        }
+        for evento, cuerpo in disparadores.items():
+            db.execute_sql(f'DROP TRIGGER IF EXISTS "{tabla}_secuencia_{evento}"')
+            db.execute_sql(f'CREATE TRIGGER "{tabla}_secuencia_{evento}" {cuerpo}')
+
+def quitar_disparadores_modificacion():
+    """
+    Quita los disparadores de modificación de los modelos replicados
+    mientras una migración reescribe columnas por lotes: sin ellos no se
+    renumera cada fila y las réplicas no reciben de nuevo toda la tabla.
+    migrar los vuelve a crear al terminar.
+    """
+    for modelo in MODELOS_REPLICADOS:
+        db.execute_sql(f'DROP TRIGGER IF EXISTS "{modelo._meta.table_name}_secuencia_update"')
+
+# Migración 1: lo que antes hacía inicializar_db en cada arranque para las
+# bases creadas antes del versionado
+INDICES_OBSOLETOS = [
+    'venta_pagada_cliente_id_total_monto_pagado'
+]
+
+def _esquema_previo(progreso: Optional[Progreso] = None):
+    with db.atomic('IMMEDIATE'):
+        agregados = []
+        for modelo in MODELOS:
+            if modelo.table_exists():
+                columnas = agregar_columnas(modelo, *modelo._meta.sorted_fields)
+                agregados.extend((modelo._meta.table_name, columna) for columna in columnas)
+            else:
+                modelo.create_table()
+        for indice in INDICES_OBSOLETOS:
+            borrar_indice(indice)
+        crear_disparadores()
+        if ('venta', 'monto_pagado') in agregados:
+            programar_tarea('venta.monto_pagado')
+        if ('cliente', 'saldo') in agregados:
+            programar_tarea('cliente.saldo')
+        for modelo in MODELOS_REPLICADOS:
+            if (modelo._meta.table_name, 'secuencia') in agregados:
+                programar_tarea(f'{modelo._meta.table_name}.secuencia')
+
+    # Venta.monto_pagado desde los pagos ya registrados
+    pagado = (Pago
+              .select(fn.COALESCE(fn.SUM(Pago.monto), 0))
+              .where(Pago.venta == Venta.id))
+    actualizar_por_lotes('venta.monto_pagado', Venta, {Venta.monto_pagado: pagado}, progreso)
+    # Cliente.saldo desde las ventas impagas (ya con monto_pagado completo)
+    saldo = (Venta
+             .select(fn.COALESCE(fn.SUM(Venta.total - Venta.monto_pagado), 0))
+             .where((Venta.cliente == Cliente.id) & (Venta.pagada == False)))
+    actualizar_por_lotes('cliente.saldo', Cliente, {Cliente.saldo: saldo}, progreso)
+    # Los registros previos a la secuencia reciben su número con los disparadores
+    for modelo in MODELOS_REPLICADOS:
+        actualizar_por_lotes(f'{modelo._meta.table_name}.secuencia', modelo,
+                             {modelo.id: modelo.id}, progreso)
+
+    # Los índices que faltan van al final, uno por transacción: un índice
+    # sobre una columna recién completada se arma una vez y no se mantiene
+    # fila por fila durante las actualizaciones
+    for modelo in MODELOS:
+        with db.atomic('IMMEDIATE'):
+            crear_indices(modelo)
+
+# Migración 2: montos en centavos enteros. Las columnas conservan el tipo
+# declarado (DECIMAL, afinidad NUMERIC), que guarda los enteros tal cual;
+# solo las bases nuevas las declaran INTEGER.
+def _campos_monto(modelo) -> List[CentavosField]:
+    return [campo for campo in modelo._meta.sorted_fields if isinstance(campo, CentavosField)]
+
+def _a_centavos(campos: List[CentavosField]) -> Dict[CentavosField, SQL]:
+    # SQL y no expresiones del campo: en Venta.total * 100 el 100 pasaría por
+    # el campo y se convertiría a centavos
+    return {campo: SQL(f'CAST(ROUND("{campo.column_name}" * 100) AS INTEGER)') for campo in campos}
+
+def _con_lotes(modelo) -> bool:
+    return modelo._meta.primary_key.name == 'id'
+
+def _archivos_existentes() -> Dict[int, str]:
+    archivos = {}
+    for periodo in PeriodoArchivado.select():
+        ruta = ruta_archivo(periodo.anio)
+        if os.path.exists(ruta):
+            archivos[periodo.anio] = ruta
+        else:
+            logging.warning(f'Migración a centavos: falta el archivo {ruta}, se omite')
+    return archivos
+
+def _centavos(progreso: Optional[Progreso] = None):
+    montos = [(modelo, _campos_monto(modelo)) for modelo in MODELOS]
+    montos = [(modelo, campos) for modelo, campos in montos if campos]
+    archivados = {modelo._meta.table_name: modelo for modelo, _ in montos
+                  if modelo._meta.table_name in TABLAS_ARCHIVADAS}
+    archivos = _archivos_existentes()
+
+    with db.atomic('IMMEDIATE'):
+        if primera_vez(2):
+            # La conversión no cambia ningún valor para las réplicas
+            quitar_disparadores_modificacion()
+            for modelo, campos in montos:
+                if _con_lotes(modelo):
+                    programar_tarea(f'{modelo._meta.table_name}.centavos')
+                else:
+                    modelo.update(_a_centavos(campos)).execute()
+            for anio in archivos:
+                for tabla in archivados:
+                    programar_tarea(f'archivo_{anio}.{tabla}.centavos')
+
+    for modelo, campos in montos:
+        if _con_lotes(modelo):
+            actualizar_por_lotes(f'{modelo._meta.table_name}.centavos', modelo,
+                                 _a_centavos(campos), progreso)
+
+    for anio in archivos:
+        with adjuntar(db, anio, solo_lectura=False) as alias:
+            for tabla, modelo in archivados.items():
+                # Un archivo viejo puede no tener todas las columnas de hoy
+                existentes = {fila[1] for fila in db.execute_sql(f'PRAGMA "{alias}".table_info("{tabla}")')}
+                campos = [campo for campo in _campos_monto(modelo) if campo.column_name in existentes]
+                actualizar_por_lotes(f'{alias}.{tabla}.centavos', modelo, _a_centavos(campos),
+                                     progreso, esquema=alias)
+
+# Migración 3: teléfono normalizado de clientes y proveedores, para
+# detectar duplicados y buscar por igualdad sobre un índice. Se completa con
+# la función normalizar_telefono registrada en la conexión (ver modelo).
+def _telefonos_normalizados(progreso: Optional[Progreso] = None):
+    modelos = (Proveedor, Cliente)
+    with db.atomic('IMMEDIATE'):
+        for modelo in modelos:
+            agregar_columnas(modelo, modelo.telefono_normalizado)
+        # La columna puede venir ya agregada (vacía) por la migración 1 en
+        # las bases previas al versionado: se completa igual
+        if primera_vez(3):
+            # Las réplicas no usan el teléfono normalizado
+            quitar_disparadores_modificacion()
+            for modelo in modelos:
+                programar_tarea(f'{modelo._meta.table_name}.telefono_normalizado')
+
+    for modelo in modelos:
+        actualizar_por_lotes(f'{modelo._meta.table_name}.telefono_normalizado', modelo,
+                             {modelo.telefono_normalizado: fn.normalizar_telefono(modelo.telefono)},
+                             progreso)
+        with db.atomic('IMMEDIATE'):
+            crear_indices(modelo)
+
+# Migraciones en orden de versión. Los modelos describen siempre el esquema
+# de la última versión: una base nueva se crea con ellos y queda en
+# ultima_version() sin correr ninguna.
+MIGRACIONES = [
+    Migracion(1, "Esquema previo al versionado", _esquema_previo, por_lotes=True),
+    Migracion(2, "Montos en centavos enteros", _centavos, por_lotes=True),
+    Migracion(3, "Teléfonos normalizados", _telefonos_normalizados, por_lotes=True),
+]
+
+def _base_nueva() -> bool:
+    return not set(db.get_tables()) & {modelo._meta.table_name for modelo in MODELOS}
+
+def migrar(progreso: Optional[Progreso] = None) -> List[int]:
+    """
+    Lleva la base a la última versión del esquema aplicando en orden las
+    migraciones pendientes. Cada una cambia la versión recién al
+    terminar; la versión se vuelve a leer con el lock de escritura tomado,
+    así dos terminales que arrancan juntas no aplican dos veces la misma.
+
+    Args:
+        progreso (Optional[Progreso]): Avance de las actualizaciones por lotes
+
+    Returns:
+        List[int]: Versiones aplicadas
+    """
+    with db.connection_context():
+        with db.atomic('IMMEDIATE'):
+            if version_esquema() == 0 and _base_nueva():
+                db.create_tables(MODELOS)
+                crear_disparadores()
+                _fijar_version(ultima_version())
+                return []
+
+        aplicadas = []
+        for migracion in MIGRACIONES:
+            if migracion.version <= version_esquema():
+                continue
+            inicio = time.perf_counter()
+            if migracion.por_lotes:
+                migracion.aplicar(progreso)
+            with db.atomic('IMMEDIATE'):
+                if migracion.version <= version_esquema():
+                    continue
+                if not migracion.por_lotes:
+                    migracion.aplicar(progreso)
+                TareaMigracion.delete().where(TareaMigracion.tarea == _marca(migracion.version)).execute()
+                _fijar_version(migracion.version)
+            aplicadas.append(migracion.version)
+            logging.info(f'Migración {migracion.version} ({migracion.descripcion}) '
+                         f'aplicada en {time.perf_counter() - inicio:.1f} s')
+
+        if aplicadas:
+            with db.atomic():
+                crear_disparadores()
+        return aplicadas
+
+def main():
+    from utilidades import configurar_logging
+
+    argparse.ArgumentParser(description="Aplica las migraciones pendientes del esquema").parse_args()
+
+    def mostrar(tarea: str, hechas: int, total: int):
+        print(f"\r{tarea}: {hechas * 100 // total:3d} % ({hechas}/{total})", end='', flush=True)
+        if hechas == total:
+            print()
+
+    configurar_logging()
+    aplicadas = migrar(mostrar)
+    with db.connection_context():
+        version = version_esquema()
+    print(f"Esquema en versión {version} ({len(aplicadas)} migraciones aplicadas)")
+
+if __name__ == '__main__':
+    main()
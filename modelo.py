@@ -1,74 +1,632 @@
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+import logging
+import sqlite3
+import threading
+import time
 from peewee import *
-from typing import List, Optional
+from playhouse.pool import PooledSqliteDatabase
+from typing import List, Optional, NamedTuple, Dict, Any
+
+from utilidades import a_centavos, de_centavos
+from validacion import normalizar_telefono
 
 # Configuración de la base de datos
-db = SqliteDatabase('distribucion_bebidas.db')
+RUTA_DB = 'distribucion_bebidas.db'
+
+# WAL permite que los lectores (reportes, gráficos) trabajen en paralelo con
+# la carga de ventas sin bloquearse; busy_timeout espera en vez de fallar con
+# "database is locked" cuando dos escritores coinciden.
+# auto_vacuum va primero: solo tiene efecto en una base sin tablas (en una
+# base existente se activa con el VACUUM del primer mantenimiento).
+PRAGMAS = {
+    'auto_vacuum': 'incremental',
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -8000,
+}
+
+class BaseDatosVigilada(PooledSqliteDatabase):
+    """
+    Pool de escritura que lleva la cuenta de las transacciones abiertas en
+    todos los hilos y de cuándo terminó la última. El mantenimiento reserva
+    la base solo si está ociosa, y mientras dura un paso de mantenimiento
+    las transacciones nuevas esperan a que termine antes del BEGIN.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._actividad = threading.Condition()
+        self._transacciones_abiertas = 0
+        self._ultima_actividad = time.monotonic()
+        self._reservada = False
+
+    def begin(self, *args, **kwargs):
+        if self.transaction_depth() > 0:
+            return super().begin(*args, **kwargs)
+        with self._actividad:
+            while self._reservada:
+                self._actividad.wait()
+            self._transacciones_abiertas += 1
+        try:
+            return super().begin(*args, **kwargs)
+        except Exception:
+            self._terminar_transaccion()
+            raise
+
+    def pop_transaction(self):
+        transaccion = super().pop_transaction()
+        if self.transaction_depth() == 0:
+            self._terminar_transaccion()
+        return transaccion
+
+    def _terminar_transaccion(self):
+        with self._actividad:
+            self._transacciones_abiertas -= 1
+            self._ultima_actividad = time.monotonic()
+            self._actividad.notify_all()
+
+    def segundos_ociosa(self) -> float:
+        """Segundos desde la última transacción (0 si hay alguna abierta)."""
+        with self._actividad:
+            if self._transacciones_abiertas:
+                return 0.0
+            return time.monotonic() - self._ultima_actividad
+
+    @contextmanager
+    def reservar_ociosa(self, inactividad: float = 0):
+        """
+        Reserva la base para un paso de mantenimiento si no hay transacciones
+        abiertas y pasaron `inactividad` segundos desde la última.
+
+        Yields:
+            bool: True si se reservó; con False el paso no debe correr
+        """
+        with self._actividad:
+            reservada = (not self._reservada and not self._transacciones_abiertas
+                         and time.monotonic() - self._ultima_actividad >= inactividad)
+            if reservada:
+                self._reservada = True
+        try:
+            yield reservada
+        finally:
+            if reservada:
+                with self._actividad:
+                    self._reservada = False
+                    self._actividad.notify_all()
+
+# Pool de conexiones: peewee mantiene una conexión por hilo y la devuelve al
+# pool al cerrarla, por eso se permite reutilizarla desde otro hilo.
+db = BaseDatosVigilada(
+    RUTA_DB,
+    pragmas=PRAGMAS,
+    max_connections=8,
+    stale_timeout=300,
+    check_same_thread=False
+)
+# Disponible en SQL para completar telefono_normalizado en las migraciones
+db.register_function(normalizar_telefono, 'normalizar_telefono', 1, deterministic=True)
+
+# Conexiones de solo lectura para reportes y gráficos. El archivo se abre con
+# mode=ro y además query_only, así un reporte nunca puede tomar el lock de
+# escritura.
+db_lectura = PooledSqliteDatabase(
+    f'file:{RUTA_DB}?mode=ro',
+    uri=True,
+    pragmas={'query_only': 1, 'busy_timeout': 5000, 'cache_size': -8000},
+    max_connections=8,
+    stale_timeout=300,
+    check_same_thread=False
+)
+
+class CentavosField(IntegerField):
+    """
+    Monto de dinero guardado como entero de centavos. En Python se lee y se
+    asigna como Decimal con dos decimales; las comparaciones con un campo
+    convierten el otro operando, y las sumas en SQL son enteras y exactas
+    (fn.SUM no pasa por el campo: devuelve centavos).
+    """
+
+    def db_value(self, value):
+        return None if value is None else a_centavos(value)
+
+    def python_value(self, value):
+        return None if value is None else de_centavos(value)
 
 class BaseModel(Model):
     class Meta:
         database = db
 
-class Proveedor(BaseModel):
+class ModeloReplicado(BaseModel):
+    """
+    Modelo compartido entre terminales. Los disparadores de la base (ver
+    migraciones.crear_disparadores) le asignan en cada alta o modificación el número
+    siguiente de la secuencia global de cambios, y sus bajas quedan en
+    RegistroBorrado con su propio número.
+    """
+    secuencia = IntegerField(default=0, index=True)
+
+class Proveedor(ModeloReplicado):
     nombre = CharField(max_length=100)
     telefono = CharField(max_length=20)
+    telefono_normalizado = CharField(max_length=20, default='', index=True)  # lo mantiene el controlador
     email = CharField(max_length=100, null=True)
     direccion = TextField(null=True)
     activo = BooleanField(default=True)
     fecha_registro = DateTimeField(default=datetime.now)
 
-class Producto(BaseModel):
+class Producto(ModeloReplicado):
     nombre = CharField(max_length=100)
     descripcion = TextField(null=True)
-    precio_unitario = DecimalField(decimal_places=2, auto_round=True)
+    precio_unitario = CentavosField()
     stock_actual = IntegerField(default=0)
     stock_minimo = IntegerField(default=10)
     proveedor = ForeignKeyField(Proveedor, backref='productos')
     activo = BooleanField(default=True)
     fecha_actualizacion = DateTimeField(default=datetime.now)
+    version = IntegerField(default=0)  # control de concurrencia optimista
 
-class Cliente(BaseModel):
+class Cliente(ModeloReplicado):
     nombre = CharField(max_length=100)
     telefono = CharField(max_length=20)
+    telefono_normalizado = CharField(max_length=20, default='', index=True)  # lo mantiene el controlador
     email = CharField(max_length=100, null=True)
     direccion = TextField()
     fecha_registro = DateTimeField(default=datetime.now)
     activo = BooleanField(default=True)
-    limite_credito = DecimalField(decimal_places=2, default=0)
+    limite_credito = CentavosField(default=0)  # 0 = sin límite
+    saldo = CentavosField(default=0)  # deuda pendiente, la mantiene el controlador
 
-class Venta(BaseModel):
+    class Meta:
+        indexes = (
+            # Listado paginado por nombre (la app móvil pide de a páginas)
+            (('activo', 'nombre'), False),
+        )
+
+class Venta(ModeloReplicado):
     cliente = ForeignKeyField(Cliente, backref='ventas')
     fecha = DateTimeField(default=datetime.now)
-    total = DecimalField(decimal_places=2, default=0)
+    total = CentavosField(default=0)
     pagada = BooleanField(default=False)
     notas = TextField(null=True)
+    monto_pagado = CentavosField(default=0)  # suma de sus pagos
+    excede_credito = BooleanField(default=False)  # autorizada por encima del límite
+    id_externo = CharField(max_length=36, null=True, unique=True)  # venta cargada sin conexión
+
+    class Meta:
+        indexes = (
+            # Ventas impagas de un cliente en orden (imputación FIFO, filtros)
+            (('cliente', 'pagada', 'fecha'), False),
+            # Cubre los saldos y la antigüedad por cliente sin leer la tabla
+            (('pagada', 'cliente', 'fecha', 'total', 'monto_pagado'), False),
+        )
 
-class DetalleVenta(BaseModel):
+class DetalleVenta(ModeloReplicado):
     venta = ForeignKeyField(Venta, backref='detalles')
     producto = ForeignKeyField(Producto, backref='ventas')
     cantidad = IntegerField()
-    precio_unitario = DecimalField(decimal_places=2)
-    subtotal = DecimalField(decimal_places=2)
+    precio_unitario = CentavosField()
+    subtotal = CentavosField()
 
-class Pago(BaseModel):
+class Pago(ModeloReplicado):
     venta = ForeignKeyField(Venta, backref='pagos')
     fecha = DateTimeField(default=datetime.now)
-    monto = DecimalField(decimal_places=2)
+    monto = CentavosField()
     metodo_pago = CharField(max_length=50)
     notas = TextField(null=True)
 
-def inicializar_db():
-    """Inicializa la base de datos creando todas las tablas necesarias."""
-    db.connect()
-    db.create_tables([
-        Proveedor,
-        Producto,
-        Cliente,
-        Venta,
-        DetalleVenta,
-        Pago
-    ])
-    db.close()
+class SecuenciaCambios(BaseModel):
+    """Último número de la secuencia global de cambios (una sola fila)."""
+    valor = IntegerField(default=0)
+
+class RegistroBorrado(BaseModel):
+    """Marca de borrado de un registro replicado, para que las réplicas lo eliminen."""
+    tabla = CharField(max_length=50)
+    registro_id = IntegerField()
+    secuencia = IntegerField(index=True)
+
+# Tipos de movimiento de stock
+MOVIMIENTO_VENTA = 'venta'
+MOVIMIENTO_ANULACION = 'anulacion'
+MOVIMIENTO_AJUSTE = 'ajuste'
+MOVIMIENTO_COMPRA = 'compra'
+MOVIMIENTO_INICIAL = 'inicial'
+
+class MovimientoStock(BaseModel):
+    """Diario de stock de solo inserción: cada alta o baja de unidades."""
+    producto = ForeignKeyField(Producto, backref='movimientos')
+    fecha = DateTimeField(default=datetime.now)
+    tipo = CharField(max_length=20)
+    cantidad = IntegerField()  # positivo entra, negativo sale
+    referencia = IntegerField(null=True)  # id de la venta u orden que lo originó
+    motivo = TextField(null=True)
+
+    class Meta:
+        indexes = (
+            (('producto', 'fecha'), False),
+        )
+
+class CorteStock(BaseModel):
+    """Foto periódica del stock de cada producto para acotar el recorrido del diario."""
+    producto = ForeignKeyField(Producto, backref='cortes')
+    fecha = DateTimeField()
+    stock = IntegerField()
+
+    class Meta:
+        indexes = (
+            (('producto', 'fecha'), False),
+        )
+
+class AlertaStock(BaseModel):
+    """Productos con stock en o bajo el mínimo (lo mantiene alertas.MotorAlertasStock)."""
+    producto = ForeignKeyField(Producto, primary_key=True, backref='alerta')
+    fecha = DateTimeField(default=datetime.now)
+
+# Estados de una orden de compra
+ORDEN_PENDIENTE = 'pendiente'
+ORDEN_RECIBIDA = 'recibida'
+ORDEN_CANCELADA = 'cancelada'
+
+class OrdenCompra(BaseModel):
+    """Pedido de reposición a un proveedor."""
+    proveedor = ForeignKeyField(Proveedor, backref='ordenes')
+    fecha = DateTimeField(default=datetime.now)
+    estado = CharField(max_length=20, default=ORDEN_PENDIENTE, index=True)
+    fecha_recepcion = DateTimeField(null=True)
+    notas = TextField(null=True)
+
+class DetalleOrdenCompra(BaseModel):
+    orden = ForeignKeyField(OrdenCompra, backref='detalles')
+    producto = ForeignKeyField(Producto, backref='ordenes')
+    cantidad = IntegerField()
+    cantidad_recibida = IntegerField(default=0)
+    costo_unitario = CentavosField(null=True)
+
+class PronosticoProducto(BaseModel):
+    """Último pronóstico de demanda calculado por pronostico.MotorPronostico."""
+    producto = ForeignKeyField(Producto, primary_key=True, backref='pronostico')
+    fecha_calculo = DateTimeField(default=datetime.now)
+    demanda_diaria = FloatField()
+    media_movil = FloatField()
+    demanda_horizonte = FloatField()
+    minimo_sugerido = IntegerField()
+
+class PeriodoArchivado(BaseModel):
+    """Año cuyas ventas cerradas se movieron a su archivo anual (ver archivo.py)."""
+    anio = IntegerField(primary_key=True)
+    archivo = CharField(max_length=255)
+    desde = DateTimeField()  # primera venta archivada
+    hasta = DateTimeField()  # corte (exclusivo) de lo archivado, ventas y pagos
+    ventas = IntegerField(default=0)
+    fecha_archivado = DateTimeField(default=datetime.now)
+
+class ResumenVentasArchivadas(BaseModel):
+    """Totales mensuales por cliente de las ventas archivadas."""
+    mes = DateTimeField()  # primer instante del mes
+    cliente = ForeignKeyField(Cliente, backref='resumenes_archivados')
+    cantidad_ventas = IntegerField(default=0)
+    total_ventas = CentavosField(default=0)
+    total_pagado = CentavosField(default=0)
+
+    class Meta:
+        indexes = (
+            (('mes', 'cliente'), True),
+        )
+
+class ResumenProductosArchivados(BaseModel):
+    """Unidades e importe mensual por producto de las ventas archivadas."""
+    mes = DateTimeField()
+    producto = ForeignKeyField(Producto, backref='resumenes_archivados')
+    cantidad = IntegerField(default=0)
+    total = CentavosField(default=0)
+
+    class Meta:
+        indexes = (
+            (('mes', 'producto'), True),
+        )
+
+# Indicadores del tablero que no dependen del día
+INDICADOR_SALDO_PENDIENTE = 'saldo_pendiente'
+
+class TareaMigracion(BaseModel):
+    """Actualización por lotes pendiente de una migración y último id procesado."""
+    tarea = CharField(primary_key=True, max_length=100)
+    ultimo_id = IntegerField(default=0)
+
+class IndicadorTablero(BaseModel):
+    """Indicador global del tablero, mantenido por cada operación (ver tablero.py)."""
+    clave = CharField(max_length=40, primary_key=True)
+    valor = CentavosField(default=0)
+    fecha_actualizacion = DateTimeField(default=datetime.now)
+
+class ResumenDiario(BaseModel):
+    """Ventas y cobros de un día, mantenidos por cada operación (ver tablero.py)."""
+    fecha = DateField(primary_key=True)
+    cantidad_ventas = IntegerField(default=0)
+    total_ventas = CentavosField(default=0)
+    total_cobrado = CentavosField(default=0)
+
+class ResumenProductoDiario(BaseModel):
+    """Unidades e importe vendidos de un producto en un día."""
+    fecha = DateField()
+    producto = ForeignKeyField(Producto, backref='resumenes_diarios')
+    cantidad = IntegerField(default=0)
+    total = CentavosField(default=0)
+
+    class Meta:
+        indexes = (
+            (('fecha', 'producto'), True),
+        )
+
+# Filas livianas de solo lectura para las listas de la interfaz. Son tuplas
+# con nombre: no tienen __dict__ por instancia, ni seguimiento de campos
+# modificados, ni descriptores de claves foráneas como las instancias Model.
+class ClienteFila(NamedTuple):
+    id: int
+    nombre: str
+    telefono: str
+    direccion: str
+    email: Optional[str]
+
+class ProveedorFila(NamedTuple):
+    id: int
+    nombre: str
+    telefono: str
+    email: Optional[str]
+    direccion: Optional[str]
+
+class ProductoFila(NamedTuple):
+    id: int
+    nombre: str
+    descripcion: Optional[str]
+    precio_unitario: Decimal
+    stock_actual: int
+    stock_minimo: int
+    proveedor_id: int
+    proveedor_nombre: str
+
+class VentaFila(NamedTuple):
+    id: int
+    fecha: datetime
+    cliente_id: int
+    cliente_nombre: str
+    total: Decimal
+    pagada: bool
+
+class AlertaFila(NamedTuple):
+    id: int
+    nombre: str
+    stock_actual: int
+    stock_minimo: int
+
+class OrdenCompraFila(NamedTuple):
+    id: int
+    fecha: datetime
+    proveedor_id: int
+    proveedor_nombre: str
+    estado: str
+    items: int
+    unidades: int
+
+class PronosticoFila(NamedTuple):
+    producto_id: int
+    demanda_diaria: float
+    media_movil: float
+    demanda_horizonte: float
+    minimo_sugerido: int
+
+class SugerenciaReposicionFila(NamedTuple):
+    producto_id: int
+    nombre: str
+    proveedor_id: int
+    proveedor_nombre: str
+    stock_actual: int
+    stock_minimo: int
+    venta_diaria: float
+    en_camino: int
+    sugerido: int
+
+def lectura(query):
+    """
+    Enlaza una consulta a la base de solo lectura.
+    
+    Args:
+        query: Consulta peewee a ejecutar
+        
+    Returns:
+        La misma consulta, que se ejecutará con una conexión de db_lectura
+    """
+    return query.bind(db_lectura)
+
+MODELOS = [
+    Proveedor,
+    Producto,
+    Cliente,
+    Venta,
+    DetalleVenta,
+    Pago,
+    MovimientoStock,
+    CorteStock,
+    AlertaStock,
+    OrdenCompra,
+    DetalleOrdenCompra,
+    PronosticoProducto,
+    PeriodoArchivado,
+    ResumenVentasArchivadas,
+    ResumenProductosArchivados,
+    SecuenciaCambios,
+    RegistroBorrado,
+    IndicadorTablero,
+    ResumenDiario,
+    ResumenProductoDiario,
+    TareaMigracion
+]
+
+# Modelos que llevan secuencia de cambios y se publican en el feed de cambios
+MODELOS_REPLICADOS = [Proveedor, Producto, Cliente, Venta, DetalleVenta, Pago]
+
+def inicializar_db(progreso=None):
+    """
+    Crea la base si no existe o la lleva a la última versión del esquema.
+
+    Args:
+        progreso: Recibe el avance de las migraciones por lotes (ver migraciones.migrar)
+    """
+    from migraciones import migrar
+    migrar(progreso)
+
+# Mantenimiento en los ratos ociosos: segundos sin transacciones de escritura
+# para empezar, cada cuánto corre y cada cuánto se revisa si corresponde
+INACTIVIDAD_MANTENIMIENTO = 120
+INTERVALO_MANTENIMIENTO = timedelta(hours=24)
+REVISION_MANTENIMIENTO = 60
+
+# Páginas liberadas por paso de incremental_vacuum y filas por índice que lee
+# ANALYZE: cada paso retiene la base pocos milisegundos
+PAGINAS_POR_VACIADO = 2000
+LIMITE_ANALISIS = 1000
+
+class MantenimientoInterrumpido(Exception):
+    """El mantenimiento se corta: empezó una transacción o la base está dañada."""
+
+def _conectar_mantenimiento() -> sqlite3.Connection:
+    """Conexión propia, fuera del pool, en modo autocommit."""
+    conexion = sqlite3.connect(RUTA_DB, isolation_level=None, timeout=5,
+                               check_same_thread=False)
+    conexion.execute('PRAGMA busy_timeout=5000')
+    return conexion
+
+def _pragma(conexion: sqlite3.Connection, pragma: str) -> int:
+    return conexion.execute(f'PRAGMA {pragma}').fetchone()[0]
+
+def _paso(conexion: sqlite3.Connection, inactividad: float, *sentencias: str):
+    """
+    Ejecuta las sentencias con la base reservada. Las filas se consumen
+    completas: incremental_vacuum libera una página por fila.
+    """
+    with db.reservar_ociosa(inactividad) as reservada:
+        if not reservada:
+            raise MantenimientoInterrumpido()
+        for sentencia in sentencias:
+            conexion.execute(sentencia).fetchall()
+
+def _verificar_base(inactividad: float) -> List[str]:
+    """quick_check con una conexión de solo lectura: no frena a los escritores."""
+    if db.segundos_ociosa() < inactividad:
+        raise MantenimientoInterrumpido()
+    conexion = sqlite3.connect(f'file:{RUTA_DB}?mode=ro', uri=True)
+    try:
+        resultado = [fila[0] for fila in conexion.execute('PRAGMA quick_check')]
+    finally:
+        conexion.close()
+    return [] if resultado == ['ok'] else resultado
+
+def mantener_db(inactividad: float = 0, paginas: int = PAGINAS_POR_VACIADO) -> Dict[str, Any]:
+    """
+    Mantenimiento de la base: quick_check, ANALYZE tabla por tabla, PRAGMA
+    optimize e incremental_vacuum de a `paginas` páginas. Cada paso que
+    escribe reserva la base, así nunca corre con una venta a medio
+    registrar; si entre pasos empieza una transacción, se interrumpe y lo
+    que falta queda para la próxima vez. La primera vez en una base sin
+    auto_vacuum incremental hace un VACUUM completo para activarlo.
+
+    Args:
+        inactividad (float): Segundos sin transacciones que exige cada paso
+        paginas (int): Páginas liberadas por paso de incremental_vacuum
+
+    Returns:
+        Dict[str, Any]: completo, duracion, problemas, paginas_liberadas,
+        bytes_liberados y tamanio (bytes de la base al terminar)
+    """
+    inicio = time.perf_counter()
+    resultado = {'completo': False, 'problemas': [], 'paginas_liberadas': 0}
+    conexion = _conectar_mantenimiento()
+    try:
+        tamanio_pagina = _pragma(conexion, 'page_size')
+        paginas_antes = _pragma(conexion, 'page_count')
+        try:
+            resultado['problemas'] = _verificar_base(inactividad)
+            if resultado['problemas']:
+                # Sobre una base dañada no se reorganizan páginas
+                raise MantenimientoInterrumpido()
+
+            if _pragma(conexion, 'auto_vacuum') != 2:
+                _paso(conexion, inactividad, 'PRAGMA auto_vacuum=INCREMENTAL', 'VACUUM')
+                logging.info('Mantenimiento: auto_vacuum incremental activado')
+
+            conexion.execute(f'PRAGMA analysis_limit={LIMITE_ANALISIS}')
+            for modelo in MODELOS:
+                _paso(conexion, inactividad, f'ANALYZE "{modelo._meta.table_name}"')
+            _paso(conexion, inactividad, 'PRAGMA optimize')
+
+            while _pragma(conexion, 'freelist_count'):
+                _paso(conexion, inactividad, f'PRAGMA incremental_vacuum({paginas})')
+            # En WAL el archivo se achica recién con el checkpoint
+            _paso(conexion, inactividad, 'PRAGMA wal_checkpoint(PASSIVE)')
+            resultado['completo'] = True
+        except MantenimientoInterrumpido:
+            pass
+
+        paginas_despues = _pragma(conexion, 'page_count')
+    finally:
+        conexion.close()
+
+    resultado['paginas_liberadas'] = max(paginas_antes - paginas_despues, 0)
+    resultado['bytes_liberados'] = resultado['paginas_liberadas'] * tamanio_pagina
+    resultado['tamanio'] = paginas_despues * tamanio_pagina
+    resultado['duracion'] = time.perf_counter() - inicio
+    if resultado['problemas']:
+        logging.error(f'quick_check encontró problemas: {resultado["problemas"][:5]}')
+    logging.info(f'Mantenimiento {"completo" if resultado["completo"] else "interrumpido"} '
+                 f'en {resultado["duracion"]:.2f} s: '
+                 f'{resultado["bytes_liberados"] / 1e6:.1f} MB liberados, '
+                 f'base de {resultado["tamanio"] / 1e6:.1f} MB')
+    return resultado
+
+class ProgramadorMantenimiento:
+    """
+    Hilo en segundo plano que corre mantener_db una vez por
+    INTERVALO_MANTENIMIENTO, cuando la base lleva INACTIVIDAD_MANTENIMIENTO
+    segundos sin transacciones. Si se interrumpe, reintenta en el próximo
+    rato ocioso.
+    """
+
+    def __init__(self, intervalo: timedelta = INTERVALO_MANTENIMIENTO,
+                 inactividad: float = INACTIVIDAD_MANTENIMIENTO):
+        self.intervalo = intervalo
+        self.inactividad = inactividad
+        self.ultimo: Optional[datetime] = None
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._ejecutar, name='mantenimiento', daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+    def corresponde(self) -> bool:
+        return ((self.ultimo is None or datetime.now() - self.ultimo >= self.intervalo)
+                and db.segundos_ociosa() >= self.inactividad)
+
+    def _ejecutar(self):
+        while not self._detener.wait(REVISION_MANTENIMIENTO):
+            if not self.corresponde():
+                continue
+            try:
+                resultado = mantener_db(self.inactividad)
+                # Una base dañada no se vuelve a revisar hasta el próximo intervalo
+                if resultado['completo'] or resultado['problemas']:
+                    self.ultimo = datetime.now()
+            except Exception as e:
+                logging.error(f'Error en el mantenimiento de la base: {str(e)}')
 
 if __name__ == '__main__':
     inicializar_db() 
\ No newline at end of file
@@ -0,0 +1,538 @@
+from typing import List, Dict, Optional, Tuple, Any, Iterator, Iterable
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+
+import numpy as np
+from peewee import fn, Case, Value
+
+from modelo import (
+    db_lectura, lectura, Cliente, Producto,
+    Venta, DetalleVenta, Pago, PeriodoArchivado,
+    ResumenVentasArchivadas, ResumenProductosArchivados
+)
+from archivo import filas_con_archivo
+from utilidades import log_operacion, de_centavos
+
+# Tipos de reporte tal como se muestran en la pestaña Reportes
+TIPOS_REPORTE = (
+    'Ventas por Cliente',
+    'Productos más Vendidos',
+    'Balance de Pagos',
+    'Stock Actual',
+    'Antigüedad de Saldos'
+)
+
+# Reportes que se pueden dividir por fecha y la columna que filtran
+COLUMNA_FECHA = {
+    'Ventas por Cliente': Venta.fecha,
+    'Productos más Vendidos': Venta.fecha,
+    'Balance de Pagos': Pago.fecha
+}
+
+# Fin de partición exclusivo: se resta un microsegundo porque los filtros
+# usan <= hasta y una venta en el borde no debe contarse dos veces.
+UN_MICROSEGUNDO = timedelta(microseconds=1)
+
+# Tipo de columna de los montos en el esquema de un lote: se cargan como
+# centavos enteros (int64), se suman sin redondeo y recién pasan a Decimal
+# al armar registros o al exportar
+CENTAVOS = 'centavos'
+
+def _inicializar_trabajador():
+    """Abre la conexión de solo lectura propia de cada proceso trabajador."""
+    db_lectura.connect(reuse_if_open=True)
+
+class LoteColumnas:
+    """
+    Resultado de un reporte en formato columnar: un arreglo NumPy por columna.
+    La misma instancia alimenta el Treeview, el gráfico y la exportación, sin
+    armar un diccionario por fila. Las columnas de montos (las listadas en
+    `montos`) guardan centavos enteros.
+    """
+
+    def __init__(self, columnas: Dict[str, np.ndarray], montos: Iterable[str] = ()):
+        self.columnas = columnas
+        self.montos = set(montos)
+
+    @classmethod
+    def desde_consulta(cls, query, esquema: List[Tuple[str, str]]) -> 'LoteColumnas':
+        """
+        Ejecuta la consulta en la base de solo lectura y carga las tuplas del
+        cursor directamente en arreglos NumPy.
+        
+        Args:
+            query: Consulta peewee; debe seleccionar las columnas en el orden del esquema
+            esquema (List[Tuple[str, str]]): Pares (nombre, dtype o CENTAVOS) de cada columna
+            
+        Returns:
+            LoteColumnas: Columnas del resultado
+        """
+        return cls.desde_filas(db_lectura.execute(query).fetchall(), esquema)
+
+    @classmethod
+    def desde_filas(cls, filas: List[Tuple], esquema: List[Tuple[str, str]]) -> 'LoteColumnas':
+        """
+        Carga tuplas ya leídas (por ejemplo, de la base y de los archivos) en arreglos NumPy.
+
+        Args:
+            filas (List[Tuple]): Tuplas en el orden del esquema
+            esquema (List[Tuple[str, str]]): Pares (nombre, dtype o CENTAVOS) de cada columna
+
+        Returns:
+            LoteColumnas: Columnas del resultado
+        """
+        # Las fechas llegan como texto ISO; se convierten en bloque al final
+        tipos = [(nombre, 'O' if tipo.startswith('datetime64') else
+                  'i8' if tipo == CENTAVOS else tipo)
+                 for nombre, tipo in esquema]
+        datos = np.array(filas, dtype=tipos)
+        
+        columnas = {}
+        for nombre, tipo in esquema:
+            columna = datos[nombre]
+            if tipo.startswith('datetime64'):
+                columna = columna.astype(str).astype(tipo)
+            columnas[nombre] = columna
+        return cls(columnas, [nombre for nombre, tipo in esquema if tipo == CENTAVOS])
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columnas.values()), ()))
+
+    def __getitem__(self, nombre: str) -> np.ndarray:
+        return self.columnas[nombre]
+
+    def __setitem__(self, nombre: str, columna: np.ndarray):
+        self.columnas[nombre] = columna
+
+    def agregar_monto(self, nombre: str, centavos: np.ndarray):
+        """Agrega una columna calculada de montos en centavos (por ejemplo, un saldo)."""
+        self.columnas[nombre] = centavos
+        self.montos.add(nombre)
+
+    def pesos(self, nombre: str) -> np.ndarray:
+        """Columna en pesos como float, solo para dibujar (los gráficos no necesitan centavos exactos)."""
+        columna = self.columnas[nombre]
+        return columna / 100 if nombre in self.montos else columna
+
+    def filas(self, *columnas) -> Iterator[Tuple]:
+        """Recorre las columnas indicadas como tuplas (para insertar en un Treeview)."""
+        return zip(*(self.columnas[nombre] for nombre in columnas))
+
+    def agrupar(self, clave: str, sumas: List[str]) -> 'LoteColumnas':
+        """
+        Une las filas que comparten la clave sumando las columnas indicadas; el
+        resto conserva el valor de la primera aparición, igual que el orden.
+        La columna clave no se incluye en el resultado.
+
+        Args:
+            clave (str): Columna que identifica cada fila (por ejemplo, el id)
+            sumas (List[str]): Columnas numéricas a acumular
+
+        Returns:
+            LoteColumnas: Una fila por valor de la clave
+        """
+        _, primeras, grupo = np.unique(self.columnas[clave], return_index=True, return_inverse=True)
+        # np.unique ordena por clave; se renumeran los grupos por primera aparición
+        orden = np.argsort(primeras, kind='stable')
+        rango = np.empty_like(orden)
+        rango[orden] = np.arange(len(orden))
+        grupo = rango[grupo.ravel()]
+
+        columnas = {}
+        for nombre, columna in self.columnas.items():
+            if nombre == clave:
+                continue
+            if nombre in sumas and columna.dtype.kind in 'iu':
+                # Enteros (cantidades y centavos): suma exacta, bincount pasa por float
+                suma = np.zeros(len(orden), dtype=columna.dtype)
+                np.add.at(suma, grupo, columna)
+                columnas[nombre] = suma
+            elif nombre in sumas:
+                suma = np.bincount(grupo, weights=columna, minlength=len(orden))
+                columnas[nombre] = suma.astype(columna.dtype)
+            else:
+                columnas[nombre] = columna[primeras[orden]]
+        return LoteColumnas(columnas, self.montos - {clave})
+
+    def ordenar(self, columna: str, descendente: bool = True) -> 'LoteColumnas':
+        """Reordena todas las columnas según una de ellas."""
+        valores = self.columnas[columna]
+        if descendente:
+            # Orden estable también al invertir: los empates conservan su posición
+            orden = len(valores) - 1 - np.argsort(valores[::-1], kind='stable')[::-1]
+        else:
+            orden = np.argsort(valores, kind='stable')
+        return LoteColumnas({nombre: valores[orden] for nombre, valores in self.columnas.items()},
+                            self.montos)
+
+    def _valores(self, nombre: str) -> List[Any]:
+        valores = self.columnas[nombre].tolist()
+        if nombre in self.montos:
+            return [de_centavos(valor) for valor in valores]
+        return valores
+
+    def a_registros(self) -> List[Dict[str, Any]]:
+        """Convierte el lote a la lista de diccionarios de los reportes clásicos (montos en Decimal)."""
+        nombres = list(self.columnas)
+        valores = [self._valores(nombre) for nombre in nombres]
+        return [dict(zip(nombres, fila)) for fila in zip(*valores)]
+
+    def a_dataframe(self):
+        """Devuelve el lote como DataFrame de pandas; solo los montos se convierten a Decimal."""
+        import pandas as pd
+        return pd.DataFrame({nombre: self._valores(nombre) if nombre in self.montos else columna
+                             for nombre, columna in self.columnas.items()})
+
+# Tramos de la antigüedad de saldos: columna, días desde y hasta (inclusive)
+TRAMOS_ANTIGUEDAD = (
+    ('d0_30', 0, 30),
+    ('d31_60', 31, 60),
+    ('d61_90', 61, 90),
+    ('d90_mas', 91, None)
+)
+
+def consulta_antiguedad(al: datetime, dias_plazo: int = 0):
+    """
+    Saldos impagos por cliente repartidos en tramos de antigüedad con una sola
+    pasada agrupada sobre las ventas impagas. La antigüedad se cuenta desde el
+    vencimiento (fecha de la venta + días de plazo); lo no vencido cae en 0-30.
+
+    Args:
+        al (datetime): Fecha de corte
+        dias_plazo (int): Días de plazo de pago
+
+    Returns:
+        Consulta con cliente, un saldo por tramo y el total
+    """
+    saldo = Venta.total - Venta.monto_pagado
+    tramos = []
+    for _, desde_dias, hasta_dias in TRAMOS_ANTIGUEDAD:
+        condicion = Value(True)
+        if desde_dias:
+            condicion &= Venta.fecha <= al - timedelta(days=desde_dias + dias_plazo)
+        if hasta_dias is not None:
+            condicion &= Venta.fecha > al - timedelta(days=hasta_dias + 1 + dias_plazo)
+        tramos.append(fn.SUM(Case(None, [(condicion, saldo)], 0)))
+
+    return (Venta
+            .select(Cliente.nombre, *tramos, fn.SUM(saldo))
+            .join(Cliente)
+            .where(Venta.pagada == False)
+            .group_by(Venta.cliente)
+            .order_by(fn.SUM(saldo).desc()))
+
+def filtrar_fechas(query, columna, desde: Optional[datetime], hasta: Optional[datetime]):
+    """Aplica a la consulta el rango de fechas (inclusive) sobre la columna dada."""
+    if desde:
+        query = query.where(columna >= desde)
+    if hasta:
+        query = query.where(columna <= hasta)
+    return query
+
+def _como_fecha(valor: Any) -> datetime:
+    if isinstance(valor, datetime):
+        return valor
+    return datetime.fromisoformat(str(valor))
+
+def _parcial_ventas_cliente(desde: Optional[datetime],
+                            hasta: Optional[datetime]) -> Dict[int, List[Any]]:
+    """Totales de ventas y pagos por cliente para una partición (incluye lo archivado)."""
+    ventas = filtrar_fechas(
+        Venta
+        .select(Venta.cliente, fn.SUM(Venta.total))
+        .group_by(Venta.cliente),
+        Venta.fecha, desde, hasta)
+    ventas_archivadas = filtrar_fechas(
+        ResumenVentasArchivadas
+        .select(ResumenVentasArchivadas.cliente, fn.SUM(ResumenVentasArchivadas.total_ventas))
+        .group_by(ResumenVentasArchivadas.cliente),
+        ResumenVentasArchivadas.mes, desde, hasta)
+
+    pagos = filtrar_fechas(
+        Pago
+        .select(Venta.cliente, fn.SUM(Pago.monto))
+        .join(Venta)
+        .group_by(Venta.cliente),
+        Venta.fecha, desde, hasta)
+    pagos_archivados = filtrar_fechas(
+        ResumenVentasArchivadas
+        .select(ResumenVentasArchivadas.cliente, fn.SUM(ResumenVentasArchivadas.total_pagado))
+        .group_by(ResumenVentasArchivadas.cliente),
+        ResumenVentasArchivadas.mes, desde, hasta)
+
+    # Sumas en centavos enteros; combinar_parciales las pasa a Decimal
+    parcial = {}
+    for cliente_id, total in filas_con_archivo(ventas, desde, hasta, ventas_archivadas):
+        parcial.setdefault(cliente_id, [0, 0])[0] += total or 0
+    for cliente_id, pagado in filas_con_archivo(pagos, desde, hasta, pagos_archivados):
+        parcial.setdefault(cliente_id, [0, 0])[1] += pagado or 0
+    return parcial
+
+def _parcial_productos(desde: Optional[datetime],
+                       hasta: Optional[datetime]) -> Dict[int, List[Any]]:
+    """Cantidad y total vendido por producto para una partición (incluye lo archivado)."""
+    query = filtrar_fechas(
+        DetalleVenta
+        .select(DetalleVenta.producto,
+                fn.SUM(DetalleVenta.cantidad),
+                fn.SUM(DetalleVenta.subtotal))
+        .join(Venta)
+        .group_by(DetalleVenta.producto),
+        Venta.fecha, desde, hasta)
+    archivados = filtrar_fechas(
+        ResumenProductosArchivados
+        .select(ResumenProductosArchivados.producto,
+                fn.SUM(ResumenProductosArchivados.cantidad),
+                fn.SUM(ResumenProductosArchivados.total))
+        .group_by(ResumenProductosArchivados.producto),
+        ResumenProductosArchivados.mes, desde, hasta)
+
+    parcial = {}
+    for producto_id, cantidad, total in filas_con_archivo(query, desde, hasta, archivados):
+        acumulado = parcial.setdefault(producto_id, [0, 0])
+        acumulado[0] += int(cantidad or 0)
+        acumulado[1] += total or 0
+    return parcial
+
+def _parcial_pagos(desde: Optional[datetime],
+                   hasta: Optional[datetime]) -> List[Tuple]:
+    """Pagos de una partición como tuplas (fecha, cliente, monto, método)."""
+    query = filtrar_fechas(
+        Pago
+        .select(Pago.fecha, Cliente.nombre, Pago.monto, Pago.metodo_pago)
+        .join(Venta)
+        .join(Cliente),
+        Pago.fecha, desde, hasta)
+
+    filas = filas_con_archivo(query, desde, hasta)
+    return [(_como_fecha(fecha), cliente, de_centavos(monto), metodo)
+            for fecha, cliente, monto, metodo in filas]
+
+def estado_stock(stock_actual: int, stock_minimo: int) -> str:
+    """Estado de un producto en el reporte de stock."""
+    if stock_actual <= 0:
+        return 'Agotado'
+    return 'Bajo' if stock_actual <= stock_minimo else 'Normal'
+
+def _parcial_stock(desde: Optional[datetime] = None,
+                   hasta: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Stock actual de los productos activos (no depende de fechas)."""
+    query = (Producto
+             .select(Producto.nombre, Producto.stock_actual, Producto.stock_minimo)
+             .where(Producto.activo == True)
+             .order_by(Producto.stock_actual))
+
+    return [{
+        'producto': nombre,
+        'stock_actual': stock_actual,
+        'stock_minimo': stock_minimo,
+        'estado': estado_stock(stock_actual, stock_minimo)
+    } for nombre, stock_actual, stock_minimo in lectura(query).tuples()]
+
+def _parcial_antiguedad(desde: Optional[datetime] = None,
+                        hasta: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Antigüedad de saldos al fin del rango (o a hoy); no se particiona."""
+    nombres = ['cliente'] + [nombre for nombre, _, _ in TRAMOS_ANTIGUEDAD] + ['total']
+    return [dict(zip(nombres, [cliente] + [de_centavos(saldo) for saldo in saldos]))
+            for cliente, *saldos in lectura(consulta_antiguedad(hasta or datetime.now())).tuples()]
+
+PARCIALES = {
+    'Ventas por Cliente': _parcial_ventas_cliente,
+    'Productos más Vendidos': _parcial_productos,
+    'Balance de Pagos': _parcial_pagos,
+    'Stock Actual': _parcial_stock,
+    'Antigüedad de Saldos': _parcial_antiguedad
+}
+
+def _calcular_parcial(tipo_reporte: str, desde: Optional[datetime],
+                      hasta: Optional[datetime]) -> Any:
+    """Punto de entrada de los procesos trabajadores."""
+    return PARCIALES[tipo_reporte](desde, hasta)
+
+def _nombres(modelo, ids) -> Dict[int, Tuple[str, bool]]:
+    query = modelo.select(modelo.id, modelo.nombre, modelo.activo).where(modelo.id.in_(list(ids)))
+    return {id_: (nombre, activo) for id_, nombre, activo in lectura(query).tuples()}
+
+def combinar_parciales(tipo_reporte: str, parciales: List[Any],
+                       sin_rango: bool = False) -> List[Dict[str, Any]]:
+    """
+    Combina los resultados parciales de cada partición en el reporte final.
+    Las filas salen en el mismo orden que el reporte del controlador: por id
+    (y después por cantidad en Productos más Vendidos).
+
+    Args:
+        tipo_reporte (str): Tipo de reporte
+        parciales (List[Any]): Resultados de _calcular_parcial por partición
+        sin_rango (bool): El reporte se pidió sin fechas; Ventas por Cliente
+            incluye entonces a los clientes activos sin ventas
+
+    Returns:
+        List[Dict[str, Any]]: Filas con el mismo formato que Controlador.obtener_reporte_*
+    """
+    if tipo_reporte in ('Stock Actual', 'Antigüedad de Saldos'):
+        return parciales[0] if parciales else []
+
+    if tipo_reporte == 'Balance de Pagos':
+        filas = [fila for parcial in parciales for fila in parcial]
+        filas.sort(key=lambda fila: fila[0], reverse=True)
+        return [{
+            'fecha': fecha,
+            'cliente': cliente,
+            'monto': monto,
+            'metodo_pago': metodo
+        } for fecha, cliente, monto, metodo in filas]
+
+    # Ventas por Cliente y Productos: sumar los acumulados por id
+    acumulado = {}
+    for parcial in parciales:
+        for id_, valores in parcial.items():
+            if id_ in acumulado:
+                acumulado[id_] = [a + b for a, b in zip(acumulado[id_], valores)]
+            else:
+                acumulado[id_] = list(valores)
+
+    if tipo_reporte == 'Ventas por Cliente':
+        if sin_rango:
+            activos = lectura(Cliente.select(Cliente.id).where(Cliente.activo == True)).tuples()
+            for id_, in activos:
+                acumulado.setdefault(id_, [0, 0])
+        nombres = _nombres(Cliente, acumulado)
+        return [{
+            'cliente': nombres[id_][0],
+            'total_ventas': de_centavos(total),
+            'total_pagado': de_centavos(pagado),
+            'saldo': de_centavos(total - pagado)
+        } for id_, (total, pagado) in sorted(acumulado.items())
+            if nombres.get(id_, ('', False))[1]]
+
+    nombres = _nombres(Producto, acumulado)
+    filas = [{
+        'producto': nombres[id_][0],
+        'cantidad': cantidad,
+        'total': de_centavos(total)
+    } for id_, (cantidad, total) in sorted(acumulado.items())
+        if nombres.get(id_, ('', False))[1]]
+    filas.sort(key=lambda fila: fila['cantidad'], reverse=True)
+    return filas
+
+def particionar(desde: datetime, hasta: datetime) -> List[Tuple[datetime, datetime]]:
+    """
+    Divide un rango de fechas en particiones mensuales sin solapamiento.
+
+    Args:
+        desde (datetime): Fecha inicial
+        hasta (datetime): Fecha final (inclusive)
+
+    Returns:
+        List[Tuple[datetime, datetime]]: Pares (inicio, fin) de cada partición
+    """
+    particiones = []
+    inicio = desde
+    while inicio <= hasta:
+        if inicio.month == 12:
+            siguiente = datetime(inicio.year + 1, 1, 1)
+        else:
+            siguiente = datetime(inicio.year, inicio.month + 1, 1)
+        particiones.append((inicio, min(siguiente - UN_MICROSEGUNDO, hasta)))
+        inicio = siguiente
+    return particiones
+
+class MotorReportes:
+    """
+    Calcula reportes en un pool de procesos. Cada proceso abre su propia
+    conexión de solo lectura; los reportes por fecha se dividen en
+    particiones mensuales y los parciales se combinan en el proceso principal.
+    """
+
+    def __init__(self, procesos: Optional[int] = None):
+        self.procesos = procesos or os.cpu_count() or 1
+        self._pool = None
+
+    def _obtener_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn evita heredar conexiones SQLite abiertas (y es lo que usa Windows)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.procesos,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_trabajador
+            )
+        return self._pool
+
+    def _rango(self, tipo_reporte: str, desde: Optional[datetime],
+               hasta: Optional[datetime]) -> List[Tuple[Optional[datetime], Optional[datetime]]]:
+        """Particiones a calcular para un reporte; completa el rango con los datos."""
+        columna = COLUMNA_FECHA.get(tipo_reporte)
+        if columna is None:
+            return [(desde, hasta)]
+
+        if desde is None or hasta is None:
+            minimo, maximo = lectura(columna.model.select(fn.MIN(columna), fn.MAX(columna))).tuples()[0]
+            archivado, = lectura(PeriodoArchivado.select(fn.MIN(PeriodoArchivado.desde))).tuples()[0]
+            if minimo is None and archivado is None:
+                return [(desde, hasta)]
+            fechas = [_como_fecha(fecha) for fecha in (minimo, archivado) if fecha is not None]
+            desde = desde or min(fechas)
+            hasta = hasta or (_como_fecha(maximo) if maximo is not None else datetime.now())
+
+        return particionar(desde, hasta) or [(desde, hasta)]
+
+    @log_operacion("reporte")
+    def generar_paquete(self, desde: Optional[datetime] = None,
+                        hasta: Optional[datetime] = None,
+                        tipos: Tuple[str, ...] = TIPOS_REPORTE) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Calcula varios reportes a la vez repartiendo todas las particiones en el pool.
+
+        Args:
+            desde (Optional[datetime]): Fecha inicial
+            hasta (Optional[datetime]): Fecha final
+            tipos (Tuple[str, ...]): Reportes a calcular
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Filas de cada reporte por tipo
+        """
+        for tipo in tipos:
+            if tipo not in PARCIALES:
+                raise ValueError(f"Tipo de reporte no válido: {tipo}")
+
+        pool = self._obtener_pool()
+        futuros = {
+            tipo: [pool.submit(_calcular_parcial, tipo, inicio, fin)
+                   for inicio, fin in self._rango(tipo, desde, hasta)]
+            for tipo in tipos
+        }
+        sin_rango = desde is None and hasta is None
+        return {tipo: combinar_parciales(tipo, [f.result() for f in lista], sin_rango)
+                for tipo, lista in futuros.items()}
+
+    def generar(self, tipo_reporte: str, desde: Optional[datetime] = None,
+                hasta: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Calcula un reporte dividiendo su rango de fechas entre los procesos.
+
+        Args:
+            tipo_reporte (str): Tipo de reporte
+            desde (Optional[datetime]): Fecha inicial
+            hasta (Optional[datetime]): Fecha final
+
+        Returns:
+            List[Dict[str, Any]]: Filas del reporte
+        """
+        return self.generar_paquete(desde, hasta, (tipo_reporte,))[tipo_reporte]
+
+    def cerrar(self):
+        """Detiene los procesos trabajadores."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+_motor: Optional[MotorReportes] = None
+
+def obtener_motor() -> MotorReportes:
+    """Devuelve el motor de reportes compartido, creándolo la primera vez."""
+    global _motor
+    if _motor is None:
+        _motor = MotorReportes()
+    return _motor
@@ -0,0 +1,243 @@
+from typing import List, Dict, Optional, Tuple, Callable
+from datetime import datetime, date, timedelta
+from concurrent.futures import ProcessPoolExecutor, Future
+import multiprocessing
+import threading
+
+import numpy as np
+from peewee import fn, chunked
+
+from modelo import (
+    db, db_lectura, lectura, Venta, DetalleVenta, RegistroBorrado,
+    PronosticoProducto, PronosticoFila
+)
+from motor_reportes import _inicializar_trabajador
+from utilidades import log_operacion
+
+# Parámetros del pronóstico
+DIAS_HISTORIAL = 84          # doce semanas de ventas
+DIAS_MEDIA_MOVIL = 28
+HORIZONTE_DIAS = 7           # días que debe cubrir el mínimo (reposición semanal)
+ALFA_SUAVIZADO = 0.2         # peso de la última observación en el suavizado exponencial
+FACTOR_SEGURIDAD = 1.65      # ~95 % de nivel de servicio
+
+def serie_demanda(hasta: date, dias: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Arma la matriz de demanda diaria (productos x días) de los últimos días.
+
+    Args:
+        hasta (date): Último día (inclusive) de la serie
+        dias (int): Cantidad de días
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: IDs de producto y matriz de unidades vendidas
+    """
+    inicio = hasta - timedelta(days=dias - 1)
+    dia = fn.DATE(Venta.fecha)
+    query = (DetalleVenta
+             .select(DetalleVenta.producto, dia, fn.SUM(DetalleVenta.cantidad))
+             .join(Venta)
+             .where((Venta.fecha >= datetime.combine(inicio, datetime.min.time())) &
+                    (Venta.fecha < datetime.combine(hasta + timedelta(days=1), datetime.min.time())))
+             .group_by(DetalleVenta.producto, dia))
+    filas = db_lectura.execute(query).fetchall()
+    if not filas:
+        return np.empty(0, dtype=np.int64), np.zeros((0, dias))
+
+    productos, dias_venta, cantidades = zip(*filas)
+    ids, fila = np.unique(np.asarray(productos, dtype=np.int64), return_inverse=True)
+    columna = (np.asarray(dias_venta, dtype='datetime64[D]') - np.datetime64(inicio, 'D')).astype(np.int64)
+    demanda = np.zeros((len(ids), dias))
+    np.add.at(demanda, (fila, columna), np.asarray(cantidades, dtype=float))
+    return ids, demanda
+
+def pronosticar(demanda: np.ndarray, inicio: date, horizonte: int = HORIZONTE_DIAS,
+                alfa: float = ALFA_SUAVIZADO, factor_seguridad: float = FACTOR_SEGURIDAD,
+                dias_media_movil: int = DIAS_MEDIA_MOVIL) -> Dict[str, np.ndarray]:
+    """
+    Pronostica la demanda de todos los productos a la vez: suavizado
+    exponencial sobre la serie desestacionalizada por día de la semana.
+
+    Args:
+        demanda (np.ndarray): Matriz productos x días
+        inicio (date): Fecha de la primera columna
+        horizonte (int): Días a cubrir desde mañana
+        alfa (float): Constante de suavizado
+        factor_seguridad (float): Desvíos de stock de seguridad
+        dias_media_movil (int): Ventana de la media móvil
+
+    Returns:
+        Dict[str, np.ndarray]: demanda_diaria, media_movil, demanda_horizonte y minimo_sugerido
+    """
+    productos, dias = demanda.shape
+    dia_semana = (np.arange(dias) + inicio.weekday()) % 7
+
+    # Estacionalidad semanal: promedio de cada día de la semana sobre el promedio general
+    media = demanda.mean(axis=1, keepdims=True)
+    por_dia = np.stack([demanda[:, dia_semana == d].mean(axis=1) for d in range(7)], axis=1)
+    factores = np.divide(por_dia, media, out=np.ones_like(por_dia), where=media > 0)
+
+    estacional = factores[:, dia_semana]
+    base = np.divide(demanda, estacional, out=np.zeros_like(demanda), where=estacional > 0)
+
+    # Suavizado exponencial en forma cerrada: el nivel final es un promedio
+    # ponderado de la serie, así se resuelve con un solo producto matricial.
+    inicial = base[:, :7].mean(axis=1)
+    pesos = alfa * (1 - alfa) ** np.arange(dias - 1, -1, -1)
+    nivel = base @ pesos + inicial * (1 - alfa) ** dias
+
+    ventana = min(dias_media_movil, dias)
+    media_movil = demanda[:, -ventana:].mean(axis=1)
+    desvio = base[:, -ventana:].std(axis=1)
+
+    futuros = (np.arange(1, horizonte + 1) + (inicio.weekday() + dias - 1)) % 7
+    demanda_horizonte = nivel * factores[:, futuros].sum(axis=1)
+    # Se redondea antes del techo para que 18.000000000000004 no pase a 19
+    minimo = np.ceil(np.round(demanda_horizonte + factor_seguridad * desvio * np.sqrt(horizonte), 6))
+
+    return {
+        'demanda_diaria': nivel,
+        'media_movil': media_movil,
+        'demanda_horizonte': demanda_horizonte,
+        'minimo_sugerido': minimo.astype(np.int64)
+    }
+
+def _calcular_pronosticos(hasta: date, dias: int, horizonte: int) -> List[PronosticoFila]:
+    """Tarea del proceso trabajador: lee la serie y pronostica todos los productos."""
+    ids, demanda = serie_demanda(hasta, dias)
+    if not len(ids):
+        return []
+    resultado = pronosticar(demanda, hasta - timedelta(days=dias - 1), horizonte)
+    return list(map(PronosticoFila._make, zip(
+        ids.tolist(),
+        resultado['demanda_diaria'].tolist(),
+        resultado['media_movil'].tolist(),
+        resultado['demanda_horizonte'].tolist(),
+        resultado['minimo_sugerido'].tolist()
+    )))
+
+class MotorPronostico:
+    """
+    Calcula los pronósticos en un proceso aparte y los guarda en memoria y en
+    PronosticoProducto. El resultado se reutiliza mientras no haya ventas
+    nuevas (ni anuladas): la marca es la última secuencia de cambios de los
+    detalles y la de los borrados, dos lecturas de índice sin recorrer la
+    tabla.
+    """
+
+    def __init__(self, dias: int = DIAS_HISTORIAL, horizonte: int = HORIZONTE_DIAS):
+        self.dias = dias
+        self.horizonte = horizonte
+        self._pool = None
+        self._lock = threading.Lock()
+        self._marca = None
+        self._en_curso: Optional[Future] = None
+        self._pronosticos: Optional[Dict[int, PronosticoFila]] = None
+        self._suscriptores: List[Callable[[Dict[int, PronosticoFila]], None]] = []
+
+    def _obtener_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_trabajador
+            )
+        return self._pool
+
+    @staticmethod
+    def _marca_ventas() -> Tuple[date, int, int]:
+        detalles = DetalleVenta.select(fn.MAX(DetalleVenta.secuencia))
+        borrados = RegistroBorrado.select(fn.MAX(RegistroBorrado.secuencia))
+        with db_lectura.atomic():
+            ultimo_detalle = lectura(detalles).scalar()
+            ultimo_borrado = lectura(borrados).scalar()
+        return date.today(), ultimo_detalle or 0, ultimo_borrado or 0
+
+    def actualizar(self, forzar: bool = False) -> Future:
+        """
+        Recalcula en segundo plano si hubo ventas desde el último cálculo.
+
+        Returns:
+            Future: Se completa con el diccionario de pronósticos por producto
+        """
+        marca = self._marca_ventas()
+        with self._lock:
+            if self._en_curso is not None and not self._en_curso.done():
+                return self._en_curso
+            if not forzar and marca == self._marca and self._pronosticos is not None:
+                listo = Future()
+                listo.set_result(self._pronosticos)
+                return listo
+
+            # El día en curso está incompleto: la serie termina ayer
+            calculo = self._obtener_pool().submit(_calcular_pronosticos,
+                                                  marca[0] - timedelta(days=1),
+                                                  self.dias, self.horizonte)
+            resultado = Future()
+            calculo.add_done_callback(lambda futuro: self._terminar(futuro, marca, resultado))
+            self._en_curso = resultado
+            return resultado
+
+    def _terminar(self, futuro: Future, marca: Tuple, resultado: Future):
+        try:
+            pronosticos = {fila.producto_id: fila for fila in futuro.result()}
+            self._guardar(pronosticos)
+        except Exception as e:
+            resultado.set_exception(e)
+            return
+        with self._lock:
+            self._pronosticos = pronosticos
+            self._marca = marca
+        resultado.set_result(pronosticos)
+        for callback in list(self._suscriptores):
+            callback(pronosticos)
+
+    @log_operacion("pronóstico")
+    def _guardar(self, pronosticos: Dict[int, PronosticoFila]):
+        ahora = datetime.now()
+        with db.connection_context():
+            with db.atomic():
+                PronosticoProducto.delete().execute()
+                for lote in chunked(pronosticos.values(), 100):
+                    PronosticoProducto.insert_many([{
+                        'producto': fila.producto_id,
+                        'fecha_calculo': ahora,
+                        'demanda_diaria': fila.demanda_diaria,
+                        'media_movil': fila.media_movil,
+                        'demanda_horizonte': fila.demanda_horizonte,
+                        'minimo_sugerido': fila.minimo_sugerido
+                    } for fila in lote]).execute()
+
+    def pronosticos(self) -> Dict[int, PronosticoFila]:
+        """Devuelve el último pronóstico; al iniciar lo lee de la tabla."""
+        with self._lock:
+            if self._pronosticos is None:
+                query = PronosticoProducto.select(
+                    PronosticoProducto.producto, PronosticoProducto.demanda_diaria,
+                    PronosticoProducto.media_movil, PronosticoProducto.demanda_horizonte,
+                    PronosticoProducto.minimo_sugerido)
+                self._pronosticos = {fila[0]: PronosticoFila._make(fila)
+                                     for fila in lectura(query).tuples()}
+            return self._pronosticos
+
+    def suscribir(self, callback: Callable[[Dict[int, PronosticoFila]], None]):
+        """
+        Registra una función que recibe cada pronóstico nuevo. Se llama desde
+        el hilo de resultados del pool, no desde el que pidió el cálculo.
+        """
+        self._suscriptores.append(callback)
+
+    def cerrar(self):
+        """Libera el proceso trabajador."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+_motor: Optional[MotorPronostico] = None
+
+def obtener_motor_pronostico() -> MotorPronostico:
+    """Devuelve el motor de pronósticos compartido, creándolo la primera vez."""
+    global _motor
+    if _motor is None:
+        _motor = MotorPronostico()
+    return _motor
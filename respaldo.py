@@ -0,0 +1,421 @@
+from typing import List, Dict, Optional, Callable
+from datetime import datetime, timedelta
+import argparse
+import glob
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from modelo import db, db_lectura, RUTA_DB, PeriodoArchivado
+from archivo import ruta_archivo
+from utilidades import log_operacion
+
+# Respaldos comprimidos de la base principal. Cada archivo anual de ventas
+# (ver archivo.py) va al lado, como <respaldo>.archivo_<año>.db.gz
+DIRECTORIO_RESPALDOS = 'respaldos'
+PREFIJO_RESPALDO = 'respaldo_'
+EXTENSION_RESPALDO = '.db.gz'
+SEPARADOR_ARCHIVO = '.archivo_'
+RESPALDOS_CONSERVADOS = 14
+NIVEL_COMPRESION = 6
+
+# Copia en línea: páginas por paso y pausa entre pasos, para que la copia
+# use poco disco y CPU mientras se siguen cargando ventas
+PAGINAS_POR_PASO = 256
+PAUSA_ENTRE_PASOS = 0.005
+
+# Programador: cada cuánto se respalda y cada cuánto se revisa si corresponde
+INTERVALO_RESPALDO = timedelta(hours=24)
+REVISION_PROGRAMADOR = 15 * 60  # segundos
+
+def _ruta_respaldos(directorio: Optional[str] = None) -> str:
+    """Directorio de respaldos, junto a la base principal si no se indica otro."""
+    return directorio or os.path.join(os.path.dirname(os.path.abspath(RUTA_DB)),
+                                      DIRECTORIO_RESPALDOS)
+
+def listar_respaldos(directorio: Optional[str] = None) -> List[str]:
+    """Respaldos existentes, del más viejo al más nuevo (el nombre lleva la fecha)."""
+    directorio = _ruta_respaldos(directorio)
+    if not os.path.isdir(directorio):
+        return []
+    return [os.path.join(directorio, nombre) for nombre in sorted(os.listdir(directorio))
+            if nombre.startswith(PREFIJO_RESPALDO) and nombre.endswith(EXTENSION_RESPALDO)
+            and SEPARADOR_ARCHIVO not in nombre]
+
+def _ruta_copia_archivo(ruta: str, anio: int) -> str:
+    """Copia del archivo de un año que acompaña a un respaldo (o a su temporal)."""
+    base, extension = (ruta[:-len(EXTENSION_RESPALDO)], EXTENSION_RESPALDO) \
+        if ruta.endswith(EXTENSION_RESPALDO) else os.path.splitext(ruta)
+    return f'{base}{SEPARADOR_ARCHIVO}{anio}{extension}'
+
+def archivos_del_respaldo(ruta: str) -> Dict[int, str]:
+    """Copias de los archivos anuales guardadas con un respaldo, por año."""
+    prefijo = ruta[:-len(EXTENSION_RESPALDO)] + SEPARADOR_ARCHIVO
+    archivos = {}
+    for copia in glob.glob(glob.escape(prefijo) + '*' + EXTENSION_RESPALDO):
+        anio = copia[len(prefijo):-len(EXTENSION_RESPALDO)]
+        if anio.isdigit():
+            archivos[int(anio)] = copia
+    return archivos
+
+def _anios_archivados(conexion: sqlite3.Connection) -> List[int]:
+    tabla = PeriodoArchivado._meta.table_name
+    return [anio for anio, in conexion.execute(f'SELECT "anio" FROM "{tabla}" ORDER BY "anio"')]
+
+def fecha_respaldo(ruta: str) -> datetime:
+    nombre = os.path.basename(ruta)[len(PREFIJO_RESPALDO):-len(EXTENSION_RESPALDO)]
+    return datetime.strptime(nombre, '%Y%m%d_%H%M%S')
+
+def verificar_integridad(ruta: str) -> List[str]:
+    """
+    Ejecuta integrity_check sobre una base sin comprimir.
+
+    Returns:
+        List[str]: Problemas encontrados (vacía si la base está sana)
+    """
+    conexion = sqlite3.connect(f'file:{ruta}?mode=ro', uri=True)
+    try:
+        resultado = [fila[0] for fila in conexion.execute('PRAGMA integrity_check')]
+    finally:
+        conexion.close()
+    return [] if resultado == ['ok'] else resultado
+
+def _copiar_en_linea(origen: str, destino: str, paginas: int, pausa: float,
+                     progreso: Optional[Callable[[int, int], None]] = None) -> Dict[int, str]:
+    """
+    Copia la base con la API de respaldo de SQLite de a `paginas` páginas.
+    La conexión de origen mantiene abierta una transacción de lectura: en
+    WAL las escrituras de otras conexiones no la bloquean ni obligan a
+    reiniciar la copia, y el respaldo queda como la foto del comienzo.
+
+    Los archivos anuales que figuran en la base se adjuntan a la misma
+    conexión y se copian dentro de esa transacción, así una venta que se
+    archiva mientras tanto no queda en las dos copias ni en ninguna.
+
+    Returns:
+        Dict[int, str]: Copias de los archivos anuales, por año
+    """
+    def entre_pasos(estado, restantes, total):
+        if progreso is not None:
+            progreso(total - restantes, total)
+        time.sleep(pausa)
+
+    fuente = sqlite3.connect(f'file:{origen}?mode=ro', uri=True, isolation_level=None)
+    try:
+        # ATTACH no se admite dentro de una transacción: si en la foto aparece
+        # un año sin adjuntar se adjunta y se vuelve a empezar
+        adjuntos = set()
+        while True:
+            fuente.execute('BEGIN')
+            anios = _anios_archivados(fuente)
+            faltan = [anio for anio in anios if anio not in adjuntos]
+            if not faltan:
+                break
+            fuente.execute('COMMIT')
+            for anio in faltan:
+                fuente.execute(f'ATTACH DATABASE ? AS "archivo_{anio}"',
+                               (f'file:{ruta_archivo(anio)}?mode=ro',))
+                adjuntos.add(anio)
+        for anio in anios:
+            fuente.execute(f'SELECT COUNT(*) FROM "archivo_{anio}".sqlite_master').fetchone()
+
+        esquemas = [('main', destino)] + [(f'archivo_{anio}', _ruta_copia_archivo(destino, anio))
+                                          for anio in anios]
+        for esquema, ruta in esquemas:
+            copia = sqlite3.connect(ruta)
+            try:
+                fuente.backup(copia, pages=paginas, progress=entre_pasos, name=esquema)
+                # La copia queda autónoma: sin WAL pendiente y lista para comprimir
+                copia.execute('PRAGMA journal_mode=DELETE')
+            finally:
+                copia.close()
+        fuente.execute('COMMIT')
+    finally:
+        fuente.close()
+    return {anio: _ruta_copia_archivo(destino, anio) for anio in anios}
+
+def _comprimir(origen: str, destino: str):
+    with open(origen, 'rb') as entrada, gzip.open(destino, 'wb', compresslevel=NIVEL_COMPRESION) as salida:
+        shutil.copyfileobj(entrada, salida, 1024 * 1024)
+
+def _descomprimir(origen: str, destino: str):
+    with gzip.open(origen, 'rb') as entrada, open(destino, 'wb') as salida:
+        shutil.copyfileobj(entrada, salida, 1024 * 1024)
+
+def rotar_respaldos(conservar: int = RESPALDOS_CONSERVADOS,
+                    directorio: Optional[str] = None) -> List[str]:
+    """Borra los respaldos más viejos y devuelve los borrados."""
+    sobrantes = listar_respaldos(directorio)[:-conservar] if conservar > 0 else []
+    for ruta in sobrantes:
+        for copia in archivos_del_respaldo(ruta).values():
+            os.remove(copia)
+        os.remove(ruta)
+    return sobrantes
+
+@log_operacion("respaldo")
+def respaldar(directorio: Optional[str] = None, paginas: int = PAGINAS_POR_PASO,
+              pausa: float = PAUSA_ENTRE_PASOS, conservar: int = RESPALDOS_CONSERVADOS,
+              progreso: Optional[Callable[[int, int], None]] = None) -> str:
+    """
+    Genera un respaldo comprimido de la base principal sin detener las
+    ventas: copia en línea de a pasos, verifica la integridad de la copia,
+    la comprime y rota los respaldos viejos. Un respaldo dañado nunca
+    reemplaza a los anteriores. Los archivos anuales de ventas se copian en
+    la misma foto y se guardan al lado del respaldo.
+
+    Args:
+        directorio (Optional[str]): Directorio de respaldos
+        paginas (int): Páginas copiadas por paso
+        pausa (float): Segundos de pausa entre pasos
+        conservar (int): Respaldos que se conservan (0: todos)
+        progreso (Optional[Callable[[int, int], None]]): Recibe páginas copiadas y total
+
+    Returns:
+        str: Ruta del respaldo generado
+    """
+    directorio = _ruta_respaldos(directorio)
+    os.makedirs(directorio, exist_ok=True)
+    inicio = time.perf_counter()
+    nombre = f"{PREFIJO_RESPALDO}{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    ruta = os.path.join(directorio, nombre + EXTENSION_RESPALDO)
+
+    descriptor, temporal = tempfile.mkstemp(suffix='.db', dir=directorio)
+    os.close(descriptor)
+    copias = {}
+    try:
+        copias = _copiar_en_linea(os.path.abspath(RUTA_DB), temporal, paginas, pausa, progreso)
+        for copia in [temporal] + list(copias.values()):
+            problemas = verificar_integridad(copia)
+            if problemas:
+                raise ValueError(f"La copia {os.path.basename(copia)} no pasó la verificación "
+                                 f"de integridad: {problemas[:5]}")
+        # Primero los archivos: el respaldo principal aparece solo si está completo
+        destinos = [(copias[anio], _ruta_copia_archivo(ruta, anio)) for anio in copias]
+        for copia, destino in destinos + [(temporal, ruta)]:
+            _comprimir(copia, destino + '.tmp')
+            os.replace(destino + '.tmp', destino)
+        tamanio = sum(os.path.getsize(copia) for copia in [temporal] + list(copias.values()))
+    finally:
+        # También las copias de archivos de una foto que falló a mitad de camino
+        temporales = glob.glob(glob.escape(os.path.splitext(temporal)[0] + SEPARADOR_ARCHIVO) + '*')
+        for copia in [temporal] + temporales:
+            for sobrante in (copia, copia + '-wal', copia + '-shm'):
+                if os.path.exists(sobrante):
+                    os.remove(sobrante)
+        for sobrante in [ruta + '.tmp'] + [_ruta_copia_archivo(ruta, anio) + '.tmp' for anio in copias]:
+            if os.path.exists(sobrante):
+                os.remove(sobrante)
+
+    rotar_respaldos(conservar, directorio)
+    logging.info(f'Respaldo {ruta}: {tamanio / 1e6:.1f} MB -> '
+                 f'{os.path.getsize(ruta) / 1e6:.1f} MB en {time.perf_counter() - inicio:.1f} s')
+    return ruta
+
+@log_operacion("respaldo")
+def verificar_respaldo(ruta: str) -> List[str]:
+    """
+    Descomprime un respaldo en un temporal y verifica su integridad y la de
+    las copias de los archivos anuales que lista.
+
+    Returns:
+        List[str]: Problemas encontrados (vacía si el respaldo es válido)
+    """
+    descriptor, temporal = tempfile.mkstemp(suffix='.db', dir=os.path.dirname(os.path.abspath(ruta)))
+    os.close(descriptor)
+    try:
+        return _preparar_restauracion(ruta, temporal)
+    finally:
+        for anio in archivos_del_respaldo(ruta):
+            if os.path.exists(_ruta_copia_archivo(temporal, anio)):
+                os.remove(_ruta_copia_archivo(temporal, anio))
+        os.remove(temporal)
+
+def _preparar_restauracion(ruta: str, temporal: str) -> List[str]:
+    """
+    Descomprime el respaldo en `temporal` y cada archivo anual al lado, y
+    verifica todo.
+
+    Returns:
+        List[str]: Problemas encontrados (vacía si el respaldo es válido)
+    """
+    try:
+        _descomprimir(ruta, temporal)
+    except (OSError, EOFError) as e:
+        return [f"Archivo comprimido dañado: {e}"]
+    problemas = verificar_integridad(temporal)
+    if problemas:
+        return problemas
+
+    conexion = sqlite3.connect(f'file:{temporal}?mode=ro', uri=True)
+    try:
+        anios = _anios_archivados(conexion)
+    finally:
+        conexion.close()
+    copias = archivos_del_respaldo(ruta)
+    for anio in anios:
+        if anio not in copias:
+            problemas.append(f"Falta la copia del archivo {anio}")
+            continue
+        copia = _ruta_copia_archivo(temporal, anio)
+        try:
+            _descomprimir(copias[anio], copia)
+        except (OSError, EOFError) as e:
+            problemas.append(f"Archivo {anio} comprimido dañado: {e}")
+            continue
+        problemas += [f"Archivo {anio}: {problema}" for problema in verificar_integridad(copia)]
+    return problemas
+
+@log_operacion("respaldo")
+def restaurar_respaldo(ruta: str, destino: str = RUTA_DB,
+                       respaldar_actual: bool = True) -> float:
+    """
+    Restaura un respaldo sobre la base principal y mide cuánto tarda.
+    Antes de tocar la base se descomprime y verifica el respaldo, y (por
+    defecto) se respalda la base actual. La copia final usa la API de
+    respaldo de SQLite sobre la base destino, así no quedan WAL ni -shm de
+    la base anterior. Los archivos anuales del respaldo se restauran junto
+    a la base destino; los que la base actual tenía y el respaldo no se
+    apartan como .anterior, porque sus ventas vuelven a estar en la base.
+    La aplicación debe estar detenida en las demás terminales.
+
+    Args:
+        ruta (str): Respaldo comprimido a restaurar
+        destino (str): Base a reemplazar
+        respaldar_actual (bool): Respaldar antes la base actual (sin rotar)
+
+    Returns:
+        float: Segundos que tardó la restauración
+    """
+    inicio = time.perf_counter()
+    directorio = os.path.dirname(os.path.abspath(destino))
+    descriptor, temporal = tempfile.mkstemp(suffix='.db', dir=directorio)
+    os.close(descriptor)
+    copias = archivos_del_respaldo(ruta)
+    try:
+        problemas = _preparar_restauracion(ruta, temporal)
+        if problemas:
+            raise ValueError(f"El respaldo está dañado: {problemas[:5]}")
+
+        anteriores = []
+        if os.path.exists(destino):
+            if respaldar_actual:
+                respaldar(os.path.dirname(os.path.abspath(ruta)), pausa=0, conservar=0)
+            conexion = sqlite3.connect(f'file:{os.path.abspath(destino)}?mode=ro', uri=True)
+            try:
+                anteriores = _anios_archivados(conexion)
+            except sqlite3.OperationalError:
+                anteriores = []
+            finally:
+                conexion.close()
+
+        conexion = sqlite3.connect(f'file:{temporal}?mode=ro', uri=True)
+        try:
+            anios = _anios_archivados(conexion)
+        finally:
+            conexion.close()
+
+        # Las conexiones del pool de este proceso verían páginas viejas en caché
+        db.close_all()
+        db_lectura.close_all()
+        for anio in anteriores:
+            archivo = os.path.join(directorio, os.path.basename(ruta_archivo(anio)))
+            if anio not in anios and os.path.exists(archivo):
+                os.replace(archivo, archivo + '.anterior')
+
+        destinos = [(_ruta_copia_archivo(temporal, anio),
+                     os.path.join(directorio, os.path.basename(ruta_archivo(anio))), False)
+                    for anio in anios]
+        for copia, archivo, wal in destinos + [(temporal, destino, True)]:
+            origen = sqlite3.connect(copia)
+            base = sqlite3.connect(archivo)
+            try:
+                origen.backup(base)
+                if wal:
+                    base.execute('PRAGMA journal_mode=WAL')
+            finally:
+                base.close()
+                origen.close()
+    finally:
+        for anio in copias:
+            if os.path.exists(_ruta_copia_archivo(temporal, anio)):
+                os.remove(_ruta_copia_archivo(temporal, anio))
+        os.remove(temporal)
+    return time.perf_counter() - inicio
+
+class ProgramadorRespaldos:
+    """
+    Hilo en segundo plano que genera un respaldo cuando el último tiene más
+    de INTERVALO_RESPALDO. No usa el pool de conexiones de peewee.
+    """
+
+    def __init__(self, intervalo: timedelta = INTERVALO_RESPALDO,
+                 directorio: Optional[str] = None):
+        self.intervalo = intervalo
+        self.directorio = directorio
+        self._detener = threading.Event()
+        self._ahora = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._ejecutar, name='respaldos', daemon=True)
+            self._hilo.start()
+
+    def respaldar_ahora(self):
+        """Pide un respaldo inmediato sin esperar a que termine."""
+        self._ahora.set()
+
+    def detener(self):
+        self._detener.set()
+        self._ahora.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+    def corresponde(self) -> bool:
+        respaldos = listar_respaldos(self.directorio)
+        return not respaldos or datetime.now() - fecha_respaldo(respaldos[-1]) >= self.intervalo
+
+    def _ejecutar(self):
+        while not self._detener.is_set():
+            forzado = self._ahora.is_set()
+            self._ahora.clear()
+            if forzado or self.corresponde():
+                try:
+                    respaldar(self.directorio)
+                except Exception as e:
+                    logging.error(f'Error en el respaldo programado: {str(e)}')
+            self._ahora.wait(REVISION_PROGRAMADOR)
+
+def main():
+    from utilidades import configurar_logging
+
+    parser = argparse.ArgumentParser(description="Respaldos de la base del sistema")
+    subparsers = parser.add_subparsers(dest='accion', required=True)
+    subparsers.add_parser('respaldar', help="Genera un respaldo ahora")
+    subparsers.add_parser('listar', help="Lista los respaldos")
+    verificar = subparsers.add_parser('verificar', help="Verifica un respaldo")
+    verificar.add_argument('respaldo')
+    restaurar = subparsers.add_parser('restaurar', help="Restaura un respaldo (con la aplicación cerrada)")
+    restaurar.add_argument('respaldo')
+    args = parser.parse_args()
+
+    configurar_logging()
+    if args.accion == 'respaldar':
+        print(respaldar())
+    elif args.accion == 'listar':
+        for ruta in listar_respaldos():
+            print(f"{ruta}  {os.path.getsize(ruta) / 1e6:.1f} MB")
+    elif args.accion == 'verificar':
+        problemas = verificar_respaldo(args.respaldo)
+        print("Respaldo válido" if not problemas else "\n".join(problemas))
+    elif args.accion == 'restaurar':
+        print(f"Restaurado en {restaurar_respaldo(args.respaldo):.1f} s")
+
+if __name__ == '__main__':
+    main()
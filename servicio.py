@@ -0,0 +1,427 @@
+from typing import List, Dict, Optional, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import json
+import logging
+import queue
+import re
+import threading
+import time
+
+from peewee import DoesNotExist
+from playhouse.shortcuts import model_to_dict
+
+from modelo import db, db_lectura, Producto, DetalleVenta
+from controlador import (
+    Controlador, ConflictoConcurrencia, LimiteCreditoExcedido, CAMBIOS_POR_LOTE
+)
+from utilidades import valor_json
+
+# Servicio HTTP/JSON para los mostradores del depósito
+PUERTO_API = 8080
+# Hilos que atienden conexiones. Cada uno conserva una conexión de escritura
+# y una de lectura; con el hilo de lotes de ventas no deben superar las
+# max_connections del pool de modelo.py
+TRABAJADORES_API = 6
+INACTIVIDAD_CONEXION = 5     # segundos que un hilo espera el próximo pedido keep-alive
+TIEMPO_RESPUESTA = 30        # segundos que un pedido espera su lote de ventas
+MAXIMO_CUERPO = 2 ** 20      # bytes de JSON aceptados por pedido
+MAXIMO_FILAS = 1000          # filas por página de clientes
+MAXIMO_ID_EXTERNO = 36       # caracteres del id_externo de una venta (Venta.id_externo)
+
+# Agrupación de ventas: hasta VENTAS_POR_LOTE ventas por commit, esperando
+# como mucho ESPERA_LOTE segundos a que lleguen más
+VENTAS_POR_LOTE = 64
+ESPERA_LOTE = 0.002
+
+class LoteVentas:
+    """
+    Agrupa las ventas que llegan casi al mismo tiempo y las registra con
+    Controlador.registrar_ventas: un commit por lote en lugar de uno por
+    venta. Escribe un solo hilo, así los pedidos no compiten por el lock de
+    escritura, y cada pedido recibe su resultado recién cuando el lote quedó
+    confirmado.
+    """
+
+    def __init__(self, controlador: Controlador, maximo: int = VENTAS_POR_LOTE,
+                 espera: float = ESPERA_LOTE):
+        self.controlador = controlador
+        self.maximo = maximo
+        self.espera = espera
+        self._cola: queue.Queue = queue.Queue()
+        self._hilo = threading.Thread(target=self._procesar, name='lote-ventas', daemon=True)
+        self._hilo.start()
+
+    def registrar(self, venta: Dict[str, Any]) -> Future:
+        """
+        Encola una venta.
+
+        Args:
+            venta (Dict[str, Any]): Argumentos de Controlador.registrar_venta
+
+        Returns:
+            Future: Se completa con (Venta, detalles) o con la excepción que la rechazó
+        """
+        futuro = Future()
+        self._cola.put((venta, futuro))
+        return futuro
+
+    def cerrar(self):
+        """Registra lo que quedó en la cola y detiene el hilo."""
+        self._cola.put(None)
+        self._hilo.join()
+
+    def _siguiente_lote(self) -> Optional[List[Tuple[Dict[str, Any], Future]]]:
+        primero = self._cola.get()
+        if primero is None:
+            return None
+        lote = [primero]
+        limite = time.monotonic() + self.espera
+        while len(lote) < self.maximo:
+            try:
+                pedido = self._cola.get(timeout=max(limite - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if pedido is None:
+                # Se registra este lote y el próximo get() termina el hilo
+                self._cola.put(None)
+                break
+            lote.append(pedido)
+        return lote
+
+    def _procesar(self):
+        with db.connection_context():
+            while True:
+                lote = self._siguiente_lote()
+                if lote is None:
+                    return
+                try:
+                    resultados = self.controlador.registrar_ventas([venta for venta, _ in lote])
+                except Exception as e:
+                    # Sin commit no se registró ninguna
+                    for _, futuro in lote:
+                        futuro.set_exception(e)
+                    continue
+                for (_, futuro), resultado in zip(lote, resultados):
+                    if isinstance(resultado, Exception):
+                        futuro.set_exception(resultado)
+                    else:
+                        futuro.set_result(resultado)
+
+def estado_error(error: Exception) -> int:
+    """Código HTTP para una excepción de la API o del controlador."""
+    if isinstance(error, DoesNotExist):
+        return 404
+    if isinstance(error, (ConflictoConcurrencia, LimiteCreditoExcedido)):
+        return 409
+    if isinstance(error, (ValueError, KeyError, TypeError)):
+        return 400
+    if isinstance(error, TimeoutError):
+        return 503
+    return 500
+
+def _fecha(parametros: Dict[str, str], clave: str, fin_del_dia: bool = False) -> Optional[datetime]:
+    """Fecha ISO de la URL; una fecha sin hora como final abarca el día completo."""
+    texto = parametros.get(clave)
+    if not texto:
+        return None
+    fecha = datetime.fromisoformat(texto)
+    if fin_del_dia and len(texto) == 10:
+        fecha += timedelta(days=1, microseconds=-1)
+    return fecha
+
+def _entero(parametros: Dict[str, str], clave: str, defecto: int, maximo: int) -> int:
+    valor = int(parametros.get(clave, defecto))
+    if valor <= 0:
+        raise ValueError(f"{clave} debe ser mayor a cero")
+    return min(valor, maximo)
+
+def _venta_de(cuerpo: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Valida el JSON de una venta y lo convierte en argumentos de
+    registrar_venta. El id_externo opcional lo elige el cliente: si reenvía
+    la venta después de un 503 con el mismo id_externo, recibe la venta ya
+    registrada en lugar de una nueva.
+    """
+    items = [{'producto_id': int(item['producto_id']), 'cantidad': int(item['cantidad'])}
+             for item in cuerpo['items']]
+    if not items:
+        raise ValueError("La venta no tiene productos")
+    if any(item['cantidad'] <= 0 for item in items):
+        raise ValueError("Las cantidades deben ser mayores a cero")
+    id_externo = cuerpo.get('id_externo')
+    if id_externo is not None:
+        id_externo = str(id_externo)
+        if not 0 < len(id_externo) <= MAXIMO_ID_EXTERNO:
+            raise ValueError(f"id_externo debe tener entre 1 y {MAXIMO_ID_EXTERNO} caracteres")
+    return {
+        'cliente_id': int(cuerpo['cliente_id']),
+        'items': items,
+        'permitir_exceso_credito': bool(cuerpo.get('permitir_exceso_credito', False)),
+        'id_externo': id_externo
+    }
+
+class Api:
+    """
+    Operaciones expuestas. Cada método recibe los parámetros de la URL, el
+    cuerpo JSON (None en los GET) y los grupos de la ruta, y devuelve lo que
+    se responde como JSON.
+    """
+
+    # Reportes: método del controlador y si recibe el rango desde/hasta
+    REPORTES = {
+        'ventas-cliente': ('obtener_lote_ventas_cliente', True),
+        'productos': ('obtener_lote_productos', True),
+        'pagos': ('obtener_lote_pagos', True),
+        'stock': ('obtener_lote_stock', False),
+        'antiguedad': ('obtener_lote_antiguedad', False)
+    }
+
+    def __init__(self, controlador: Controlador, lote_ventas: LoteVentas):
+        self.controlador = controlador
+        self.lote_ventas = lote_ventas
+
+    def salud(self, parametros, cuerpo):
+        return {'estado': 'ok'}
+
+    def productos(self, parametros, cuerpo):
+        texto = parametros.get('texto')
+        filas = (self.controlador.buscar_productos(texto) if texto
+                 else self.controlador.obtener_todos_productos())
+        return [fila._asdict() for fila in filas]
+
+    def producto(self, parametros, cuerpo, producto_id):
+        producto = self.controlador.obtener_producto_por_id(int(producto_id))
+        if producto is None:
+            raise Producto.DoesNotExist(f"No existe el producto {producto_id}")
+        return model_to_dict(producto, recurse=False)
+
+    def clientes(self, parametros, cuerpo):
+        despues = None
+        if 'despues_nombre' in parametros:
+            despues = (parametros['despues_nombre'], int(parametros['despues_id']))
+        limite = _entero(parametros, 'limite', MAXIMO_FILAS, MAXIMO_FILAS)
+        filas = self.controlador.obtener_pagina_clientes(parametros.get('texto', ''), despues, limite)
+        siguiente = None
+        if len(filas) == limite:
+            siguiente = {'despues_nombre': filas[-1].nombre, 'despues_id': filas[-1].id}
+        return {'clientes': [fila._asdict() for fila in filas], 'siguiente': siguiente}
+
+    def balance_cliente(self, parametros, cuerpo, cliente_id):
+        return self.controlador.obtener_balance_cliente(int(cliente_id))
+
+    def proveedores(self, parametros, cuerpo):
+        return [fila._asdict() for fila in self.controlador.obtener_todos_proveedores()]
+
+    def venta(self, parametros, cuerpo, venta_id):
+        venta = self.controlador.obtener_venta_por_id(int(venta_id))
+        datos = model_to_dict(venta, recurse=False)
+        datos['detalles'] = [model_to_dict(detalle, recurse=False, exclude=[DetalleVenta.venta])
+                             for detalle in self.controlador.obtener_detalles_venta(venta.id)]
+        return datos
+
+    def registrar_venta(self, parametros, cuerpo):
+        futuro = self.lote_ventas.registrar(_venta_de(cuerpo))
+        venta, detalles = futuro.result(timeout=TIEMPO_RESPUESTA)
+        return {
+            'venta_id': venta.id,
+            'total': venta.total,
+            'excede_credito': venta.excede_credito,
+            'detalles': [{'producto_id': detalle.producto_id, 'cantidad': detalle.cantidad,
+                          'precio_unitario': detalle.precio_unitario, 'subtotal': detalle.subtotal}
+                         for detalle in detalles]
+        }
+
+    def registrar_pago(self, parametros, cuerpo):
+        pago = self.controlador.registrar_pago(int(cuerpo['venta_id']), cuerpo['monto'],
+                                               cuerpo['metodo_pago'], cuerpo.get('notas'))
+        return {'pago_id': pago.id, 'venta_id': pago.venta_id, 'monto': pago.monto,
+                'fecha': pago.fecha}
+
+    def registrar_pago_cliente(self, parametros, cuerpo, cliente_id):
+        imputaciones = self.controlador.registrar_pago_cliente(
+            int(cliente_id), cuerpo['monto'], cuerpo['metodo_pago'], cuerpo.get('notas'))
+        return [{'venta_id': venta_id, 'monto': monto} for venta_id, monto in imputaciones]
+
+    def reporte(self, parametros, cuerpo, tipo):
+        metodo, con_rango = self.REPORTES[tipo]
+        if con_rango:
+            argumentos = (_fecha(parametros, 'desde'), _fecha(parametros, 'hasta', fin_del_dia=True))
+        elif tipo == 'antiguedad':
+            argumentos = (_fecha(parametros, 'al', fin_del_dia=True),)
+        else:
+            argumentos = ()
+        return getattr(self.controlador, metodo)(*argumentos).a_registros()
+
+    def tablero(self, parametros, cuerpo):
+        return self.controlador.obtener_tablero()
+
+    def cambios(self, parametros, cuerpo):
+        return self.controlador.obtener_cambios(int(parametros.get('desde', 0)),
+                                                _entero(parametros, 'limite', CAMBIOS_POR_LOTE,
+                                                        CAMBIOS_POR_LOTE))
+
+# Rutas: método HTTP, expresión de la ruta y método de Api
+RUTAS = [(verbo, re.compile(patron), nombre) for verbo, patron, nombre in (
+    ('GET', r'/salud', 'salud'),
+    ('GET', r'/productos', 'productos'),
+    ('GET', r'/productos/(\d+)', 'producto'),
+    ('GET', r'/clientes', 'clientes'),
+    ('GET', r'/clientes/(\d+)/balance', 'balance_cliente'),
+    ('GET', r'/proveedores', 'proveedores'),
+    ('GET', r'/ventas/(\d+)', 'venta'),
+    ('POST', r'/ventas', 'registrar_venta'),
+    ('POST', r'/pagos', 'registrar_pago'),
+    ('POST', r'/clientes/(\d+)/pagos', 'registrar_pago_cliente'),
+    ('GET', r'/reportes/(ventas-cliente|productos|pagos|stock|antiguedad)', 'reporte'),
+    ('GET', r'/tablero', 'tablero'),
+    ('GET', r'/cambios', 'cambios')
+)]
+
+class _ManejadorApi(BaseHTTPRequestHandler):
+    # Conexiones persistentes: cada mostrador reutiliza la suya entre pedidos
+    protocol_version = 'HTTP/1.1'
+    timeout = INACTIVIDAD_CONEXION
+    # Encabezados y cuerpo salen en dos escrituras: con Nagle la segunda
+    # esperaría el ACK demorado del cliente (~40 ms por pedido)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._despachar('GET')
+
+    def do_POST(self):
+        self._despachar('POST')
+
+    def _despachar(self, metodo: str):
+        largo = int(self.headers.get('Content-Length', 0))
+        if largo > MAXIMO_CUERPO:
+            self.close_connection = True
+            self._responder(413, {'error': "Pedido demasiado grande"})
+            return
+        cuerpo = self.rfile.read(largo) if largo else b''
+
+        url = urlsplit(self.path)
+        for verbo, patron, nombre in RUTAS:
+            coincidencia = patron.fullmatch(url.path)
+            if coincidencia and verbo == metodo:
+                break
+        else:
+            self._responder(404, {'error': f"Ruta inexistente: {metodo} {url.path}"})
+            return
+
+        try:
+            parametros = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+            datos = None
+            if metodo == 'POST':
+                datos = json.loads(cuerpo)
+                if not isinstance(datos, dict):
+                    raise ValueError("El cuerpo debe ser un objeto JSON")
+            operacion = getattr(self.server.api, nombre)
+            respuesta = operacion(parametros, datos, *coincidencia.groups())
+            estado = 201 if metodo == 'POST' else 200
+        except Exception as e:
+            estado = estado_error(e)
+            if estado >= 500:
+                logging.error(f'Error en {metodo} {url.path}: {str(e)}')
+            mensaje = f"Falta el campo {e}" if isinstance(e, KeyError) else str(e)
+            respuesta = {'error': mensaje or type(e).__name__}
+        self._responder(estado, respuesta)
+
+    def _responder(self, estado: int, datos: Any):
+        contenido = json.dumps(datos, default=valor_json, separators=(',', ':'),
+                               ensure_ascii=False).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(contenido)))
+        self.end_headers()
+        self.wfile.write(contenido)
+
+    def log_message(self, formato, *args):
+        logging.debug(f'API {self.client_address[0]}: {formato % args}')
+
+def _conectar_trabajador():
+    # peewee asocia las conexiones al hilo: el trabajador toma una de cada
+    # pool al arrancar y la conserva mientras viva
+    db.connect(reuse_if_open=True)
+    db_lectura.connect(reuse_if_open=True)
+
+class ServidorApi(HTTPServer):
+    """
+    Servidor HTTP/JSON sobre el Controlador. Las conexiones se atienden en un
+    pool fijo de hilos, cada uno con sus conexiones a la base ya abiertas, y
+    las ventas pasan por LoteVentas. Una conexión keep-alive ocupa un hilo
+    hasta que queda inactiva INACTIVIDAD_CONEXION segundos.
+    """
+
+    def __init__(self, controlador: Controlador, puerto: int = PUERTO_API,
+                 host: str = '127.0.0.1', trabajadores: int = TRABAJADORES_API,
+                 ventas_por_lote: int = VENTAS_POR_LOTE):
+        super().__init__((host, puerto), _ManejadorApi)
+        self.lote_ventas = LoteVentas(controlador, ventas_por_lote)
+        self.api = Api(controlador, self.lote_ventas)
+        self._pool = ThreadPoolExecutor(trabajadores, thread_name_prefix='api',
+                                        initializer=_conectar_trabajador)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        logging.exception(f'Error atendiendo a {client_address[0]}')
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+        self.lote_ventas.cerrar()
+
+def iniciar_servidor_api(controlador: Controlador, puerto: int = PUERTO_API,
+                         host: str = '127.0.0.1', **opciones) -> ServidorApi:
+    """
+    Levanta el servicio en un hilo aparte (puerto 0 elige uno libre: ver
+    servidor.server_port). Se detiene con servidor.shutdown() y
+    servidor.server_close().
+    """
+    servidor = ServidorApi(controlador, puerto, host, **opciones)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def main():
+    from modelo import inicializar_db, ProgramadorMantenimiento
+    from utilidades import configurar_logging
+
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON del sistema de gestión")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=PUERTO_API)
+    parser.add_argument('--trabajadores', type=int, default=TRABAJADORES_API)
+    parser.add_argument('--ventas-por-lote', type=int, default=VENTAS_POR_LOTE)
+    args = parser.parse_args()
+
+    configurar_logging()
+    inicializar_db()
+    controlador = Controlador()
+    controlador.verificar_tablero(reparar=True)
+    servidor = ServidorApi(controlador, args.puerto, args.host, args.trabajadores,
+                           args.ventas_por_lote)
+    mantenimiento = ProgramadorMantenimiento()
+    mantenimiento.iniciar()
+    print(f"Servicio escuchando en http://{args.host}:{servidor.server_port}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        mantenimiento.detener()
+
+if __name__ == '__main__':
+    main()
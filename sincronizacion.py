@@ -0,0 +1,402 @@
+from typing import List, Dict, Optional, Any, Callable, Tuple
+from datetime import datetime
+from decimal import Decimal
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import json
+import logging
+import threading
+import urllib.error
+import urllib.request
+import uuid
+import zlib
+
+from peewee import (
+    SqliteDatabase, Model, CharField, IntegerField, DecimalField, BooleanField,
+    DateTimeField, TextField, ForeignKeyField, Tuple as Fila, fn
+)
+
+from utilidades import log_operacion, a_decimal, valor_json
+
+# Diario local de la terminal móvil (independiente de la base de la oficina)
+RUTA_DIARIO = 'diario_movil.db'
+
+# Servidor de la oficina
+PUERTO_SERVIDOR = 8765
+URL_SERVIDOR = f'http://127.0.0.1:{PUERTO_SERVIDOR}/sincronizar'
+TIEMPO_ESPERA = 30           # segundos por pedido
+MAXIMO_PAQUETE = 8 * 2 ** 20  # bytes comprimidos aceptados por pedido
+
+# Ventas enviadas por pedido y nivel de compresión de zlib
+VENTAS_POR_LOTE = 50
+NIVEL_COMPRESION = 6
+
+# Estados de una venta del diario: pendiente hasta que la oficina responde;
+# después queda el estado informado por Controlador.recibir_ventas_moviles
+ESTADO_PENDIENTE = 'pendiente'
+
+# Formato de intercambio: JSON comprimido con zlib (Content-Encoding: deflate)
+def empaquetar(datos: Dict[str, Any]) -> bytes:
+    """Serializa un paquete de sincronización a JSON comprimido."""
+    texto = json.dumps(datos, default=valor_json, separators=(',', ':'), ensure_ascii=False)
+    return zlib.compress(texto.encode('utf-8'), NIVEL_COMPRESION)
+
+def desempaquetar(paquete: bytes) -> Dict[str, Any]:
+    """Lee un paquete comprimido con empaquetar()."""
+    return json.loads(zlib.decompress(paquete).decode('utf-8'))
+
+# Lado oficina
+def atender(controlador, paquete: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Procesa un paquete de una terminal: registra sus ventas y devuelve los
+    resultados junto con los cambios de catálogo desde su marca.
+
+    Args:
+        controlador (Controlador): Controlador sobre la base de la oficina
+        paquete (Dict[str, Any]): {"ventas": [...], "marca": {...} o None}
+
+    Returns:
+        Dict[str, Any]: {"resultados": [...], "cambios": {...}}
+    """
+    ventas = [dict(venta, fecha=datetime.fromisoformat(venta['fecha']))
+              for venta in paquete.get('ventas', [])]
+    resultados = controlador.recibir_ventas_moviles(ventas) if ventas else []
+    return {
+        'resultados': resultados,
+        'cambios': controlador.obtener_cambios_catalogo(paquete.get('marca'))
+    }
+
+class _ManejadorSincronizacion(BaseHTTPRequestHandler):
+    def do_POST(self):
+        from modelo import db, db_lectura
+
+        if self.path != '/sincronizar':
+            self.send_error(404)
+            return
+        largo = int(self.headers.get('Content-Length', 0))
+        if not 0 < largo <= MAXIMO_PAQUETE:
+            self.send_error(413 if largo else 400)
+            return
+        try:
+            paquete = desempaquetar(self.rfile.read(largo))
+        except (zlib.error, ValueError):
+            self.send_error(400, "Paquete inválido")
+            return
+
+        try:
+            # Cada pedido corre en su propio hilo: las conexiones vuelven al pool al terminar
+            with db.connection_context(), db_lectura.connection_context():
+                respuesta = empaquetar(atender(self.server.controlador, paquete))
+        except Exception as e:
+            logging.error(f'Error al sincronizar una terminal: {str(e)}')
+            self.send_error(500, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Encoding', 'deflate')
+        self.send_header('Content-Length', str(len(respuesta)))
+        self.end_headers()
+        self.wfile.write(respuesta)
+
+    def log_message(self, formato, *args):
+        logging.info(f'Sincronización {self.client_address[0]}: {formato % args}')
+
+class ServidorSincronizacion(ThreadingHTTPServer):
+    """
+    Servidor HTTP de sincronización de la oficina. Sirve también como
+    servidor de prueba local: iniciar_servidor() lo levanta en un hilo.
+    """
+    daemon_threads = True
+
+    def __init__(self, controlador, puerto: int = PUERTO_SERVIDOR, host: str = '127.0.0.1'):
+        super().__init__((host, puerto), _ManejadorSincronizacion)
+        self.controlador = controlador
+
+def iniciar_servidor(controlador, puerto: int = PUERTO_SERVIDOR,
+                     host: str = '127.0.0.1') -> ServidorSincronizacion:
+    """
+    Levanta el servidor de sincronización en un hilo aparte (puerto 0 elige
+    uno libre: ver servidor.server_port). Se detiene con servidor.shutdown().
+    """
+    servidor = ServidorSincronizacion(controlador, puerto, host)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+# Lado terminal
+class TransporteHttp:
+    """Envía paquetes al servidor de la oficina por HTTP."""
+
+    def __init__(self, url: str = URL_SERVIDOR, tiempo_espera: float = TIEMPO_ESPERA):
+        self.url = url
+        self.tiempo_espera = tiempo_espera
+
+    def __call__(self, paquete: Dict[str, Any]) -> Dict[str, Any]:
+        pedido = urllib.request.Request(
+            self.url,
+            data=empaquetar(paquete),
+            headers={'Content-Type': 'application/json', 'Content-Encoding': 'deflate'},
+            method='POST'
+        )
+        try:
+            with urllib.request.urlopen(pedido, timeout=self.tiempo_espera) as respuesta:
+                return desempaquetar(respuesta.read())
+        except (urllib.error.URLError, OSError) as e:
+            raise ConnectionError(f"No se pudo conectar con la oficina: {e}")
+
+db_diario = SqliteDatabase(None, pragmas={'journal_mode': 'wal', 'synchronous': 'normal'})
+
+class ModeloDiario(Model):
+    class Meta:
+        database = db_diario
+
+class VentaDiario(ModeloDiario):
+    """Venta cargada en la terminal; el id_externo la identifica en la oficina."""
+    id_externo = CharField(max_length=36, primary_key=True)
+    cliente_id = IntegerField()
+    fecha = DateTimeField(default=datetime.now)
+    total = DecimalField(decimal_places=2, default=0)  # estimado con los precios locales
+    estado = CharField(max_length=20, default=ESTADO_PENDIENTE, index=True)
+    venta_id = IntegerField(null=True)  # id asignado por la oficina
+    mensaje = TextField(null=True)
+    fecha_sincronizacion = DateTimeField(null=True)
+
+class DetalleDiario(ModeloDiario):
+    venta = ForeignKeyField(VentaDiario, backref='detalles', on_delete='CASCADE')
+    producto_id = IntegerField()
+    cantidad = IntegerField()
+    precio_unitario = DecimalField(decimal_places=2)
+
+class ProductoLocal(ModeloDiario):
+    """Copia del catálogo de la oficina para vender sin conexión."""
+    id = IntegerField(primary_key=True)
+    nombre = CharField(max_length=100)
+    precio_unitario = DecimalField(decimal_places=2)
+    stock_actual = IntegerField(default=0)  # stock de la oficina menos las ventas pendientes
+    activo = BooleanField(default=True)
+
+class ClienteLocal(ModeloDiario):
+    """Copia de los clientes de la oficina para la lista y las ventas sin conexión."""
+    id = IntegerField(primary_key=True)
+    nombre = CharField(max_length=100)
+    telefono = CharField(max_length=20)
+    activo = BooleanField(default=True)
+
+    class Meta:
+        # Páginas de la lista de clientes por (nombre, id)
+        indexes = ((('nombre', 'id'), False),)
+
+class MarcaSincronizacion(ModeloDiario):
+    """Marca de la última sincronización (tal como la devolvió la oficina)."""
+    clave = CharField(max_length=20, primary_key=True)
+    valor = TextField()
+
+MODELOS_DIARIO = [VentaDiario, DetalleDiario, ProductoLocal, ClienteLocal, MarcaSincronizacion]
+
+def abrir_diario(ruta: str = RUTA_DIARIO):
+    """Abre (o crea) el diario local de la terminal."""
+    db_diario.init(ruta)
+    db_diario.connect(reuse_if_open=True)
+    db_diario.create_tables(MODELOS_DIARIO)
+
+class DiarioVentas:
+    """
+    Ventas de la terminal móvil. Se cargan en el diario local sin necesidad
+    de conexión y se envían a la oficina por lotes al sincronizar: solo las
+    pendientes, y del catálogo se reciben solo los cambios desde la última
+    marca.
+    """
+
+    def __init__(self, transporte: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.transporte = transporte or TransporteHttp()
+        self._lock = threading.Lock()
+
+    @log_operacion("diario_móvil")
+    def registrar_venta(self, cliente_id: int, items: List[Dict[str, int]]) -> VentaDiario:
+        """
+        Registra una venta en el diario local y descuenta el stock estimado.
+
+        Args:
+            cliente_id (int): ID del cliente (de la oficina)
+            items (List[Dict[str, int]]): [{"producto_id": id, "cantidad": cantidad}, ...]
+
+        Returns:
+            VentaDiario: Venta pendiente de sincronizar
+        """
+        if not items:
+            raise ValueError("La venta no tiene productos")
+        if not ClienteLocal.select().where((ClienteLocal.id == cliente_id) &
+                                           (ClienteLocal.activo == True)).exists():
+            raise ValueError("Cliente inexistente")
+
+        with db_diario.atomic():
+            productos = {producto.id: producto for producto in ProductoLocal
+                         .select()
+                         .where(ProductoLocal.id.in_([item['producto_id'] for item in items]) &
+                                (ProductoLocal.activo == True))}
+            venta = VentaDiario.create(id_externo=uuid.uuid4().hex, cliente_id=cliente_id)
+            total = Decimal('0')
+            for item in items:
+                producto = productos.get(item['producto_id'])
+                if producto is None:
+                    raise ValueError("Producto inexistente")
+                if item['cantidad'] <= 0:
+                    raise ValueError("La cantidad debe ser mayor a cero")
+                if producto.stock_actual < item['cantidad']:
+                    raise ValueError(f"Stock insuficiente para {producto.nombre}")
+                producto.stock_actual -= item['cantidad']
+                producto.save()
+                DetalleDiario.create(venta=venta, producto_id=producto.id,
+                                     cantidad=item['cantidad'],
+                                     precio_unitario=producto.precio_unitario)
+                total += producto.precio_unitario * item['cantidad']
+            venta.total = a_decimal(total)
+            venta.save()
+        return venta
+
+    def pagina_clientes(self, texto: str = "", despues: Optional[Tuple[str, int]] = None,
+                        limite: int = 100) -> List[ClienteLocal]:
+        """
+        Página de clientes activos del diario ordenados por nombre, pedida a
+        partir del (nombre, id) de la última fila recibida como
+        Controlador.obtener_pagina_clientes en la oficina.
+
+        Args:
+            texto (str): Texto a buscar en nombre o teléfono (vacío: todos)
+            despues (Optional[Tuple[str, int]]): Nombre e ID de la última fila de la página anterior
+            limite (int): Cantidad máxima de filas
+
+        Returns:
+            List[ClienteLocal]: Clientes de la página; menos de `limite` indica que no hay más
+        """
+        query = ClienteLocal.select().where(ClienteLocal.activo == True)
+        if texto:
+            patron = f"%{texto}%"
+            query = query.where((ClienteLocal.nombre ** patron) | (ClienteLocal.telefono ** patron))
+        if despues is not None:
+            query = query.where(Fila(ClienteLocal.nombre, ClienteLocal.id) > Fila(*despues))
+        return list(query.order_by(ClienteLocal.nombre, ClienteLocal.id).limit(limite))
+
+    def pendientes(self) -> int:
+        """Cantidad de ventas sin sincronizar."""
+        return VentaDiario.select().where(VentaDiario.estado == ESTADO_PENDIENTE).count()
+
+    def ventas(self, limite: int = 200) -> List[VentaDiario]:
+        """Últimas ventas del diario, de la más reciente a la más antigua."""
+        return list(VentaDiario.select().order_by(VentaDiario.fecha.desc()).limit(limite))
+
+    def _marca(self) -> Optional[Dict[str, Any]]:
+        fila = MarcaSincronizacion.get_or_none(MarcaSincronizacion.clave == 'catalogo')
+        return json.loads(fila.valor) if fila else None
+
+    def _lote_pendiente(self) -> List[Dict[str, Any]]:
+        ventas = list(VentaDiario
+                      .select()
+                      .where(VentaDiario.estado == ESTADO_PENDIENTE)
+                      .order_by(VentaDiario.fecha)
+                      .limit(VENTAS_POR_LOTE))
+        detalles = {}
+        for detalle in (DetalleDiario
+                        .select()
+                        .where(DetalleDiario.venta.in_([venta.id_externo for venta in ventas]))):
+            detalles.setdefault(detalle.venta_id, []).append(
+                {'producto_id': detalle.producto_id, 'cantidad': detalle.cantidad})
+        return [{
+            'id_externo': venta.id_externo,
+            'cliente_id': venta.cliente_id,
+            'fecha': venta.fecha,
+            'items': detalles.get(venta.id_externo, [])
+        } for venta in ventas]
+
+    def _devolver_no_registrado(self, resultado: Dict[str, Any]):
+        """Repone en el stock local lo que la oficina rechazó o recortó."""
+        if resultado['estado'] not in ('rechazada', 'ajustada'):
+            return
+        registrado = {item['producto_id']: item['cantidad'] for item in resultado['items']}
+        vendido = (DetalleDiario
+                   .select(DetalleDiario.producto_id, fn.SUM(DetalleDiario.cantidad))
+                   .where(DetalleDiario.venta == resultado['id_externo'])
+                   .group_by(DetalleDiario.producto_id))
+        for producto_id, cantidad in vendido.tuples():
+            devuelto = cantidad - registrado.get(producto_id, 0)
+            if devuelto > 0:
+                (ProductoLocal
+                 .update(stock_actual=ProductoLocal.stock_actual + devuelto)
+                 .where(ProductoLocal.id == producto_id)
+                 .execute())
+
+    def _aplicar_respuesta(self, respuesta: Dict[str, Any]):
+        ahora = datetime.now()
+        cambios = respuesta['cambios']
+        with db_diario.atomic():
+            for resultado in respuesta['resultados']:
+                self._devolver_no_registrado(resultado)
+                datos = {
+                    'estado': resultado['estado'],
+                    'venta_id': resultado['venta_id'],
+                    'mensaje': resultado['mensaje'],
+                    'fecha_sincronizacion': ahora
+                }
+                if resultado['total'] is not None:
+                    # Vale el precio de la oficina
+                    datos['total'] = a_decimal(resultado['total'])
+                (VentaDiario
+                 .update(**datos)
+                 .where(VentaDiario.id_externo == resultado['id_externo'])
+                 .execute())
+
+            if cambios['productos']:
+                ProductoLocal.insert_many(cambios['productos']).on_conflict_replace().execute()
+                # El stock de la oficina todavía no incluye lo que sigue pendiente
+                pendiente = (DetalleDiario
+                             .select(DetalleDiario.producto_id, fn.SUM(DetalleDiario.cantidad))
+                             .join(VentaDiario)
+                             .where((VentaDiario.estado == ESTADO_PENDIENTE) &
+                                    DetalleDiario.producto_id.in_(
+                                        [producto['id'] for producto in cambios['productos']]))
+                             .group_by(DetalleDiario.producto_id))
+                for producto_id, cantidad in pendiente.tuples():
+                    (ProductoLocal
+                     .update(stock_actual=ProductoLocal.stock_actual - cantidad)
+                     .where(ProductoLocal.id == producto_id)
+                     .execute())
+            if cambios['clientes']:
+                ClienteLocal.insert_many(cambios['clientes']).on_conflict_replace().execute()
+
+            (MarcaSincronizacion
+             .insert(clave='catalogo', valor=json.dumps(cambios['marca'], default=valor_json))
+             .on_conflict_replace()
+             .execute())
+
+    @log_operacion("diario_móvil")
+    def sincronizar(self) -> Dict[str, int]:
+        """
+        Envía las ventas pendientes por lotes y actualiza el catálogo local.
+        Si la conexión se corta a mitad de camino, lo ya confirmado queda
+        marcado y el resto se reenvía la próxima vez: la oficina reconoce las
+        ventas repetidas por su id_externo.
+
+        Returns:
+            Dict[str, int]: Cantidad de ventas por estado informado por la oficina
+        """
+        resumen = {}
+        with self._lock:
+            while True:
+                lote = self._lote_pendiente()
+                respuesta = self.transporte({'ventas': lote, 'marca': self._marca()})
+                self._aplicar_respuesta(respuesta)
+                for resultado in respuesta['resultados']:
+                    resumen[resultado['estado']] = resumen.get(resultado['estado'], 0) + 1
+                if len(lote) < VENTAS_POR_LOTE:
+                    return resumen
+
+if __name__ == '__main__':
+    # Servidor de sincronización de la oficina (o de prueba, en la misma PC)
+    from modelo import inicializar_db
+    from controlador import Controlador
+    from utilidades import configurar_logging
+
+    configurar_logging()
+    inicializar_db()
+    servidor = ServidorSincronizacion(Controlador())
+    print(f"Sincronización escuchando en el puerto {servidor.server_port}")
+    servidor.serve_forever()
@@ -0,0 +1,269 @@
+from typing import List, Dict, Optional, Any, Iterable, Tuple
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+
+from peewee import fn, chunked, EXCLUDED
+
+from modelo import (
+    db_lectura, lectura, Cliente, Producto, Venta, DetalleVenta, Pago, AlertaStock,
+    PeriodoArchivado, IndicadorTablero, ResumenDiario, ResumenProductoDiario,
+    INDICADOR_SALDO_PENDIENTE
+)
+from utilidades import a_decimal, de_centavos
+
+# Productos del ranking y días de la evolución que muestra el tablero
+PRODUCTOS_TABLERO = 5
+DIAS_TABLERO = 7
+
+# Días (hasta hoy) que recalcula la reconciliación; cubre lo que muestra el tablero
+DIAS_RECONCILIACION = DIAS_TABLERO
+
+# Los acumuladores se actualizan dentro de la transacción de la operación
+# que los modifica, con upserts que suman sobre el valor vigente en SQLite
+def sumar_venta(fecha: datetime, total: Decimal, detalles: Iterable[Tuple[int, int, Decimal]],
+                signo: int = 1):
+    """
+    Suma (o resta, con signo -1) una venta al resumen de su día y de sus productos.
+
+    Args:
+        fecha (datetime): Fecha de la venta
+        total (Decimal): Total de la venta
+        detalles (Iterable[Tuple[int, int, Decimal]]): (producto_id, cantidad, subtotal) por ítem
+        signo (int): 1 al registrar, -1 al anular
+    """
+    dia = fecha.date()
+    (ResumenDiario
+     .insert(fecha=dia, cantidad_ventas=signo, total_ventas=signo * total)
+     .on_conflict(
+         conflict_target=[ResumenDiario.fecha],
+         update={
+             ResumenDiario.cantidad_ventas:
+                 ResumenDiario.cantidad_ventas + EXCLUDED.cantidad_ventas,
+             ResumenDiario.total_ventas:
+                 ResumenDiario.total_ventas + EXCLUDED.total_ventas
+         })
+     .execute())
+
+    filas = [{'fecha': dia, 'producto': producto_id, 'cantidad': signo * cantidad,
+              'total': signo * subtotal} for producto_id, cantidad, subtotal in detalles]
+    for lote in chunked(filas, 100):
+        (ResumenProductoDiario
+         .insert_many(lote)
+         .on_conflict(
+             conflict_target=[ResumenProductoDiario.fecha, ResumenProductoDiario.producto],
+             update={
+                 ResumenProductoDiario.cantidad:
+                     ResumenProductoDiario.cantidad + EXCLUDED.cantidad,
+                 ResumenProductoDiario.total:
+                     ResumenProductoDiario.total + EXCLUDED.total
+             })
+         .execute())
+
+def sumar_cobro(fecha: datetime, monto: Decimal):
+    """Suma un pago (negativo al anularlo) al resumen de su día."""
+    (ResumenDiario
+     .insert(fecha=fecha.date(), total_cobrado=monto)
+     .on_conflict(
+         conflict_target=[ResumenDiario.fecha],
+         update={ResumenDiario.total_cobrado: ResumenDiario.total_cobrado + EXCLUDED.total_cobrado})
+     .execute())
+
+def sumar_saldo_pendiente(monto: Decimal):
+    """Suma al total adeudado por los clientes (acompaña cada cambio de Cliente.saldo)."""
+    (IndicadorTablero
+     .insert(clave=INDICADOR_SALDO_PENDIENTE, valor=monto, fecha_actualizacion=datetime.now())
+     .on_conflict(
+         conflict_target=[IndicadorTablero.clave],
+         update={
+             IndicadorTablero.valor: IndicadorTablero.valor + EXCLUDED.valor,
+             IndicadorTablero.fecha_actualizacion: EXCLUDED.fecha_actualizacion
+         })
+     .execute())
+
+def leer_tablero(hoy: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Lee los indicadores del tablero: unas pocas lecturas por clave primaria
+    sobre los acumuladores, en una misma foto de la base y sin recorrer
+    ventas ni pagos.
+
+    Args:
+        hoy (Optional[date]): Día del tablero (por defecto, hoy)
+
+    Returns:
+        Dict[str, Any]: Ventas, importe y cobros del día, saldo pendiente de
+            los clientes, productos bajo stock, productos más vendidos del día
+            y la evolución de los últimos DIAS_TABLERO días
+    """
+    hoy = hoy or date.today()
+    primero = hoy - timedelta(days=DIAS_TABLERO - 1)
+    with db_lectura.atomic():
+        dias = {fila.fecha: fila for fila in lectura(ResumenDiario
+                                                      .select()
+                                                      .where(ResumenDiario.fecha.between(primero, hoy)))}
+        saldo = lectura(IndicadorTablero
+                        .select(IndicadorTablero.valor)
+                        .where(IndicadorTablero.clave == INDICADOR_SALDO_PENDIENTE)).scalar()
+        bajo_stock = lectura(AlertaStock.select()).count()
+        productos = list(lectura(ResumenProductoDiario
+                                 .select(ResumenProductoDiario.producto, Producto.nombre,
+                                         ResumenProductoDiario.cantidad, ResumenProductoDiario.total)
+                                 .join(Producto)
+                                 .where((ResumenProductoDiario.fecha == hoy) &
+                                        (ResumenProductoDiario.cantidad > 0))
+                                 .order_by(ResumenProductoDiario.cantidad.desc())
+                                 .limit(PRODUCTOS_TABLERO)).tuples())
+
+    evolucion = []
+    for desplazamiento in range(DIAS_TABLERO):
+        dia = primero + timedelta(days=desplazamiento)
+        fila = dias.get(dia)
+        evolucion.append({
+            'fecha': dia,
+            'cantidad_ventas': fila.cantidad_ventas if fila else 0,
+            'total_ventas': a_decimal(fila.total_ventas if fila else 0),
+            'total_cobrado': a_decimal(fila.total_cobrado if fila else 0)
+        })
+    return {
+        'fecha': hoy,
+        **{clave: valor for clave, valor in evolucion[-1].items() if clave != 'fecha'},
+        'saldo_pendiente': a_decimal(saldo or 0),
+        'productos_bajo_stock': bajo_stock,
+        'productos_mas_vendidos': [{
+            'producto_id': producto_id,
+            'nombre': nombre,
+            'cantidad': cantidad,
+            'total': a_decimal(total)
+        } for producto_id, nombre, cantidad, total in productos],
+        'evolucion': evolucion
+    }
+
+def _dia(valor) -> date:
+    # DATE(fecha) llega convertido por el campo de origen: como datetime o como texto
+    if isinstance(valor, datetime):
+        return valor.date()
+    return valor if isinstance(valor, date) else date.fromisoformat(valor)
+
+def _primer_dia_reconciliado(hoy: date, dias: int) -> date:
+    """Los días ya archivados no se recalculan: sus ventas no están en la base principal."""
+    desde = hoy - timedelta(days=dias - 1)
+    ultimo = PeriodoArchivado.select().order_by(PeriodoArchivado.hasta.desc()).first()
+    if ultimo is not None:
+        desde = max(desde, ultimo.hasta.date())
+    return desde
+
+def reconciliar_tablero(reparar: bool = False, hoy: Optional[date] = None,
+                        dias: int = DIAS_RECONCILIACION) -> List[Dict[str, Any]]:
+    """
+    Recalcula los acumuladores de los últimos días y el saldo pendiente a
+    partir de las ventas, pagos y clientes, y los compara con los mantenidos.
+    Debe llamarse dentro de una transacción de escritura para que ninguna
+    operación se intercale entre el cálculo y la reparación.
+
+    Args:
+        reparar (bool): Reemplazar los acumuladores por los valores calculados
+        hoy (Optional[date]): Último día a recalcular (por defecto, hoy)
+        dias (int): Días a recalcular
+
+    Returns:
+        List[Dict[str, Any]]: Diferencias con el indicador, la fecha y el
+            producto (si corresponden) y los valores registrado y correcto
+    """
+    hoy = hoy or date.today()
+    desde = _primer_dia_reconciliado(hoy, dias)
+    inicio = datetime.combine(desde, datetime.min.time())
+    fin = datetime.combine(hoy + timedelta(days=1), datetime.min.time())
+
+    dia_venta = fn.DATE(Venta.fecha)
+    dia_pago = fn.DATE(Pago.fecha)
+    correctos = {}
+    for dia, cantidad, total in (Venta
+                                 .select(dia_venta, fn.COUNT(Venta.id), fn.SUM(Venta.total))
+                                 .where((Venta.fecha >= inicio) & (Venta.fecha < fin))
+                                 .group_by(dia_venta)
+                                 .tuples()):
+        correctos[_dia(dia)] = (cantidad, de_centavos(total), a_decimal(0))
+    for dia, cobrado in (Pago
+                         .select(dia_pago, fn.SUM(Pago.monto))
+                         .where((Pago.fecha >= inicio) & (Pago.fecha < fin))
+                         .group_by(dia_pago)
+                         .tuples()):
+        cantidad, total, _ = correctos.get(_dia(dia), (0, a_decimal(0), None))
+        correctos[_dia(dia)] = (cantidad, total, de_centavos(cobrado))
+
+    productos_correctos = {}
+    for dia, producto_id, cantidad, total in (DetalleVenta
+                                              .select(dia_venta, DetalleVenta.producto,
+                                                      fn.SUM(DetalleVenta.cantidad),
+                                                      fn.SUM(DetalleVenta.subtotal))
+                                              .join(Venta)
+                                              .where((Venta.fecha >= inicio) & (Venta.fecha < fin))
+                                              .group_by(dia_venta, DetalleVenta.producto)
+                                              .tuples()):
+        productos_correctos[(_dia(dia), producto_id)] = (cantidad, de_centavos(total))
+
+    registrados = {fila.fecha: (fila.cantidad_ventas, a_decimal(fila.total_ventas),
+                                a_decimal(fila.total_cobrado))
+                   for fila in ResumenDiario.select().where(ResumenDiario.fecha.between(desde, hoy))}
+    productos_registrados = {(fila.fecha, fila.producto_id): (fila.cantidad, a_decimal(fila.total))
+                             for fila in (ResumenProductoDiario
+                                          .select()
+                                          .where(ResumenProductoDiario.fecha.between(desde, hoy)))}
+
+    # Un acumulador en cero equivale a uno inexistente
+    vacio_dia = (0, a_decimal(0), a_decimal(0))
+    vacio_producto = (0, a_decimal(0))
+    diferencias = [{
+        'indicador': 'resumen_diario',
+        'fecha': dia,
+        'producto_id': None,
+        'registrado': registrados.get(dia, vacio_dia),
+        'correcto': correctos.get(dia, vacio_dia)
+    } for dia in sorted(set(correctos) | set(registrados))
+        if registrados.get(dia, vacio_dia) != correctos.get(dia, vacio_dia)]
+    diferencias += [{
+        'indicador': 'resumen_producto',
+        'fecha': dia,
+        'producto_id': producto_id,
+        'registrado': productos_registrados.get((dia, producto_id), vacio_producto),
+        'correcto': productos_correctos.get((dia, producto_id), vacio_producto)
+    } for dia, producto_id in sorted(set(productos_correctos) | set(productos_registrados))
+        if productos_registrados.get((dia, producto_id), vacio_producto) !=
+        productos_correctos.get((dia, producto_id), vacio_producto)]
+
+    saldo_registrado = a_decimal(IndicadorTablero
+                                 .select(IndicadorTablero.valor)
+                                 .where(IndicadorTablero.clave == INDICADOR_SALDO_PENDIENTE)
+                                 .scalar() or 0)
+    saldo_correcto = de_centavos(Cliente.select(fn.COALESCE(fn.SUM(Cliente.saldo), 0)).scalar())
+    if saldo_registrado != saldo_correcto:
+        diferencias.append({
+            'indicador': INDICADOR_SALDO_PENDIENTE,
+            'fecha': None,
+            'producto_id': None,
+            'registrado': saldo_registrado,
+            'correcto': saldo_correcto
+        })
+
+    if reparar and diferencias:
+        ResumenDiario.delete().where(ResumenDiario.fecha.between(desde, hoy)).execute()
+        for lote in chunked(correctos.items(), 100):
+            ResumenDiario.insert_many([{
+                'fecha': dia,
+                'cantidad_ventas': cantidad,
+                'total_ventas': total,
+                'total_cobrado': cobrado
+            } for dia, (cantidad, total, cobrado) in lote]).execute()
+        ResumenProductoDiario.delete().where(ResumenProductoDiario.fecha.between(desde, hoy)).execute()
+        for lote in chunked(productos_correctos.items(), 100):
+            ResumenProductoDiario.insert_many([{
+                'fecha': dia,
+                'producto': producto_id,
+                'cantidad': cantidad,
+                'total': total
+            } for (dia, producto_id), (cantidad, total) in lote]).execute()
+        (IndicadorTablero
+         .insert(clave=INDICADOR_SALDO_PENDIENTE, valor=saldo_correcto,
+                 fecha_actualizacion=datetime.now())
+         .on_conflict_replace()
+         .execute())
+    return diferencias
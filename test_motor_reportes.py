@@ -0,0 +1,93 @@
+"""
+El motor de reportes en paralelo debe dar exactamente los mismos reportes
+que el controlador en serie, con y sin rango de fechas.
+
+Uso:
+    python -m unittest test_motor_reportes
+"""
+from datetime import datetime, timedelta
+import os
+import shutil
+import tempfile
+import unittest
+
+# La ruta de la base es relativa al directorio de trabajo: se cambia a un
+# directorio temporal antes de importar modelo (igual que benchmark.py).
+DIRECTORIO_ORIGINAL = os.getcwd()
+directorio = None
+
+def setUpModule():
+    global directorio
+    directorio = tempfile.mkdtemp(prefix='test_reportes_')
+    os.chdir(directorio)
+    from modelo import inicializar_db
+    inicializar_db()
+
+def tearDownModule():
+    from modelo import db, db_lectura
+    db.close_all()
+    db_lectura.close_all()
+    os.chdir(DIRECTORIO_ORIGINAL)
+    shutil.rmtree(directorio, ignore_errors=True)
+
+class TestMotorReportes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from controlador import Controlador
+        from motor_reportes import MotorReportes
+
+        cls.controlador = controlador = Controlador()
+        proveedor = controlador.agregar_proveedor('Proveedor', '1100000000')
+        productos = [controlador.agregar_producto(f'Producto {i}', 10 + i, 1000, proveedor.id).id
+                     for i in range(4)]
+        # Los clientes 3 y 4 no compran: deben figurar en el reporte sin fechas
+        clientes = [controlador.agregar_cliente(f'Cliente {i}', f'11223344{i:02d}', 'Calle').id
+                    for i in range(5)]
+        controlador.eliminar_cliente(clientes[4])
+        fecha = datetime(2026, 3, 15, 10)
+        for i in range(30):
+            venta, _ = controlador.registrar_venta(
+                clientes[i % 3], [{'producto_id': productos[i % 4], 'cantidad': 1 + i % 3}],
+                fecha=fecha - timedelta(days=7 * i))
+            if i % 2:
+                controlador.registrar_pago(venta.id, 5, 'efectivo')
+        controlador.ajustar_stock(productos[3], -980, 'Prueba de stock bajo')
+        cls.motor = MotorReportes(procesos=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.motor.cerrar()
+
+    def serial(self, tipo_reporte, desde, hasta):
+        controlador = self.controlador
+        if tipo_reporte == 'Ventas por Cliente':
+            return controlador.obtener_reporte_ventas_cliente(desde, hasta)
+        if tipo_reporte == 'Productos más Vendidos':
+            return controlador.obtener_reporte_productos(desde, hasta)
+        if tipo_reporte == 'Balance de Pagos':
+            return controlador.obtener_reporte_pagos(desde, hasta)
+        if tipo_reporte == 'Stock Actual':
+            return controlador.obtener_reporte_stock()
+        return controlador.obtener_reporte_antiguedad(hasta)
+
+    def comparar(self, desde, hasta):
+        from motor_reportes import TIPOS_REPORTE
+
+        paquete = self.motor.generar_paquete(desde, hasta)
+        for tipo_reporte in TIPOS_REPORTE:
+            with self.subTest(tipo_reporte=tipo_reporte):
+                self.assertEqual(paquete[tipo_reporte], self.serial(tipo_reporte, desde, hasta))
+
+    def test_sin_rango(self):
+        self.comparar(None, None)
+
+    def test_con_rango(self):
+        self.comparar(datetime(2025, 12, 1), datetime(2026, 2, 28, 23, 59, 59))
+
+    def test_clientes_sin_ventas(self):
+        clientes = [fila['cliente'] for fila in self.motor.generar('Ventas por Cliente')]
+        self.assertIn('Cliente 3', clientes)
+        self.assertNotIn('Cliente 4', clientes)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,10 @@
 import logging
-from datetime import datetime
+from datetime import datetime, date
 from functools import wraps
 from typing import Callable, Any
+from decimal import Decimal, ROUND_HALF_UP
 import os
+import numpy as np
 
 # Configuración del sistema de logging
 def configurar_logging():
@@ -37,71 +39,106 @@ def log_operacion(operacion: str):
         return wrapper
     return decorador
 
-def validar_telefono(telefono: str) -> bool:
-    """
-    Valida que el número de teléfono tenga un formato válido.
-    Acepta formatos como:
-    - 1123456789
-    - 11-2345-6789
-    - (11) 2345-6789
-    - +54 11 2345-6789
+def formatear_moneda(valor: Decimal) -> str:
+    """
+    Formatea un monto como moneda.
     
     Args:
-        telefono (str): Número de teléfono a validar
+        valor (Decimal): Monto a formatear
         
     Returns:
-        bool: True si el formato es válido, False en caso contrario
+        str: Valor formateado como moneda
+    """
+    return f"${a_decimal(valor):,.2f}"
+
+CENTAVO = Decimal('0.01')
+
+def a_decimal(valor: Any) -> Decimal:
     """
-    import re
-    # Eliminar espacios, paréntesis y guiones para contar dígitos
-    solo_numeros = re.sub(r'[\s\(\)\-\+]', '', telefono)
+    Convierte un monto a Decimal con dos decimales, sin pasar por la
+    representación binaria de un float (0.1 queda 0.10, no 0.1000000000000000055).
     
-    # Verificar que tenga entre 8 y 15 dígitos (para incluir código de país)
-    if not (8 <= len(solo_numeros) <= 15):
-        return False
+    Args:
+        valor (Any): Monto como Decimal, int, float o str
+        
+    Returns:
+        Decimal: Monto redondeado al centavo
+    """
+    if not isinstance(valor, Decimal):
+        valor = Decimal(str(valor))
+    return valor.quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+def a_centavos(valor: Any) -> int:
+    """
+    Convierte un monto a centavos enteros, como se guardan en la base.
     
-    # Verificar que solo contenga caracteres válidos
-    patron = r'^[\+]?[\d\s\(\)\-]+$'
-    return bool(re.match(patron, telefono))
+    Args:
+        valor (Any): Monto como Decimal, int, float o str
+        
+    Returns:
+        int: Centavos, redondeados como a_decimal
+    """
+    return int(a_decimal(valor).scaleb(2))
 
-def validar_email(email: str) -> bool:
+def de_centavos(centavos: Any) -> Decimal:
     """
-    Valida que el email tenga un formato válido.
+    Convierte centavos leídos de la base (o una suma en SQL) a Decimal.
+    Un entero pasa exacto; un promedio u otro cálculo real se redondea al centavo.
     
     Args:
-        email (str): Email a validar
+        centavos (Any): Centavos como int, float o str
         
     Returns:
-        bool: True si el formato es válido, False en caso contrario
+        Decimal: Monto con dos decimales
     """
-    import re
-    patron = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(patron, email))
+    if isinstance(centavos, int):
+        return Decimal(centavos).scaleb(-2)
+    return a_decimal(Decimal(str(centavos)).scaleb(-2))
 
-def formatear_moneda(valor: float) -> str:
+def valor_json(valor: Any) -> Any:
     """
-    Formatea un valor numérico como moneda.
+    Convierte los valores que json no sabe serializar (usar como default de
+    json.dumps): fechas en ISO 8601 y montos Decimal como texto, para no
+    perder centavos al pasar por float.
     
     Args:
-        valor (float): Valor a formatear
+        valor (Any): Valor a convertir
         
     Returns:
-        str: Valor formateado como moneda
+        Any: Representación serializable
+    """
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+def formatear_montos(centavos: np.ndarray) -> np.ndarray:
+    """
+    Formatea una columna completa de montos en centavos para mostrar en
+    tablas. La división por 100 recién acá, al mostrar: el %.2f vuelve
+    siempre al mismo centavo.
+    
+    Args:
+        centavos (np.ndarray): Montos en centavos (enteros)
+        
+    Returns:
+        np.ndarray: Montos formateados como "$1234.50"
     """
-    return f"${valor:,.2f}"
+    return np.char.mod('$%.2f', np.asarray(centavos) / 100)
 
-def calcular_total_venta(cantidad: int, precio_unitario: float) -> float:
+def calcular_total_venta(cantidad: int, precio_unitario: Decimal) -> Decimal:
     """
-    Calcula el total de una venta.
+    Calcula el total de una línea de venta.
     
     Args:
         cantidad (int): Cantidad de productos
-        precio_unitario (float): Precio unitario del producto
+        precio_unitario (Decimal): Precio unitario del producto
         
     Returns:
-        float: Total calculado
+        Decimal: Total redondeado al centavo
     """
-    return round(cantidad * precio_unitario, 2)
+    return a_decimal(cantidad * a_decimal(precio_unitario))
 
 # Inicializar logging al importar el módulo
 configurar_logging() 
\ No newline at end of file
@@ -0,0 +1,196 @@
+from typing import List, Dict, Optional, Tuple, Callable, Iterable, Sequence, Set, NamedTuple
+import re
+
+import numpy as np
+
+# Patrones compilados una sola vez al importar el módulo. ASCII: \s no
+# acepta espacios Unicode que después no se podrían quitar al normalizar.
+PATRON_TELEFONO = re.compile(r'\+?[0-9\s()\-]+', re.ASCII)
+PATRON_EMAIL = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+PATRON_MONTO = re.compile(r'[0-9]+(?:[.,][0-9]{1,2})?')
+_NO_DIGITO = re.compile(r'[^0-9]')
+
+# Lo que PATRON_TELEFONO admite además de dígitos; quitarlo con translate
+# es mucho más rápido que una sustitución con expresión regular
+_SEPARADORES_TELEFONO = str.maketrans('', '', ' \t\n\r\f\v()-+')
+
+# Dígitos de un teléfono válido (con código de país incluido)
+MIN_DIGITOS_TELEFONO = 8
+MAX_DIGITOS_TELEFONO = 15
+
+CODIGO_PAIS = '54'
+DIGITOS_NACIONALES = 10  # código de área + número
+
+def _canonico(digitos: str) -> str:
+    """
+    Forma canónica de un teléfono argentino a partir de sus dígitos: sin
+    código de país, sin el 9 de los celulares en formato internacional y
+    sin el 0 de larga distancia. "+54 9 11 2345-6789", "011 2345-6789" y
+    "1123456789" quedan todos como "1123456789".
+    """
+    if len(digitos) > DIGITOS_NACIONALES and digitos.startswith(CODIGO_PAIS):
+        digitos = digitos[len(CODIGO_PAIS):]
+        if len(digitos) == DIGITOS_NACIONALES + 1 and digitos.startswith('9'):
+            digitos = digitos[1:]
+    if digitos.startswith('0'):
+        digitos = digitos[1:]
+    return digitos
+
+def validar_telefono(telefono: str) -> bool:
+    """
+    Valida que el número de teléfono tenga un formato válido.
+    Acepta formatos como:
+    - 1123456789
+    - 11-2345-6789
+    - (11) 2345-6789
+    - +54 11 2345-6789
+
+    Args:
+        telefono (str): Número de teléfono a validar
+
+    Returns:
+        bool: True si el formato es válido, False en caso contrario
+    """
+    if PATRON_TELEFONO.fullmatch(telefono) is None:
+        return False
+    # Entre 8 y 15 dígitos (para incluir código de país)
+    return MIN_DIGITOS_TELEFONO <= len(telefono.translate(_SEPARADORES_TELEFONO)) <= MAX_DIGITOS_TELEFONO
+
+def normalizar_telefono(telefono: Optional[str]) -> str:
+    """
+    Teléfono en forma canónica (solo dígitos), para detectar duplicados y
+    buscar por igualdad sobre un índice sin importar cómo se escribió.
+
+    Args:
+        telefono (Optional[str]): Teléfono en cualquier formato
+
+    Returns:
+        str: Dígitos del número nacional ('' si no tiene dígitos)
+    """
+    return _canonico(_NO_DIGITO.sub('', telefono or ''))
+
+def validar_email(email: str) -> bool:
+    """
+    Valida que el email tenga un formato válido.
+
+    Args:
+        email (str): Email a validar
+
+    Returns:
+        bool: True si el formato es válido, False en caso contrario
+    """
+    return PATRON_EMAIL.fullmatch(email) is not None
+
+# Validación por columnas para importar archivos: cada regla recorre una
+# columna entera con el método del patrón ya resuelto y deja una máscara
+# NumPy; las máscaras se combinan sin volver a recorrer las filas y los
+# mensajes se arman solo para las filas con error.
+class ErrorFila(NamedTuple):
+    fila: int  # posición en las columnas (0 = primera fila de datos)
+    columna: str
+    mensaje: str
+
+class ResultadoValidacion(NamedTuple):
+    validas: np.ndarray  # máscara por fila
+    columnas: Dict[str, np.ndarray]  # valores limpios, más telefono_normalizado
+    errores: List[ErrorFila]  # ordenados por fila
+
+    def filas_validas(self, *nombres) -> Iterable[Tuple]:
+        """Recorre las columnas indicadas de las filas válidas como tuplas."""
+        indices = np.flatnonzero(self.validas)
+        return zip(*(self.columnas[nombre][indices] for nombre in nombres))
+
+def limpiar_columna(valores: Sequence) -> np.ndarray:
+    """Columna como arreglo de textos sin espacios sobrantes; None y NaN quedan ''."""
+    return np.array(['' if valor is None or valor != valor else str(valor).strip()
+                     for valor in valores], dtype=object)
+
+def _coinciden(patron: re.Pattern, columna: np.ndarray) -> np.ndarray:
+    coincide = patron.fullmatch
+    return np.fromiter((coincide(valor) is not None for valor in columna), bool, len(columna))
+
+def validar_telefonos(columna: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Valida y normaliza una columna de teléfonos ya limpia.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Máscara de válidos y teléfonos
+            normalizados ('' en los inválidos)
+    """
+    formato = _coinciden(PATRON_TELEFONO, columna)
+    digitos = [valor.translate(_SEPARADORES_TELEFONO) for valor in columna]
+    largos = np.fromiter(map(len, digitos), np.int64, len(digitos))
+    validos = formato & (largos >= MIN_DIGITOS_TELEFONO) & (largos <= MAX_DIGITOS_TELEFONO)
+    normalizados = np.full(len(columna), '', dtype=object)
+    indices = np.flatnonzero(validos)
+    normalizados[indices] = [_canonico(digitos[i]) for i in indices]
+    return validos, normalizados
+
+def validar_lote(columnas: Dict[str, Sequence], obligatorias: Sequence[str] = ('nombre', 'telefono'),
+                 montos: Sequence[str] = (),
+                 registrados: Optional[Callable[[List[str]], Set[str]]] = None) -> ResultadoValidacion:
+    """
+    Valida columnas completas de un archivo de clientes o proveedores: campos
+    obligatorios, teléfono, email (si tiene), montos y teléfonos repetidos en
+    el archivo o ya registrados. Una fila con algún error no es válida; el
+    informe trae un error por regla incumplida.
+
+    Args:
+        columnas (Dict[str, Sequence]): Valores por columna, todas del mismo largo
+        obligatorias (Sequence[str]): Columnas que no pueden estar vacías
+        montos (Sequence[str]): Columnas de montos opcionales (hasta dos decimales)
+        registrados (Optional[Callable[[List[str]], Set[str]]]): Recibe los
+            teléfonos normalizados válidos y devuelve los que ya existen
+
+    Returns:
+        ResultadoValidacion: Máscara de filas válidas, columnas limpias y errores
+    """
+    faltantes = [nombre for nombre in obligatorias if nombre not in columnas]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+    limpias = {nombre: limpiar_columna(valores) for nombre, valores in columnas.items()}
+    largos = {len(columna) for columna in limpias.values()}
+    if len(largos) > 1:
+        raise ValueError("Las columnas no tienen la misma cantidad de filas")
+    filas = largos.pop() if largos else 0
+
+    reglas: List[Tuple[str, str, np.ndarray]] = []
+    for nombre in obligatorias:
+        reglas.append((nombre, "Campo obligatorio", limpias[nombre] == ''))
+
+    if 'telefono' in limpias:
+        telefonos = limpias['telefono']
+        validos, normalizados = validar_telefonos(telefonos)
+        reglas.append(('telefono', "Teléfono inválido", ~validos & (telefonos != '')))
+        limpias['telefono_normalizado'] = normalizados
+
+        # Repetido en el archivo: vale la primera aparición
+        _, primeras, grupos = np.unique(normalizados, return_index=True, return_inverse=True)
+        primera = primeras[grupos.ravel()]
+        reglas.append(('telefono', "Teléfono repetido en el archivo",
+                       validos & (primera != np.arange(filas))))
+        if registrados is not None:
+            existentes = registrados(list(dict.fromkeys(normalizados[validos])))
+            if existentes:
+                ya = np.fromiter((valor in existentes for valor in normalizados), bool, filas)
+                reglas.append(('telefono', "Teléfono ya registrado", validos & ya))
+
+    if 'email' in limpias:
+        emails = limpias['email']
+        reglas.append(('email', "Email inválido",
+                       (emails != '') & ~_coinciden(PATRON_EMAIL, emails)))
+
+    for nombre in montos:
+        if nombre in limpias:
+            valores = limpias[nombre]
+            reglas.append((nombre, "Monto inválido",
+                           (valores != '') & ~_coinciden(PATRON_MONTO, valores)))
+            limpias[nombre] = np.array([valor.replace(',', '.') for valor in valores], dtype=object)
+
+    validas = np.ones(filas, dtype=bool)
+    errores = []
+    for columna, mensaje, falla in reglas:
+        validas &= ~falla
+        errores.extend(ErrorFila(int(fila), columna, mensaje) for fila in np.flatnonzero(falla))
+    errores.sort(key=lambda error: error.fila)
+    return ResultadoValidacion(validas, limpias, errores)
@@ -1,9 +1,104 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from typing import Callable, Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List, Iterable, Tuple
 from datetime import datetime
-from decimal import Decimal
-from controlador import Controlador
+from decimal import Decimal, InvalidOperation
+import queue
+import numpy as np
+from controlador import Controlador, LimiteCreditoExcedido
+from utilidades import formatear_montos, formatear_moneda, a_decimal
+
+# Cada cuánto se pide el pronóstico de demanda (no recalcula si no hubo ventas)
+INTERVALO_PRONOSTICO_MS = 10 * 60 * 1000
+# Cada cuánto el hilo de Tk revisa si llegaron pronósticos de otro hilo
+INTERVALO_COLA_PRONOSTICOS_MS = 250
+
+# Refresco del tablero mientras está visible y reconciliación de sus acumuladores
+INTERVALO_TABLERO_MS = 30 * 1000
+INTERVALO_RECONCILIACION_MS = 60 * 60 * 1000
+
+class TablaIncremental(ttk.Treeview):
+    """
+    Treeview que identifica cada fila por una clave (el id del registro) y,
+    al refrescar, compara el resultado nuevo con lo que ya está mostrado para
+    aplicar solo altas, cambios y bajas. Editar un registro en una lista de
+    miles de filas se traduce en una sola llamada a Tk.
+    """
+
+    def __init__(self, master=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self._filas: Dict[str, Tuple] = {}
+        self._orden: List[str] = []
+
+    def configurar_columnas(self, columnas: Tuple[str, ...], ancho: int = 100):
+        """Cambia las columnas; si son distintas a las actuales vacía la tabla."""
+        if tuple(self['columns']) == tuple(columnas):
+            return
+        self.limpiar()
+        self['columns'] = columnas
+        for col in columnas:
+            self.heading(col, text=col)
+            self.column(col, width=ancho)
+
+    def limpiar(self):
+        """Elimina todas las filas con una única llamada a Tk."""
+        if self._orden:
+            self.delete(*self._orden)
+        self._filas = {}
+        self._orden = []
+
+    def actualizar(self, filas: Iterable[Tuple[Any, Tuple]]):
+        """
+        Sincroniza la tabla con un nuevo resultado.
+        
+        Args:
+            filas (Iterable[Tuple[Any, Tuple]]): Pares (clave, valores) en el orden a mostrar
+        """
+        nuevas = {str(clave): tuple(valores) for clave, valores in filas}
+        orden = list(nuevas)
+        
+        # Bajas: una sola llamada a Tk para todas
+        bajas = [iid for iid in self._orden if iid not in nuevas]
+        if bajas:
+            self.delete(*bajas)
+        
+        # Altas en su posición y cambios solo donde los valores difieren
+        for posicion, iid in enumerate(orden):
+            valores = nuevas[iid]
+            anteriores = self._filas.get(iid)
+            if anteriores is None:
+                self.insert('', posicion, iid=iid, values=valores)
+            elif anteriores != valores:
+                self.item(iid, values=valores)
+        
+        # Si cambió el orden relativo de las filas existentes, se reordena
+        # todo con set_children (una sola llamada a Tk)
+        existentes = [iid for iid in self._orden if iid in nuevas]
+        if existentes != [iid for iid in orden if iid in self._filas]:
+            self.set_children('', *orden)
+        
+        self._filas = nuevas
+        self._orden = orden
+
+    def actualizar_fila(self, clave: Any, valores: Tuple):
+        """Actualiza (o agrega al final) una sola fila."""
+        iid = str(clave)
+        valores = tuple(valores)
+        if iid in self._filas:
+            if self._filas[iid] != valores:
+                self.item(iid, values=valores)
+        else:
+            self.insert('', 'end', iid=iid, values=valores)
+            self._orden.append(iid)
+        self._filas[iid] = valores
+
+    def eliminar_fila(self, clave: Any):
+        """Quita una fila si está mostrada."""
+        iid = str(clave)
+        if iid in self._filas:
+            self.delete(iid)
+            del self._filas[iid]
+            self._orden.remove(iid)
 
 class VistaPrincipal:
     def __init__(self, root: tk.Tk):
@@ -23,29 +118,146 @@ class VistaPrincipal:
         self.notebook.pack(expand=True, fill='both', padx=5, pady=5)
         
         # Inicializar pestañas
+        self.tab_tablero = ttk.Frame(self.notebook)
         self.tab_clientes = ttk.Frame(self.notebook)
         self.tab_productos = ttk.Frame(self.notebook)
         self.tab_proveedores = ttk.Frame(self.notebook)
         self.tab_ventas = ttk.Frame(self.notebook)
+        self.tab_compras = ttk.Frame(self.notebook)
         self.tab_reportes = ttk.Frame(self.notebook)
         
+        self.notebook.add(self.tab_tablero, text='Tablero')
         self.notebook.add(self.tab_clientes, text='Clientes')
         self.notebook.add(self.tab_productos, text='Productos')
         self.notebook.add(self.tab_proveedores, text='Proveedores')
         self.notebook.add(self.tab_ventas, text='Ventas')
+        self.notebook.add(self.tab_compras, text='Compras')
         self.notebook.add(self.tab_reportes, text='Reportes')
         
         # Inicializar componentes
+        self._init_tablero()
         self._init_clientes()
         self._init_productos()
         self._init_proveedores()
         self._init_ventas()
+        self._init_compras()
         self._init_reportes()
         
         # Cargar datos iniciales
         self.actualizar_lista_clientes()
         self.actualizar_lista_productos()
         self.actualizar_lista_proveedores()
+        self.actualizar_lista_compras()
+        self._programar_tablero()
+        self.root.after(INTERVALO_RECONCILIACION_MS, self._programar_reconciliacion)
+
+    def _init_tablero(self):
+        """Inicializa la pestaña de inicio con los indicadores del día."""
+        frame_hoy = ttk.LabelFrame(self.tab_tablero, text="Hoy")
+        frame_hoy.pack(fill='x', padx=5, pady=5)
+        
+        # Una etiqueta por indicador, en dos columnas
+        self.indicadores_tablero = {}
+        for posicion, (clave, titulo) in enumerate((
+            ('cantidad_ventas', 'Ventas'),
+            ('total_ventas', 'Importe vendido'),
+            ('total_cobrado', 'Cobrado'),
+            ('saldo_pendiente', 'Saldo pendiente de clientes'),
+            ('productos_bajo_stock', 'Productos bajo stock')
+        )):
+            fila, columna = divmod(posicion, 2)
+            ttk.Label(frame_hoy, text=f"{titulo}:").grid(row=fila, column=columna * 2,
+                                                         sticky='w', padx=5, pady=2)
+            etiqueta = ttk.Label(frame_hoy, text="-", font=('TkDefaultFont', 12, 'bold'))
+            etiqueta.grid(row=fila, column=columna * 2 + 1, sticky='w', padx=5, pady=2)
+            self.indicadores_tablero[clave] = etiqueta
+        
+        # Productos más vendidos del día
+        frame_productos = ttk.LabelFrame(self.tab_tablero, text="Productos más Vendidos Hoy")
+        frame_productos.pack(expand=True, fill='both', padx=5, pady=5)
+        self.tree_tablero_productos = TablaIncremental(frame_productos, show='headings', height=5)
+        self.tree_tablero_productos.configurar_columnas(('Producto', 'Cantidad', 'Total'))
+        self.tree_tablero_productos.pack(expand=True, fill='both', padx=5, pady=5)
+        
+        # Evolución de los últimos días
+        frame_dias = ttk.LabelFrame(self.tab_tablero, text="Últimos Días")
+        frame_dias.pack(expand=True, fill='both', padx=5, pady=5)
+        self.tree_tablero_dias = TablaIncremental(frame_dias, show='headings', height=7)
+        self.tree_tablero_dias.configurar_columnas(('Fecha', 'Ventas', 'Importe', 'Cobrado'))
+        self.tree_tablero_dias.pack(expand=True, fill='both', padx=5, pady=5)
+        
+        frame_botones = ttk.Frame(self.tab_tablero)
+        frame_botones.pack(pady=5)
+        ttk.Button(frame_botones, text="Actualizar",
+                  command=self.actualizar_tablero).pack(side='left', padx=5)
+        ttk.Button(frame_botones, text="Reconciliar",
+                  command=self.reconciliar_tablero).pack(side='left', padx=5)
+        ttk.Button(frame_botones, text="Verificar Pagos y Saldos",
+                  command=self.verificar_pagos_saldos).pack(side='left', padx=5)
+        
+        self.notebook.bind('<<NotebookTabChanged>>', self._al_cambiar_pestania)
+
+    def actualizar_tablero(self):
+        """Muestra los indicadores del tablero (lecturas directas de los acumuladores)."""
+        try:
+            tablero = self.controlador.obtener_tablero()
+        except Exception as e:
+            self.mostrar_error(f"Error al cargar el tablero: {str(e)}")
+            return
+        for clave, etiqueta in self.indicadores_tablero.items():
+            valor = tablero[clave]
+            etiqueta.config(text=formatear_moneda(valor) if isinstance(valor, Decimal) else str(valor))
+        self.tree_tablero_productos.actualizar(
+            (producto['producto_id'], (producto['nombre'], producto['cantidad'],
+                                       formatear_moneda(producto['total'])))
+            for producto in tablero['productos_mas_vendidos'])
+        self.tree_tablero_dias.actualizar(
+            (dia['fecha'], (dia['fecha'].strftime('%d/%m/%Y'), dia['cantidad_ventas'],
+                            formatear_moneda(dia['total_ventas']),
+                            formatear_moneda(dia['total_cobrado'])))
+            for dia in reversed(tablero['evolucion']))
+
+    def _al_cambiar_pestania(self, event=None):
+        if self.notebook.select() == str(self.tab_tablero):
+            self.actualizar_tablero()
+
+    def _programar_tablero(self):
+        """Refresca el tablero si está visible y se reprograma cada INTERVALO_TABLERO_MS."""
+        self._al_cambiar_pestania()
+        self.root.after(INTERVALO_TABLERO_MS, self._programar_tablero)
+
+    def _programar_reconciliacion(self):
+        """Reconcilia los acumuladores y se reprograma cada INTERVALO_RECONCILIACION_MS."""
+        try:
+            self.controlador.verificar_tablero(reparar=True)
+        except Exception as e:
+            self.mostrar_error(f"Error al reconciliar el tablero: {str(e)}")
+        self.root.after(INTERVALO_RECONCILIACION_MS, self._programar_reconciliacion)
+
+    def reconciliar_tablero(self):
+        """Recalcula los indicadores desde las ventas y pagos y corrige diferencias."""
+        try:
+            diferencias = self.controlador.verificar_tablero(reparar=True)
+            self.actualizar_tablero()
+            if diferencias:
+                self.mostrar_info(f"Se corrigieron {len(diferencias)} indicadores del tablero")
+            else:
+                self.mostrar_info("Los indicadores del tablero están al día")
+        except Exception as e:
+            self.mostrar_error(f"Error al reconciliar el tablero: {str(e)}")
+
+    def verificar_pagos_saldos(self):
+        """Verifica lo pagado de cada venta y el saldo de cada cliente y corrige diferencias."""
+        try:
+            ventas = self.controlador.verificar_pagos(reparar=True)
+            clientes = self.controlador.verificar_saldos(reparar=True)
+            self.actualizar_tablero()
+            if ventas or clientes:
+                self.mostrar_info(f"Se corrigieron {len(ventas)} ventas y {len(clientes)} saldos de clientes")
+            else:
+                self.mostrar_info("Los pagos y saldos están al día")
+        except Exception as e:
+            self.mostrar_error(f"Error al verificar pagos y saldos: {str(e)}")
 
     def _init_clientes(self):
         # Frame para búsqueda
@@ -63,7 +275,7 @@ class VistaPrincipal:
         
         # Treeview para clientes
         columns = ('ID', 'Nombre', 'Teléfono', 'Dirección', 'Email', 'Saldo')
-        self.tree_clientes = ttk.Treeview(frame_lista, columns=columns, show='headings')
+        self.tree_clientes = TablaIncremental(frame_lista, columns=columns, show='headings')
         
         for col in columns:
             self.tree_clientes.heading(col, text=col)
@@ -81,6 +293,7 @@ class VistaPrincipal:
         frame_acciones.pack(fill='x', padx=5, pady=5)
         ttk.Button(frame_acciones, text="Editar", command=self.editar_cliente).pack(side='left', padx=5)
         ttk.Button(frame_acciones, text="Eliminar", command=self.eliminar_cliente).pack(side='left', padx=5)
+        ttk.Button(frame_acciones, text="Registrar Pago", command=self.mostrar_dialogo_pago_cliente).pack(side='left', padx=5)
 
     def mostrar_dialogo_cliente(self, cliente: Optional[Any] = None):
         """Muestra el diálogo para agregar o editar un cliente."""
@@ -109,6 +322,38 @@ class VistaPrincipal:
         cliente = self.controlador.obtener_cliente_por_id(cliente_id)
         self.mostrar_dialogo_cliente(cliente)
 
+    def mostrar_dialogo_pago_cliente(self):
+        """Registra un pago del cliente seleccionado imputándolo a sus ventas más antiguas."""
+        selected_item = self.tree_clientes.selection()
+        if not selected_item:
+            self.mostrar_error("Por favor, selecciona un cliente para registrar el pago.")
+            return
+        cliente_id = self.tree_clientes.item(selected_item)['values'][0]
+        try:
+            saldo = self.controlador.obtener_balance_cliente(cliente_id)['saldo_pendiente']
+            if saldo <= 0:
+                self.mostrar_error("El cliente no tiene saldo pendiente")
+                return
+            
+            def registrar_pago(datos: Dict[str, Any]):
+                try:
+                    imputaciones = self.controlador.registrar_pago_cliente(
+                        cliente_id=cliente_id,
+                        monto=datos['monto'],
+                        metodo_pago=datos['metodo_pago'],
+                        notas=datos.get('notas')
+                    )
+                    self.mostrar_info(f"Pago imputado a {len(imputaciones)} ventas")
+                    self.actualizar_lista_clientes()
+                    self.actualizar_historial_ventas()
+                except Exception as e:
+                    self.mostrar_error(f"Error al registrar pago: {str(e)}")
+            
+            dialogo = DialogoPago(self.root, registrar_pago, a_decimal(saldo))
+            dialogo.grab_set()
+        except Exception as e:
+            self.mostrar_error(f"Error al cargar saldo: {str(e)}")
+
     def eliminar_cliente(self):
         """Elimina el cliente seleccionado."""
         selected_item = self.tree_clientes.selection()
@@ -124,25 +369,23 @@ class VistaPrincipal:
             except Exception as e:
                 self.mostrar_error(f"Error al eliminar cliente: {str(e)}")
 
+    def _mostrar_clientes(self, clientes: List[Any]):
+        """Sincroniza el treeview de clientes con la lista dada."""
+        # Saldos de todos los clientes en una sola consulta agrupada
+        saldos = self.controlador.obtener_saldos_clientes()
+        self.tree_clientes.actualizar((cliente.id, (
+            cliente.id,
+            cliente.nombre,
+            cliente.telefono,
+            cliente.direccion,
+            cliente.email or '',
+            formatear_moneda(saldos.get(cliente.id, Decimal('0')))
+        )) for cliente in clientes)
+
     def actualizar_lista_clientes(self):
         """Actualiza la lista de clientes en el treeview."""
-        # Limpiar lista actual
-        for item in self.tree_clientes.get_children():
-            self.tree_clientes.delete(item)
-        
-        # Obtener clientes de la base de datos
         try:
-            clientes = self.controlador.obtener_todos_clientes()
-            for cliente in clientes:
-                balance = self.controlador.obtener_balance_cliente(cliente.id)
-                self.tree_clientes.insert('', 'end', values=(
-                    cliente.id,
-                    cliente.nombre,
-                    cliente.telefono,
-                    cliente.direccion,
-                    cliente.email or '',
-                    f"${balance['saldo_pendiente']:.2f}"
-                ))
+            self._mostrar_clientes(self.controlador.obtener_todos_clientes())
         except Exception as e:
             self.mostrar_error(f"Error al cargar clientes: {str(e)}")
 
@@ -153,22 +396,8 @@ class VistaPrincipal:
             self.actualizar_lista_clientes()
             return
         
-        # Limpiar lista actual
-        for item in self.tree_clientes.get_children():
-            self.tree_clientes.delete(item)
-        
         try:
-            clientes = self.controlador.buscar_clientes(texto)
-            for cliente in clientes:
-                balance = self.controlador.obtener_balance_cliente(cliente.id)
-                self.tree_clientes.insert('', 'end', values=(
-                    cliente.id,
-                    cliente.nombre,
-                    cliente.telefono,
-                    cliente.direccion,
-                    cliente.email or '',
-                    f"${balance['saldo_pendiente']:.2f}"
-                ))
+            self._mostrar_clientes(self.controlador.buscar_clientes(texto))
         except Exception as e:
             self.mostrar_error(f"Error al buscar clientes: {str(e)}")
 
@@ -187,8 +416,9 @@ class VistaPrincipal:
         frame_lista = ttk.LabelFrame(self.tab_productos, text="Productos")
         frame_lista.pack(expand=True, fill='both', padx=5, pady=5)
         
-        columns = ('ID', 'Nombre', 'Descripción', 'Stock', 'Stock Mínimo', 'Precio', 'Proveedor')
-        self.tree_productos = ttk.Treeview(frame_lista, columns=columns, show='headings')
+        columns = ('ID', 'Nombre', 'Descripción', 'Stock', 'Stock Mínimo', 'Mín. Sugerido',
+                   'Precio', 'Proveedor')
+        self.tree_productos = TablaIncremental(frame_lista, columns=columns, show='headings')
         
         for col in columns:
             self.tree_productos.heading(col, text=col)
@@ -207,6 +437,8 @@ class VistaPrincipal:
         ttk.Button(frame_acciones, text="Editar", command=self.editar_producto).pack(side='left', padx=5)
         ttk.Button(frame_acciones, text="Eliminar", command=self.eliminar_producto).pack(side='left', padx=5)
         ttk.Button(frame_acciones, text="Ajustar Stock", command=self.mostrar_dialogo_ajuste_stock).pack(side='left', padx=5)
+        ttk.Button(frame_acciones, text="Aplicar Mínimos Sugeridos",
+                  command=self.aplicar_minimos_sugeridos).pack(side='left', padx=5)
         
         # Frame para alertas de stock bajo
         frame_alertas = ttk.LabelFrame(self.tab_productos, text="Alertas de Stock Bajo")
@@ -215,22 +447,31 @@ class VistaPrincipal:
         self.lista_alertas = tk.Listbox(frame_alertas, height=3)
         self.lista_alertas.pack(expand=True, fill='both', padx=5, pady=5)
         
-        # Cargar datos iniciales
+        # Cargar datos iniciales; las alertas se actualizan solas ante cada
+        # cambio de stock informado por el controlador
         self.actualizar_lista_productos()
         self.actualizar_alertas_stock()
+        self.controlador.suscribir_alertas_stock(self._al_cambiar_alertas)
+        
+        # El pronóstico de demanda corre en otro proceso; solo se recalcula
+        # cuando hubo ventas desde la última vez
+        self._pronosticos_nuevos = queue.Queue()
+        self.controlador.suscribir_pronosticos(self._al_cambiar_pronosticos)
+        self._programar_pronosticos()
+        self._revisar_pronosticos_nuevos()
 
     def mostrar_dialogo_producto(self, producto: Optional[Any] = None):
         """Muestra el diálogo para agregar o editar un producto."""
         def guardar_producto(datos: Dict[str, Any]):
             try:
                 if producto:
-                    self.controlador.actualizar_producto(producto.id, **datos)
+                    self.controlador.actualizar_producto(
+                        producto.id, version_esperada=producto.version, **datos)
                     self.mostrar_info("Producto actualizado exitosamente")
                 else:
                     self.controlador.agregar_producto(**datos)
                     self.mostrar_info("Producto agregado exitosamente")
                 self.actualizar_lista_productos()
-                self.actualizar_alertas_stock()
             except Exception as e:
                 self.mostrar_error(f"Error al guardar producto: {str(e)}")
         
@@ -262,7 +503,6 @@ class VistaPrincipal:
             try:
                 self.controlador.eliminar_producto(producto_id)
                 self.actualizar_lista_productos()
-                self.actualizar_alertas_stock()
                 self.mostrar_info("Producto eliminado exitosamente")
             except Exception as e:
                 self.mostrar_error(f"Error al eliminar producto: {str(e)}")
@@ -279,7 +519,6 @@ class VistaPrincipal:
             try:
                 self.controlador.ajustar_stock(producto_id, cantidad, motivo)
                 self.actualizar_lista_productos()
-                self.actualizar_alertas_stock()
                 self.mostrar_info("Stock ajustado exitosamente")
             except Exception as e:
                 self.mostrar_error(f"Error al ajustar stock: {str(e)}")
@@ -287,35 +526,85 @@ class VistaPrincipal:
         dialogo = DialogoAjusteStock(self.root, ajustar_stock)
         dialogo.grab_set()
 
+    def _mostrar_productos(self, productos: List[Any]):
+        """Sincroniza el treeview de productos con la lista dada."""
+        pronosticos = self.controlador.obtener_pronosticos()
+        self.tree_productos.actualizar((producto.id, (
+            producto.id,
+            producto.nombre,
+            producto.descripcion or '',
+            producto.stock_actual,
+            producto.stock_minimo,
+            pronosticos[producto.id].minimo_sugerido if producto.id in pronosticos else '',
+            formatear_moneda(producto.precio_unitario),
+            producto.proveedor_nombre
+        )) for producto in productos)
+
     def actualizar_lista_productos(self):
         """Actualiza la lista de productos en el treeview."""
-        # Limpiar lista actual
-        for item in self.tree_productos.get_children():
-            self.tree_productos.delete(item)
-        
         try:
-            productos = self.controlador.obtener_todos_productos()
-            for producto in productos:
-                self.tree_productos.insert('', 'end', values=(
-                    producto.id,
-                    producto.nombre,
-                    producto.descripcion or '',
-                    producto.stock_actual,
-                    producto.stock_minimo,
-                    f"${float(producto.precio_unitario):.2f}",
-                    producto.proveedor.nombre
-                ))
+            self._mostrar_productos(self.controlador.obtener_todos_productos())
         except Exception as e:
             self.mostrar_error(f"Error al cargar productos: {str(e)}")
 
+    def _programar_pronosticos(self):
+        """Pide el pronóstico y se reprograma cada INTERVALO_PRONOSTICO_MS."""
+        try:
+            self.controlador.actualizar_pronosticos()
+        except Exception as e:
+            self.mostrar_error(f"Error al calcular pronósticos: {str(e)}")
+        self.root.after(INTERVALO_PRONOSTICO_MS, self._programar_pronosticos)
+
+    def _al_cambiar_pronosticos(self, pronosticos: Dict[int, Any]):
+        """
+        Recibe un pronóstico nuevo en el hilo del motor. Tkinter no admite
+        llamadas desde otros hilos: solo se encola.
+        """
+        self._pronosticos_nuevos.put(pronosticos)
+
+    def _revisar_pronosticos_nuevos(self):
+        """Vacía la cola de pronósticos en el hilo de Tk y redibuja si llegó alguno."""
+        nuevos = False
+        while True:
+            try:
+                self._pronosticos_nuevos.get_nowait()
+            except queue.Empty:
+                break
+            nuevos = True
+        if nuevos:
+            self.actualizar_lista_productos()
+            self.actualizar_alertas_stock()
+        self.root.after(INTERVALO_COLA_PRONOSTICOS_MS, self._revisar_pronosticos_nuevos)
+
+    def aplicar_minimos_sugeridos(self):
+        """Usa el mínimo sugerido como stock mínimo de los productos seleccionados (o de todos)."""
+        seleccion = [self.tree_productos.item(item)['values'][0]
+                     for item in self.tree_productos.selection()]
+        alcance = "los productos seleccionados" if seleccion else "todos los productos"
+        if not self.mostrar_confirmacion(f"¿Aplicar el mínimo sugerido a {alcance}?"):
+            return
+        try:
+            cantidad = self.controlador.aplicar_minimos_sugeridos(seleccion or None)
+            self.actualizar_lista_productos()
+            self.mostrar_info(f"Se actualizaron {cantidad} productos")
+        except Exception as e:
+            self.mostrar_error(f"Error al aplicar mínimos: {str(e)}")
+
+    def _al_cambiar_alertas(self, evento: Dict[str, List]):
+        """Recibe los cambios del motor de alertas y redibuja la lista en el hilo de Tk."""
+        self.root.after_idle(self.actualizar_alertas_stock)
+
     def actualizar_alertas_stock(self):
         """Actualiza la lista de alertas de stock bajo."""
         self.lista_alertas.delete(0, tk.END)
         try:
             productos_bajo_stock = self.controlador.obtener_productos_bajo_stock()
+            pronosticos = self.controlador.obtener_pronosticos()
             for producto in productos_bajo_stock:
-                self.lista_alertas.insert(tk.END, 
-                    f"{producto.nombre}: {producto.stock_actual}/{producto.stock_minimo}")
+                texto = f"{producto.nombre}: {producto.stock_actual}/{producto.stock_minimo}"
+                if producto.id in pronosticos:
+                    texto += f" (sugerido {pronosticos[producto.id].minimo_sugerido})"
+                self.lista_alertas.insert(tk.END, texto)
         except Exception as e:
             self.mostrar_error(f"Error al cargar alertas de stock: {str(e)}")
 
@@ -326,22 +615,8 @@ class VistaPrincipal:
             self.actualizar_lista_productos()
             return
         
-        # Limpiar lista actual
-        for item in self.tree_productos.get_children():
-            self.tree_productos.delete(item)
-        
         try:
-            productos = self.controlador.buscar_productos(texto)
-            for producto in productos:
-                self.tree_productos.insert('', 'end', values=(
-                    producto.id,
-                    producto.nombre,
-                    producto.descripcion or '',
-                    producto.stock_actual,
-                    producto.stock_minimo,
-                    f"${float(producto.precio_unitario):.2f}",
-                    producto.proveedor.nombre
-                ))
+            self._mostrar_productos(self.controlador.buscar_productos(texto))
         except Exception as e:
             self.mostrar_error(f"Error al buscar productos: {str(e)}")
 
@@ -362,7 +637,7 @@ class VistaPrincipal:
         
         # Treeview para proveedores
         columns = ('ID', 'Nombre', 'Teléfono', 'Email', 'Dirección')
-        self.tree_proveedores = ttk.Treeview(frame_lista, columns=columns, show='headings')
+        self.tree_proveedores = TablaIncremental(frame_lista, columns=columns, show='headings')
         
         for col in columns:
             self.tree_proveedores.heading(col, text=col)
@@ -423,22 +698,20 @@ class VistaPrincipal:
             except Exception as e:
                 self.mostrar_error(f"Error al eliminar proveedor: {str(e)}")
 
+    def _mostrar_proveedores(self, proveedores: List[Any]):
+        """Sincroniza el treeview de proveedores con la lista dada."""
+        self.tree_proveedores.actualizar((proveedor.id, (
+            proveedor.id,
+            proveedor.nombre,
+            proveedor.telefono,
+            proveedor.email or '',
+            proveedor.direccion or ''
+        )) for proveedor in proveedores)
+
     def actualizar_lista_proveedores(self):
         """Actualiza la lista de proveedores en el treeview."""
-        # Limpiar lista actual
-        for item in self.tree_proveedores.get_children():
-            self.tree_proveedores.delete(item)
-        
         try:
-            proveedores = self.controlador.obtener_todos_proveedores()
-            for proveedor in proveedores:
-                self.tree_proveedores.insert('', 'end', values=(
-                    proveedor.id,
-                    proveedor.nombre,
-                    proveedor.telefono,
-                    proveedor.email or '',
-                    proveedor.direccion or ''
-                ))
+            self._mostrar_proveedores(self.controlador.obtener_todos_proveedores())
         except Exception as e:
             self.mostrar_error(f"Error al cargar proveedores: {str(e)}")
 
@@ -449,20 +722,8 @@ class VistaPrincipal:
             self.actualizar_lista_proveedores()
             return
         
-        # Limpiar lista actual
-        for item in self.tree_proveedores.get_children():
-            self.tree_proveedores.delete(item)
-        
         try:
-            proveedores = self.controlador.buscar_proveedores(texto)
-            for proveedor in proveedores:
-                self.tree_proveedores.insert('', 'end', values=(
-                    proveedor.id,
-                    proveedor.nombre,
-                    proveedor.telefono,
-                    proveedor.email or '',
-                    proveedor.direccion or ''
-                ))
+            self._mostrar_proveedores(self.controlador.buscar_proveedores(texto))
         except Exception as e:
             self.mostrar_error(f"Error al buscar proveedores: {str(e)}")
 
@@ -537,7 +798,7 @@ class VistaPrincipal:
         
         # Lista de ventas
         columns = ('ID', 'Fecha', 'Cliente', 'Total', 'Estado')
-        self.tree_ventas = ttk.Treeview(frame_historial, columns=columns, show='headings')
+        self.tree_ventas = TablaIncremental(frame_historial, columns=columns, show='headings')
         
         for col in columns:
             self.tree_ventas.heading(col, text=col)
@@ -554,7 +815,7 @@ class VistaPrincipal:
         
         # Inicializar datos
         self.items_venta = []
-        self.total_venta = 0
+        self.total_venta = Decimal('0')
         self.actualizar_combos()
         self.actualizar_historial_ventas()
 
@@ -574,7 +835,7 @@ class VistaPrincipal:
             for p in productos:
                 if p.stock_actual > 0:  # Solo mostrar productos con stock disponible
                     productos_valores.append(
-                        f"{p.id} - {p.nombre} (Stock: {p.stock_actual}) ${float(p.precio_unitario):.2f}"
+                        f"{p.id} - {p.nombre} (Stock: {p.stock_actual}) {formatear_moneda(p.precio_unitario)}"
                     )
             self.combo_producto['values'] = productos_valores
             
@@ -603,27 +864,27 @@ class VistaPrincipal:
                 self.mostrar_error(f"Stock insuficiente. Disponible: {producto.stock_actual}")
                 return
             
-            subtotal = float(producto.precio_unitario) * cantidad
+            subtotal = producto.precio_unitario * cantidad
             
             # Agregar a la lista visual
             self.tree_items.insert('', 'end', values=(
                 producto.nombre,
                 cantidad,
-                f"${float(producto.precio_unitario):.2f}",
-                f"${subtotal:.2f}"
+                formatear_moneda(producto.precio_unitario),
+                formatear_moneda(subtotal)
             ))
             
             # Agregar a la lista interna
             self.items_venta.append({
                 "producto_id": producto_id,
                 "cantidad": cantidad,
-                "precio_unitario": float(producto.precio_unitario),
+                "precio_unitario": producto.precio_unitario,
                 "subtotal": subtotal
             })
             
             # Actualizar total
             self.total_venta += subtotal
-            self.label_total.config(text=f"Total: ${self.total_venta:.2f}")
+            self.label_total.config(text=f"Total: {formatear_moneda(self.total_venta)}")
             
             # Limpiar selección
             self.combo_producto.set('')
@@ -645,12 +906,20 @@ class VistaPrincipal:
         try:
             cliente_id = int(self.combo_cliente.get().split(' - ')[0])
             
-            # Registrar venta
-            venta, detalles = self.controlador.registrar_venta(
-                cliente_id=cliente_id,
-                items=[{"producto_id": item["producto_id"], "cantidad": item["cantidad"]}
-                      for item in self.items_venta]
-            )
+            items = [{"producto_id": item["producto_id"], "cantidad": item["cantidad"]}
+                     for item in self.items_venta]
+            
+            # Registrar venta; si supera el límite de crédito se pide autorización
+            try:
+                venta, detalles = self.controlador.registrar_venta(
+                    cliente_id=cliente_id, items=items)
+            except LimiteCreditoExcedido:
+                if not self.mostrar_confirmacion(
+                        "La venta supera el límite de crédito del cliente. "
+                        "¿Registrarla igualmente? Quedará marcada."):
+                    return
+                venta, detalles = self.controlador.registrar_venta(
+                    cliente_id=cliente_id, items=items, permitir_exceso_credito=True)
             
             self.mostrar_info("Venta registrada exitosamente")
             self.cancelar_venta()  # Limpiar formulario
@@ -667,32 +936,28 @@ class VistaPrincipal:
         for item in self.tree_items.get_children():
             self.tree_items.delete(item)
         self.items_venta = []
-        self.total_venta = 0
+        self.total_venta = Decimal('0')
         self.label_total.config(text="Total: $0.00")
 
+    def _mostrar_ventas(self, ventas: List[Any]):
+        """Sincroniza el treeview del historial con la lista dada."""
+        self.tree_ventas.actualizar((venta.id, (
+            venta.id,
+            venta.fecha.strftime("%Y-%m-%d %H:%M"),
+            venta.cliente_nombre,
+            formatear_moneda(venta.total),
+            "Pagada" if venta.pagada else "Pendiente"
+        )) for venta in ventas)
+
     def actualizar_historial_ventas(self):
         """Actualiza la lista de ventas en el historial."""
-        for item in self.tree_ventas.get_children():
-            self.tree_ventas.delete(item)
-        
         try:
-            ventas = self.controlador.obtener_todas_ventas()
-            for venta in ventas:
-                self.tree_ventas.insert('', 'end', values=(
-                    venta.id,
-                    venta.fecha.strftime("%Y-%m-%d %H:%M"),
-                    venta.cliente.nombre,
-                    f"${float(venta.total):.2f}",
-                    "Pagada" if venta.pagada else "Pendiente"
-                ))
+            self._mostrar_ventas(self.controlador.obtener_todas_ventas())
         except Exception as e:
             self.mostrar_error(f"Error al cargar historial: {str(e)}")
 
     def filtrar_ventas(self):
         """Filtra las ventas según los criterios seleccionados."""
-        for item in self.tree_ventas.get_children():
-            self.tree_ventas.delete(item)
-        
         try:
             # Obtener filtros
             cliente = self.combo_filtro_cliente.get()
@@ -707,15 +972,7 @@ class VistaPrincipal:
             
             # Aplicar filtros
             ventas = self.controlador.filtrar_ventas(cliente_id=cliente_id, pagada=pagada)
-            
-            for venta in ventas:
-                self.tree_ventas.insert('', 'end', values=(
-                    venta.id,
-                    venta.fecha.strftime("%Y-%m-%d %H:%M"),
-                    venta.cliente.nombre,
-                    f"${float(venta.total):.2f}",
-                    "Pagada" if venta.pagada else "Pendiente"
-                ))
+            self._mostrar_ventas(ventas)
         except Exception as e:
             self.mostrar_error(f"Error al filtrar ventas: {str(e)}")
 
@@ -763,7 +1020,7 @@ class VistaPrincipal:
                 except Exception as e:
                     self.mostrar_error(f"Error al registrar pago: {str(e)}")
             
-            dialogo = DialogoPago(self.root, registrar_pago, float(venta.total))
+            dialogo = DialogoPago(self.root, registrar_pago, venta.total - venta.monto_pagado)
             dialogo.grab_set()
         except Exception as e:
             self.mostrar_error(f"Error al cargar venta: {str(e)}")
@@ -784,6 +1041,126 @@ class VistaPrincipal:
             except Exception as e:
                 self.mostrar_error(f"Error al anular venta: {str(e)}")
 
+    def _init_compras(self):
+        """Inicializa la pestaña de órdenes de compra."""
+        # Frame para sugerencias de reposición
+        frame_sugerencias = ttk.LabelFrame(self.tab_compras, text="Reposición Sugerida")
+        frame_sugerencias.pack(expand=True, fill='both', padx=5, pady=5)
+        
+        columns = ('ID', 'Producto', 'Proveedor', 'Stock', 'Mínimo', 'Venta Diaria',
+                   'En Camino', 'Sugerido')
+        self.tree_sugerencias = TablaIncremental(frame_sugerencias, show='headings', height=8)
+        self.tree_sugerencias.configurar_columnas(columns, ancho=90)
+        self.tree_sugerencias.pack(expand=True, fill='both', padx=5, pady=5)
+        
+        frame_acciones_sugerencias = ttk.Frame(self.tab_compras)
+        frame_acciones_sugerencias.pack(fill='x', padx=5)
+        ttk.Button(frame_acciones_sugerencias, text="Generar Órdenes Sugeridas",
+                  command=self.generar_ordenes_sugeridas).pack(side='left', padx=5)
+        ttk.Button(frame_acciones_sugerencias, text="Actualizar",
+                  command=self.actualizar_lista_compras).pack(side='left', padx=5)
+        
+        # Frame para órdenes
+        frame_ordenes = ttk.LabelFrame(self.tab_compras, text="Órdenes de Compra")
+        frame_ordenes.pack(expand=True, fill='both', padx=5, pady=5)
+        
+        columns = ('ID', 'Fecha', 'Proveedor', 'Estado', 'Items', 'Unidades')
+        self.tree_ordenes = TablaIncremental(frame_ordenes, show='headings')
+        self.tree_ordenes.configurar_columnas(columns)
+        self.tree_ordenes.pack(expand=True, fill='both', padx=5, pady=5)
+        
+        frame_acciones = ttk.Frame(self.tab_compras)
+        frame_acciones.pack(fill='x', padx=5, pady=5)
+        ttk.Button(frame_acciones, text="Ver Detalles",
+                  command=self.ver_detalles_orden).pack(side='left', padx=5)
+        ttk.Button(frame_acciones, text="Recibir Orden",
+                  command=self.recibir_orden).pack(side='left', padx=5)
+        ttk.Button(frame_acciones, text="Cancelar Orden",
+                  command=self.cancelar_orden).pack(side='left', padx=5)
+
+    def actualizar_lista_compras(self):
+        """Actualiza las sugerencias de reposición y la lista de órdenes."""
+        try:
+            self.tree_sugerencias.actualizar((sugerencia.producto_id, (
+                sugerencia.producto_id,
+                sugerencia.nombre,
+                sugerencia.proveedor_nombre,
+                sugerencia.stock_actual,
+                sugerencia.stock_minimo,
+                f"{sugerencia.venta_diaria:.1f}",
+                sugerencia.en_camino,
+                sugerencia.sugerido
+            )) for sugerencia in self.controlador.sugerir_reposicion())
+            
+            self.tree_ordenes.actualizar((orden.id, (
+                orden.id,
+                orden.fecha.strftime('%Y-%m-%d %H:%M'),
+                orden.proveedor_nombre,
+                orden.estado.capitalize(),
+                orden.items,
+                orden.unidades
+            )) for orden in self.controlador.obtener_ordenes_compra())
+        except Exception as e:
+            self.mostrar_error(f"Error al cargar compras: {str(e)}")
+
+    def generar_ordenes_sugeridas(self):
+        """Crea una orden por proveedor con la reposición sugerida."""
+        try:
+            ordenes = self.controlador.generar_ordenes_sugeridas()
+            self.actualizar_lista_compras()
+            if ordenes:
+                self.mostrar_info(f"Se generaron {len(ordenes)} órdenes de compra")
+            else:
+                self.mostrar_info("No hay productos para reponer")
+        except Exception as e:
+            self.mostrar_error(f"Error al generar órdenes: {str(e)}")
+
+    def _orden_seleccionada(self) -> Optional[int]:
+        selected_item = self.tree_ordenes.selection()
+        if not selected_item:
+            self.mostrar_error("Por favor, selecciona una orden de compra.")
+            return None
+        return self.tree_ordenes.item(selected_item)['values'][0]
+
+    def ver_detalles_orden(self):
+        """Muestra los items de la orden seleccionada."""
+        orden_id = self._orden_seleccionada()
+        if orden_id is None:
+            return
+        try:
+            dialogo = DialogoDetallesOrden(self.root, orden_id,
+                                           self.controlador.obtener_detalles_orden(orden_id))
+            dialogo.grab_set()
+        except Exception as e:
+            self.mostrar_error(f"Error al cargar detalles: {str(e)}")
+
+    def recibir_orden(self):
+        """Ingresa al stock toda la orden seleccionada."""
+        orden_id = self._orden_seleccionada()
+        if orden_id is None:
+            return
+        if self.mostrar_confirmacion("¿Confirmas la recepción completa de esta orden?"):
+            try:
+                self.controlador.recibir_orden_compra(orden_id)
+                self.actualizar_lista_compras()
+                self.actualizar_lista_productos()
+                self.mostrar_info("Orden recibida exitosamente")
+            except Exception as e:
+                self.mostrar_error(f"Error al recibir orden: {str(e)}")
+
+    def cancelar_orden(self):
+        """Cancela la orden seleccionada."""
+        orden_id = self._orden_seleccionada()
+        if orden_id is None:
+            return
+        if self.mostrar_confirmacion("¿Estás seguro de que deseas cancelar esta orden?"):
+            try:
+                self.controlador.cancelar_orden_compra(orden_id)
+                self.actualizar_lista_compras()
+                self.mostrar_info("Orden cancelada exitosamente")
+            except Exception as e:
+                self.mostrar_error(f"Error al cancelar orden: {str(e)}")
+
     def _init_reportes(self):
         """Inicializa la pestaña de reportes."""
         # Frame para filtros
@@ -810,7 +1187,8 @@ class VistaPrincipal:
             'Ventas por Cliente',
             'Productos más Vendidos',
             'Balance de Pagos',
-            'Stock Actual'
+            'Stock Actual',
+            'Antigüedad de Saldos'
         ])
         self.combo_reporte.pack(side='left', padx=5, expand=True, fill='x')
         self.combo_reporte.set('Ventas por Cliente')
@@ -830,12 +1208,18 @@ class VistaPrincipal:
         self.frame_datos.pack(fill='x', padx=5, pady=5)
         
         # Treeview para datos
-        self.tree_datos = ttk.Treeview(self.frame_datos, show='headings', height=5)
+        self.tree_datos = TablaIncremental(self.frame_datos, show='headings', height=5)
         self.tree_datos.pack(expand=True, fill='both', padx=5, pady=5)
         
-        # Botón para exportar
-        ttk.Button(self.tab_reportes, text="Exportar a Excel", 
-                  command=self.exportar_reporte).pack(pady=5)
+        # Botones para exportar
+        frame_exportar = ttk.Frame(self.tab_reportes)
+        frame_exportar.pack(pady=5)
+        ttk.Button(frame_exportar, text="Exportar a Excel", 
+                  command=self.exportar_reporte).pack(side='left', padx=5)
+        ttk.Button(frame_exportar, text="Exportar Paquete Completo", 
+                  command=self.exportar_paquete_reportes).pack(side='left', padx=5)
+        ttk.Button(frame_exportar, text="Archivar Ventas Antiguas", 
+                  command=self.archivar_ventas_antiguas).pack(side='left', padx=5)
 
     def generar_reporte(self):
         """Genera el reporte seleccionado."""
@@ -859,6 +1243,8 @@ class VistaPrincipal:
                 self._generar_reporte_pagos(desde, hasta)
             elif tipo_reporte == 'Stock Actual':
                 self._generar_reporte_stock()
+            elif tipo_reporte == 'Antigüedad de Saldos':
+                self._generar_reporte_antiguedad(hasta)
             
         except ValueError:
             self.mostrar_error("Formato de fecha inválido. Use YYYY-MM-DD")
@@ -867,27 +1253,18 @@ class VistaPrincipal:
 
     def _generar_reporte_ventas_cliente(self, desde: Optional[datetime], hasta: Optional[datetime]):
         """Genera el reporte de ventas por cliente."""
-        # Obtener datos
-        datos = self.controlador.obtener_reporte_ventas_cliente(desde, hasta)
+        # Obtener datos (un único lote columnar para tabla y gráfico)
+        datos = self.controlador.obtener_lote_ventas_cliente(desde, hasta)
         
         # Configurar treeview
-        self.tree_datos['columns'] = ('Cliente', 'Total Ventas', 'Total Pagado', 'Saldo')
-        for col in self.tree_datos['columns']:
-            self.tree_datos.heading(col, text=col)
-            self.tree_datos.column(col, width=100)
-        
-        # Limpiar datos anteriores
-        for item in self.tree_datos.get_children():
-            self.tree_datos.delete(item)
-        
-        # Insertar nuevos datos
-        for dato in datos:
-            self.tree_datos.insert('', 'end', values=(
-                dato['cliente'],
-                f"${dato['total_ventas']:.2f}",
-                f"${dato['total_pagado']:.2f}",
-                f"${dato['saldo']:.2f}"
-            ))
+        self.tree_datos.configurar_columnas(('Cliente', 'Total Ventas', 'Total Pagado', 'Saldo'))
+        
+        # Sincronizar datos (las filas del reporte se identifican por posición)
+        filas = zip(datos['cliente'],
+                    formatear_montos(datos['total_ventas']),
+                    formatear_montos(datos['total_pagado']),
+                    formatear_montos(datos['saldo']))
+        self.tree_datos.actualizar(enumerate(filas))
         
         # Generar gráfico
         self.controlador.generar_grafico_ventas_cliente(
@@ -895,26 +1272,15 @@ class VistaPrincipal:
 
     def _generar_reporte_productos(self, desde: Optional[datetime], hasta: Optional[datetime]):
         """Genera el reporte de productos más vendidos."""
-        # Obtener datos
-        datos = self.controlador.obtener_reporte_productos(desde, hasta)
+        # Obtener datos (un único lote columnar para tabla y gráfico)
+        datos = self.controlador.obtener_lote_productos(desde, hasta)
         
         # Configurar treeview
-        self.tree_datos['columns'] = ('Producto', 'Cantidad Vendida', 'Total Ventas')
-        for col in self.tree_datos['columns']:
-            self.tree_datos.heading(col, text=col)
-            self.tree_datos.column(col, width=100)
-        
-        # Limpiar datos anteriores
-        for item in self.tree_datos.get_children():
-            self.tree_datos.delete(item)
-        
-        # Insertar nuevos datos
-        for dato in datos:
-            self.tree_datos.insert('', 'end', values=(
-                dato['producto'],
-                dato['cantidad'],
-                f"${dato['total']:.2f}"
-            ))
+        self.tree_datos.configurar_columnas(('Producto', 'Cantidad Vendida', 'Total Ventas'))
+        
+        # Sincronizar datos (las filas del reporte se identifican por posición)
+        filas = zip(datos['producto'], datos['cantidad'], formatear_montos(datos['total']))
+        self.tree_datos.actualizar(enumerate(filas))
         
         # Generar gráfico
         self.controlador.generar_grafico_productos(
@@ -922,27 +1288,18 @@ class VistaPrincipal:
 
     def _generar_reporte_pagos(self, desde: Optional[datetime], hasta: Optional[datetime]):
         """Genera el reporte de balance de pagos."""
-        # Obtener datos
-        datos = self.controlador.obtener_reporte_pagos(desde, hasta)
+        # Obtener datos (un único lote columnar para tabla y gráfico)
+        datos = self.controlador.obtener_lote_pagos(desde, hasta)
         
         # Configurar treeview
-        self.tree_datos['columns'] = ('Fecha', 'Cliente', 'Monto', 'Método')
-        for col in self.tree_datos['columns']:
-            self.tree_datos.heading(col, text=col)
-            self.tree_datos.column(col, width=100)
-        
-        # Limpiar datos anteriores
-        for item in self.tree_datos.get_children():
-            self.tree_datos.delete(item)
-        
-        # Insertar nuevos datos
-        for dato in datos:
-            self.tree_datos.insert('', 'end', values=(
-                dato['fecha'].strftime("%Y-%m-%d"),
-                dato['cliente'],
-                f"${dato['monto']:.2f}",
-                dato['metodo_pago']
-            ))
+        self.tree_datos.configurar_columnas(('Fecha', 'Cliente', 'Monto', 'Método'))
+        
+        # Sincronizar datos (las filas del reporte se identifican por posición)
+        filas = zip(np.datetime_as_string(datos['fecha'], unit='D'),
+                    datos['cliente'],
+                    formatear_montos(datos['monto']),
+                    datos['metodo_pago'])
+        self.tree_datos.actualizar(enumerate(filas))
         
         # Generar gráfico
         self.controlador.generar_grafico_pagos(
@@ -950,37 +1307,40 @@ class VistaPrincipal:
 
     def _generar_reporte_stock(self):
         """Genera el reporte de stock actual."""
-        # Obtener datos
-        datos = self.controlador.obtener_reporte_stock()
+        # Obtener datos (el estado ya viene calculado en el lote)
+        datos = self.controlador.obtener_lote_stock()
         
         # Configurar treeview
-        self.tree_datos['columns'] = ('Producto', 'Stock Actual', 'Stock Mínimo', 'Estado')
-        for col in self.tree_datos['columns']:
-            self.tree_datos.heading(col, text=col)
-            self.tree_datos.column(col, width=100)
-        
-        # Limpiar datos anteriores
-        for item in self.tree_datos.get_children():
-            self.tree_datos.delete(item)
-        
-        # Insertar nuevos datos
-        for dato in datos:
-            estado = "Normal"
-            if dato['stock_actual'] <= dato['stock_minimo']:
-                estado = "Bajo"
-            elif dato['stock_actual'] == 0:
-                estado = "Agotado"
-            
-            self.tree_datos.insert('', 'end', values=(
-                dato['producto'],
-                dato['stock_actual'],
-                dato['stock_minimo'],
-                estado
-            ))
+        self.tree_datos.configurar_columnas(('Producto', 'Stock Actual', 'Stock Mínimo', 'Estado'))
+        
+        # Sincronizar datos (las filas del reporte se identifican por posición)
+        self.tree_datos.actualizar(
+            enumerate(datos.filas('producto', 'stock_actual', 'stock_minimo', 'estado')))
         
         # Generar gráfico
         self.controlador.generar_grafico_stock(datos, self.canvas_grafico)
 
+    def _generar_reporte_antiguedad(self, al: Optional[datetime]):
+        """Genera el reporte de antigüedad de saldos (al corte de la fecha Hasta)."""
+        # Obtener datos (un único lote columnar para tabla y gráfico)
+        datos = self.controlador.obtener_lote_antiguedad(al)
+        
+        # Configurar treeview
+        self.tree_datos.configurar_columnas(
+            ('Cliente', '0-30 días', '31-60 días', '61-90 días', 'Más de 90', 'Total'))
+        
+        # Sincronizar datos (las filas del reporte se identifican por posición)
+        filas = zip(datos['cliente'],
+                    formatear_montos(datos['d0_30']),
+                    formatear_montos(datos['d31_60']),
+                    formatear_montos(datos['d61_90']),
+                    formatear_montos(datos['d90_mas']),
+                    formatear_montos(datos['total']))
+        self.tree_datos.actualizar(enumerate(filas))
+        
+        # Generar gráfico
+        self.controlador.generar_grafico_antiguedad(datos, self.canvas_grafico)
+
     def exportar_reporte(self):
         """Exporta el reporte actual a Excel."""
         tipo_reporte = self.combo_reporte.get()
@@ -1004,6 +1364,42 @@ class VistaPrincipal:
         except Exception as e:
             self.mostrar_error(f"Error al exportar reporte: {str(e)}")
 
+    def exportar_paquete_reportes(self):
+        """Exporta los cuatro reportes del período a un único Excel."""
+        try:
+            desde = None
+            hasta = None
+            if self.fecha_desde.get().strip():
+                desde = datetime.strptime(self.fecha_desde.get().strip(), "%Y-%m-%d")
+            if self.fecha_hasta.get().strip():
+                hasta = datetime.strptime(self.fecha_hasta.get().strip(), "%Y-%m-%d")
+            
+            nombre_archivo = self.controlador.exportar_paquete_reportes(desde, hasta)
+            
+            self.mostrar_info(f"Paquete de reportes exportado exitosamente: {nombre_archivo}")
+            
+        except ValueError:
+            self.mostrar_error("Formato de fecha inválido. Use YYYY-MM-DD")
+        except Exception as e:
+            self.mostrar_error(f"Error al exportar paquete de reportes: {str(e)}")
+
+    def archivar_ventas_antiguas(self):
+        """Mueve las ventas pagadas de más de un año a los archivos anuales."""
+        if not self.mostrar_confirmacion(
+                "¿Archivar las ventas pagadas anteriores a los últimos 12 meses?\n"
+                "Seguirán incluidas en los reportes."):
+            return
+        try:
+            archivadas = self.controlador.archivar_ventas_antiguas()
+            if not archivadas:
+                self.mostrar_info("No hay ventas para archivar")
+                return
+            detalle = "\n".join(f"{anio}: {cantidad} ventas"
+                                for anio, cantidad in sorted(archivadas.items()))
+            self.mostrar_info(f"Ventas archivadas:\n{detalle}")
+        except Exception as e:
+            self.mostrar_error(f"Error al archivar ventas: {str(e)}")
+
     def mostrar_error(self, mensaje: str):
         """Muestra un mensaje de error."""
         messagebox.showerror("Error", mensaje)
@@ -1061,8 +1457,8 @@ class DialogoCliente(tk.Toplevel):
     def _guardar(self):
         """Recopila los datos del formulario y llama al callback de guardado."""
         try:
-            limite_credito = float(self.limite_credito.get() or 0)
-        except ValueError:
+            limite_credito = a_decimal(self.limite_credito.get().strip() or 0)
+        except InvalidOperation:
             messagebox.showerror("Error", "El límite de crédito debe ser un número")
             return
         
@@ -1170,10 +1566,10 @@ class DialogoProducto(tk.Toplevel):
     def _guardar(self):
         """Recopila los datos del formulario y llama al callback de guardado."""
         try:
-            precio = float(self.precio.get())
+            precio = a_decimal(self.precio.get().strip())
             stock = int(self.stock.get())
             stock_minimo = int(self.stock_minimo.get() or 10)
-        except ValueError:
+        except (ValueError, InvalidOperation):
             messagebox.showerror("Error", "Los valores numéricos son inválidos")
             return
         
@@ -1274,26 +1670,52 @@ class DialogoDetallesVenta(tk.Toplevel):
             tree.insert('', 'end', values=(
                 detalle.producto.nombre,
                 detalle.cantidad,
-                f"${float(detalle.precio_unitario):.2f}",
-                f"${float(detalle.subtotal):.2f}"
+                formatear_moneda(detalle.precio_unitario),
+                formatear_moneda(detalle.subtotal)
             ))
         
         tree.pack(expand=True, fill='both', padx=5, pady=5)
         
         # Total
-        ttk.Label(self, text=f"Total: ${float(venta.total):.2f}",
+        ttk.Label(self, text=f"Total: {formatear_moneda(venta.total)}",
                  font=('Arial', 12, 'bold')).pack(pady=10)
         
         # Botón cerrar
         ttk.Button(self, text="Cerrar", command=self.destroy).pack(pady=5)
 
+class DialogoDetallesOrden(tk.Toplevel):
+    def __init__(self, parent, orden_id: int, detalles: List[Any]):
+        super().__init__(parent)
+        self.title(f"Orden de Compra #{orden_id}")
+        self.geometry("600x400")
+        
+        columns = ('Producto', 'Pedido', 'Recibido', 'Costo Unit.')
+        tree = ttk.Treeview(self, columns=columns, show='headings')
+        
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=100)
+        
+        for detalle in detalles:
+            tree.insert('', 'end', values=(
+                detalle.producto.nombre,
+                detalle.cantidad,
+                detalle.cantidad_recibida,
+                formatear_moneda(detalle.costo_unitario) if detalle.costo_unitario is not None else ''
+            ))
+        
+        tree.pack(expand=True, fill='both', padx=5, pady=5)
+        
+        # Botón cerrar
+        ttk.Button(self, text="Cerrar", command=self.destroy).pack(pady=5)
+
 class DialogoPago(tk.Toplevel):
-    def __init__(self, parent, callback_guardar: Callable[[Dict[str, Any]], None], total: float):
+    def __init__(self, parent, callback_guardar: Callable[[Dict[str, Any]], None], total: Decimal):
         super().__init__(parent)
         self.title("Registrar Pago")
         self.callback_guardar = callback_guardar
         
-        ttk.Label(self, text=f"Total a pagar: ${total:.2f}",
+        ttk.Label(self, text=f"Total a pagar: {formatear_moneda(total)}",
                  font=('Arial', 12, 'bold')).grid(row=0, column=0, columnspan=2, pady=10)
         
         # Campos
@@ -1321,8 +1743,8 @@ class DialogoPago(tk.Toplevel):
     def _guardar(self):
         """Recopila los datos del formulario y llama al callback de guardado."""
         try:
-            monto = float(self.monto.get())
-        except ValueError:
+            monto = Decimal(self.monto.get().strip())
+        except InvalidOperation:
             messagebox.showerror("Error", "El monto debe ser un número")
             return
         